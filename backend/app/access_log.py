@@ -0,0 +1,217 @@
+"""キュー経由の構造化アクセスログ。
+
+リクエスト処理側（イベントループ・スレッドプール）はレコードを上限付きキューに
+`put_nowait` で積むだけで、整形（JSON 化）とファイル書き込みは `QueueListener` の
+専用スレッドが行う。キューが満杯のときはレコードを捨てて件数を数え、処理を止めない。
+
+アクセスログ（`api.access`）は1リクエスト1行の JSON で、ルート定義のパス・所要時間・
+セッション ID・そのリクエスト中の LLM 呼び出し時間を含む。ヘルスチェックや `/metrics`
+などのポーリング系ルートは `MONSHINMATE_ACCESS_LOG_SAMPLE_RATE` の割合だけ記録する
+（エラー応答は常に記録する）。監査ログ（`security`）のファイル出力も同じ仕組みで非同期化する。
+"""
+from __future__ import annotations
+
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from pathlib import Path
+from typing import Any, Callable
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+import traceback
+
+from .metrics import REGISTRY as METRICS_REGISTRY
+
+
+LOG_DIR = Path(os.getenv("MONSHINMATE_LOG_DIR", str(Path(__file__).resolve().parent / "logs")))
+ACCESS_LOG_QUEUE_SIZE = int(os.getenv("MONSHINMATE_ACCESS_LOG_QUEUE_SIZE", "10000"))
+ACCESS_LOG_CONSOLE = os.getenv("MONSHINMATE_ACCESS_LOG_CONSOLE", "1").lower() in {"1", "true", "yes", "on"}
+ACCESS_LOG_SAMPLED_ROUTES = tuple(
+    r.strip()
+    for r in os.getenv(
+        "MONSHINMATE_ACCESS_LOG_SAMPLED_ROUTES", "/health,/healthz,/readyz,/metrics,/system/llm-status"
+    ).split(",")
+    if r.strip()
+)
+ACCESS_LOG_SAMPLE_RATE = float(os.getenv("MONSHINMATE_ACCESS_LOG_SAMPLE_RATE", "0.01"))
+LOG_FILE_MAX_BYTES = 5_000_000
+LOG_FILE_BACKUPS = 5
+
+access_logger = logging.getLogger("api.access")
+
+LOG_RECORDS_DROPPED = METRICS_REGISTRY.counter(
+    "monshin_log_records_dropped",
+    "Log records dropped because the logging queue was full",
+    ("logger",),
+)
+
+# 処理中リクエストの付加情報（セッション ID・LLM 呼び出し）。ミドルウェアで設定し、
+# スレッドプールにはコンテキストごとコピーされるため同じ dict を更新できる
+_request_fields: ContextVar[dict[str, Any] | None] = ContextVar("access_log_fields", default=None)
+
+
+def begin_request() -> tuple[dict[str, Any], Any]:
+    fields: dict[str, Any] = {"llm_calls": 0, "llm_ms": 0.0}
+    return fields, _request_fields.set(fields)
+
+
+def end_request(token: Any) -> None:
+    _request_fields.reset(token)
+
+
+def bind_session_id(session_id: str) -> None:
+    """パスに含まれないセッション ID（作成直後など）をアクセスログに残す。"""
+
+    fields = _request_fields.get()
+    if fields is not None:
+        fields["session_id"] = session_id
+
+
+def record_llm_call(operation: str, outcome: str, seconds: float) -> None:
+    """LLM ゲートウェイの呼び出し時間をリクエストのログに加える。"""
+
+    fields = _request_fields.get()
+    if fields is None:
+        return
+    fields["llm_calls"] += 1
+    fields["llm_ms"] += seconds * 1000
+    fields.setdefault("llm", []).append(
+        {"operation": operation, "outcome": outcome, "duration_ms": round(seconds * 1000, 1)}
+    )
+
+
+def should_log(route: str, status: int, sample_rate: float = ACCESS_LOG_SAMPLE_RATE) -> bool:
+    """ポーリング系ルートの成功応答は間引く。"""
+
+    if status >= 400 or route not in ACCESS_LOG_SAMPLED_ROUTES:
+        return True
+    return sample_rate > 0 and random.random() < sample_rate
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """呼び出し元で整形せず、満杯なら捨てる QueueHandler。"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # 引数の文字列化は整形スレッドに任せ、スレッドをまたげない例外情報だけ文字列にする
+        if record.exc_info:
+            record.exc_text = "".join(traceback.format_exception(*record.exc_info)).rstrip()
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc(logger=record.name)
+
+
+class JsonFormatter(logging.Formatter):
+    """1レコード1行の JSON。`extra={"fields": {...}}` の内容を最上位に展開する。"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        fields = getattr(record, "fields", None)
+        if isinstance(fields, dict):
+            entry.update(fields)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _Pipeline:
+    def __init__(self, logger: logging.Logger, listener: QueueListener, handler: QueueHandler) -> None:
+        self.logger = logger
+        self.listener = listener
+        self.handler = handler
+
+
+_pipelines: dict[str, _Pipeline] = {}
+_lock = threading.Lock()
+
+
+def _attach(
+    logger: logging.Logger,
+    make_handlers: Callable[[], list[logging.Handler]],
+    *,
+    propagate: bool,
+    queue_size: int,
+) -> None:
+    # ハンドラはログファイルを開くため、未登録と確認できてから作る
+    with _lock:
+        if logger.name in _pipelines:
+            return
+        log_queue: queue.Queue[logging.LogRecord] = queue.Queue(maxsize=max(1, queue_size))
+        handler = NonBlockingQueueHandler(log_queue)
+        listener = QueueListener(log_queue, *make_handlers(), respect_handler_level=True)
+        listener.start()
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = propagate
+        _pipelines[logger.name] = _Pipeline(logger, listener, handler)
+
+
+def configure_logging(log_dir: Path | None = None, *, queue_size: int = ACCESS_LOG_QUEUE_SIZE) -> None:
+    """アクセスログと監査ログのキュー・書き込みスレッドを用意する（2回目以降は何もしない）。"""
+
+    directory = Path(log_dir or LOG_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    def access_handlers() -> list[logging.Handler]:
+        access_file = RotatingFileHandler(
+            directory / "access.log", maxBytes=LOG_FILE_MAX_BYTES, backupCount=LOG_FILE_BACKUPS, encoding="utf-8"
+        )
+        access_file.setFormatter(JsonFormatter())
+        handlers: list[logging.Handler] = [access_file]
+        if ACCESS_LOG_CONSOLE:
+            console = logging.StreamHandler(sys.stderr)
+            console.setFormatter(JsonFormatter())
+            handlers.append(console)
+        return handlers
+
+    def security_handlers() -> list[logging.Handler]:
+        security_file = RotatingFileHandler(
+            directory / "security.log", maxBytes=1_000_000, backupCount=5, encoding="utf-8"
+        )
+        security_file.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+        return [security_file]
+
+    _attach(access_logger, access_handlers, propagate=False, queue_size=queue_size)
+    # 監査ログはファイルだけを非同期化し、従来どおり上位ロガー（コンソール）にも伝播させる
+    _attach(logging.getLogger("security"), security_handlers, propagate=True, queue_size=queue_size)
+
+
+def shutdown_logging() -> None:
+    """キューに残ったレコードを書き出し、書き込みスレッドを止める。"""
+
+    with _lock:
+        pipelines = list(_pipelines.values())
+        _pipelines.clear()
+    for pipeline in pipelines:
+        pipeline.logger.removeHandler(pipeline.handler)
+        pipeline.listener.stop()
+        for handler in pipeline.listener.handlers:
+            handler.close()
+
+
+__all__ = [
+    "JsonFormatter",
+    "NonBlockingQueueHandler",
+    "access_logger",
+    "begin_request",
+    "bind_session_id",
+    "configure_logging",
+    "end_request",
+    "record_llm_call",
+    "should_log",
+    "shutdown_logging",
+]
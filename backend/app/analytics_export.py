@@ -0,0 +1,329 @@
+"""研究・集計向けの列指向エクスポート。
+
+確定済みセッションを1行、テンプレート項目を1列（型付き）に展開する。
+複数選択は選択肢ごとの真偽値列に展開し、選択肢外の自由記述は別列にまとめる。
+個人情報（氏名・生年月日・連絡先）は出力せず、年齢のみを受診時点で算出して含める。
+pyarrow がインストールされていれば Parquet、無ければ型付き CSV で出力する。
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, Iterable, Iterator, Literal
+import csv
+import io
+import json
+
+from .patient_keys import canonical_dob
+
+try:  # pragma: no cover - 環境依存
+    import pyarrow as pa  # type: ignore[import-not-found]
+    import pyarrow.parquet as pq  # type: ignore[import-not-found]
+except Exception:  # noqa: BLE001 - 未インストール時は CSV のみ
+    pa = None  # type: ignore[assignment]
+    pq = None  # type: ignore[assignment]
+
+
+ColumnKind = Literal["string", "bool", "float", "int", "timestamp"]
+
+# 個人を特定し得るため出力しない項目種別
+EXCLUDED_ITEM_TYPES = {"personal_info"}
+# Parquet の1行グループに含める行数
+PARQUET_ROW_GROUP_SIZE = 1000
+
+
+@dataclass(frozen=True)
+class AnalyticsColumn:
+    """出力列の定義。"""
+
+    name: str
+    kind: ColumnKind
+    item_id: str | None = None
+    option: str | None = None
+    # 複数選択の選択肢外の回答をまとめる列（`options` は既知の選択肢）
+    other: bool = False
+    options: tuple[str, ...] = ()
+
+
+BASE_COLUMNS: tuple[AnalyticsColumn, ...] = (
+    AnalyticsColumn("session_id", "string"),
+    AnalyticsColumn("questionnaire_id", "string"),
+    AnalyticsColumn("visit_type", "string"),
+    AnalyticsColumn("gender", "string"),
+    AnalyticsColumn("age_at_visit", "int"),
+    AnalyticsColumn("finalized_at", "timestamp"),
+)
+
+
+def parquet_available() -> bool:
+    return pa is not None and pq is not None
+
+
+def _field(item: Any, name: str) -> Any:
+    if isinstance(item, dict):
+        return item.get(name)
+    return getattr(item, name, None)
+
+
+def _walk_items(items: Iterable[Any]) -> Iterator[Any]:
+    """条件付き追質問（followups）を含めてテンプレート項目を順に返す。"""
+
+    for item in items:
+        yield item
+        followups = _field(item, "followups") or {}
+        if isinstance(followups, dict):
+            for children in followups.values():
+                yield from _walk_items(children or [])
+
+
+def plan_columns(item_lists: Iterable[Iterable[Any]]) -> list[AnalyticsColumn]:
+    """テンプレート項目の和集合（初出順）から出力列を決める。"""
+
+    columns: list[AnalyticsColumn] = list(BASE_COLUMNS)
+    seen_items: set[str] = set()
+    seen_names: set[str] = {c.name for c in columns}
+
+    def _add(column: AnalyticsColumn) -> None:
+        if column.name in seen_names:
+            return
+        seen_names.add(column.name)
+        columns.append(column)
+
+    for items in item_lists:
+        for item in _walk_items(items):
+            item_id = str(_field(item, "id") or "")
+            item_type = _field(item, "type")
+            if not item_id or item_type in EXCLUDED_ITEM_TYPES:
+                continue
+            if item_id in seen_items:
+                # 同じ ID で選択肢が追加されている場合に備え、選択肢列のみ補う
+                if item_type != "multi":
+                    continue
+            seen_items.add(item_id)
+            if item_type == "multi":
+                options = tuple(str(o) for o in _field(item, "options") or [])
+                for option in options:
+                    _add(AnalyticsColumn(f"{item_id}__{option}", "bool", item_id, option))
+                _add(
+                    AnalyticsColumn(f"{item_id}__other", "string", item_id, other=True, options=options)
+                )
+            elif item_type == "yesno":
+                _add(AnalyticsColumn(item_id, "bool", item_id))
+            elif item_type in {"slider", "number"}:
+                _add(AnalyticsColumn(item_id, "float", item_id))
+            else:
+                _add(AnalyticsColumn(item_id, "string", item_id))
+    # 選択肢外の列は、テンプレート間で合算した選択肢を基準にする
+    known: dict[str, tuple[str, ...]] = {}
+    for column in columns:
+        if column.option is not None and column.item_id is not None:
+            known[column.item_id] = (*known.get(column.item_id, ()), column.option)
+    return [
+        AnalyticsColumn(c.name, c.kind, c.item_id, other=True, options=known.get(c.item_id or "", ()))
+        if c.other
+        else c
+        for c in columns
+    ]
+
+
+def _parse_datetime(value: Any) -> datetime | None:
+    if isinstance(value, datetime):
+        return value
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+def _age_at(dob: Any, at: datetime | None) -> int | None:
+    if not dob or at is None:
+        return None
+    # 生年月日は入力どおり（スラッシュ区切り・8桁・和暦など）で保存されているため共通の解釈で揃える
+    try:
+        born = date.fromisoformat(canonical_dob(str(dob))[:10])
+    except ValueError:
+        return None
+    on = at.date()
+    return on.year - born.year - ((on.month, on.day) < (born.month, born.day))
+
+
+def _to_bool(value: Any) -> bool | None:
+    if value is None or value == "":
+        return None
+    if isinstance(value, bool):
+        return value
+    lowered = str(value).strip().lower()
+    if lowered in {"yes", "true", "1", "はい"}:
+        return True
+    if lowered in {"no", "false", "0", "いいえ"}:
+        return False
+    return None
+
+
+def _to_float(value: Any) -> float | None:
+    if value is None or value == "" or isinstance(value, bool):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_text(value: Any) -> str | None:
+    if value is None or value == "":
+        return None
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+def build_record(session: dict[str, Any], columns: list[AnalyticsColumn]) -> dict[str, Any]:
+    """1セッション分の行（列名→型付きの値）を組み立てる。"""
+
+    answers = session.get("answers") or {}
+    finalized_at = _parse_datetime(session.get("finalized_at"))
+    record: dict[str, Any] = {
+        "session_id": session.get("id"),
+        "questionnaire_id": session.get("questionnaire_id"),
+        "visit_type": session.get("visit_type"),
+        "gender": session.get("gender"),
+        "age_at_visit": _age_at(session.get("dob"), finalized_at),
+        "finalized_at": finalized_at,
+    }
+    for column in columns:
+        if column.item_id is None:
+            continue
+        value = answers.get(column.item_id)
+        if column.option is not None:
+            selected = value if isinstance(value, list) else ([] if value in (None, "") else [value])
+            record[column.name] = column.option in {str(v) for v in selected}
+        elif column.other:
+            if value in (None, ""):
+                record[column.name] = None
+                continue
+            selected = value if isinstance(value, list) else [value]
+            extra = [str(v) for v in selected if str(v) not in column.options]
+            record[column.name] = ", ".join(extra) if extra else None
+        elif column.kind == "bool":
+            record[column.name] = _to_bool(value)
+        elif column.kind == "float":
+            record[column.name] = _to_float(value)
+        else:
+            record[column.name] = _to_text(value)
+    return record
+
+
+def _csv_cell(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def iter_csv(records: Iterable[dict[str, Any]], columns: list[AnalyticsColumn]) -> Iterator[str]:
+    """型付き CSV を行ごとに返す。真偽値は true/false、欠損は空欄とする。"""
+
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow([c.name for c in columns])
+    for record in records:
+        writer.writerow([_csv_cell(record.get(c.name)) for c in columns])
+        if buf.tell() >= 64 * 1024:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate(0)
+    if buf.tell():
+        yield buf.getvalue()
+
+
+class _CountingSink(io.RawIOBase):
+    """Parquet 書き込み用の出力先。書き込み位置を数えつつバイト列を溜める。"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: Any) -> int:  # type: ignore[override]
+        chunk = bytes(data)
+        if chunk:
+            self._chunks.append(chunk)
+            self._position += len(chunk)
+        return len(chunk)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        out = b"".join(self._chunks)
+        self._chunks.clear()
+        return out
+
+
+def _arrow_schema(columns: list[AnalyticsColumn]) -> Any:
+    types = {
+        "string": pa.string(),
+        "bool": pa.bool_(),
+        "float": pa.float64(),
+        "int": pa.int32(),
+        "timestamp": pa.timestamp("us", tz="UTC"),
+    }
+    return pa.schema([pa.field(c.name, types[c.kind]) for c in columns])
+
+
+def iter_parquet(
+    records: Iterable[dict[str, Any]],
+    columns: list[AnalyticsColumn],
+    *,
+    row_group_size: int = PARQUET_ROW_GROUP_SIZE,
+) -> Iterator[bytes]:
+    """Parquet を行グループ単位で書き出し、書けた分から返す。"""
+
+    if not parquet_available():
+        raise RuntimeError("pyarrow is not installed")
+    schema = _arrow_schema(columns)
+    sink = _CountingSink()
+    writer = pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema)
+    batch: list[dict[str, Any]] = []
+
+    def _flush() -> bytes:
+        table = pa.Table.from_pylist(batch, schema=schema)
+        writer.write_table(table)
+        batch.clear()
+        return sink.drain()
+
+    try:
+        for record in records:
+            batch.append(record)
+            if len(batch) >= row_group_size:
+                out = _flush()
+                if out:
+                    yield out
+        if batch:
+            out = _flush()
+            if out:
+                yield out
+    finally:
+        writer.close()
+    out = sink.drain()
+    if out:
+        yield out
+
+
+__all__ = [
+    "AnalyticsColumn",
+    "BASE_COLUMNS",
+    "build_record",
+    "iter_csv",
+    "iter_parquet",
+    "parquet_available",
+    "plan_columns",
+]
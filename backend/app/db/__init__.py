@@ -30,6 +30,8 @@ for candidate in (_ADAPTER_DIR, _PRIVATE_DIR):
             sys.path.insert(0, path_str)
 
 from ..config import get_settings
+from ..patient_keys import canonical_dob, patient_name_key
+from .instrumentation import instrumented_call
 from .interfaces import PersistenceAdapter
 from .sqlite_adapter import (
     SQLiteAdapter,
@@ -137,13 +139,37 @@ def check_firestore_health() -> bool:
 def _delegate(name: str) -> Callable[..., Any]:
     def _proxy(*args: Any, **kwargs: Any) -> Any:
         method = getattr(_adapter, name)
-        return method(*args, **kwargs)
+        return instrumented_call(name, method, *args, **kwargs)
 
     _proxy.__name__ = name
     _proxy.__doc__ = getattr(_adapter, name).__doc__ if hasattr(_adapter, name) else None
     return _proxy
 
 
+def append_session_event(*args: Any, **kwargs: Any) -> int | None:
+    """イベントログへ追記する。イベントログに未対応のアダプタでは None を返す。"""
+    method = getattr(_adapter, "append_session_event", None)
+    if not callable(method):
+        return None
+    return instrumented_call("append_session_event", method, *args, **kwargs)
+
+
+def list_session_events(*args: Any, **kwargs: Any) -> list[dict[str, Any]] | None:
+    """イベントログを参照する。イベントログに未対応のアダプタでは None を返す。"""
+    method = getattr(_adapter, "list_session_events", None)
+    if not callable(method):
+        return None
+    return instrumented_call("list_session_events", method, *args, **kwargs)
+
+
+def prune_session_events(*args: Any, **kwargs: Any) -> int:
+    """古いイベントを削除する。イベントログに未対応のアダプタでは何もしない。"""
+    method = getattr(_adapter, "prune_session_events", None)
+    if not callable(method):
+        return 0
+    return instrumented_call("prune_session_events", method, *args, **kwargs)
+
+
 def init_db(db_path: str | None = None) -> None:
     init_callable = getattr(_adapter, "init", None)
     if init_callable is None:
@@ -199,6 +225,50 @@ _METHOD_NAMES = [
 globals().update({name: _delegate(name) for name in _METHOD_NAMES})
 
 
+def get_sessions(
+    session_ids: Any, *args: Any, include_answers: bool = True, **kwargs: Any
+) -> list[dict[str, Any]]:
+    """複数セッションをまとめて取得する。一括取得に未対応のアダプタでは1件ずつ取得する。"""
+    method = getattr(_adapter, "get_sessions", None)
+    if callable(method):
+        return instrumented_call(
+            "get_sessions", method, session_ids, *args, include_answers=include_answers, **kwargs
+        )
+    results: list[dict[str, Any]] = []
+    for sid in dict.fromkeys(i for i in session_ids if i):
+        session = instrumented_call("get_session", _adapter.get_session, sid, *args, **kwargs)
+        if session:
+            results.append(session)
+    return results
+
+
+def find_latest_finalized_session_id(patient_name: str, dob: str, *args: Any, **kwargs: Any) -> str | None:
+    """氏名・生年月日が一致する最新の確定済みセッション ID を返す。
+
+    患者索引に未対応のアダプタでは氏名で検索した候補を読み込んで照合する。
+    """
+    method = getattr(_adapter, "find_latest_finalized_session_id", None)
+    if callable(method):
+        return instrumented_call(
+            "find_latest_finalized_session_id", method, patient_name, dob, *args, **kwargs
+        )
+    name_key = patient_name_key(patient_name)
+    dob_key = canonical_dob(dob)
+    if not name_key or not dob_key:
+        return None
+    summaries = instrumented_call(
+        "list_sessions", _adapter.list_sessions, *args, patient_name=patient_name.strip(), **kwargs
+    )
+    for summary in summaries:
+        if summary.get("interrupted"):
+            continue
+        if patient_name_key(summary.get("patient_name")) != name_key:
+            continue
+        if canonical_dob(summary.get("dob")) == dob_key:
+            return summary.get("id")
+    return None
+
+
 DEFAULT_DB_PATH = getattr(_adapter, "default_db_path", None) or SQLITE_DEFAULT_DB_PATH
 COUCHDB_URL = getattr(_adapter, "couchdb_url", None) or SQLITE_COUCHDB_URL
 couch_db = getattr(_adapter, "couch_db", None) or SQLITE_COUCH_DB
@@ -214,5 +284,10 @@ __all__ = [
     "pwd_context",
     "get_couch_db",
     "init_db",
+    "get_sessions",
+    "find_latest_finalized_session_id",
+    "append_session_event",
+    "list_session_events",
+    "prune_session_events",
 ] + _METHOD_NAMES
 
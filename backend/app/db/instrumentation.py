@@ -0,0 +1,264 @@
+"""永続化アダプタ呼び出しの計測。
+
+`app.db` の委譲関数はすべて `instrumented_call` を経由し、関数ごとの呼び出し回数・
+所要時間・返却行数を集計する。所要時間が `MONSHINMATE_DB_SLOW_MS` を超えた呼び出しは
+警告ログと直近の履歴に残し、SQLite の場合はその呼び出し中に実行した SQL の
+EXPLAIN QUERY PLAN を添える（SQL 中のリテラルは伏せる）。
+"""
+from __future__ import annotations
+
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Callable, Literal
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from ..metrics import REGISTRY as METRICS_REGISTRY
+
+
+# 0 以下で遅い呼び出しの記録を無効化する
+DB_SLOW_CALL_MS = float(os.getenv("MONSHINMATE_DB_SLOW_MS", "200"))
+SLOW_CALL_HISTORY = 50
+# 1回の呼び出しで保持する SQL 文の上限（一括投入で際限なく溜めない）
+MAX_CAPTURED_STATEMENTS = 20
+MAX_EXPLAINED_STATEMENTS = 5
+MAX_EXPLAINED_SQL_LENGTH = 20_000
+
+StatsOrder = Literal["max", "total", "mean", "calls"]
+
+logger = logging.getLogger("db.instrumentation")
+
+DB_CALL_DURATION = METRICS_REGISTRY.histogram(
+    "monshin_db_call_duration_seconds",
+    "Persistence adapter call latency by function",
+    ("function",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+DB_ROWS_RETURNED = METRICS_REGISTRY.counter(
+    "monshin_db_rows_returned",
+    "Rows returned (or affected) by persistence adapter calls",
+    ("function",),
+)
+DB_CALL_ERRORS = METRICS_REGISTRY.counter(
+    "monshin_db_call_errors",
+    "Persistence adapter calls that raised",
+    ("function",),
+)
+
+# 呼び出し中に実行された (DB パス, SQL) の一覧。計測中のみ設定される
+_captured_statements: ContextVar[list[tuple[str, str]] | None] = ContextVar(
+    "db_captured_statements", default=None
+)
+
+_STRING_LITERAL = re.compile(r"[xX]?'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?![\w.])")
+_EXPLAINABLE = ("SELECT", "WITH", "UPDATE", "DELETE")
+
+
+class _FunctionStats:
+    __slots__ = ("calls", "errors", "total_seconds", "max_seconds", "rows")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.rows = 0
+
+
+class DBCallStats:
+    """関数ごとの累計と、遅い呼び出しの直近履歴。"""
+
+    def __init__(self, slow_call_ms: float = DB_SLOW_CALL_MS, history: int = SLOW_CALL_HISTORY) -> None:
+        self.slow_call_ms = slow_call_ms
+        self._lock = threading.Lock()
+        self._functions: dict[str, _FunctionStats] = {}
+        self._slow_calls: deque[dict[str, Any]] = deque(maxlen=max(1, history))
+
+    def record(self, name: str, seconds: float, rows: int, *, error: bool) -> None:
+        with self._lock:
+            stats = self._functions.get(name)
+            if stats is None:
+                stats = self._functions[name] = _FunctionStats()
+            stats.calls += 1
+            stats.errors += int(error)
+            stats.total_seconds += seconds
+            stats.max_seconds = max(stats.max_seconds, seconds)
+            stats.rows += rows
+
+    def record_slow(self, entry: dict[str, Any]) -> None:
+        with self._lock:
+            self._slow_calls.append(entry)
+
+    def top(self, limit: int = 10, order: StatsOrder = "max") -> list[dict[str, Any]]:
+        """関数ごとの統計を `order` の降順で返す。"""
+
+        with self._lock:
+            rows = [
+                {
+                    "function": name,
+                    "calls": s.calls,
+                    "errors": s.errors,
+                    "total_ms": round(s.total_seconds * 1000, 3),
+                    "mean_ms": round(s.total_seconds * 1000 / s.calls, 3) if s.calls else 0.0,
+                    "max_ms": round(s.max_seconds * 1000, 3),
+                    "rows": s.rows,
+                }
+                for name, s in self._functions.items()
+            ]
+        key = {"max": "max_ms", "total": "total_ms", "mean": "mean_ms", "calls": "calls"}[order]
+        rows.sort(key=lambda r: r[key], reverse=True)
+        return rows[: max(0, limit)]
+
+    def recent_slow_calls(self, limit: int = SLOW_CALL_HISTORY) -> list[dict[str, Any]]:
+        """遅い呼び出しを新しい順に返す。"""
+
+        with self._lock:
+            entries = list(self._slow_calls)
+        return entries[::-1][: max(0, limit)]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._functions.clear()
+            self._slow_calls.clear()
+
+
+stats = DBCallStats()
+
+
+def attach_statement_capture(conn: sqlite3.Connection, db_path: str) -> None:
+    """計測中の呼び出しで開かれた接続に、実行 SQL を記録するトレースを設定する。"""
+
+    captured = _captured_statements.get()
+    if captured is None or len(captured) >= MAX_CAPTURED_STATEMENTS:
+        return
+
+    def _trace(sql: str) -> None:
+        # executemany では1行ごとに呼ばれ、展開済み SQL は回答 JSON などを含んで長いため先頭だけを見る
+        if len(captured) >= MAX_CAPTURED_STATEMENTS:
+            conn.set_trace_callback(None)
+            return
+        if sql[:16].lstrip()[:6].upper().startswith(_EXPLAINABLE):
+            captured.append((str(db_path), sql))
+            if len(captured) >= MAX_CAPTURED_STATEMENTS:
+                conn.set_trace_callback(None)
+
+    conn.set_trace_callback(_trace)
+
+
+def redact_sql(sql: str) -> str:
+    """ログに患者情報が残らないよう、文字列・数値リテラルを `?` に置き換える。"""
+
+    redacted = _STRING_LITERAL.sub("?", sql)
+    redacted = _NUMBER_LITERAL.sub("?", redacted)
+    return " ".join(redacted.split())
+
+
+def explain_query_plan(db_path: str, sql: str) -> list[str]:
+    """SQLite の EXPLAIN QUERY PLAN の detail 列を返す。"""
+
+    conn = sqlite3.connect(db_path)
+    try:
+        return [str(row[3]) for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()]
+    finally:
+        conn.close()
+
+
+def _explain_statements(captured: list[tuple[str, str]]) -> list[dict[str, Any]]:
+    explained: list[dict[str, Any]] = []
+    seen: set[str] = set()
+    for db_path, sql in captured:
+        statement = sql.strip()
+        if not statement.upper().startswith(_EXPLAINABLE) or len(statement) > MAX_EXPLAINED_SQL_LENGTH:
+            continue
+        redacted = redact_sql(statement)
+        if redacted in seen:
+            continue
+        seen.add(redacted)
+        try:
+            plan = explain_query_plan(db_path, statement)
+        except sqlite3.Error as exc:
+            plan = [f"explain_failed: {exc}"]
+        explained.append({"sql": redacted, "plan": plan})
+        if len(explained) >= MAX_EXPLAINED_STATEMENTS:
+            break
+    return explained
+
+
+def count_rows(result: Any) -> int:
+    """返却値から行数を推定する（一覧は件数、単一レコードは 1、件数を返す関数はその値）。"""
+
+    if result is None or isinstance(result, bool):
+        return 0
+    if isinstance(result, int):
+        return max(0, result)
+    if isinstance(result, (list, tuple)):
+        return len(result)
+    if isinstance(result, (dict, bytes, bytearray, str)):
+        return 1
+    return 0
+
+
+def _report_slow(name: str, seconds: float, rows: int, captured: list[tuple[str, str]] | None) -> None:
+    statements = _explain_statements(captured or [])
+    entry = {
+        "function": name,
+        "duration_ms": round(seconds * 1000, 3),
+        "rows": rows,
+        "at": datetime.now(timezone.utc).isoformat(),
+        "statements": statements,
+    }
+    stats.record_slow(entry)
+    logger.warning("db_slow_call function=%s duration_ms=%.1f rows=%d", name, seconds * 1000, rows)
+    for statement in statements:
+        logger.warning(
+            "db_slow_call_plan function=%s sql=%s plan=%s",
+            name,
+            statement["sql"],
+            " | ".join(statement["plan"]),
+        )
+
+
+def instrumented_call(name: str, method: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """アダプタのメソッドを呼び出し、所要時間・返却行数を記録する。"""
+
+    captured: list[tuple[str, str]] | None = [] if stats.slow_call_ms > 0 else None
+    token = _captured_statements.set(captured)
+    started = time.perf_counter()
+    try:
+        result = method(*args, **kwargs)
+    except Exception:
+        seconds = time.perf_counter() - started
+        _captured_statements.reset(token)
+        DB_CALL_DURATION.observe(seconds, function=name)
+        DB_CALL_ERRORS.inc(function=name)
+        stats.record(name, seconds, 0, error=True)
+        raise
+    seconds = time.perf_counter() - started
+    _captured_statements.reset(token)
+    rows = count_rows(result)
+    DB_CALL_DURATION.observe(seconds, function=name)
+    DB_ROWS_RETURNED.inc(rows, function=name)
+    stats.record(name, seconds, rows, error=False)
+    if stats.slow_call_ms > 0 and seconds * 1000 >= stats.slow_call_ms:
+        try:
+            _report_slow(name, seconds, rows, captured)
+        except Exception:  # noqa: BLE001 - 計測の失敗で呼び出しを失敗させない
+            logger.exception("db_slow_call_report_failed function=%s", name)
+    return result
+
+
+__all__ = [
+    "DBCallStats",
+    "attach_statement_capture",
+    "count_rows",
+    "explain_query_plan",
+    "instrumented_call",
+    "redact_sql",
+    "stats",
+]
@@ -48,9 +48,24 @@ class PersistenceAdapter(Protocol):
     def get_session(self, *args: Any, **kwargs: Any) -> dict[str, Any] | None:
         ...
 
+    def get_sessions(self, session_ids: Iterable[str], *args: Any, **kwargs: Any) -> list[dict[str, Any]]:
+        """複数セッションをまとめて取得する（任意。未実装の場合は1件ずつ取得する）。"""
+
+    def find_latest_finalized_session_id(self, patient_name: str, dob: str, *args: Any, **kwargs: Any) -> str | None:
+        """氏名・生年月日が一致する最新の確定済みセッション ID を返す（任意。未実装の場合は一覧から照合する）。"""
+
     def delete_session(self, *args: Any, **kwargs: Any) -> bool:
         ...
 
+    def append_session_event(self, *args: Any, **kwargs: Any) -> int:
+        """イベントログへ追記する（任意。未実装の場合はログを使わない）。"""
+
+    def list_session_events(self, *args: Any, **kwargs: Any) -> list[dict[str, Any]]:
+        """イベントログから指定 ID より後のイベントを返す（任意）。"""
+
+    def prune_session_events(self, *args: Any, **kwargs: Any) -> int:
+        """古いイベントを削除する（任意）。"""
+
     def delete_sessions(self, ids: Iterable[str], *args: Any, **kwargs: Any) -> int:
         ...
 
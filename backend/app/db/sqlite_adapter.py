@@ -13,13 +13,15 @@ from pathlib import Path
 from datetime import datetime, UTC
 from typing import Any, Iterable
 import base64
-import unicodedata
 from uuid import uuid4
 
 from passlib.context import CryptContext
 from cryptography.fernet import Fernet, InvalidToken
 import logging
 
+from .instrumentation import attach_statement_capture
+from ..patient_keys import canonical_dob, patient_name_key
+
 
 logger = logging.getLogger(__name__)
 
@@ -46,6 +48,8 @@ COUCHDB_URL = os.getenv("COUCHDB_URL")
 COUCHDB_DB_NAME = os.getenv("COUCHDB_DB", "monshin_sessions")
 COUCHDB_USER = os.getenv("COUCHDB_USER")
 COUCHDB_PASSWORD = os.getenv("COUCHDB_PASSWORD")
+# 一括取り込みで1回の _bulk_docs に含める文書数
+COUCH_BULK_BATCH_SIZE = 500
 couch_db = None
 
 
@@ -87,9 +91,6 @@ if COUCHDB_URL:
     couch_db = get_couch_db()
 
 
-SPACE_CHARS = {" ", "\u3000"}
-
-
 def _dict_factory(cursor: sqlite3.Cursor, row: tuple[Any, ...]) -> dict[str, Any]:
     return {col[0]: row[idx] for idx, col in enumerate(cursor.description)}
 
@@ -143,17 +144,50 @@ def _extract_question_texts_from_items(items: Iterable[Any] | None) -> dict[str,
 
 def get_conn(db_path: str = DEFAULT_DB_PATH) -> sqlite3.Connection:
     conn = sqlite3.connect(db_path)
+    attach_statement_capture(conn, db_path)
     conn.row_factory = _dict_factory
     conn.execute("PRAGMA journal_mode=WAL;")
     conn.execute("PRAGMA foreign_keys=ON;")
     return conn
 
 
-def _normalize_patient_name_for_search(value: str) -> str:
-    """検索時に患者名を比較しやすい形に正規化する。"""
+def _patient_index_row(session: dict[str, Any]) -> tuple[str, str, str, str]:
+    finalized_at = session.get("finalized_at") or session.get("started_at") or ""
+    if isinstance(finalized_at, datetime):
+        finalized_at = finalized_at.isoformat()
+    return (
+        str(session.get("id")),
+        patient_name_key(session.get("patient_name")),
+        canonical_dob(session.get("dob")),
+        str(finalized_at),
+    )
+
+
+def _upsert_patient_index(conn: sqlite3.Connection, sessions: Iterable[dict[str, Any]]) -> None:
+    """確定済みセッションを患者索引へ反映し、それ以外は索引から外す。"""
+
+    finalized: list[tuple[str, str, str, str]] = []
+    others: list[tuple[str]] = []
+    for sess in sessions:
+        if (sess.get("completion_status") or "") == "finalized":
+            finalized.append(_patient_index_row(sess))
+        else:
+            others.append((str(sess.get("id")),))
+    if finalized:
+        conn.executemany(
+            """
+            INSERT INTO patient_index (session_id, name_key, dob_key, finalized_at)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(session_id) DO UPDATE SET
+                name_key=excluded.name_key,
+                dob_key=excluded.dob_key,
+                finalized_at=excluded.finalized_at
+            """,
+            finalized,
+        )
+    if others:
+        conn.executemany("DELETE FROM patient_index WHERE session_id=?", others)
 
-    normalized = unicodedata.normalize("NFKC", value)
-    return ''.join(ch for ch in normalized if ch not in SPACE_CHARS)
 
 def init_db(db_path: str = DEFAULT_DB_PATH) -> None:
     """最小限のテーブル群を作成し、初期データを投入する。"""
@@ -286,6 +320,25 @@ def init_db(db_path: str = DEFAULT_DB_PATH) -> None:
         except Exception:
             pass
 
+        # 確定済みセッションの患者索引（正規化した氏名・生年月日 → セッション）
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS patient_index (
+                session_id TEXT PRIMARY KEY,
+                name_key TEXT NOT NULL,
+                dob_key TEXT NOT NULL,
+                finalized_at TEXT NOT NULL,
+                FOREIGN KEY(session_id) REFERENCES sessions(id) ON DELETE CASCADE
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_patient_index_lookup
+            ON patient_index (name_key, dob_key, finalized_at DESC)
+            """
+        )
+
         # LLM 設定（単一行）
         conn.execute(
             """
@@ -327,6 +380,32 @@ def init_db(db_path: str = DEFAULT_DB_PATH) -> None:
             """
         )
 
+        # 管理画面向けイベントの追記専用ログ（id は SSE の Last-Event-ID として使う）
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS session_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                event_name TEXT NOT NULL,
+                session_id TEXT,
+                payload_json TEXT NOT NULL,
+                occurred_at TEXT NOT NULL,
+                created_at TEXT NOT NULL
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_session_events_occurred_at
+            ON session_events (occurred_at)
+            """
+        )
+        conn.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_session_events_created_at
+            ON session_events (created_at)
+            """
+        )
+
         # ユーザー管理テーブル
         conn.execute(
             """
@@ -449,6 +528,18 @@ def init_db(db_path: str = DEFAULT_DB_PATH) -> None:
 
         conn.commit()
 
+        # --- 患者索引の初回構築（索引導入前の確定済みセッション） ---
+        if conn.execute("SELECT 1 FROM patient_index LIMIT 1").fetchone() is None:
+            rows = conn.execute(
+                """
+                SELECT id, patient_name, dob, completion_status, started_at, finalized_at
+                FROM sessions WHERE completion_status = 'finalized'
+                """
+            ).fetchall()
+            if rows:
+                _upsert_patient_index(conn, rows)
+                conn.commit()
+
         # --- レガシー設定の整理 ---
         old_settings_row = conn.execute("SELECT json FROM app_settings WHERE id='global'").fetchone()
         if old_settings_row:
@@ -1179,6 +1270,19 @@ def save_session(session: Any, db_path: str = DEFAULT_DB_PATH) -> None:
                     ts,
                 ),
             )
+        _upsert_patient_index(
+            conn,
+            [
+                {
+                    "id": session.id,
+                    "patient_name": session.patient_name,
+                    "dob": session.dob,
+                    "completion_status": session.completion_status,
+                    "started_at": started_dt,
+                    "finalized_at": finalized_dt,
+                }
+            ],
+        )
         conn.commit()
     finally:
         conn.close()
@@ -1199,7 +1303,7 @@ def list_sessions(
     """
     patient_name_query = (patient_name or "").strip()
     normalized_patient_name_query = (
-        _normalize_patient_name_for_search(patient_name_query) if patient_name_query else ""
+        patient_name_key(patient_name_query) if patient_name_query else ""
     )
     db = get_couch_db()
     if db:
@@ -1213,7 +1317,7 @@ def list_sessions(
                 direct_match = patient_name_query in raw_name if use_direct else True
                 normalized_match = True
                 if use_normalized:
-                    normalized_target = _normalize_patient_name_for_search(raw_name)
+                    normalized_target = patient_name_key(raw_name)
                     normalized_match = normalized_patient_name_query in normalized_target
                 if not direct_match and not normalized_match:
                     continue
@@ -1367,6 +1471,149 @@ def list_sessions_finalized_after(
         conn.close()
 
 
+def _event_timestamp(value: datetime | None = None) -> str:
+    """イベント時刻を文字列比較できる固定長の UTC 表記にする（naive は UTC とみなす）。"""
+
+    dt = value or datetime.now(UTC)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=UTC)
+    return dt.astimezone(UTC).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+def _session_event_row(row: dict[str, Any]) -> dict[str, Any]:
+    try:
+        payload = json.loads(row.get("payload_json") or "{}")
+    except Exception:
+        payload = {}
+    return {
+        "id": int(row["id"]),
+        "event_name": row.get("event_name"),
+        "session_id": row.get("session_id"),
+        "payload": payload,
+        "occurred_at": row.get("occurred_at"),
+    }
+
+
+def append_session_event(
+    event_name: str,
+    payload: dict[str, Any],
+    *,
+    session_id: str | None = None,
+    occurred_at: datetime | None = None,
+    db_path: str = DEFAULT_DB_PATH,
+) -> int:
+    """イベントログへ1件追記し、採番された ID を返す。"""
+
+    conn = get_conn(db_path)
+    try:
+        cur = conn.execute(
+            """
+            INSERT INTO session_events (event_name, session_id, payload_json, occurred_at, created_at)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            (
+                event_name,
+                session_id,
+                json.dumps(payload, ensure_ascii=False, default=str),
+                _event_timestamp(occurred_at),
+                _event_timestamp(),
+            ),
+        )
+        conn.commit()
+        return int(cur.lastrowid)
+    finally:
+        conn.close()
+
+
+def list_session_events(
+    *,
+    after_id: int | None = None,
+    since: datetime | None = None,
+    limit: int = 200,
+    oldest_first: bool = False,
+    db_path: str = DEFAULT_DB_PATH,
+) -> list[dict[str, Any]]:
+    """指定 ID（または発生時刻）より後のイベントを古い順に返す。
+
+    件数が `limit` を超える場合は新しいものから `limit` 件に絞る。
+    `oldest_first=True` の場合は古いものから `limit` 件を返す（カーソルで順に読み進める用途）。
+    """
+
+    limit = max(1, int(limit))
+    if after_id is not None:
+        where, param = "id > ?", int(after_id)
+    elif since is not None:
+        where, param = "occurred_at > ?", _event_timestamp(since)
+    else:
+        where, param = "id > ?", 0
+    order = "ASC" if oldest_first else "DESC"
+    conn = get_conn(db_path)
+    try:
+        rows = conn.execute(
+            f"SELECT * FROM session_events WHERE {where} ORDER BY id {order} LIMIT ?",
+            (param, limit),
+        ).fetchall()
+    finally:
+        conn.close()
+    if not oldest_first:
+        rows.reverse()
+    return [_session_event_row(row) for row in rows]
+
+
+def prune_session_events(older_than: datetime, db_path: str = DEFAULT_DB_PATH) -> int:
+    """記録日時が `older_than` より前のイベントを削除し、削除件数を返す。"""
+
+    conn = get_conn(db_path)
+    try:
+        cur = conn.execute(
+            "DELETE FROM session_events WHERE created_at < ?",
+            (_event_timestamp(older_than),),
+        )
+        conn.commit()
+        return int(cur.rowcount or 0)
+    finally:
+        conn.close()
+
+
+def _hydrate_couch_session(doc: dict[str, Any]) -> dict[str, Any]:
+    doc["id"] = doc.pop("_id")
+    if not doc.get("started_at"):
+        doc["started_at"] = doc.get("finalized_at")
+    doc["interrupted"] = (doc.get("completion_status") or "") != "finalized"
+    qtexts = doc.get("question_texts") or {}
+    if isinstance(qtexts, dict):
+        doc["question_texts"] = {str(k): v for k, v in qtexts.items() if isinstance(v, str)}
+    llm_qtexts = doc.get("llm_question_texts") or {}
+    if isinstance(llm_qtexts, dict):
+        doc["llm_question_texts"] = {str(k): v for k, v in llm_qtexts.items() if isinstance(v, str)}
+    return doc
+
+
+def _hydrate_session_row(srow: dict[str, Any], rrows: list[dict[str, Any]]) -> dict[str, Any]:
+    if not srow.get("started_at"):
+        srow["started_at"] = srow.get("finalized_at")
+    srow["interrupted"] = (srow.get("completion_status") or "") != "finalized"
+    answers = {r["item_id"]: json.loads(r["answer_json"]) for r in rrows}
+    # LLM 追加質問の質問文マッピングも返却に含める（API レイヤでは必要に応じて利用）
+    llm_qtexts: dict[str, str] = {}
+    question_texts: dict[str, str] = {}
+    for r in rrows:
+        iid = r.get("item_id")
+        qtext = r.get("question_text")
+        if iid and qtext:
+            question_texts[str(iid)] = qtext
+            if isinstance(iid, str) and iid.startswith("llm_"):
+                llm_qtexts[str(iid)] = qtext
+    srow["answers"] = answers
+    if question_texts:
+        srow["question_texts"] = question_texts
+    if llm_qtexts:
+        srow["llm_question_texts"] = llm_qtexts
+    srow["remaining_items"] = json.loads(srow.get("remaining_items_json") or "[]")
+    srow["attempt_counts"] = json.loads(srow.get("attempt_counts_json") or "{}")
+    return srow
+
+
 def get_session(session_id: str, db_path: str = DEFAULT_DB_PATH) -> dict[str, Any] | None:
     """DB からセッションを取得する。"""
     db = get_couch_db()
@@ -1374,17 +1621,7 @@ def get_session(session_id: str, db_path: str = DEFAULT_DB_PATH) -> dict[str, An
         doc = db.get(session_id)
         if not doc:
             return None
-        doc["id"] = doc.pop("_id")
-        if not doc.get("started_at"):
-            doc["started_at"] = doc.get("finalized_at")
-        doc["interrupted"] = (doc.get("completion_status") or "") != "finalized"
-        qtexts = doc.get("question_texts") or {}
-        if isinstance(qtexts, dict):
-            doc["question_texts"] = {str(k): v for k, v in qtexts.items() if isinstance(v, str)}
-        llm_qtexts = doc.get("llm_question_texts") or {}
-        if isinstance(llm_qtexts, dict):
-            doc["llm_question_texts"] = {str(k): v for k, v in llm_qtexts.items() if isinstance(v, str)}
-        return doc
+        return _hydrate_couch_session(doc)
     conn = get_conn(db_path)
     try:
         srow = conn.execute(
@@ -1393,32 +1630,110 @@ def get_session(session_id: str, db_path: str = DEFAULT_DB_PATH) -> dict[str, An
         ).fetchone()
         if not srow:
             return None
-        if not srow.get("started_at"):
-            srow["started_at"] = srow.get("finalized_at")
-        srow["interrupted"] = (srow.get("completion_status") or "") != "finalized"
         rrows = conn.execute(
             "SELECT item_id, answer_json, question_text FROM session_responses WHERE session_id=?",
             (session_id,),
         ).fetchall()
-        answers = {r["item_id"]: json.loads(r["answer_json"]) for r in rrows}
-        # LLM 追加質問の質問文マッピングも返却に含める（API レイヤでは必要に応じて利用）
-        llm_qtexts: dict[str, str] = {}
-        question_texts: dict[str, str] = {}
-        for r in rrows:
-            iid = r.get("item_id")
-            qtext = r.get("question_text")
-            if iid and qtext:
-                question_texts[str(iid)] = qtext
-                if isinstance(iid, str) and iid.startswith("llm_"):
-                    llm_qtexts[str(iid)] = qtext
-        srow["answers"] = answers
-        if question_texts:
-            srow["question_texts"] = question_texts
-        if llm_qtexts:
-            srow["llm_question_texts"] = llm_qtexts
-        srow["remaining_items"] = json.loads(srow.get("remaining_items_json") or "[]")
-        srow["attempt_counts"] = json.loads(srow.get("attempt_counts_json") or "{}")
-        return srow
+        return _hydrate_session_row(srow, rrows)
+    finally:
+        conn.close()
+
+
+def find_latest_finalized_session_id(
+    patient_name: str, dob: str, db_path: str = DEFAULT_DB_PATH
+) -> str | None:
+    """氏名と生年月日が一致する最新の確定済みセッション ID を返す。
+
+    どちらも `patient_keys` で正規化してから比較するため、空白の有無や
+    生年月日の表記（ISO・スラッシュ区切り・和暦など）の違いは吸収される。
+    SQLite では患者索引への1クエリで求める。
+    """
+    name_key = patient_name_key(patient_name)
+    dob_key = canonical_dob(dob)
+    if not name_key or not dob_key:
+        return None
+    db = get_couch_db()
+    if db:
+        latest: tuple[str, str] | None = None
+        for row in db.view("_all_docs", include_docs=True):
+            d = row.doc
+            if not d or (d.get("completion_status") or "") != "finalized":
+                continue
+            idx = _patient_index_row({**d, "id": d.get("_id")})
+            if idx[1] != name_key or idx[2] != dob_key:
+                continue
+            if latest is None or idx[3] > latest[1]:
+                latest = (idx[0], idx[3])
+        return latest[0] if latest else None
+    conn = get_conn(db_path)
+    try:
+        row = conn.execute(
+            """
+            SELECT session_id FROM patient_index
+            WHERE name_key=? AND dob_key=?
+            ORDER BY finalized_at DESC
+            LIMIT 1
+            """,
+            (name_key, dob_key),
+        ).fetchone()
+        return row["session_id"] if row else None
+    finally:
+        conn.close()
+
+
+# SQLite のプレースホルダ数上限（既定 999）を超えないよう分割して問い合わせる
+_SESSION_FETCH_CHUNK = 500
+
+
+def get_sessions(
+    session_ids: Iterable[str],
+    db_path: str = DEFAULT_DB_PATH,
+    *,
+    include_answers: bool = True,
+) -> list[dict[str, Any]]:
+    """複数セッションをまとめて取得する。
+
+    返却順は `session_ids` の順で、存在しない ID は含めない。
+    SQLite ではセッション本体と回答をそれぞれ1クエリで取得する。
+    `include_answers=False` の場合は回答を読み込まない。
+    """
+    id_list = list(dict.fromkeys(i for i in session_ids if i))
+    if not id_list:
+        return []
+    db = get_couch_db()
+    if db:
+        docs: list[dict[str, Any]] = []
+        for sid in id_list:
+            doc = db.get(sid)
+            if doc:
+                docs.append(_hydrate_couch_session(doc))
+        return docs
+    conn = get_conn(db_path)
+    try:
+        by_id: dict[str, dict[str, Any]] = {}
+        responses: dict[str, list[dict[str, Any]]] = {}
+        for offset in range(0, len(id_list), _SESSION_FETCH_CHUNK):
+            chunk = id_list[offset : offset + _SESSION_FETCH_CHUNK]
+            placeholders = ",".join(["?"] * len(chunk))
+            for srow in conn.execute(
+                f"SELECT * FROM sessions WHERE id IN ({placeholders})", chunk
+            ).fetchall():
+                by_id[srow["id"]] = srow
+            if not include_answers:
+                continue
+            for rrow in conn.execute(
+                f"""
+                SELECT session_id, item_id, answer_json, question_text
+                FROM session_responses WHERE session_id IN ({placeholders})
+                """,
+                chunk,
+            ).fetchall():
+                responses.setdefault(rrow["session_id"], []).append(rrow)
+        return [
+            _hydrate_session_row(by_id[sid], responses.get(sid, []))
+            for sid in id_list
+            if sid in by_id
+        ]
     finally:
         conn.close()
 
@@ -1507,7 +1822,7 @@ def delete_session(session_id: str, db_path: str = DEFAULT_DB_PATH) -> bool:
     """指定セッションを削除する。
 
     戻り値は削除が実行されデータが存在したかどうか。
-    付随する回答は外部キー制約 ON DELETE CASCADE により削除される。
+    付随する回答と患者索引は外部キー制約 ON DELETE CASCADE により削除される。
     CouchDB が有効な場合は CouchDB から削除する。
     """
     db = get_couch_db()
@@ -1852,6 +2167,7 @@ def import_sessions_data(
                 doc = db.get(row.id)
                 if doc:
                     db.delete(doc)
+        docs: list[dict[str, Any]] = []
         for sess in sessions:
             sid = sess.get("id")
             if not sid:
@@ -1875,16 +2191,28 @@ def import_sessions_data(
                 "finalized_at": sess.get("finalized_at"),
                 "llm_question_texts": sess.get("llm_question_texts") or {},
             }
-            existing = db.get(sid)
-            if existing:
-                doc["_rev"] = existing.rev
-            db.save(doc)
+            docs.append(doc)
+        # 1件ずつ取得・保存すると往復が件数分になるため、既存リビジョンの取得と保存を一括で行う
+        for offset in range(0, len(docs), COUCH_BULK_BATCH_SIZE):
+            chunk = docs[offset : offset + COUCH_BULK_BATCH_SIZE]
+            revs = {
+                row.get("key"): (row.get("value") or {}).get("rev")
+                for row in db.view("_all_docs", keys=[doc["_id"] for doc in chunk])
+                if not (row.get("value") or {}).get("deleted")
+            }
+            for doc in chunk:
+                if revs.get(doc["_id"]):
+                    doc["_rev"] = revs[doc["_id"]]
+            for ok, sid, error in db.update(chunk):
+                if not ok:
+                    raise RuntimeError(f"failed to import session {sid}: {error}")
         return {"sessions": len(sessions)}
 
     conn = get_conn(db_path)
     try:
         if mode == "replace":
             conn.execute("DELETE FROM session_responses")
+            conn.execute("DELETE FROM patient_index")
             conn.execute("DELETE FROM sessions")
 
         for sess in sessions:
@@ -1940,23 +2268,25 @@ def import_sessions_data(
             conn.execute("DELETE FROM session_responses WHERE session_id=?", (sid,))
             ts = sess.get("finalized_at") or sess.get("started_at") or ""
             llm_qtexts = sess.get("llm_question_texts") or {}
-            for item_id, ans in answers.items():
-                qtext = None
-                if isinstance(item_id, str) and item_id.startswith("llm_"):
-                    qtext = llm_qtexts.get(item_id)
-                conn.execute(
-                    """
-                    INSERT INTO session_responses (session_id, item_id, answer_json, question_text, ts)
-                    VALUES (?, ?, ?, ?, ?)
-                    """,
+            conn.executemany(
+                """
+                INSERT INTO session_responses (session_id, item_id, answer_json, question_text, ts)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                [
                     (
                         sid,
                         item_id,
                         json.dumps(ans, ensure_ascii=False),
-                        qtext,
+                        llm_qtexts.get(item_id)
+                        if isinstance(item_id, str) and item_id.startswith("llm_")
+                        else None,
                         ts,
-                    ),
-                )
+                    )
+                    for item_id, ans in answers.items()
+                ],
+            )
+        _upsert_patient_index(conn, [sess for sess in sessions if sess.get("id")])
         conn.commit()
     finally:
         conn.close()
@@ -2202,6 +2532,21 @@ class SQLiteAdapter:
     def get_session(self, *args, **kwargs):
         return self._call_with_db_path(get_session, *args, **kwargs)
 
+    def append_session_event(self, *args, **kwargs):
+        return self._call_with_db_path(append_session_event, *args, **kwargs)
+
+    def list_session_events(self, *args, **kwargs):
+        return self._call_with_db_path(list_session_events, *args, **kwargs)
+
+    def prune_session_events(self, *args, **kwargs):
+        return self._call_with_db_path(prune_session_events, *args, **kwargs)
+
+    def find_latest_finalized_session_id(self, *args, **kwargs):
+        return self._call_with_db_path(find_latest_finalized_session_id, *args, **kwargs)
+
+    def get_sessions(self, session_ids: Iterable[str], *args, **kwargs):
+        return self._call_with_db_path(get_sessions, session_ids, *args, **kwargs)
+
     def delete_session(self, *args, **kwargs):
         return self._call_with_db_path(delete_session, *args, **kwargs)
 
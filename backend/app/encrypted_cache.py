@@ -0,0 +1,291 @@
+"""暗号化した成果物を SQLite に保持する TTL / サイズ上限付きキャッシュの共通部。
+
+LLM 応答キャッシュ（`llm_cache`）と描画結果キャッシュ（`render_cache`）が共有する。
+各キャッシュはキーの生成とペイロードの（逆）直列化のみを実装し、
+暗号化・期限切れの破棄・最終参照順の追い出し・セッション単位の削除はここで行う。
+"""
+from __future__ import annotations
+
+import base64
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from cryptography.fernet import Fernet, InvalidToken
+
+
+def resolve_fernet(env_name: str) -> Fernet:
+    """`env_name` の鍵（未設定なら TOTP_ENC_KEY、それも無ければ固定値）で Fernet を作る。"""
+
+    key = os.getenv(env_name) or os.getenv(
+        "TOTP_ENC_KEY", base64.urlsafe_b64encode(b"0" * 32).decode()
+    )
+    return Fernet(key)
+
+
+class EncryptedSQLiteCache:
+    """暗号化したペイロードを SQLite に保持するキャッシュの基底クラス。
+
+    TTL 超過分は参照時・保存時に破棄し、合計サイズが上限を超えた場合は
+    最終参照が古いものから削除する。セッションIDは削除用の紐付けにのみ使う。
+    サブクラスは `table` / `log_prefix` / `logger` を定め、
+    `_serialize` / `_deserialize` を実装する。
+    """
+
+    table: str = ""
+    log_prefix: str = ""
+    logger: logging.Logger = logging.getLogger("api")
+
+    def __init__(
+        self,
+        db_path: Path | str,
+        *,
+        ttl_seconds: float,
+        max_bytes: int,
+        fernet: Fernet,
+    ) -> None:
+        self.db_path = Path(db_path)
+        self.ttl_seconds = max(1.0, float(ttl_seconds))
+        self.max_bytes = max(1, int(max_bytes))
+        self._fernet = fernet
+        self._lock = threading.Lock()
+        self._initialized = False
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    def _serialize(self, value: Any) -> bytes:
+        raise NotImplementedError
+
+    def _deserialize(self, data: bytes) -> Any:
+        raise NotImplementedError
+
+    @property
+    def _sessions_table(self) -> str:
+        return f"{self.table}_sessions"
+
+    def _connect(self) -> sqlite3.Connection:
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        if not self._initialized:
+            conn.execute(
+                f"""
+                CREATE TABLE IF NOT EXISTS {self.table} (
+                    cache_key TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    payload BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_access_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                f"""
+                CREATE TABLE IF NOT EXISTS {self._sessions_table} (
+                    cache_key TEXT NOT NULL,
+                    session_id TEXT NOT NULL,
+                    PRIMARY KEY (cache_key, session_id)
+                )
+                """
+            )
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{self._sessions_table}_session ON {self._sessions_table}(session_id)"
+            )
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{self.table}_last_access ON {self.table}(last_access_at)"
+            )
+            conn.commit()
+            self._initialized = True
+        return conn
+
+    @contextmanager
+    def _session(self) -> Iterator[sqlite3.Connection]:
+        conn = self._connect()
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _bump(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._stats[name] = self._stats.get(name, 0) + amount
+
+    def stats(self) -> dict[str, int]:
+        """ヒット数などの統計値を返す。"""
+
+        with self._lock:
+            return dict(self._stats)
+
+    def contains(self, cache_key: str) -> bool:
+        """有効な項目が存在するかを返す（統計・最終参照時刻は更新しない）。"""
+
+        try:
+            with self._session() as conn:
+                row = conn.execute(
+                    f"SELECT 1 FROM {self.table} WHERE cache_key=? AND expires_at > ?",
+                    (cache_key, time.time()),
+                ).fetchone()
+        except sqlite3.Error as exc:
+            self.logger.warning("%s_get_failed: %s", self.log_prefix, exc)
+            return False
+        return row is not None
+
+    def get(self, cache_key: str, *, session_id: str | None = None) -> Any | None:
+        """キャッシュ済みの値を返す。無い・期限切れ・復号失敗の場合は None。"""
+
+        now = time.time()
+        try:
+            with self._session() as conn:
+                row = conn.execute(
+                    f"SELECT payload, expires_at FROM {self.table} WHERE cache_key=?",
+                    (cache_key,),
+                ).fetchone()
+                if row is None:
+                    self._bump("misses")
+                    return None
+                if float(row["expires_at"]) <= now:
+                    self._delete_keys(conn, [cache_key])
+                    self._bump("misses")
+                    return None
+                try:
+                    value = self._deserialize(self._fernet.decrypt(bytes(row["payload"])))
+                except (InvalidToken, ValueError):
+                    # 暗号鍵の変更などで復号できない項目は破棄する
+                    self._delete_keys(conn, [cache_key])
+                    self._bump("misses")
+                    return None
+                conn.execute(
+                    f"UPDATE {self.table} SET last_access_at=? WHERE cache_key=?",
+                    (now, cache_key),
+                )
+                if session_id:
+                    self._link_session(conn, cache_key, session_id)
+        except sqlite3.Error as exc:
+            self.logger.warning("%s_get_failed: %s", self.log_prefix, exc)
+            self._bump("misses")
+            return None
+        self._bump("hits")
+        return value
+
+    def put(
+        self,
+        cache_key: str,
+        value: Any,
+        *,
+        kind: str,
+        session_id: str | None = None,
+    ) -> None:
+        """値を暗号化して保存し、必要に応じて古い項目を追い出す。"""
+
+        now = time.time()
+        try:
+            payload = self._fernet.encrypt(self._serialize(value))
+        except (TypeError, ValueError) as exc:
+            self.logger.warning("%s_serialize_failed: %s", self.log_prefix, exc)
+            return
+        if len(payload) > self.max_bytes:
+            return
+        try:
+            with self._session() as conn:
+                conn.execute(
+                    f"""
+                    INSERT INTO {self.table} (cache_key, kind, payload, size, created_at, expires_at, last_access_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(cache_key) DO UPDATE SET
+                        kind=excluded.kind,
+                        payload=excluded.payload,
+                        size=excluded.size,
+                        created_at=excluded.created_at,
+                        expires_at=excluded.expires_at,
+                        last_access_at=excluded.last_access_at
+                    """,
+                    (
+                        cache_key,
+                        kind,
+                        sqlite3.Binary(payload),
+                        len(payload),
+                        now,
+                        now + self.ttl_seconds,
+                        now,
+                    ),
+                )
+                if session_id:
+                    self._link_session(conn, cache_key, session_id)
+                self._evict(conn, now)
+        except sqlite3.Error as exc:
+            self.logger.warning("%s_put_failed: %s", self.log_prefix, exc)
+            return
+        self._bump("stores")
+
+    def purge_sessions(self, session_ids: Iterable[str]) -> int:
+        """指定セッションに紐づくキャッシュ項目を削除し、削除件数を返す。"""
+
+        ids = [sid for sid in session_ids if sid]
+        if not ids:
+            return 0
+        placeholders = ",".join(["?"] * len(ids))
+        try:
+            with self._session() as conn:
+                rows = conn.execute(
+                    f"SELECT DISTINCT cache_key FROM {self._sessions_table} WHERE session_id IN ({placeholders})",
+                    ids,
+                ).fetchall()
+                return self._delete_keys(conn, [row["cache_key"] for row in rows])
+        except sqlite3.Error as exc:
+            self.logger.warning("%s_purge_failed: %s", self.log_prefix, exc)
+            return 0
+
+    def clear(self) -> None:
+        """全項目を削除する。"""
+
+        try:
+            with self._session() as conn:
+                conn.execute(f"DELETE FROM {self.table}")
+                conn.execute(f"DELETE FROM {self._sessions_table}")
+        except sqlite3.Error as exc:
+            self.logger.warning("%s_clear_failed: %s", self.log_prefix, exc)
+
+    def _link_session(self, conn: sqlite3.Connection, cache_key: str, session_id: str) -> None:
+        conn.execute(
+            f"INSERT OR IGNORE INTO {self._sessions_table} (cache_key, session_id) VALUES (?, ?)",
+            (cache_key, session_id),
+        )
+
+    def _delete_keys(self, conn: sqlite3.Connection, keys: list[str]) -> int:
+        if not keys:
+            return 0
+        placeholders = ",".join(["?"] * len(keys))
+        cur = conn.execute(f"DELETE FROM {self.table} WHERE cache_key IN ({placeholders})", keys)
+        conn.execute(f"DELETE FROM {self._sessions_table} WHERE cache_key IN ({placeholders})", keys)
+        return cur.rowcount or 0
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        expired = [
+            row["cache_key"]
+            for row in conn.execute(
+                f"SELECT cache_key FROM {self.table} WHERE expires_at <= ?", (now,)
+            ).fetchall()
+        ]
+        evicted = self._delete_keys(conn, expired)
+        total_row = conn.execute(f"SELECT COALESCE(SUM(size), 0) AS total FROM {self.table}").fetchone()
+        total = int(total_row["total"] or 0) if total_row else 0
+        if total > self.max_bytes:
+            victims: list[str] = []
+            for row in conn.execute(f"SELECT cache_key, size FROM {self.table} ORDER BY last_access_at ASC"):
+                if total <= self.max_bytes:
+                    break
+                victims.append(row["cache_key"])
+                total -= int(row["size"] or 0)
+            evicted += self._delete_keys(conn, victims)
+        if evicted:
+            self._bump("evictions", evicted)
+
+
+__all__ = ["EncryptedSQLiteCache", "resolve_fernet"]
@@ -0,0 +1,110 @@
+"""LLM 応答のコンテンツアドレス型キャッシュ。
+
+同一セッションへのサマリー再生成や、インポート済みセッションの再要約など、
+入力が完全に一致する LLM 呼び出しの結果を暗号化して SQLite に保存する。
+キーはプロバイダ・モデル・温度・プロンプト・正規化済み回答のハッシュで、
+セッションIDは紐付けのみに利用する（セッション削除時の破棄用）。
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import unicodedata
+from pathlib import Path
+from typing import Any
+
+from cryptography.fernet import Fernet
+
+from .encrypted_cache import EncryptedSQLiteCache, resolve_fernet
+
+
+_LOGGER = logging.getLogger("llm.cache")
+
+LLM_CACHE_DB_PATH = Path(
+    os.getenv(
+        "MONSHINMATE_LLM_CACHE_DB",
+        str(Path(__file__).resolve().parent / "llm_cache.sqlite3"),
+    )
+)
+DEFAULT_TTL_SECONDS = float(os.getenv("MONSHINMATE_LLM_CACHE_TTL", str(7 * 24 * 3600)))
+DEFAULT_MAX_BYTES = int(os.getenv("MONSHINMATE_LLM_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+
+def _normalize_value(value: Any) -> Any:
+    """キー計算用に回答値を正規化する（NFKC・前後空白除去・キー順固定）。"""
+
+    if isinstance(value, str):
+        return unicodedata.normalize("NFKC", value).strip()
+    if isinstance(value, dict):
+        return {str(k): _normalize_value(v) for k, v in sorted(value.items(), key=lambda kv: str(kv[0]))}
+    if isinstance(value, (list, tuple)):
+        return [_normalize_value(v) for v in value]
+    return value
+
+
+def build_cache_key(
+    *,
+    kind: str,
+    provider: str,
+    model: str,
+    temperature: float,
+    system_prompt: str | None,
+    prompt: str | None,
+    answers: dict[str, Any] | None,
+    extra: dict[str, Any] | None = None,
+    base_url: str | None = None,
+    profile: dict[str, Any] | None = None,
+) -> str:
+    """キャッシュキー（SHA-256 の16進表記）を生成する。
+
+    同じモデル名でも接続先（`base_url`）やプロファイルの接続設定が異なれば別のキーになる。
+    """
+
+    material = {
+        "kind": kind,
+        "provider": provider or "",
+        "base_url": (base_url or "").strip().rstrip("/"),
+        "profile": _normalize_value(profile or {}),
+        "model": model or "",
+        "temperature": round(float(temperature or 0.0), 4),
+        "system_prompt": system_prompt or "",
+        "prompt": prompt or "",
+        "answers": _normalize_value(answers or {}),
+        "extra": _normalize_value(extra or {}),
+    }
+    encoded = json.dumps(material, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache(EncryptedSQLiteCache):
+    """暗号化した LLM 応答（JSON）を SQLite に保持するキャッシュ。"""
+
+    table = "llm_response_cache"
+    log_prefix = "llm_cache"
+    logger = _LOGGER
+
+    def __init__(
+        self,
+        db_path: Path | str = LLM_CACHE_DB_PATH,
+        *,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        fernet: Fernet | None = None,
+    ) -> None:
+        super().__init__(
+            db_path,
+            ttl_seconds=ttl_seconds,
+            max_bytes=max_bytes,
+            fernet=fernet or resolve_fernet("LLM_CACHE_ENC_KEY"),
+        )
+
+    def _serialize(self, value: Any) -> bytes:
+        return json.dumps(value, ensure_ascii=False).encode("utf-8")
+
+    def _deserialize(self, data: bytes) -> Any:
+        return json.loads(data.decode("utf-8"))
+
+
+__all__ = ["LLMResponseCache", "build_cache_key", "LLM_CACHE_DB_PATH"]
@@ -0,0 +1,177 @@
+"""LLM バックエンド向けのサーキットブレーカーと適応タイムアウト。
+
+LLM サーバー停止中に全ての患者が毎回タイムアウトまで待たされることを防ぐため、
+連続失敗が閾値に達したらリモート呼び出しを止めて即座にフォールバックさせ、
+一定時間後に1件だけ試行（half-open）して復旧を確認する。
+タイムアウトは直近の応答時間の分位点から決める。
+"""
+from __future__ import annotations
+
+from collections import deque
+from typing import Any, Literal
+import math
+import os
+import threading
+import time
+
+
+CircuitState = Literal["closed", "open", "half_open"]
+
+DEFAULT_FAILURE_THRESHOLD = int(os.getenv("MONSHINMATE_LLM_BREAKER_THRESHOLD", "3"))
+DEFAULT_COOLDOWN_SECONDS = float(os.getenv("MONSHINMATE_LLM_BREAKER_COOLDOWN", "30"))
+# half-open の試行が結果を記録しないまま終わった場合（キャンセル等）に再試行を許可するまでの秒数
+DEFAULT_PROBE_LEASE_SECONDS = 130.0
+
+
+class CircuitBreaker:
+    """連続失敗回数に基づく単純なサーキットブレーカー。"""
+
+    def __init__(
+        self,
+        *,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        cooldown_seconds: float = DEFAULT_COOLDOWN_SECONDS,
+        probe_lease_seconds: float = DEFAULT_PROBE_LEASE_SECONDS,
+        clock: Any = time.monotonic,
+    ) -> None:
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.cooldown_seconds = max(0.0, float(cooldown_seconds))
+        self.probe_lease_seconds = max(1.0, float(probe_lease_seconds))
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state: CircuitState = "closed"
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._probe_started_at: float | None = None
+        self._short_circuited = 0
+
+    @property
+    def state(self) -> CircuitState:
+        with self._lock:
+            return self._state
+
+    def allow_request(self) -> bool:
+        """リモート呼び出しを行ってよいかを返す。"""
+        now = self._clock()
+        with self._lock:
+            if self._state == "closed":
+                return True
+            if self._state == "open":
+                if self._opened_at is not None and now - self._opened_at >= self.cooldown_seconds:
+                    self._state = "half_open"
+                    self._probe_started_at = now
+                    return True
+                self._short_circuited += 1
+                return False
+            # half_open: 試行中は1件のみ許可する
+            if (
+                self._probe_started_at is None
+                or now - self._probe_started_at >= self.probe_lease_seconds
+            ):
+                self._probe_started_at = now
+                return True
+            self._short_circuited += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = "closed"
+            self._failures = 0
+            self._opened_at = None
+            self._probe_started_at = None
+
+    def record_failure(self) -> None:
+        now = self._clock()
+        with self._lock:
+            self._failures += 1
+            if self._state == "half_open" or self._failures >= self.failure_threshold:
+                self._state = "open"
+                self._opened_at = now
+                self._probe_started_at = None
+
+    def reset(self) -> None:
+        """設定変更時などに初期状態へ戻す。"""
+        self.record_success()
+
+    def snapshot(self) -> dict[str, Any]:
+        now = self._clock()
+        with self._lock:
+            retry_in: float | None = None
+            if self._state == "open" and self._opened_at is not None:
+                retry_in = max(0.0, self.cooldown_seconds - (now - self._opened_at))
+            return {
+                "state": self._state,
+                "consecutive_failures": self._failures,
+                "failure_threshold": self.failure_threshold,
+                "retry_in_seconds": retry_in,
+                "short_circuited": self._short_circuited,
+            }
+
+
+class LatencyTracker:
+    """処理種別ごとの直近応答時間を保持し、分位点からタイムアウトを決める。"""
+
+    def __init__(
+        self,
+        *,
+        window: int = 50,
+        min_samples: int = 5,
+        percentile: float = 0.95,
+        multiplier: float = 2.0,
+        floor_seconds: float = 5.0,
+    ) -> None:
+        self.window = max(1, int(window))
+        self.min_samples = max(1, int(min_samples))
+        self.percentile = percentile
+        self.multiplier = multiplier
+        self.floor_seconds = floor_seconds
+        self._lock = threading.Lock()
+        self._samples: dict[str, deque[float]] = {}
+
+    def observe(self, kind: str, seconds: float) -> None:
+        with self._lock:
+            bucket = self._samples.get(kind)
+            if bucket is None:
+                bucket = deque(maxlen=self.window)
+                self._samples[kind] = bucket
+            bucket.append(max(0.0, float(seconds)))
+
+    def quantile(self, kind: str, q: float) -> float | None:
+        with self._lock:
+            values = sorted(self._samples.get(kind) or ())
+        if not values:
+            return None
+        index = min(len(values) - 1, max(0, math.ceil(q * len(values)) - 1))
+        return values[index]
+
+    def timeout_for(self, kind: str, ceiling: float) -> float:
+        """分位点 × 係数を下限・上限（設定値）で丸めたタイムアウト秒数を返す。"""
+        with self._lock:
+            count = len(self._samples.get(kind) or ())
+        if count < self.min_samples:
+            return ceiling
+        observed = self.quantile(kind, self.percentile) or 0.0
+        return max(min(self.floor_seconds, ceiling), min(ceiling, observed * self.multiplier))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._samples.clear()
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            kinds = list(self._samples.keys())
+        result: dict[str, Any] = {}
+        for kind in kinds:
+            p50 = self.quantile(kind, 0.5)
+            p95 = self.quantile(kind, 0.95)
+            with self._lock:
+                count = len(self._samples.get(kind) or ())
+            result[kind] = {
+                "samples": count,
+                "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+                "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            }
+        return result
+
+
+__all__ = ["CircuitBreaker", "LatencyTracker", "CircuitState"]
@@ -2,7 +2,12 @@
 from __future__ import annotations
 
 from datetime import datetime, timezone
-from typing import Any, Literal
+from typing import Any, Callable, Iterator, Literal, TypeVar
+from contextlib import contextmanager
+from contextvars import ContextVar
+import asyncio
+import functools
+import inspect
 import time
 import logging
 import json
@@ -12,6 +17,10 @@ from pydantic import BaseModel, Field
 import httpx
 
 
+from .llm_cache import LLMResponseCache, build_cache_key
+from .llm_circuit import CircuitBreaker, LatencyTracker
+from .metrics import REGISTRY as METRICS_REGISTRY
+from .access_log import record_llm_call
 from .llm_provider_registry import (
     LLMProviderAdapter,
     ProviderRegistration,
@@ -33,9 +42,90 @@ DEFAULT_FOLLOWUP_PROMPT = (
 
 DEFAULT_FOLLOWUP_TIMEOUT = 30.0
 
+# 再試行しても回復が見込めない通信エラー
+_UNREACHABLE_ERRORS = (httpx.ConnectError, httpx.TimeoutException)
+
+# 応答キャッシュのキーに含めないプロファイル項目（認証情報）
+_CACHE_KEY_SECRET_FIELDS = {"api_key", "service_account_json"}
+
 
 LlmStatusValue = Literal["ok", "ng", "disabled", "pending"]
 
+LLM_CALL_DURATION = METRICS_REGISTRY.histogram(
+    "monshin_llm_call_duration_seconds",
+    "LLM gateway call latency by provider, operation and outcome",
+    ("provider", "operation", "outcome"),
+)
+# 呼び出し中の結果（ok / error / fallback / cache_hit / cancelled）。
+# 通信結果の記録（_record_status）やキャッシュ参照で更新し、入れ子の呼び出しは外側でまとめて計測する。
+_call_outcome: ContextVar[list[str] | None] = ContextVar("llm_call_outcome", default=None)
+
+_F = TypeVar("_F", bound=Callable[..., Any])
+
+
+def _set_call_outcome(outcome: str) -> None:
+    holder = _call_outcome.get()
+    if holder is not None:
+        holder[0] = outcome
+
+
+def _instrumented(operation: str) -> Callable[[_F], _F]:
+    """ゲートウェイの公開メソッドの所要時間を provider / operation / outcome 別に記録する。"""
+
+    def decorator(fn: _F) -> _F:
+        def _observe(gateway: "LLMGateway", holder: list[str], started: float) -> None:
+            seconds = time.perf_counter() - started
+            LLM_CALL_DURATION.observe(
+                seconds,
+                provider=gateway.settings.provider,
+                operation=operation,
+                outcome=holder[0],
+            )
+            record_llm_call(operation, holder[0], seconds)
+
+        if inspect.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def async_wrapper(self: "LLMGateway", *args: Any, **kwargs: Any) -> Any:
+                if _call_outcome.get() is not None:
+                    return await fn(self, *args, **kwargs)
+                holder = ["fallback"]
+                token = _call_outcome.set(holder)
+                started = time.perf_counter()
+                try:
+                    return await fn(self, *args, **kwargs)
+                except asyncio.CancelledError:
+                    holder[0] = "cancelled"
+                    raise
+                except Exception:
+                    holder[0] = "error"
+                    raise
+                finally:
+                    _call_outcome.reset(token)
+                    _observe(self, holder, started)
+
+            return async_wrapper  # type: ignore[return-value]
+
+        @functools.wraps(fn)
+        def wrapper(self: "LLMGateway", *args: Any, **kwargs: Any) -> Any:
+            if _call_outcome.get() is not None:
+                return fn(self, *args, **kwargs)
+            holder = ["fallback"]
+            token = _call_outcome.set(holder)
+            started = time.perf_counter()
+            try:
+                return fn(self, *args, **kwargs)
+            except Exception:
+                holder[0] = "error"
+                raise
+            finally:
+                _call_outcome.reset(token)
+                _observe(self, holder, started)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
 
 class ProviderProfile(BaseModel):
     """プロバイダ単位の設定（LLM有効状態はトップレベルで管理）。"""
@@ -63,6 +153,8 @@ class LLMSettings(BaseModel):
     base_url: str | None = None
     api_key: str | None = None
     followup_timeout_seconds: float = DEFAULT_FOLLOWUP_TIMEOUT
+    # 温度0以外でも応答キャッシュを利用する場合に有効化する
+    response_cache_enabled: bool = False
     provider_profiles: dict[str, ProviderProfile] = Field(default_factory=dict)
 
     def get_profile(self, provider: str | None = None) -> ProviderProfile:
@@ -187,15 +279,25 @@ class LLMGateway:
     現段階ではスタブ実装として、固定的/組み立て応答のみを返す。
     """
 
-    def __init__(self, settings: LLMSettings) -> None:
+    def __init__(
+        self,
+        settings: LLMSettings,
+        response_cache: LLMResponseCache | None = None,
+    ) -> None:
         # 受け取った設定を正規化して保持
         settings.sync_from_active_profile()
         settings.sync_to_active_profile()
         self._ensure_provider_integrity(settings)
         self.settings = settings
+        # 決定的な呼び出し（温度0など）の結果を再利用するキャッシュ
+        self.response_cache = response_cache
         # セッション単位での直列化用ロック
         self._locks: dict[str, threading.RLock] = {}
         self._locks_guard = threading.Lock()
+        # 非同期 API 用のセッション単位ロックと共有 AsyncClient（ループごとに作り直す）
+        self._async_locks: dict[str, asyncio.Lock] = {}
+        self._async_client: httpx.AsyncClient | None = None
+        self._async_client_loop: asyncio.AbstractEventLoop | None = None
         self._status_lock = threading.Lock()
         self._last_status: dict[str, Any] = {
             "status": "disabled",
@@ -203,6 +305,9 @@ class LLMGateway:
             "source": "init",
             "checked_at": None,
         }
+        # 連続失敗時にリモート呼び出しを止めるブレーカーと、応答時間に基づくタイムアウト
+        self._breaker = CircuitBreaker()
+        self._latency = LatencyTracker()
         self._sync_status_for_settings(reason="init")
 
     def _ensure_provider_integrity(self, settings: LLMSettings) -> None:
@@ -318,6 +423,42 @@ class LLMGateway:
         self, status: LlmStatusValue, source: str, detail: str | None = None
     ) -> None:
         self._set_status(status, detail, source, mark_time=True)
+        # 通信結果をサーキットブレーカーへ反映する
+        if status == "ok":
+            self._breaker.record_success()
+            _set_call_outcome("ok")
+        elif status == "ng":
+            self._breaker.record_failure()
+            _set_call_outcome("error")
+
+    def _circuit_allows(self, source: str) -> bool:
+        """ブレーカーが開いている場合は False を返し、呼び出し側をフォールバックさせる。"""
+        if self._breaker.allow_request():
+            return True
+        logging.getLogger("llm").info("llm_circuit_open source=%s; skipping remote call", source)
+        return False
+
+    @contextmanager
+    def _track_latency(self, kind: str) -> Iterator[None]:
+        """成功またはタイムアウトまでの所要時間を記録する。"""
+        start = time.perf_counter()
+        try:
+            yield
+        except httpx.TimeoutException:
+            # タイムアウトも標本に含め、短すぎる設定が固定化しないようにする
+            self._latency.observe(kind, time.perf_counter() - start)
+            raise
+        self._latency.observe(kind, time.perf_counter() - start)
+
+    def _adaptive_timeout(self, kind: str, ceiling: float) -> httpx.Timeout:
+        return httpx.Timeout(self._latency.timeout_for(kind, ceiling))
+
+    def get_circuit_snapshot(self) -> dict[str, Any]:
+        """サーキットブレーカーの状態と応答時間の統計を返す。"""
+
+        snapshot = self._breaker.snapshot()
+        snapshot["latency"] = self._latency.snapshot()
+        return snapshot
 
     def _sync_status_for_settings(self, *, reason: str) -> None:
         s = self.settings
@@ -356,8 +497,12 @@ class LLMGateway:
         settings.sync_to_active_profile()
         self._ensure_provider_integrity(settings)
         self.settings = settings
+        # 接続先が変わり得るため、ブレーカーと応答時間の統計を初期化する
+        self._breaker.reset()
+        self._latency.clear()
         self._sync_status_for_settings(reason="settings_update")
 
+    @_instrumented("test_connection")
     def test_connection(self, *, source: str = "manual_test") -> dict[str, str]:
         """LLM 接続の疎通確認（スタブ）。
 
@@ -415,6 +560,7 @@ class LLMGateway:
             self._record_status("ng", source, detail)
             return {"status": "ng", "detail": detail}
 
+    @_instrumented("list_models")
     def list_models(self, *, source: str | None = None) -> list[str]:
         """利用可能なモデル名の一覧を返す。
 
@@ -447,38 +593,19 @@ class LLMGateway:
             return []
 
         try:
-            timeout = httpx.Timeout(5.0)
-            if s.provider == "ollama":
-                url = s.base_url.rstrip("/") + "/api/tags"
-                r = httpx.get(url, timeout=timeout)
-                r.raise_for_status()
-                data = r.json()
-                models = sorted(
-                    [m.get("name") for m in data.get("models", []) if m.get("name")]
-                )
-                if source:
-                    self._record_status("ok", source, "model list fetched")
-                return models
-            else:  # LM Studio or other OpenAI compatible
-                url = s.base_url.rstrip("/") + "/v1/models"
-                headers = {}
-                if s.api_key:
-                    headers["Authorization"] = f"Bearer {s.api_key}"
-                r = httpx.get(url, headers=headers, timeout=timeout)
-                r.raise_for_status()
-                data = r.json()
-                models = sorted(
-                    [m.get("id") for m in data.get("data", []) if m.get("id")]
-                )
-                if source:
-                    self._record_status("ok", source, "model list fetched")
-                return models
+            r = httpx.get(**self._models_request())
+            r.raise_for_status()
+            models = self._parse_models_response(r.json())
+            if source:
+                self._record_status("ok", source, "model list fetched")
+            return models
         except Exception as e:
             logging.getLogger("llm").error(f"Failed to list models: {e}")
             if source:
                 self._record_status("ng", source, str(e))
         return []
 
+    @_instrumented("generate_question")
     def generate_question(
         self,
         missing_item_id: str,
@@ -501,7 +628,8 @@ class LLMGateway:
         start = time.perf_counter()
         s = self.settings
         adapter = self._get_adapter()
-        if adapter is not None:
+        allowed = self._circuit_allows("generate_question")
+        if adapter is not None and allowed:
             profile_data = self.settings.get_profile(s.provider).model_dump()
             try:
                 question = adapter.generate_question(
@@ -528,7 +656,7 @@ class LLMGateway:
                         "ok", "generate_question", "external question generated"
                     )
                     return question
-        if s.enabled and s.base_url:
+        if allowed and s.enabled and s.base_url:
             try:
                 timeout = httpx.Timeout(15.0)
                 if s.provider == "ollama":
@@ -629,6 +757,278 @@ class LLMGateway:
         )
         return result
 
+    def _response_cache_key(
+        self,
+        kind: str,
+        *,
+        system_prompt: str | None,
+        prompt: str | None,
+        answers: dict[str, Any],
+        extra: dict[str, Any] | None = None,
+    ) -> str | None:
+        """キャッシュ利用可能な場合にキーを返す。対象外なら None。"""
+        s = self.settings
+        if self.response_cache is None or not s.enabled:
+            return None
+        if float(s.temperature or 0.0) != 0.0 and not s.response_cache_enabled:
+            return None
+        if self._get_adapter() is None and not s.base_url:
+            # スタブ応答はキャッシュしない
+            return None
+        profile = (s.provider_profiles or {}).get(s.provider)
+        profile_extra = {
+            k: v
+            for k, v in ((profile.model_extra or {}) if profile is not None else {}).items()
+            if k not in _CACHE_KEY_SECRET_FIELDS
+        }
+        return build_cache_key(
+            kind=kind,
+            provider=s.provider,
+            model=s.model,
+            temperature=s.temperature,
+            system_prompt=system_prompt,
+            prompt=prompt,
+            answers=answers,
+            extra=extra,
+            base_url=s.base_url,
+            profile=profile_extra,
+        )
+
+    def _cache_lookup(self, key: str | None, session_id: str | None) -> Any | None:
+        if key is None or self.response_cache is None:
+            return None
+        cached = self.response_cache.get(key, session_id=session_id)
+        if cached is not None:
+            _set_call_outcome("cache_hit")
+        return cached
+
+    def _cache_store(
+        self, key: str | None, value: Any, *, kind: str, session_id: str | None
+    ) -> None:
+        if key is None or self.response_cache is None or not value:
+            return
+        self.response_cache.put(key, value, kind=kind, session_id=session_id)
+
+    # --- リモート呼び出しの組み立て（同期/非同期で共有） ---
+    def _remote_url(self, path: str) -> str:
+        return (self.settings.base_url or "").rstrip("/") + path
+
+    def _openai_headers(self) -> dict[str, str]:
+        headers = {"Content-Type": "application/json"}
+        if self.settings.api_key:
+            headers["Authorization"] = f"Bearer {self.settings.api_key}"
+        return headers
+
+    def _followup_timeout(self) -> httpx.Timeout:
+        s = self.settings
+        seconds = (
+            s.followup_timeout_seconds
+            if s.followup_timeout_seconds is not None
+            else DEFAULT_FOLLOWUP_TIMEOUT
+        )
+        safe = max(5.0, min(120.0, float(seconds)))
+        # 設定値を上限とし、観測した応答時間に応じて短縮する
+        return self._adaptive_timeout("generate_followups", safe)
+
+    def _chat_messages(self, system_prompt: str | None, content: str) -> list[dict[str, Any]]:
+        messages: list[dict[str, Any]] = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": content})
+        return messages
+
+    def _models_request(self) -> dict[str, Any]:
+        timeout = httpx.Timeout(5.0)
+        if self.settings.provider == "ollama":
+            return {"url": self._remote_url("/api/tags"), "timeout": timeout}
+        # LM Studio or other OpenAI compatible
+        headers = {}
+        if self.settings.api_key:
+            headers["Authorization"] = f"Bearer {self.settings.api_key}"
+        return {"url": self._remote_url("/v1/models"), "headers": headers, "timeout": timeout}
+
+    def _parse_models_response(self, data: dict[str, Any]) -> list[str]:
+        if self.settings.provider == "ollama":
+            return sorted([m.get("name") for m in data.get("models", []) if m.get("name")])
+        return sorted([m.get("id") for m in data.get("data", []) if m.get("id")])
+
+    def _followups_request(
+        self, context: dict[str, Any], max_questions: int, user_prompt: str
+    ) -> dict[str, Any]:
+        s = self.settings
+        messages = self._chat_messages(s.system_prompt, f"{context}\n{user_prompt}")
+        # プロバイダごとに構造化出力（JSON Schema）を強制する
+        if s.provider == "ollama":
+            # Ollama: /api/chat に JSON Schema を format フィールドで指定
+            schema = {
+                "type": "array",
+                "items": {"type": "string"},
+                "minItems": 0,
+                "maxItems": max_questions,
+            }
+            payload: dict[str, Any] = {
+                "model": s.model,
+                "messages": messages,
+                "stream": False,
+                "options": {"temperature": s.temperature},
+                # JSON Schema に適合した配列を強制
+                "format": schema,
+            }
+            return {
+                "url": self._remote_url("/api/chat"),
+                "json": payload,
+                "timeout": self._followup_timeout(),
+            }
+        # LM Studio（OpenAI 互換）: response_format.json_schema で構造化出力を要求
+        json_schema = {
+            "name": "followup_questions",
+            "strict": "true",  # LM Studio の Structured Output 仕様に合わせる
+            "schema": {
+                "type": "array",
+                "items": {"type": "string"},
+                "minItems": 0,
+                "maxItems": max_questions,
+            },
+        }
+        payload = {
+            "model": s.model,
+            "messages": messages,
+            "temperature": s.temperature,
+            "stream": False,
+            "response_format": {
+                "type": "json_schema",
+                "json_schema": json_schema,
+            },
+        }
+        return {
+            "url": self._remote_url("/v1/chat/completions"),
+            "headers": self._openai_headers(),
+            "json": payload,
+            "timeout": self._followup_timeout(),
+        }
+
+    def _parse_followups_response(self, data: dict[str, Any], max_questions: int) -> list[str]:
+        if self.settings.provider == "ollama":
+            content = (
+                (data.get("message") or {}).get("content")
+                or data.get("response")
+                or ""
+            )
+            arr = json.loads(content) if content else []
+            if isinstance(arr, list):
+                return [str(x) for x in arr][:max_questions]
+            raise RuntimeError("invalid structured response from ollama")
+        choices = data.get("choices") or []
+        if choices:
+            content = choices[0].get("message", {}).get("content", "")
+            arr = json.loads(content) if content else []
+            if isinstance(arr, list):
+                return [str(x) for x in arr][:max_questions]
+        raise RuntimeError("invalid structured response from lm studio")
+
+    def _chat_request(self, message: str) -> dict[str, Any]:
+        s = self.settings
+        timeout = self._adaptive_timeout("chat", 15.0)
+        messages = self._chat_messages(s.system_prompt, message)
+        if s.provider == "ollama":
+            # Ollama Chat API
+            payload: dict[str, Any] = {
+                "model": s.model,
+                "messages": messages,
+                "stream": False,
+                "options": {"temperature": s.temperature},
+            }
+            return {"url": self._remote_url("/api/chat"), "json": payload, "timeout": timeout}
+        # LM Studio (OpenAI 互換) Chat Completions API
+        payload = {
+            "model": s.model,
+            "messages": messages,
+            "temperature": s.temperature,
+            "stream": False,
+        }
+        return {
+            "url": self._remote_url("/v1/chat/completions"),
+            "headers": self._openai_headers(),
+            "json": payload,
+            "timeout": timeout,
+        }
+
+    def _parse_chat_response(self, data: dict[str, Any]) -> str:
+        if self.settings.provider == "ollama":
+            # Ollama の応答は data["message"]["content"] に入る
+            content = (
+                (data.get("message") or {}).get("content")
+                or data.get("response")  # generate API 互換の可能性も考慮
+                or ""
+            )
+            if not content:
+                raise RuntimeError("empty response from ollama")
+            return content
+        choices = data.get("choices") or []
+        if not choices:
+            raise RuntimeError("no choices in response")
+        msg = choices[0].get("message") or {}
+        content = msg.get("content") or ""
+        if not content:
+            raise RuntimeError("empty content in choice")
+        return content
+
+    def _summary_request(self, system_prompt: str, pairs_text: str) -> dict[str, Any]:
+        s = self.settings
+        timeout = self._adaptive_timeout("summarize", 20.0)
+        messages = self._chat_messages(
+            system_prompt, f"以下の問診回答を要約してください。\n{pairs_text}"
+        )
+        if s.provider == "ollama":
+            payload: dict[str, Any] = {
+                "model": s.model,
+                "messages": messages,
+                "stream": False,
+                "options": {"temperature": s.temperature},
+            }
+            return {"url": self._remote_url("/api/chat"), "json": payload, "timeout": timeout}
+        payload = {
+            "model": s.model,
+            "messages": messages,
+            "temperature": s.temperature,
+            "stream": False,
+        }
+        return {
+            "url": self._remote_url("/v1/chat/completions"),
+            "headers": self._openai_headers(),
+            "json": payload,
+            "timeout": timeout,
+        }
+
+    def _parse_summary_response(self, data: dict[str, Any]) -> str:
+        if self.settings.provider == "ollama":
+            content = (
+                (data.get("message") or {}).get("content")
+                or data.get("response")
+                or ""
+            )
+            if content:
+                return content
+            raise RuntimeError("empty content from ollama summary")
+        choices = data.get("choices") or []
+        if choices:
+            msg = choices[0].get("message") or {}
+            content = msg.get("content") or ""
+            if content:
+                return content
+        raise RuntimeError("empty content from lm studio summary")
+
+    @staticmethod
+    def _format_answer_pairs(
+        answers: dict[str, Any], labels: dict[str, str] | None
+    ) -> str:
+        lines: list[str] = []
+        for k, v in answers.items():
+            label = labels.get(k) if labels else k
+            lines.append(f"- {label}: {v}")
+        return "\n".join(lines)
+
+    @_instrumented("generate_followups")
     def generate_followups(
         self,
         context: dict[str, Any],
@@ -643,6 +1043,18 @@ class LLMGateway:
         user_prompt = (prompt or DEFAULT_FOLLOWUP_PROMPT).replace(
             "{max_questions}", str(max_questions)
         )
+        cache_key = self._response_cache_key(
+            "generate_followups",
+            system_prompt=s.system_prompt,
+            prompt=user_prompt,
+            answers=context,
+            extra={"max_questions": max_questions},
+        )
+        cached = self._cache_lookup(cache_key, lock_key)
+        if isinstance(cached, list):
+            return [str(q) for q in cached][:max_questions]
+        if not self._circuit_allows("generate_followups"):
+            return []
         adapter = self._get_adapter()
         if adapter is not None:
             profile_data = self.settings.get_profile(s.provider).model_dump()
@@ -666,6 +1078,9 @@ class LLMGateway:
                 self._record_status(
                     "ok", "generate_followups", "external followups generated"
                 )
+                self._cache_store(
+                    cache_key, result, kind="generate_followups", session_id=lock_key
+                )
                 return result or []
             except Exception as exc:  # noqa: BLE001
                 self._record_status("ng", "generate_followups", str(exc))
@@ -676,94 +1091,14 @@ class LLMGateway:
             # セッション単位の直列化
             lock = self._get_lock(lock_key)
 
-            def _resolved_timeout() -> httpx.Timeout:
-                seconds = (
-                    s.followup_timeout_seconds
-                    if s.followup_timeout_seconds is not None
-                    else DEFAULT_FOLLOWUP_TIMEOUT
-                )
-                safe = max(5.0, min(120.0, float(seconds)))
-                return httpx.Timeout(safe)
-
             def _attempt() -> list[str]:
-                timeout = _resolved_timeout()
-                # プロバイダごとに構造化出力（JSON Schema）を強制する
-                if s.provider == "ollama":
-                    # Ollama: /api/chat に JSON Schema を format フィールドで指定
-                    url = s.base_url.rstrip("/") + "/api/chat"
-                    messages: list[dict[str, Any]] = []
-                    if s.system_prompt:
-                        messages.append({"role": "system", "content": s.system_prompt})
-                    messages.append({
-                        "role": "user",
-                        "content": f"{context}\n{user_prompt}",
-                    })
-                    schema = {
-                        "type": "array",
-                        "items": {"type": "string"},
-                        "minItems": 0,
-                        "maxItems": max_questions,
-                    }
-                    payload: dict[str, Any] = {
-                        "model": s.model,
-                        "messages": messages,
-                        "stream": False,
-                        "options": {"temperature": s.temperature},
-                        # JSON Schema に適合した配列を強制
-                        "format": schema,
-                    }
-                    r = httpx.post(url, json=payload, timeout=timeout)
-                    r.raise_for_status()
-                    data = r.json()
-                    content = (
-                        (data.get("message") or {}).get("content")
-                        or data.get("response")
-                        or ""
+                with self._track_latency("generate_followups"):
+                    r = httpx.post(
+                        **self._followups_request(context, max_questions, user_prompt)
                     )
-                    arr = json.loads(content) if content else []
-                    if isinstance(arr, list):
-                        return [str(x) for x in arr][:max_questions]
-                    raise RuntimeError("invalid structured response from ollama")
-                else:
-                    # LM Studio（OpenAI 互換）: response_format.json_schema で構造化出力を要求
-                    url = s.base_url.rstrip("/") + "/v1/chat/completions"
-                    headers = {"Content-Type": "application/json"}
-                    if s.api_key:
-                        headers["Authorization"] = f"Bearer {s.api_key}"
-                    messages: list[dict[str, Any]] = []
-                    if s.system_prompt:
-                        messages.append({"role": "system", "content": s.system_prompt})
-                    messages.append({"role": "user", "content": f"{context}\n{user_prompt}"})
-                    schema = {
-                        "name": "followup_questions",
-                        "strict": "true",  # LM Studio の Structured Output 仕様に合わせる
-                        "schema": {
-                            "type": "array",
-                            "items": {"type": "string"},
-                            "minItems": 0,
-                            "maxItems": max_questions,
-                        },
-                    }
-                    payload = {
-                        "model": s.model,
-                        "messages": messages,
-                        "temperature": s.temperature,
-                        "stream": False,
-                        "response_format": {
-                            "type": "json_schema",
-                            "json_schema": schema,
-                        },
-                    }
-                    r = httpx.post(url, headers=headers, json=payload, timeout=timeout)
                     r.raise_for_status()
-                    data = r.json()
-                    choices = data.get("choices") or []
-                    if choices:
-                        content = choices[0].get("message", {}).get("content", "")
-                        arr = json.loads(content) if content else []
-                        if isinstance(arr, list):
-                            return [str(x) for x in arr][:max_questions]
-                    raise RuntimeError("invalid structured response from lm studio")
+                return self._parse_followups_response(r.json(), max_questions)
+
             # ロック内で実行し、失敗時はスタブへフォールバックする
             try:
                 if lock:
@@ -774,6 +1109,9 @@ class LLMGateway:
                 self._record_status(
                     "ok", "generate_followups", "remote followups generated"
                 )
+                self._cache_store(
+                    cache_key, result, kind="generate_followups", session_id=lock_key
+                )
                 return result
             except Exception as e:  # noqa: BLE001
                 self._record_status("ng", "generate_followups", str(e))
@@ -787,10 +1125,13 @@ class LLMGateway:
         )
         return []
 
+    @_instrumented("chat")
     def chat(self, message: str) -> str:
         """チャット形式での応答を模擬的に返す。"""
         start = time.perf_counter()
         s = self.settings
+        if not self._circuit_allows("chat"):
+            return self._chat_stub(message, start)
         adapter = self._get_adapter()
         if adapter is not None:
             profile_data = self.settings.get_profile(s.provider).model_dump()
@@ -822,10 +1163,7 @@ class LLMGateway:
                 logging.getLogger("llm").exception("remote_chat_failed; falling back to stub")
 
         # フォールバック（スタブ）
-        result = f"LLM応答[{s.provider}:{s.model},temp={s.temperature}] {message}"
-        duration = (time.perf_counter() - start) * 1000
-        logging.getLogger("llm").info("chat(stub) took_ms=%.1f", duration)
-        return result
+        return self._chat_stub(message, start)
 
     def _chat_remote(self, message: str) -> str:
         """リモート LLM へチャットリクエストを送信する。
@@ -833,61 +1171,11 @@ class LLMGateway:
         provider に応じて Ollama または OpenAI 互換（LM Studio）を呼び分ける。
         エラー時は例外を送出する（呼び出し側でフォールバック）。
         """
-        s = self.settings
-        assert s.base_url, "base_url is required for remote chat"
-        timeout = httpx.Timeout(15.0)
-        if s.provider == "ollama":
-            # Ollama Chat API
-            url = s.base_url.rstrip("/") + "/api/chat"
-            messages = []
-            if s.system_prompt:
-                messages.append({"role": "system", "content": s.system_prompt})
-            messages.append({"role": "user", "content": message})
-            payload: dict[str, Any] = {
-                "model": s.model,
-                "messages": messages,
-                "stream": False,
-                "options": {"temperature": s.temperature},
-            }
-            r = httpx.post(url, json=payload, timeout=timeout)
-            r.raise_for_status()
-            data = r.json()
-            # Ollama の応答は data["message"]["content"] に入る
-            content = (
-                (data.get("message") or {}).get("content")
-                or data.get("response")  # generate API 互換の可能性も考慮
-                or ""
-            )
-            if not content:
-                raise RuntimeError("empty response from ollama")
-            return content
-        else:
-            # LM Studio (OpenAI 互換) Chat Completions API
-            url = s.base_url.rstrip("/") + "/v1/chat/completions"
-            headers = {"Content-Type": "application/json"}
-            if s.api_key:
-                headers["Authorization"] = f"Bearer {s.api_key}"
-            messages = []
-            if s.system_prompt:
-                messages.append({"role": "system", "content": s.system_prompt})
-            messages.append({"role": "user", "content": message})
-            payload = {
-                "model": s.model,
-                "messages": messages,
-                "temperature": s.temperature,
-                "stream": False,
-            }
-            r = httpx.post(url, headers=headers, json=payload, timeout=timeout)
+        assert self.settings.base_url, "base_url is required for remote chat"
+        with self._track_latency("chat"):
+            r = httpx.post(**self._chat_request(message))
             r.raise_for_status()
-            data = r.json()
-            choices = data.get("choices") or []
-            if not choices:
-                raise RuntimeError("no choices in response")
-            msg = choices[0].get("message") or {}
-            content = msg.get("content") or ""
-            if not content:
-                raise RuntimeError("empty content in choice")
-            return content
+        return self._parse_chat_response(r.json())
 
     def summarize(self, answers: dict[str, Any]) -> str:
         """回答内容を簡易に要約した文字列を返す。
@@ -912,6 +1200,7 @@ class LLMGateway:
         return result
 
     # --- カスタムプロンプトを用いたサマリー生成（可能ならリモート） ---
+    @_instrumented("summarize")
     def summarize_with_prompt(
         self,
         system_prompt: str,
@@ -929,11 +1218,20 @@ class LLMGateway:
             s = self.settings
             last_error: Exception | None = None
             # 質問と回答のペアを整形
-            lines: list[str] = []
-            for k, v in answers.items():
-                label = labels.get(k) if labels else k
-                lines.append(f"- {label}: {v}")
-            pairs_text = "\n".join(lines)
+            pairs_text = self._format_answer_pairs(answers, labels)
+
+            cache_key = self._response_cache_key(
+                "summarize",
+                system_prompt=system_prompt,
+                prompt=None,
+                answers=answers,
+                extra={"labels": labels or {}},
+            )
+            cached = self._cache_lookup(cache_key, lock_key)
+            if isinstance(cached, str) and cached:
+                return cached
+            if not self._circuit_allows("summarize"):
+                return self.summarize(answers)
 
             adapter = self._get_adapter()
             if adapter is not None:
@@ -962,9 +1260,12 @@ class LLMGateway:
                         self._record_status(
                             "ok", "summarize", "external summary generated"
                         )
+                        self._cache_store(
+                            cache_key, external, kind="summarize", session_id=lock_key
+                        )
                         return external
                 except Exception as exc:  # noqa: BLE001
-                    last_error = exc
+                    # 失敗はここで1回だけ記録する（末尾の last_error は互換 API 経路の分）
                     self._record_status("ng", "summarize", str(exc))
                     logging.getLogger("llm").warning(
                         "external_summary_failed: %s", exc
@@ -974,61 +1275,11 @@ class LLMGateway:
             if s.enabled and s.base_url:
                 lock = self._get_lock(lock_key)
                 def _attempt() -> str:
-                    timeout = httpx.Timeout(20.0)
-                    if s.provider == "ollama":
-                        url = s.base_url.rstrip("/") + "/api/chat"
-                        messages = []
-                        if system_prompt:
-                            messages.append({"role": "system", "content": system_prompt})
-                        messages.append({
-                            "role": "user",
-                            "content": f"以下の問診回答を要約してください。\n{pairs_text}",
-                        })
-                        payload: dict[str, Any] = {
-                            "model": s.model,
-                            "messages": messages,
-                            "stream": False,
-                            "options": {"temperature": s.temperature},
-                        }
-                        r = httpx.post(url, json=payload, timeout=timeout)
+                    with self._track_latency("summarize"):
+                        r = httpx.post(**self._summary_request(system_prompt, pairs_text))
                         r.raise_for_status()
-                        data = r.json()
-                        content = (
-                            (data.get("message") or {}).get("content")
-                            or data.get("response")
-                            or ""
-                        )
-                        if content:
-                            return content
-                        raise RuntimeError("empty content from ollama summary")
-                    else:
-                        url = s.base_url.rstrip("/") + "/v1/chat/completions"
-                        headers = {"Content-Type": "application/json"}
-                        if s.api_key:
-                            headers["Authorization"] = f"Bearer {s.api_key}"
-                        messages = []
-                        if system_prompt:
-                            messages.append({"role": "system", "content": system_prompt})
-                        messages.append({
-                            "role": "user",
-                            "content": f"以下の問診回答を要約してください。\n{pairs_text}",
-                        })
-                        payload = {
-                            "model": s.model,
-                            "messages": messages,
-                            "temperature": s.temperature,
-                            "stream": False,
-                        }
-                        r = httpx.post(url, headers=headers, json=payload, timeout=timeout)
-                        r.raise_for_status()
-                        data = r.json()
-                        choices = data.get("choices") or []
-                        if choices:
-                            msg = choices[0].get("message") or {}
-                            content = msg.get("content") or ""
-                            if content:
-                                return content
-                        raise RuntimeError("empty content from lm studio summary")
+                    return self._parse_summary_response(r.json())
+
                 try:
                     if lock:
                         with lock:
@@ -1038,13 +1289,17 @@ class LLMGateway:
                     self._record_status(
                         "ok", "summarize", "remote summary generated"
                     )
+                    self._cache_store(
+                        cache_key, result, kind="summarize", session_id=lock_key
+                    )
                     return result
                 except Exception as e:
                     last_error = e
                     logging.getLogger("llm").warning(
                         "summarize_with_prompt attempt failed: %s", e
                     )
-                    if retry > 0:
+                    # 接続不可・タイムアウトは停止中とみなし、再試行で待ち時間を重ねない
+                    if retry > 0 and not isinstance(e, _UNREACHABLE_ERRORS):
                         time.sleep(0.4)
                         try:
                             if lock:
@@ -1055,6 +1310,9 @@ class LLMGateway:
                             self._record_status(
                                 "ok", "summarize", "remote summary generated"
                             )
+                            self._cache_store(
+                                cache_key, result, kind="summarize", session_id=lock_key
+                            )
                             return result
                         except Exception as e2:
                             last_error = e2
@@ -1069,3 +1327,368 @@ class LLMGateway:
 
         # フォールバック（スタブ要約）
         return self.summarize(answers)
+
+    # --- 非同期 API ---
+    def _get_async_lock(self, key: str | None) -> asyncio.Lock | None:
+        if not key:
+            return None
+        with self._locks_guard:
+            lock = self._async_locks.get(key)
+            if lock is None:
+                lock = asyncio.Lock()
+                self._async_locks[key] = lock
+            return lock
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if (
+            self._async_client is None
+            or self._async_client.is_closed
+            or self._async_client_loop is not loop
+        ):
+            self._async_client = httpx.AsyncClient()
+            self._async_client_loop = loop
+        return self._async_client
+
+    async def aclose(self) -> None:
+        """このゲートウェイの共有 AsyncClient を閉じる。
+
+        プロバイダアダプタはプロセス全体で共有されるため、ここでは閉じない
+        （アプリ終了時に `close_provider_adapters` で閉じる）。
+        """
+        client = self._async_client
+        self._async_client = None
+        self._async_client_loop = None
+        if client is not None and not client.is_closed:
+            await client.aclose()
+
+    async def _arequest_json(self, method: str, request: dict[str, Any]) -> dict[str, Any]:
+        client = self._get_async_client()
+        r = await client.request(method, **request)
+        r.raise_for_status()
+        return r.json()
+
+    async def _acall_adapter(
+        self, adapter: LLMProviderAdapter, name: str, *args: Any, **kwargs: Any
+    ) -> Any:
+        """アダプタの非同期メソッドを呼ぶ。未実装ならスレッドで同期版を実行する。"""
+        method = getattr(adapter, f"a{name}", None)
+        if method is not None and inspect.iscoroutinefunction(method):
+            return await method(*args, **kwargs)
+        return await asyncio.to_thread(getattr(adapter, name), *args, **kwargs)
+
+    async def _awith_lock(self, lock: asyncio.Lock | None, coro_factory: Any) -> Any:
+        if lock is None:
+            return await coro_factory()
+        async with lock:
+            return await coro_factory()
+
+    @_instrumented("list_models")
+    async def alist_models(self, *, source: str | None = None) -> list[str]:
+        """`list_models` の非同期版。"""
+        s = self.settings
+        if not s.enabled:
+            if source:
+                self._set_status("disabled", "llm disabled", source, mark_time=True)
+            return []
+
+        adapter = self._get_adapter()
+        profile_data = self.settings.get_profile(s.provider).model_dump()
+        if adapter is not None:
+            try:
+                models = await self._acall_adapter(
+                    adapter, "list_models", self.settings, profile_data, source=source
+                )
+            except Exception as exc:  # noqa: BLE001
+                logging.getLogger("llm").error("adapter_list_models_failed: %s", exc)
+                if source:
+                    self._record_status("ng", source, str(exc))
+                return []
+            if source:
+                self._record_status("ok", source, "model list fetched")
+            return models
+
+        if self._provider_uses_base_url() and not s.base_url:
+            if source:
+                self._set_status("disabled", "base_url missing", source, mark_time=True)
+            return []
+
+        try:
+            data = await self._arequest_json("GET", self._models_request())
+            models = self._parse_models_response(data)
+            if source:
+                self._record_status("ok", source, "model list fetched")
+            return models
+        except Exception as e:  # noqa: BLE001
+            logging.getLogger("llm").error("Failed to list models: %s", e)
+            if source:
+                self._record_status("ng", source, str(e))
+        return []
+
+    @_instrumented("generate_followups")
+    async def agenerate_followups(
+        self,
+        context: dict[str, Any],
+        max_questions: int,
+        prompt: str | None = None,
+        lock_key: str | None = None,
+    ) -> list[str]:
+        """`generate_followups` の非同期版。"""
+        s = self.settings
+        if not s.enabled:
+            return []
+        user_prompt = (prompt or DEFAULT_FOLLOWUP_PROMPT).replace(
+            "{max_questions}", str(max_questions)
+        )
+        cache_key = self._response_cache_key(
+            "generate_followups",
+            system_prompt=s.system_prompt,
+            prompt=user_prompt,
+            answers=context,
+            extra={"max_questions": max_questions},
+        )
+        if cache_key is not None:
+            cached = await asyncio.to_thread(self._cache_lookup, cache_key, lock_key)
+            if isinstance(cached, list):
+                return [str(q) for q in cached][:max_questions]
+        if not self._circuit_allows("generate_followups"):
+            return []
+        lock = self._get_async_lock(lock_key)
+        adapter = self._get_adapter()
+        if adapter is not None:
+            profile_data = self.settings.get_profile(s.provider).model_dump()
+            try:
+                result = await self._awith_lock(
+                    lock,
+                    lambda: self._acall_adapter(
+                        adapter,
+                        "generate_followups",
+                        self.settings,
+                        profile_data,
+                        context,
+                        max_questions,
+                        prompt=user_prompt,
+                    ),
+                )
+                self._record_status(
+                    "ok", "generate_followups", "external followups generated"
+                )
+                await asyncio.to_thread(
+                    self._cache_store,
+                    cache_key,
+                    result,
+                    kind="generate_followups",
+                    session_id=lock_key,
+                )
+                return result or []
+            except Exception as exc:  # noqa: BLE001
+                self._record_status("ng", "generate_followups", str(exc))
+                logging.getLogger("llm").warning(
+                    "external_generate_followups_failed: %s", exc
+                )
+        if s.base_url:
+
+            async def _attempt() -> list[str]:
+                with self._track_latency("generate_followups"):
+                    data = await self._arequest_json(
+                        "POST", self._followups_request(context, max_questions, user_prompt)
+                    )
+                return self._parse_followups_response(data, max_questions)
+
+            try:
+                result = await self._awith_lock(lock, _attempt)
+                self._record_status(
+                    "ok", "generate_followups", "remote followups generated"
+                )
+                await asyncio.to_thread(
+                    self._cache_store,
+                    cache_key,
+                    result,
+                    kind="generate_followups",
+                    session_id=lock_key,
+                )
+                return result
+            except Exception as e:  # noqa: BLE001
+                self._record_status("ng", "generate_followups", str(e))
+                logging.getLogger("llm").warning(
+                    "generate_followups attempt failed: %s", e
+                )
+        logging.getLogger("llm").info(
+            "generate_followups fallback: returning no additional questions"
+        )
+        return []
+
+    @_instrumented("chat")
+    async def achat(self, message: str) -> str:
+        """`chat` の非同期版。"""
+        start = time.perf_counter()
+        s = self.settings
+        if not self._circuit_allows("chat"):
+            return self._chat_stub(message, start)
+        adapter = self._get_adapter()
+        if adapter is not None:
+            profile_data = self.settings.get_profile(s.provider).model_dump()
+            try:
+                reply = await self._acall_adapter(
+                    adapter, "chat", self.settings, profile_data, message
+                )
+            except Exception as exc:  # noqa: BLE001
+                self._record_status("ng", "chat", str(exc))
+                logging.getLogger("llm").exception(
+                    "external_chat_failed; falling back to stub"
+                )
+            else:
+                duration = (time.perf_counter() - start) * 1000
+                logging.getLogger("llm").info(
+                    "chat(external) took_ms=%.1f", duration
+                )
+                self._record_status("ok", "chat", "external chat succeeded")
+                return reply
+        requires_base = self._provider_uses_base_url()
+        if s.enabled and ((not requires_base) or s.base_url):
+            try:
+                with self._track_latency("chat"):
+                    data = await self._arequest_json("POST", self._chat_request(message))
+                reply = self._parse_chat_response(data)
+                duration = (time.perf_counter() - start) * 1000
+                logging.getLogger("llm").info("chat(remote) took_ms=%.1f", duration)
+                self._record_status("ok", "chat", "remote chat succeeded")
+                return reply
+            except Exception as e:  # noqa: BLE001
+                self._record_status("ng", "chat", str(e))
+                logging.getLogger("llm").exception("remote_chat_failed; falling back to stub")
+
+        return self._chat_stub(message, start)
+
+    def _chat_stub(self, message: str, start: float) -> str:
+        s = self.settings
+        result = f"LLM応答[{s.provider}:{s.model},temp={s.temperature}] {message}"
+        duration = (time.perf_counter() - start) * 1000
+        logging.getLogger("llm").info("chat(stub) took_ms=%.1f", duration)
+        return result
+
+    @_instrumented("summarize")
+    async def asummarize_with_prompt(
+        self,
+        system_prompt: str,
+        answers: dict[str, Any],
+        labels: dict[str, str] | None = None,
+        lock_key: str | None = None,
+        retry: int = 1,
+    ) -> str:
+        """`summarize_with_prompt` の非同期版。"""
+        try:
+            s = self.settings
+            last_error: Exception | None = None
+            pairs_text = self._format_answer_pairs(answers, labels)
+            cache_key = self._response_cache_key(
+                "summarize",
+                system_prompt=system_prompt,
+                prompt=None,
+                answers=answers,
+                extra={"labels": labels or {}},
+            )
+            if cache_key is not None:
+                cached = await asyncio.to_thread(self._cache_lookup, cache_key, lock_key)
+                if isinstance(cached, str) and cached:
+                    return cached
+            if not self._circuit_allows("summarize"):
+                return self.summarize(answers)
+            lock = self._get_async_lock(lock_key)
+
+            adapter = self._get_adapter()
+            if adapter is not None:
+                profile_data = self.settings.get_profile(s.provider).model_dump()
+                try:
+                    external = await self._awith_lock(
+                        lock,
+                        lambda: self._acall_adapter(
+                            adapter,
+                            "summarize_with_prompt",
+                            self.settings,
+                            profile_data,
+                            system_prompt,
+                            answers,
+                            labels,
+                        ),
+                    )
+                    if external:
+                        logging.getLogger("llm").info(
+                            "summarize_with_prompt(external) success"
+                        )
+                        self._record_status(
+                            "ok", "summarize", "external summary generated"
+                        )
+                        await asyncio.to_thread(
+                            self._cache_store,
+                            cache_key,
+                            external,
+                            kind="summarize",
+                            session_id=lock_key,
+                        )
+                        return external
+                except Exception as exc:  # noqa: BLE001
+                    # 失敗はここで1回だけ記録する（末尾の last_error は互換 API 経路の分）
+                    self._record_status("ng", "summarize", str(exc))
+                    logging.getLogger("llm").warning(
+                        "external_summary_failed: %s", exc
+                    )
+
+            if s.enabled and s.base_url:
+
+                async def _attempt() -> str:
+                    with self._track_latency("summarize"):
+                        data = await self._arequest_json(
+                            "POST", self._summary_request(system_prompt, pairs_text)
+                        )
+                    return self._parse_summary_response(data)
+
+                for attempt in range(max(0, retry) + 1):
+                    if attempt:
+                        await asyncio.sleep(0.4)
+                    try:
+                        result = await self._awith_lock(lock, _attempt)
+                    except Exception as e:  # noqa: BLE001
+                        last_error = e
+                        logging.getLogger("llm").warning(
+                            "summarize_with_prompt attempt failed: %s", e
+                        )
+                        if isinstance(e, _UNREACHABLE_ERRORS):
+                            break
+                        continue
+                    self._record_status("ok", "summarize", "remote summary generated")
+                    await asyncio.to_thread(
+                        self._cache_store,
+                        cache_key,
+                        result,
+                        kind="summarize",
+                        session_id=lock_key,
+                    )
+                    return result
+            if last_error:
+                self._record_status("ng", "summarize", str(last_error))
+        except Exception as e:  # noqa: BLE001 - フォールバックへ
+            self._record_status("ng", "summarize", str(e))
+            logging.getLogger("llm").exception("summarize_with_prompt failed: %s", e)
+
+        return self.summarize(answers)
+
+
+async def close_provider_adapters() -> None:
+    """登録済みプロバイダアダプタが保持する接続プールを閉じる（アプリ終了時のみ呼ぶ）。"""
+
+    for registration in get_provider_registry().values():
+        adapter = registration.adapter
+        if adapter is None:
+            continue
+        try:
+            async_close = getattr(adapter, "aclose", None)
+            if async_close is not None and inspect.iscoroutinefunction(async_close):
+                await async_close()
+            sync_close = getattr(adapter, "close", None)
+            if callable(sync_close):
+                sync_close()
+        except Exception as exc:  # noqa: BLE001
+            logging.getLogger("llm").warning(
+                "provider_adapter_close_failed provider=%s error=%s", registration.meta.key, exc
+            )
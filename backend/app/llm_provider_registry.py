@@ -100,6 +100,37 @@ class LLMProviderAdapter(Protocol):
     ) -> str:
         """サマリーを生成する。"""
 
+    # --- 非同期版（未実装のアダプタはゲートウェイがスレッドで同期版を実行する） ---
+    async def alist_models(
+        self, settings: "LLMSettings", profile: dict[str, Any], *, source: str | None = None
+    ) -> list[str]:
+        """`list_models` の非同期版。"""
+
+    async def agenerate_followups(
+        self,
+        settings: "LLMSettings",
+        profile: dict[str, Any],
+        context: dict[str, Any],
+        max_questions: int,
+        prompt: str | None = None,
+    ) -> list[str]:
+        """`generate_followups` の非同期版。"""
+
+    async def achat(
+        self, settings: "LLMSettings", profile: dict[str, Any], message: str
+    ) -> str:
+        """`chat` の非同期版。"""
+
+    async def asummarize_with_prompt(
+        self,
+        settings: "LLMSettings",
+        profile: dict[str, Any],
+        system_prompt: str,
+        answers: dict[str, Any],
+        labels: dict[str, str] | None = None,
+    ) -> str:
+        """`summarize_with_prompt` の非同期版。"""
+
 
 @dataclass
 class ProviderRegistration:
@@ -2,11 +2,15 @@ from __future__ import annotations
 
 """Google Cloud Vertex AI 向け LLM プロバイダアダプタ。"""
 
+from datetime import datetime, timedelta, timezone
 from typing import Any, TYPE_CHECKING
+import asyncio
 import json
 import base64
+import hashlib
 import logging
 import re
+import threading
 
 import httpx
 try:  # pragma: no cover
@@ -32,6 +36,9 @@ _DEFAULT_LOCATION = "us-central1"
 _DEFAULT_MAX_OUTPUT_TOKENS = 8192
 _MAX_OUTPUT_TOKENS_LIMIT = 8192
 _MIN_OUTPUT_TOKENS = 32
+# 有効期限までの残りがこの秒数を下回ったらアクセストークンを更新する
+_TOKEN_REFRESH_MARGIN_SECONDS = 300
+_HTTP_POOL_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10)
 
 
 GCP_VERTEX_PROVIDER_META: dict[str, Any] = {
@@ -93,6 +100,15 @@ class GcpVertexProvider:
 
     def __init__(self) -> None:
         self.meta: dict[str, Any] = dict(GCP_VERTEX_PROVIDER_META)
+        # 認証情報はプロファイルの指紋単位で保持し、トークン更新は指紋ごとに直列化する
+        self._credentials_cache: dict[str, GoogleCredentials] = {}
+        self._refresh_locks: dict[str, threading.Lock] = {}
+        self._credentials_guard = threading.Lock()
+        self._http_client: httpx.Client | None = None
+        self._http_client_guard = threading.Lock()
+        # AsyncClient はイベントループに紐づくため、ループごとに作り直す
+        self._async_client: httpx.AsyncClient | None = None
+        self._async_client_loop: asyncio.AbstractEventLoop | None = None
 
     # --- メタ情報関連ユーティリティ ---
     def normalize_profile(self, profile: dict[str, Any]) -> dict[str, Any]:
@@ -114,11 +130,25 @@ class GcpVertexProvider:
         return normalized
 
     # --- 認証処理 ---
-    def _load_credentials(self, profile: dict[str, Any]) -> GoogleCredentials:
+    def _ensure_google_auth(self) -> None:
         if GoogleAuthRequest is None or google_auth is None or service_account is None:
             raise RuntimeError(
                 "google-auth ライブラリがインストールされていません。`pip install google-auth` を実行してください。"
             )
+
+    def _credentials_fingerprint(self, profile: dict[str, Any]) -> str:
+        raw_json = profile.get("service_account_json")
+        if not raw_json:
+            return "adc"
+        # 毎リクエスト通るため JSON の解釈はせず、保存されている文字列をそのままハッシュする
+        if isinstance(raw_json, dict):
+            encoded = json.dumps(raw_json, sort_keys=True, ensure_ascii=False)
+        else:
+            encoded = str(raw_json).strip()
+        return "sa:" + hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def _build_credentials(self, profile: dict[str, Any]) -> GoogleCredentials:
+        self._ensure_google_auth()
         scopes = [_GCP_SCOPE]
         raw_json = profile.get("service_account_json")
         credentials: GoogleCredentials
@@ -127,10 +157,51 @@ class GcpVertexProvider:
             credentials = service_account.Credentials.from_service_account_info(info, scopes=scopes)
         else:
             credentials, _ = google_auth.default(scopes=scopes)
-        if not credentials.valid:
-            credentials.refresh(GoogleAuthRequest())
         return credentials
 
+    @staticmethod
+    def _token_needs_refresh(credentials: GoogleCredentials) -> bool:
+        if not getattr(credentials, "token", None):
+            return True
+        expiry = getattr(credentials, "expiry", None)
+        if expiry is None:
+            return False
+        # google-auth の expiry はタイムゾーンなしの UTC
+        if expiry.tzinfo is None:
+            expiry = expiry.replace(tzinfo=timezone.utc)
+        remaining = expiry - datetime.now(timezone.utc)
+        return remaining <= timedelta(seconds=_TOKEN_REFRESH_MARGIN_SECONDS)
+
+    def _load_credentials(self, profile: dict[str, Any]) -> GoogleCredentials:
+        """プロファイルに対応する認証情報を返す。期限が近い場合のみ更新する。"""
+        self._ensure_google_auth()
+        fingerprint = self._credentials_fingerprint(profile)
+        with self._credentials_guard:
+            credentials = self._credentials_cache.get(fingerprint)
+            refresh_lock = self._refresh_locks.setdefault(fingerprint, threading.Lock())
+        if credentials is None:
+            credentials = self._build_credentials(profile)
+            with self._credentials_guard:
+                credentials = self._credentials_cache.setdefault(fingerprint, credentials)
+        if self._token_needs_refresh(credentials):
+            with refresh_lock:
+                # 待機中に他スレッドが更新済みであれば再取得しない
+                if self._token_needs_refresh(credentials):
+                    try:
+                        credentials.refresh(GoogleAuthRequest())
+                    except Exception:
+                        with self._credentials_guard:
+                            if self._credentials_cache.get(fingerprint) is credentials:
+                                self._credentials_cache.pop(fingerprint, None)
+                        raise
+        return credentials
+
+    def clear_credentials_cache(self) -> None:
+        """保持している認証情報を破棄する。"""
+        with self._credentials_guard:
+            self._credentials_cache.clear()
+            self._refresh_locks.clear()
+
     def _parse_service_account_json(self, raw: Any) -> dict[str, Any]:
         if isinstance(raw, dict):
             return raw
@@ -156,13 +227,20 @@ class GcpVertexProvider:
             )
         credentials = self._load_credentials(profile)
         token = credentials.token
-        if not token:
-            credentials.refresh(GoogleAuthRequest())
-            token = credentials.token
         if not token:
             raise RuntimeError("GCP のアクセストークンを取得できませんでした")
         return {"Authorization": f"Bearer {token}"}
 
+    async def _aget_auth_headers(self, profile: dict[str, Any]) -> dict[str, str]:
+        """非同期版。キャッシュ済みトークンが有効ならスレッドを使わずに返す。"""
+        fingerprint = self._credentials_fingerprint(profile)
+        with self._credentials_guard:
+            credentials = self._credentials_cache.get(fingerprint)
+        if credentials is not None and not self._token_needs_refresh(credentials):
+            return {"Authorization": f"Bearer {credentials.token}"}
+        # google-auth のトークン更新は同期 I/O のためワーカースレッドで実行する
+        return await asyncio.to_thread(self._get_auth_headers, profile)
+
     # --- API 呼び出し ---
     def _build_base_url(self, profile: dict[str, Any]) -> str:
         location = profile.get("location") or _DEFAULT_LOCATION
@@ -190,14 +268,68 @@ class GcpVertexProvider:
         json_payload: dict[str, Any] | None = None,
         timeout_seconds: float = 30.0,
     ) -> httpx.Response:
-        with httpx.Client(timeout=timeout_seconds) as client:
-            response = client.request(method, url, headers=headers, json=json_payload)
-            try:
-                response.raise_for_status()
-            except httpx.HTTPStatusError as exc:
-                detail = self._extract_error_message(response)
-                raise RuntimeError(detail) from exc
-            return response
+        client = self._get_http_client()
+        response = client.request(
+            method, url, headers=headers, json=json_payload, timeout=timeout_seconds
+        )
+        try:
+            response.raise_for_status()
+        except httpx.HTTPStatusError as exc:
+            detail = self._extract_error_message(response)
+            raise RuntimeError(detail) from exc
+        return response
+
+    def _get_http_client(self) -> httpx.Client:
+        """接続プールを共有する HTTP クライアントを返す。"""
+        with self._http_client_guard:
+            if self._http_client is None or self._http_client.is_closed:
+                self._http_client = httpx.Client(limits=_HTTP_POOL_LIMITS)
+            return self._http_client
+
+    def close(self) -> None:
+        """共有 HTTP クライアントを閉じる。"""
+        with self._http_client_guard:
+            if self._http_client is not None:
+                self._http_client.close()
+                self._http_client = None
+
+    def _get_async_http_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if (
+            self._async_client is None
+            or self._async_client.is_closed
+            or self._async_client_loop is not loop
+        ):
+            self._async_client = httpx.AsyncClient(limits=_HTTP_POOL_LIMITS)
+            self._async_client_loop = loop
+        return self._async_client
+
+    async def _aperform_request(
+        self,
+        method: str,
+        url: str,
+        headers: dict[str, str],
+        json_payload: dict[str, Any] | None = None,
+        timeout_seconds: float = 30.0,
+    ) -> httpx.Response:
+        client = self._get_async_http_client()
+        response = await client.request(
+            method, url, headers=headers, json=json_payload, timeout=timeout_seconds
+        )
+        try:
+            response.raise_for_status()
+        except httpx.HTTPStatusError as exc:
+            detail = self._extract_error_message(response)
+            raise RuntimeError(detail) from exc
+        return response
+
+    async def aclose(self) -> None:
+        """共有 AsyncClient を閉じる。"""
+        client = self._async_client
+        self._async_client = None
+        self._async_client_loop = None
+        if client is not None and not client.is_closed:
+            await client.aclose()
 
     def _extract_error_message(self, response: httpx.Response) -> str:
         try:
@@ -207,15 +339,29 @@ class GcpVertexProvider:
         message = data.get("error", {}).get("message") if isinstance(data, dict) else None
         return message or f"HTTP {response.status_code}"
 
+    def _build_models_url(self, profile: dict[str, Any]) -> str:
+        base_url = self._build_base_url(profile)
+        project_id = profile.get("project_id")
+        location = profile.get("location") or _DEFAULT_LOCATION
+        return f"{base_url}/v1/projects/{project_id}/locations/{location}/publishers/google/models"
+
     def list_models(self, settings: LLMSettings, profile: dict[str, Any], *, source: str | None = None) -> list[str]:
         profile = self.normalize_profile(profile)
         headers = self._get_auth_headers(profile)
-        base_url = self._build_base_url(profile)
+        response = self._perform_request("GET", self._build_models_url(profile), headers)
+        return self._parse_models(profile, response.json())
+
+    async def alist_models(
+        self, settings: LLMSettings, profile: dict[str, Any], *, source: str | None = None
+    ) -> list[str]:
+        profile = self.normalize_profile(profile)
+        headers = await self._aget_auth_headers(profile)
+        response = await self._aperform_request("GET", self._build_models_url(profile), headers)
+        return self._parse_models(profile, response.json())
+
+    def _parse_models(self, profile: dict[str, Any], data: Any) -> list[str]:
         project_id = profile.get("project_id")
         location = profile.get("location") or _DEFAULT_LOCATION
-        url = f"{base_url}/v1/projects/{project_id}/locations/{location}/publishers/google/models"
-        response = self._perform_request("GET", url, headers)
-        data = response.json()
         models: list[str] = []
         for item in (data or {}).get("models", []):
             if not isinstance(item, dict):
@@ -395,11 +541,29 @@ class GcpVertexProvider:
         response_mime_type: str | None = None,
         response_schema: dict[str, Any] | None = None,
     ) -> str:
-        profile = self.normalize_profile(profile)
-        base_url = self._build_base_url(profile)
-        model_path = self._build_model_path(profile)
+        profile, url, payload = self._prepare_generation(
+            settings,
+            profile,
+            user_parts=user_parts,
+            max_tokens=max_tokens,
+            response_mime_type=response_mime_type,
+            response_schema=response_schema,
+        )
         headers = self._get_auth_headers(profile)
-        payload = self._build_generation_payload(
+        response = self._perform_request("POST", url, headers, payload)
+        return self._finish_generation(response.json())
+
+    async def _agenerate_text(
+        self,
+        settings: LLMSettings,
+        profile: dict[str, Any],
+        *,
+        user_parts: list[dict[str, str]],
+        max_tokens: int | None = None,
+        response_mime_type: str | None = None,
+        response_schema: dict[str, Any] | None = None,
+    ) -> str:
+        profile, url, payload = self._prepare_generation(
             settings,
             profile,
             user_parts=user_parts,
@@ -407,9 +571,24 @@ class GcpVertexProvider:
             response_mime_type=response_mime_type,
             response_schema=response_schema,
         )
+        headers = await self._aget_auth_headers(profile)
+        response = await self._aperform_request("POST", url, headers, payload)
+        return self._finish_generation(response.json())
+
+    def _prepare_generation(
+        self,
+        settings: LLMSettings,
+        profile: dict[str, Any],
+        **kwargs: Any,
+    ) -> tuple[dict[str, Any], str, dict[str, Any]]:
+        profile = self.normalize_profile(profile)
+        base_url = self._build_base_url(profile)
+        model_path = self._build_model_path(profile)
+        payload = self._build_generation_payload(settings, profile, **kwargs)
         url = f"{base_url}/v1/{model_path}:generateContent"
-        response = self._perform_request("POST", url, headers, payload)
-        data = response.json()
+        return profile, url, payload
+
+    def _finish_generation(self, data: dict[str, Any]) -> str:
         self._log_response_metadata(data)
         text = self._extract_text(data)
         return text.strip()
@@ -448,6 +627,31 @@ class GcpVertexProvider:
         max_questions: int,
         prompt: str | None = None,
     ) -> list[str]:
+        response_text = self._generate_text(
+            settings,
+            profile,
+            **self._followups_request(context, max_questions, prompt),
+        )
+        return self._parse_followups(response_text, max_questions)
+
+    async def agenerate_followups(
+        self,
+        settings: LLMSettings,
+        profile: dict[str, Any],
+        context: dict[str, Any],
+        max_questions: int,
+        prompt: str | None = None,
+    ) -> list[str]:
+        response_text = await self._agenerate_text(
+            settings,
+            profile,
+            **self._followups_request(context, max_questions, prompt),
+        )
+        return self._parse_followups(response_text, max_questions)
+
+    def _followups_request(
+        self, context: dict[str, Any], max_questions: int, prompt: str | None
+    ) -> dict[str, Any]:
         base_prompt = prompt or (
             "以下の患者情報を参照し、診療に必要な追質問を日本語の敬体で最大{max_questions}個生成してください。"
             "質問のみを JSON 配列で返してください。"
@@ -459,16 +663,16 @@ class GcpVertexProvider:
             text,
             len(details),
         )
-        response_text = self._generate_text(
-            settings,
-            profile,
-            user_parts=[{"text": f"{text}\n患者情報: {details}"}],
-            response_mime_type="application/json",
-            response_schema={
+        return {
+            "user_parts": [{"text": f"{text}\n患者情報: {details}"}],
+            "response_mime_type": "application/json",
+            "response_schema": {
                 "type": "ARRAY",
                 "items": {"type": "STRING"},
             },
-        )
+        }
+
+    def _parse_followups(self, response_text: str, max_questions: int) -> list[str]:
         truncated = response_text if len(response_text) <= 2000 else f"{response_text[:2000]}…"
         _LOGGER.info(
             "vertex_followups_response_raw length=%d preview=%s",
@@ -555,6 +759,18 @@ class GcpVertexProvider:
             user_parts=[{"text": str(message)}],
         )
 
+    async def achat(
+        self,
+        settings: LLMSettings,
+        profile: dict[str, Any],
+        message: str,
+    ) -> str:
+        return await self._agenerate_text(
+            settings,
+            profile,
+            user_parts=[{"text": str(message)}],
+        )
+
     def summarize_with_prompt(
         self,
         settings: LLMSettings,
@@ -563,6 +779,32 @@ class GcpVertexProvider:
         answers: dict[str, Any],
         labels: dict[str, str] | None = None,
     ) -> str:
+        return self._generate_text(
+            settings,
+            profile,
+            user_parts=self._summary_parts(system_prompt, answers, labels),
+        )
+
+    async def asummarize_with_prompt(
+        self,
+        settings: LLMSettings,
+        profile: dict[str, Any],
+        system_prompt: str,
+        answers: dict[str, Any],
+        labels: dict[str, str] | None = None,
+    ) -> str:
+        return await self._agenerate_text(
+            settings,
+            profile,
+            user_parts=self._summary_parts(system_prompt, answers, labels),
+        )
+
+    def _summary_parts(
+        self,
+        system_prompt: str,
+        answers: dict[str, Any],
+        labels: dict[str, str] | None,
+    ) -> list[dict[str, str]]:
         summary_prompt = system_prompt or (
             "以下の問診結果をもとに、患者の状況を簡潔な日本語のサマリーにまとめてください。"
         )
@@ -570,8 +812,4 @@ class GcpVertexProvider:
             "answers": answers,
             "labels": labels or {},
         }, ensure_ascii=False)
-        return self._generate_text(
-            settings,
-            profile,
-            user_parts=[{"text": f"{summary_prompt}\n\nデータ: {payload}"}],
-        )
+        return [{"text": f"{summary_prompt}\n\nデータ: {payload}"}]
@@ -3,14 +3,16 @@
 問診テンプレート取得やチャット応答を含む簡易 API を提供する。
 """
 from __future__ import annotations
-from typing import Any, Iterable, Literal
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, Iterator, Literal, TypeVar
+from collections import OrderedDict, deque
 from uuid import uuid4
+import asyncio
+import threading
 import time
 from datetime import datetime, timedelta, UTC
 from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 import os
 import io
-import zipfile
 import re
 import csv
 import json
@@ -33,6 +35,7 @@ load_dotenv(_PROJECT_ROOT / ".env")
 
 from fastapi import FastAPI, HTTPException, Response, Request, BackgroundTasks, Query, UploadFile, File, Form
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.background import BackgroundTask
 from fastapi.responses import StreamingResponse
 import sqlite3
 from pydantic import BaseModel, Field
@@ -47,7 +50,19 @@ from .llm_gateway import (
     ProviderProfile,
     DEFAULT_FOLLOWUP_PROMPT,
     DEFAULT_SYSTEM_PROMPT,
+    close_provider_adapters,
 )
+from .analytics_export import (
+    build_record,
+    iter_csv as iter_analytics_csv,
+    iter_parquet,
+    parquet_available,
+    plan_columns,
+)
+from .llm_cache import LLMResponseCache
+from .render_cache import RenderedDocumentCache, build_render_key
+from .pdf_render_pool import PDFRenderPool, build_render_job
+from .zip_stream import iter_zip_stream
 from .llm_provider_registry import get_provider_meta_list, ProviderMetaSchema
 from cryptography.fernet import Fernet, InvalidToken
 
@@ -62,7 +77,12 @@ from .db import (
     save_session,
     list_sessions as db_list_sessions,
     get_session as db_get_session,
+    get_sessions as db_get_sessions,
+    find_latest_finalized_session_id as db_find_latest_finalized_session_id,
     list_sessions_finalized_after,
+    append_session_event as db_append_session_event,
+    list_session_events,
+    prune_session_events,
     upsert_summary_prompt,
     get_summary_prompt,
     get_summary_config,
@@ -99,7 +119,7 @@ from .db import (
 from .validator import Validator
 from .session_fsm import SessionFSM
 from .structured_context import StructuredContextManager
-from .pdf_renderer import PDFLayoutMode, render_session_pdf
+from .pdf_renderer import PDFLayoutMode
 from .personal_info import (
     format_lines as format_personal_info_lines,
     format_multiline as format_personal_info_multiline,
@@ -107,13 +127,27 @@ from .personal_info import (
 from .postal_code_lookup import (
     PostalCodeImportError,
     get_postal_dictionary_info,
+    SEARCH_CANDIDATE_LIMIT as POSTAL_SEARCH_CANDIDATE_LIMIT,
+    SEARCH_MAX_LIMIT as POSTAL_SEARCH_MAX_LIMIT,
     import_postal_csv,
     lookup_postal_code,
+    search_postal_codes,
 )
 from .secret_manager import load_secrets
 import logging
-from logging.handlers import RotatingFileHandler
-from .notifications import SessionEventBroker
+from .db.instrumentation import stats as db_call_stats
+from .metrics import OPENMETRICS_CONTENT_TYPE, REGISTRY as METRICS_REGISTRY
+from .profiling import PROFILER, ProfileCapture
+from .access_log import (
+    access_logger,
+    begin_request,
+    bind_session_id,
+    configure_logging,
+    end_request,
+    should_log,
+    shutdown_logging,
+)
+from .notifications import EventLogRelay, SessionEventBroker, TooManySubscribers, message_event_id
 
 load_secrets()
 _settings = get_settings()
@@ -569,26 +603,112 @@ def fetch_system_logo(filename: str) -> Response:
     return _build_binary_asset_response(asset, filename)
 
 
+HTTP_REQUEST_DURATION = METRICS_REGISTRY.histogram(
+    "monshin_http_request_duration_seconds",
+    "HTTP request latency by route template and status",
+    ("method", "route", "status"),
+)
+
+
+def _route_template(request: Request) -> str:
+    # 実パスではなくルート定義のパスを使い、ラベルの種類が増え続けないようにする
+    return getattr(request.scope.get("route"), "path", None) or "unmatched"
+
+
+def _observe_request(request: Request, status: int, seconds: float) -> None:
+    HTTP_REQUEST_DURATION.observe(seconds, method=request.method, route=_route_template(request), status=status)
+
+
+def _log_access(request: Request, status: int, seconds: float, fields: dict[str, Any]) -> None:
+    """アクセスログを1行積む（整形と書き込みは access_log の書き込みスレッドで行う）。"""
+    route = _route_template(request)
+    if not should_log(route, status):
+        return
+    duration = seconds * 1000
+    session_id = fields.get("session_id") or (request.scope.get("path_params") or {}).get("session_id")
+    access_logger.info(
+        "api_call path=%s method=%s status=%d duration_ms=%.1f",
+        request.url.path,
+        request.method,
+        status,
+        duration,
+        extra={
+            "fields": {
+                "method": request.method,
+                "path": request.url.path,
+                "route": route,
+                "status": status,
+                "duration_ms": round(duration, 1),
+                "session_id": session_id,
+                "llm_calls": fields["llm_calls"],
+                "llm_ms": round(fields["llm_ms"], 1),
+                "llm": fields.get("llm", []),
+            }
+        },
+    )
+
+
 @app.middleware("http")
 async def log_middleware(request: Request, call_next):
     """API 呼び出しとエラーを記録するミドルウェア。"""
     start = time.perf_counter()
+    fields, token = begin_request()
     try:
         response = await call_next(request)
     except Exception:  # noqa: BLE001 - ログ出力後に再送出
         logger.exception("api_error path=%s method=%s", request.url.path, request.method)
+        _observe_request(request, 500, time.perf_counter() - start)
+        _log_access(request, 500, time.perf_counter() - start, fields)
         raise
-    duration = (time.perf_counter() - start) * 1000
-    logger.info(
-        "api_call path=%s method=%s status=%d duration_ms=%.1f",
-        request.url.path,
-        request.method,
-        response.status_code,
-        duration,
-    )
+    finally:
+        end_request(token)
+    seconds = time.perf_counter() - start
+    _observe_request(request, response.status_code, seconds)
+    _log_access(request, response.status_code, seconds, fields)
+    return response
+
+
+async def profile_middleware(request: Request, call_next):
+    """設定された対象リクエストだけをサンプリングプロファイラで計測する。
+
+    `MONSHINMATE_PROFILE_*` が未設定の場合は登録しないため、通常運用では経路に入らない。
+    """
+    if not PROFILER.enabled or not PROFILER.should_profile(request.url.path, request.headers):
+        return await call_next(request)
+    capture = PROFILER.start(request.method, request.url.path)
+    try:
+        response = await call_next(request)
+    except BaseException:
+        PROFILER.stop(capture, 500)
+        await asyncio.to_thread(_save_profile, capture)
+        raise
+    body_iterator = response.body_iterator
+
+    async def profiled_body() -> AsyncIterator[bytes]:
+        # ストリーミング応答（一括 ZIP・CSV 出力など）は本文の生成中に処理が走るため、送り終えるまで計測する
+        try:
+            async for chunk in body_iterator:
+                yield chunk
+        finally:
+            PROFILER.stop(capture, response.status_code)
+
+    response.body_iterator = profiled_body()
+    # ファイル書き出しは応答の送信後に行い、計測対象の応答時間に含めない
+    response.background = BackgroundTask(_save_profile, capture)
     return response
 
 
+if PROFILER.enabled:
+    app.middleware("http")(profile_middleware)
+
+
+def _save_profile(capture: ProfileCapture) -> None:
+    try:
+        PROFILER.save(capture)
+    except Exception:  # noqa: BLE001 - 保存に失敗しても応答には影響させない
+        logger.exception("profile_save_failed path=%s", capture.path)
+
+
 def make_default_initial_items() -> list[dict[str, Any]]:
     """初診テンプレートに投入する問診項目定義。"""
 
@@ -974,19 +1094,11 @@ def on_startup() -> None:
     """アプリ起動時の初期化処理。DB 初期化とデフォルトテンプレ投入。"""
     init_db()
     _migrate_legacy_assets()
-    # 監査ログ（security）をファイルにも出力
-    try:
-        log_dir = Path(__file__).resolve().parent / "logs"
-        log_dir.mkdir(exist_ok=True)
-        sec_log = logging.getLogger("security")
-        if not any(isinstance(h, RotatingFileHandler) for h in sec_log.handlers):
-            handler = RotatingFileHandler(log_dir / "security.log", maxBytes=1_000_000, backupCount=5)
-            formatter = logging.Formatter("%(asctime)s %(levelname)s %(message)s")
-            handler.setFormatter(formatter)
-            sec_log.addHandler(handler)
-            sec_log.setLevel(logging.INFO)
+    # アクセスログ（JSON）と監査ログ（security）をキュー経由でファイルに出力
+    try:
+        configure_logging()
     except Exception:
-        logging.getLogger(__name__).exception("failed to setup security logger")
+        logging.getLogger(__name__).exception("failed to setup access/security loggers")
     try:
         logging.getLogger(__name__).info("database_path=%s", DEFAULT_DB_PATH)
     except Exception:
@@ -1009,6 +1121,7 @@ def on_startup() -> None:
         llm_followup_max_questions=5,
     )
     _ensure_default_prompts()
+    prune_expired_session_events()
     # 保存済みの LLM 設定があれば読み込む
     try:
         stored = load_llm_settings()
@@ -1044,6 +1157,26 @@ def on_startup() -> None:
     return
 
 
+@app.on_event("startup")
+async def start_session_event_relay() -> None:
+    """eventlog 方式の場合、イベントログの中継を開始する。メトリクスの定期書き出しも開始する。"""
+    if session_event_relay is not None:
+        session_event_relay.start()
+    METRICS_REGISTRY.start_flusher()
+
+
+@app.on_event("shutdown")
+async def on_shutdown() -> None:
+    """共有 HTTP クライアント（プロバイダアダプタの接続プールを含む）と PDF 描画プロセス、イベント中継を閉じ、メトリクスとログを書き出す。"""
+    if session_event_relay is not None:
+        await session_event_relay.stop()
+    await llm_gateway.aclose()
+    await close_provider_adapters()
+    pdf_render_pool.shutdown()
+    METRICS_REGISTRY.stop_flusher()
+    shutdown_logging()
+
+
 default_llm_settings = LLMSettings(
     provider="ollama",
     model="llama2",
@@ -1054,11 +1187,121 @@ default_llm_settings = LLMSettings(
     base_url="http://localhost:11434",
 )
 default_llm_settings.sync_to_active_profile()
-llm_gateway = LLMGateway(default_llm_settings)
+llm_response_cache = LLMResponseCache()
+rendered_document_cache = RenderedDocumentCache()
+llm_gateway = LLMGateway(default_llm_settings, response_cache=llm_response_cache)
+pdf_render_pool = PDFRenderPool()
+# 確定時に PDF を事前描画してキャッシュしておくか
+PDF_PRERENDER_ENABLED = os.getenv("MONSHINMATE_PDF_PRERENDER", "1").lower() in {"1", "true", "yes", "on"}
 
 # メモリ上でセッションを保持する簡易ストア
 sessions: dict[str, "Session"] = {}
-session_events = SessionEventBroker()
+# SSE 購読者ごとの未送信キュー上限・同時購読数の上限・キューが溢れた場合の扱い（drop_oldest / disconnect）
+SESSION_EVENT_QUEUE_SIZE = int(os.getenv("MONSHINMATE_SESSION_EVENT_QUEUE_SIZE", "100"))
+SESSION_EVENT_MAX_SUBSCRIBERS = int(os.getenv("MONSHINMATE_SESSION_EVENT_MAX_SUBSCRIBERS", "1000"))
+SESSION_EVENT_OVERFLOW_POLICY = os.getenv("MONSHINMATE_SESSION_EVENT_OVERFLOW", "drop_oldest").strip().lower()
+session_events = SessionEventBroker(
+    max_queue=SESSION_EVENT_QUEUE_SIZE,
+    max_subscribers=SESSION_EVENT_MAX_SUBSCRIBERS,
+    overflow_policy="disconnect" if SESSION_EVENT_OVERFLOW_POLICY == "disconnect" else "drop_oldest",
+)
+# 管理画面イベントログの保持期間（日）。再接続時の取りこぼし補完に使う
+SESSION_EVENT_RETENTION_DAYS = float(os.getenv("MONSHINMATE_SESSION_EVENT_RETENTION_DAYS", "7"))
+# この件数を追記するごとに保持期間を過ぎたイベントを削除する
+SESSION_EVENT_PRUNE_INTERVAL = 500
+_session_event_appends = 0
+
+
+def prune_expired_session_events() -> int:
+    """保持期間を過ぎたイベントをイベントログから削除する。"""
+
+    try:
+        cutoff = datetime.now(UTC) - timedelta(days=SESSION_EVENT_RETENTION_DAYS)
+        return prune_session_events(cutoff)
+    except Exception as exc:  # noqa: BLE001 - 削除できなくても配信は継続する
+        logger.warning("session_events_prune_failed: %s", exc)
+        return 0
+
+
+def record_session_event(
+    event_name: str,
+    payload: dict[str, Any],
+    *,
+    session_id: str | None = None,
+    occurred_at: datetime | None = None,
+) -> str | None:
+    """イベントをイベントログへ追記し、SSE の id として使う文字列を返す。
+
+    イベントログに未対応のアダプタや書き込み失敗時は None を返す。
+    """
+
+    global _session_event_appends
+    try:
+        event_id = db_append_session_event(
+            event_name, payload, session_id=session_id, occurred_at=occurred_at
+        )
+    except Exception as exc:  # noqa: BLE001 - 記録できなくても配信は継続する
+        logger.warning("session_event_record_failed name=%s: %s", event_name, exc)
+        return None
+    if event_id is None:
+        return None
+    _session_event_appends += 1
+    if _session_event_appends % SESSION_EVENT_PRUNE_INTERVAL == 0:
+        prune_expired_session_events()
+    return str(event_id)
+
+
+# 管理画面イベントの配信方式。memory: プロセス内のみ / eventlog: イベントログのポーリングでプロセス間に配信
+SESSION_EVENT_BACKEND = os.getenv("MONSHINMATE_SESSION_EVENT_BACKEND", "memory").strip().lower()
+SESSION_EVENT_POLL_INTERVAL = float(os.getenv("MONSHINMATE_SESSION_EVENT_POLL_INTERVAL", "1.0"))
+
+
+def _fetch_session_events_after(cursor: int, limit: int) -> list[dict[str, Any]]:
+    return list_session_events(after_id=cursor, limit=limit, oldest_first=True) or []
+
+
+def _latest_session_event_id() -> int:
+    rows = list_session_events(limit=1) or []
+    return int(rows[-1]["id"]) if rows else 0
+
+
+session_event_relay: EventLogRelay | None = None
+if SESSION_EVENT_BACKEND == "eventlog":
+    session_event_relay = EventLogRelay(
+        session_events,
+        _fetch_session_events_after,
+        _latest_session_event_id,
+        interval=SESSION_EVENT_POLL_INTERVAL,
+    )
+elif SESSION_EVENT_BACKEND != "memory":
+    logger.warning("unknown MONSHINMATE_SESSION_EVENT_BACKEND=%s; using memory", SESSION_EVENT_BACKEND)
+
+
+async def emit_session_event(
+    event_name: str,
+    payload: dict[str, Any],
+    *,
+    session_id: str | None = None,
+    occurred_at: datetime | None = None,
+    fallback_event_id: str | None = None,
+) -> str | None:
+    """イベントをイベントログへ記録し、購読者へ配信する。
+
+    eventlog 方式で中継が動作中の場合、このプロセスの購読者にも中継経由で届くため直接は配信しない。
+    """
+
+    event_id = await asyncio.to_thread(
+        record_session_event, event_name, payload, session_id=session_id, occurred_at=occurred_at
+    )
+    if event_id is not None and session_event_relay is not None and session_event_relay.running:
+        return event_id
+    try:
+        await session_events.publish(
+            payload, event_id=event_id or fallback_event_id, event_name=event_name
+        )
+    except Exception:
+        logger.exception("session_event_publish_failed name=%s id=%s", event_name, session_id)
+    return event_id
 
 
 @app.get("/health")
@@ -1695,12 +1938,12 @@ class ChatResponse(BaseModel):
 
 
 @app.post("/llm/chat", response_model=ChatResponse)
-def llm_chat(req: ChatRequest) -> ChatResponse:
+async def llm_chat(req: ChatRequest, request: Request) -> ChatResponse:
     """LLM との対話を行う。"""
 
-    global METRIC_LLM_CHATS
-    METRIC_LLM_CHATS += 1
-    return ChatResponse(reply=llm_gateway.chat(req.message))
+    METRIC_LLM_CHATS.inc()
+    reply = await _await_unless_disconnected(request, llm_gateway.achat(req.message))
+    return ChatResponse(reply=reply)
 
 
 @app.get("/llm/providers", response_model=list[ProviderMetaSchema])
@@ -1943,141 +2186,6 @@ def build_markdown_lines(s: dict, rows: list[tuple[str, str]], vt_label: str) ->
     return lines
 
 
-DATE_FORMATS = [
-    "%Y-%m-%d",
-    "%Y/%m/%d",
-    "%Y.%m.%d",
-    "%Y年%m月%d日",
-    "%Y %m %d",
-]
-
-ERA_YEAR_PATTERN = re.compile(
-    r"(令和|reiwa|R|平成|heisei|H|昭和|showa|S|大正|taisho|T|明治|meiji|M)\s*(元|\d{1,2})",
-    re.IGNORECASE,
-)
-ERA_BASE_YEARS: dict[str, int] = {
-    "令和": 2018,
-    "reiwa": 2018,
-    "r": 2018,
-    "平成": 1988,
-    "heisei": 1988,
-    "h": 1988,
-    "昭和": 1925,
-    "showa": 1925,
-    "s": 1925,
-    "大正": 1911,
-    "taisho": 1911,
-    "t": 1911,
-    "明治": 1867,
-    "meiji": 1867,
-    "m": 1867,
-}
-
-
-def _try_parse_iso_date(value: str) -> str | None:
-    trimmed = value.strip()
-    if not trimmed:
-        return None
-    normalized_values = [trimmed, trimmed.replace(" ", "")]
-    for candidate in normalized_values:
-        for fmt in DATE_FORMATS:
-            try:
-                dt = datetime.strptime(candidate, fmt)
-                return dt.strftime("%Y-%m-%d")
-            except ValueError:
-                continue
-    digits_only = re.sub(r"\D", "", trimmed)
-    if len(digits_only) == 8:
-        try:
-            year = int(digits_only[0:4])
-            month = int(digits_only[4:6])
-            day = int(digits_only[6:8])
-            dt = datetime(year, month, day)
-            return dt.strftime("%Y-%m-%d")
-        except ValueError:
-            return None
-    era_candidate = _try_parse_japanese_era_date(trimmed)
-    if era_candidate:
-        year, month, day = era_candidate
-        try:
-            dt = datetime(year, month, day)
-            return dt.strftime("%Y-%m-%d")
-        except ValueError:
-            return None
-    return None
-
-
-def _try_parse_japanese_era_date(value: str) -> tuple[int, int, int] | None:
-    match = ERA_YEAR_PATTERN.search(value)
-    if not match:
-        return None
-    era_key = match.group(1)
-    year_token = match.group(2)
-    base = ERA_BASE_YEARS.get(era_key.lower()) or ERA_BASE_YEARS.get(era_key)  # type: ignore[arg-type]
-    if base is None:
-        return None
-    if year_token == "元":
-        year_number = 1
-    else:
-        try:
-            year_number = int(year_token)
-        except ValueError:
-            return None
-    year = base + year_number
-    remainder = value[match.end():]
-    month_day = _extract_month_day_from_text(remainder)
-    if not month_day:
-        return None
-    return year, month_day[0], month_day[1]
-
-
-def _extract_month_day_from_text(text: str) -> tuple[int, int] | None:
-    if not text:
-        return None
-    month_match = re.search(r"(\d{1,2})月", text)
-    day_match = re.search(r"(\d{1,2})日", text)
-    if month_match and day_match:
-        try:
-            month = int(month_match.group(1))
-            day = int(day_match.group(1))
-        except ValueError:
-            return None
-        if 1 <= month <= 12 and 1 <= day <= 31:
-            return month, day
-    pair = re.search(r"(\d{1,2})\D+(\d{1,2})", text)
-    if pair:
-        try:
-            month = int(pair.group(1))
-            day = int(pair.group(2))
-        except ValueError:
-            return None
-        if 1 <= month <= 12 and 1 <= day <= 31:
-            return month, day
-    digits = re.findall(r"(\d{1,2})", text)
-    if len(digits) >= 2:
-        try:
-            month = int(digits[0])
-            day = int(digits[1])
-        except ValueError:
-            return None
-        if 1 <= month <= 12 and 1 <= day <= 31:
-            return month, day
-    return None
-
-
-def _normalize_dob_variants(value: str | None) -> set[str]:
-    if not value:
-        return set()
-    trimmed = value.strip()
-    if not trimmed:
-        return set()
-    variants: set[str] = {trimmed}
-    iso = _try_parse_iso_date(trimmed)
-    if iso:
-        variants.add(iso)
-    return variants
-
-
 def _hash_patient_summary_api_key(value: str) -> str:
     return hashlib.sha256(value.encode("utf-8")).hexdigest()
 
@@ -2094,23 +2202,10 @@ def _is_patient_summary_api_key_valid(provided: str | None) -> bool:
 
 
 def _find_latest_finalized_session(patient_name: str, dob: str) -> dict[str, Any] | None:
-    normalized_dob_variants = _normalize_dob_variants(dob)
-    if not normalized_dob_variants:
+    session_id = db_find_latest_finalized_session_id(patient_name, dob)
+    if not session_id:
         return None
-    trimmed_name = patient_name.strip()
-    if not trimmed_name:
-        return None
-    summaries = db_list_sessions(patient_name=trimmed_name)
-    for summary in summaries:
-        session = db_get_session(summary.get("id"))
-        if not session:
-            continue
-        if (session.get("completion_status") or "") != "finalized":
-            continue
-        stored_dob_variants = _normalize_dob_variants(session.get("dob"))
-        if normalized_dob_variants & stored_dob_variants:
-            return session
-    return None
+    return db_get_session(session_id)
 
 
 def _visit_type_label(visit_type: str | None) -> str:
@@ -2121,97 +2216,178 @@ def _visit_type_label(visit_type: str | None) -> str:
     return str(visit_type or "不明")
 
 
-def build_session_rows_and_items(s: dict) -> tuple[list[tuple[str, str]], str, list[QuestionnaireItem]]:
-    """PDF/Markdown出力用に回答行とテンプレ項目を収集する。"""
+_PERSONAL_INFO_KEYS = {"personal_info", "personalInfo", "patient_basic_info"}
+
+
+def _format_yesno_value(ans: Any) -> str | None:
+    if isinstance(ans, str):
+        lowered = ans.strip().lower()
+        if lowered in {"yes", "no"}:
+            return "はい" if lowered == "yes" else "いいえ"
+    if isinstance(ans, bool):
+        return "はい" if ans else "いいえ"
+    return None
+
+
+def _format_answer_value(ans: Any, item_type: str | None = None) -> str:
+    """出力用に回答値を表示文字列へ整形する。"""
+
+    if ans is None or ans == "":
+        return ""
+    if item_type == "personal_info":
+        return format_personal_info_multiline(ans)
+    yesno_display = _format_yesno_value(ans) if item_type == "yesno" else None
+    if yesno_display is not None:
+        return yesno_display
+    if isinstance(ans, list):
+        return ", ".join(
+            _format_yesno_value(v) or str(v) for v in ans
+        )
+    if isinstance(ans, dict):
+        return json.dumps(ans, ensure_ascii=False)
+    yesno_display = _format_yesno_value(ans)
+    if yesno_display is not None:
+        return yesno_display
+    return str(ans)
+
+
+def _template_items_for(tpl: dict | None, visit_type: str | None) -> list[QuestionnaireItem]:
+    """テンプレートの項目を読み込む。未登録の場合は既定テンプレートを使う。"""
 
-    visit_type = s.get("visit_type")
-    tpl = db_get_template(s.get("questionnaire_id"), visit_type) or {}
-    items: list[QuestionnaireItem] = []
     try:
         raw_items = tpl.get("items") if isinstance(tpl, dict) else None
         if raw_items:
-            items = [QuestionnaireItem(**it) for it in raw_items]
-        else:
-            default_items = (
-                make_default_initial_items()
-                if visit_type == "initial"
-                else make_default_followup_items()
-            )
-            items = [QuestionnaireItem(**it) for it in default_items]
+            return [QuestionnaireItem(**it) for it in raw_items]
+        default_items = (
+            make_default_initial_items()
+            if visit_type == "initial"
+            else make_default_followup_items()
+        )
+        return [QuestionnaireItem(**it) for it in default_items]
     except Exception:
-        items = []
+        return []
 
-    answers = s.get("answers", {}) or {}
-    question_texts = {}
-    raw_qtexts = s.get("question_texts") or {}
-    if isinstance(raw_qtexts, dict):
-        question_texts = {str(k): v for k, v in raw_qtexts.items() if isinstance(v, str)}
 
-    personal_info_keys = {"personal_info", "personalInfo", "patient_basic_info"}
+def _format_yesno_item(ans: Any) -> str:
+    return _format_answer_value(ans, "yesno")
 
-    def fmt_yesno(ans: Any) -> str | None:
-        if isinstance(ans, str):
-            lowered = ans.strip().lower()
-            if lowered in {"yes", "no"}:
-                return "はい" if lowered == "yes" else "いいえ"
-        if isinstance(ans, bool):
-            return "はい" if ans else "いいえ"
-        return None
 
-    def fmt_answer(ans: Any, item_type: str | None = None) -> str:
-        if ans is None or ans == "":
-            return ""
-        yesno_display = fmt_yesno(ans) if item_type == "yesno" else None
-        if yesno_display is not None:
-            return yesno_display
-        if isinstance(ans, list):
-            return ", ".join(
-                fmt_yesno(v) or str(v) for v in ans
-            )
-        if isinstance(ans, dict):
-            return json.dumps(ans, ensure_ascii=False)
-        yesno_display = fmt_yesno(ans)
-        if yesno_display is not None:
-            return yesno_display
-        return str(ans)
-
-    rows: list[tuple[str, str]] = []
-    appended_ids: set[str] = set()
-    for item in items:
-        try:
-            item_id = str(item.id)
-            label = question_texts.get(item_id) or item.label
-            answer_value = answers.get(item_id)
-            item_type = getattr(item, "type", None)
-            if item_type == "personal_info":
-                display_answer = format_personal_info_multiline(answer_value)
-            else:
-                display_answer = fmt_answer(answer_value, item_type)
-            rows.append((label, display_answer))
-            appended_ids.add(item_id)
-        except Exception:
-            continue
-    llm_qtexts = s.get("llm_question_texts") or {}
-    if isinstance(llm_qtexts, dict):
-        for iid, qtext in llm_qtexts.items():
-            key = str(iid)
-            label = question_texts.get(key) or str(qtext)
-            rows.append((label, fmt_answer(answers.get(key))))
-            appended_ids.add(key)
-    # テンプレートに存在しないが回答が残っている項目も出力に含める
-    for iid in sorted({str(k) for k in answers.keys()}):
-        if iid in appended_ids:
-            continue
-        label = question_texts.get(iid) or iid
-        if iid in personal_info_keys:
-            rows.append(("患者基本情報", format_personal_info_multiline(answers.get(iid))))
-            appended_ids.add(iid)
-            continue
-        rows.append((label, fmt_answer(answers.get(iid))))
-        appended_ids.add(iid)
+def _row_formatter_for(item_type: str | None) -> Callable[[Any], str]:
+    """項目種別に応じた回答の整形関数を返す。"""
+
+    if item_type == "personal_info":
+        return format_personal_info_multiline
+    if item_type == "yesno":
+        return _format_yesno_item
+    return _format_answer_value
+
+
+class SessionRowPlan:
+    """テンプレートごとにコンパイルした出力行の計画。
+
+    `steps` は (項目ID, ラベル, 整形関数) をテンプレート順に並べたもの。
+    PDF / Markdown / CSV / 患者サマリーAPI で共有し、セッションごとには適用のみ行う。
+    """
+
+    __slots__ = ("items", "item_dicts", "steps", "item_ids")
+
+    def __init__(self, items: list[QuestionnaireItem]) -> None:
+        self.items = items
+        # PDF 描画ジョブへ渡すための辞書表現（セッションごとの model_dump を避ける）
+        self.item_dicts = [item.model_dump() for item in items]
+        steps: list[tuple[str, str, Callable[[Any], str]]] = []
+        for item in items:
+            try:
+                steps.append((str(item.id), item.label, _row_formatter_for(getattr(item, "type", None))))
+            except Exception:
+                continue
+        self.steps = tuple(steps)
+        self.item_ids = frozenset(step[0] for step in steps)
+
+    def apply(self, s: dict) -> list[tuple[str, str]]:
+        """セッションの回答へ計画を適用し、(ラベル, 回答) の行を返す。"""
+
+        answers = s.get("answers", {}) or {}
+        question_texts: dict[str, str] = {}
+        raw_qtexts = s.get("question_texts") or {}
+        if isinstance(raw_qtexts, dict):
+            question_texts = {str(k): v for k, v in raw_qtexts.items() if isinstance(v, str)}
+
+        rows: list[tuple[str, str]] = []
+        if question_texts:
+            for item_id, label, fmt in self.steps:
+                rows.append((question_texts.get(item_id) or label, fmt(answers.get(item_id))))
+        else:
+            for item_id, label, fmt in self.steps:
+                rows.append((label, fmt(answers.get(item_id))))
+
+        appended_ids = set(self.item_ids)
+        llm_qtexts = s.get("llm_question_texts") or {}
+        if isinstance(llm_qtexts, dict):
+            for iid, qtext in llm_qtexts.items():
+                key = str(iid)
+                label = question_texts.get(key) or str(qtext)
+                rows.append((label, _format_answer_value(answers.get(key))))
+                appended_ids.add(key)
+        # テンプレートに存在しないが回答が残っている項目も出力に含める
+        for iid in sorted({str(k) for k in answers.keys()} - appended_ids):
+            if iid in _PERSONAL_INFO_KEYS:
+                rows.append(("患者基本情報", format_personal_info_multiline(answers.get(iid))))
+                continue
+            rows.append((question_texts.get(iid) or iid, _format_answer_value(answers.get(iid))))
+        return rows
+
+
+ROW_PLAN_CACHE_SIZE = 64
+_row_plan_cache: "OrderedDict[str, SessionRowPlan]" = OrderedDict()
+_row_plan_lock = threading.Lock()
+
+
+def _row_plan_fingerprint(tpl: dict | None, visit_type: str | None) -> str:
+    raw_items = tpl.get("items") if isinstance(tpl, dict) else None
+    if not raw_items:
+        return f"default:{'initial' if visit_type == 'initial' else 'followup'}"
+    payload = json.dumps(raw_items, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def get_row_plan(tpl: dict | None, visit_type: str | None) -> SessionRowPlan:
+    """テンプレートの行計画を返す。項目内容のハッシュで共有し、変更されれば作り直す。"""
+
+    key = _row_plan_fingerprint(tpl, visit_type)
+    with _row_plan_lock:
+        plan = _row_plan_cache.get(key)
+        if plan is not None:
+            _row_plan_cache.move_to_end(key)
+            return plan
+    plan = SessionRowPlan(_template_items_for(tpl, visit_type))
+    with _row_plan_lock:
+        _row_plan_cache[key] = plan
+        while len(_row_plan_cache) > ROW_PLAN_CACHE_SIZE:
+            _row_plan_cache.popitem(last=False)
+    return plan
+
+
+def build_session_rows_and_items(
+    s: dict,
+    tpl: dict | None = None,
+    items: list[QuestionnaireItem] | None = None,
+    plan: SessionRowPlan | None = None,
+) -> tuple[list[tuple[str, str]], str, list[QuestionnaireItem]]:
+    """PDF/Markdown出力用に回答行とテンプレ項目を収集する。
 
-    vt_label = _visit_type_label(visit_type)
-    return rows, vt_label, items
+    取得済みのテンプレート（`tpl`）や行計画（`plan`）を渡すと再取得しない。
+    """
+
+    visit_type = s.get("visit_type")
+    if plan is None:
+        if items is not None:
+            plan = SessionRowPlan(items)
+        else:
+            if tpl is None:
+                tpl = db_get_template(s.get("questionnaire_id"), visit_type) or {}
+            plan = get_row_plan(tpl, visit_type)
+    return plan.apply(s), _visit_type_label(visit_type), plan.items
 
 
 def _resolve_pdf_render_config() -> tuple[PDFLayoutMode, str]:
@@ -2311,7 +2487,7 @@ class ListModelsRequest(BaseModel):
 
 
 @app.post("/llm/list-models")
-def list_llm_models(req: ListModelsRequest) -> list[str]:
+async def list_llm_models(req: ListModelsRequest) -> list[str]:
     """指定された設定で利用可能なLLMモデルの一覧を返す。"""
     # リクエストから一時的な設定でゲートウェイを作成
     temp_settings = LLMSettings(
@@ -2325,7 +2501,10 @@ def list_llm_models(req: ListModelsRequest) -> list[str]:
     )
     _apply_provider_profile_payload(temp_settings, req.provider_profiles)
     gateway = LLMGateway(temp_settings)
-    return gateway.list_models()
+    try:
+        return await gateway.alist_models()
+    finally:
+        await gateway.aclose()
 
 
 # --- システム表示名・設定 API ---
@@ -2398,6 +2577,13 @@ class PostalCodeLookupResponse(BaseModel):
     candidates: list[PostalCodeCandidate] = Field(default_factory=list)
 
 
+class PostalCodeSearchResponse(BaseModel):
+    query: str
+    mode: Literal["code_prefix", "address"]
+    candidates: list[PostalCodeCandidate] = Field(default_factory=list)
+    truncated: bool = False
+
+
 class PostalCodeDictionaryInfo(BaseModel):
     is_available: bool
     row_count: int
@@ -2405,6 +2591,16 @@ class PostalCodeDictionaryInfo(BaseModel):
     last_updated_at: str | None = None
 
 
+@app.get("/postal-code/search", response_model=PostalCodeSearchResponse)
+def search_postal_code_candidates(
+    q: str = Query(..., max_length=64),
+    limit: int = Query(POSTAL_SEARCH_CANDIDATE_LIMIT, ge=1, le=POSTAL_SEARCH_MAX_LIMIT),
+) -> PostalCodeSearchResponse:
+    """入力補完用の検索。数字は郵便番号の前方一致、それ以外は住所・読みの部分一致で探す。"""
+
+    return PostalCodeSearchResponse(**search_postal_codes(q, limit))
+
+
 @app.get("/postal-code/{postal_code}", response_model=PostalCodeLookupResponse)
 def get_postal_code_address(postal_code: str) -> PostalCodeLookupResponse:
     """郵便番号から住所候補を返す。未登録時は found=false として手入力へフォールバックする。"""
@@ -2780,6 +2976,8 @@ class LLMStatusResponse(BaseModel):
     detail: str | None = None
     source: str | None = None
     checked_at: datetime | None = None
+    # サーキットブレーカーの状態（state / consecutive_failures / retry_in_seconds など）と応答時間統計
+    circuit: dict[str, Any] | None = None
 
 
 @app.get("/system/database-status", response_model=DatabaseStatus)
@@ -2816,6 +3014,7 @@ def get_llm_status_snapshot() -> LLMStatusResponse:
         detail=snapshot.get("detail"),
         source=snapshot.get("source"),
         checked_at=snapshot.get("checked_at"),
+        circuit=llm_gateway.get_circuit_snapshot(),
     )
 
 
@@ -3497,8 +3696,8 @@ def create_session(req: SessionCreateRequest) -> SessionCreateResponse:
     session.interrupted = session.completion_status != "finalized"
     sessions[session_id] = session
     save_session(session)
-    global METRIC_SESSIONS_CREATED
-    METRIC_SESSIONS_CREATED += 1
+    METRIC_SESSIONS_CREATED.inc()
+    bind_session_id(session_id)
     logger.info("session_created id=%s visit_type=%s", session_id, req.visit_type)
     return SessionCreateResponse(
         id=session.id,
@@ -3513,6 +3712,31 @@ def create_session(req: SessionCreateRequest) -> SessionCreateResponse:
     )
 
 
+_T = TypeVar("_T")
+
+
+async def _await_unless_disconnected(
+    request: Request, awaitable: Awaitable[_T], *, poll_interval: float = 0.5
+) -> _T:
+    """クライアント切断を監視しながら LLM 呼び出しを待つ。
+
+    切断を検知した場合は実行中の呼び出しをキャンセルし、499 を返す。
+    """
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_interval)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                logger.info("llm_request_cancelled path=%s", request.url.path)
+                raise HTTPException(status_code=499, detail="client disconnected")
+    finally:
+        if not task.done():
+            task.cancel()
+
+
 class AnswersRequest(BaseModel):
     """複数回答を一度に受け取るリクエスト。"""
 
@@ -3548,23 +3772,22 @@ def submit_llm_answer(session_id: str, req: LlmAnswerRequest) -> dict:
         raise HTTPException(status_code=404, detail="session not found")
     fsm = SessionFSM(session, llm_gateway)
     fsm.step(req.item_id, req.answer)
-    global METRIC_ANSWERS_RECEIVED
-    METRIC_ANSWERS_RECEIVED += 1
+    METRIC_ANSWERS_RECEIVED.inc()
     save_session(session)
     logger.info("llm_answer_saved id=%s item=%s", session_id, req.item_id)
     return {"status": "ok", "remaining_items": session.remaining_items}
 
 
 @app.post("/sessions/{session_id}/llm-questions")
-def get_llm_questions(session_id: str) -> dict:
+async def get_llm_questions(session_id: str, request: Request) -> dict:
     """不足項目に応じた追加質問を返す。"""
     session = sessions.get(session_id)
     if not session:
         raise HTTPException(status_code=404, detail="session not found")
 
     fsm = SessionFSM(session, llm_gateway)
-    questions = fsm.next_questions()
-    save_session(session)
+    questions = await _await_unless_disconnected(request, fsm.anext_questions())
+    await asyncio.to_thread(save_session, session)
     if not questions:
         logger.info("llm_question_limit id=%s", session_id)
         return {"questions": []}
@@ -3591,8 +3814,7 @@ async def finalize_session(
     # 必須が未完了の場合も、フェイルセーフとして現状で要約を返し進行可能とする
     if summary_enabled:
         session.summary = llm_gateway.summarize(session.answers)
-        global METRIC_SUMMARIES
-        METRIC_SUMMARIES += 1
+        METRIC_SUMMARIES.inc()
     else:
         session.summary = ""
     if payload and payload.llm_error:
@@ -3604,14 +3826,17 @@ async def finalize_session(
     session.interrupted = False
     session.completion_status = "finalized"
     logger.info("session_finalized id=%s", session_id)
-    save_session(session)
+    await asyncio.to_thread(save_session, session)
     event = _build_finalize_event_from_session(session)
-    try:
-        await session_events.publish(event.dict(), event_id=event.finalized_at)
-    except Exception:
-        logger.exception("session_finalize_event_publish_failed id=%s", session_id)
+    await emit_session_event(
+        "session.finalized",
+        event.dict(),
+        session_id=session.id,
+        occurred_at=session.finalized_at,
+        fallback_event_id=event.finalized_at,
+    )
     # LLM が有効かつ base_url が設定されている場合、バックグラウンドで詳細サマリーを生成
-    def _bg_summary_task(sid: str) -> None:
+    async def _bg_summary_task(sid: str) -> None:
         s = sessions.get(sid)
         if not s:
             return
@@ -3625,7 +3850,7 @@ async def finalize_session(
             )
         )
         if getattr(llm_gateway.settings, "enabled", True):
-            new_summary = llm_gateway.summarize_with_prompt(
+            new_summary = await llm_gateway.asummarize_with_prompt(
                 prompt,
                 s.answers,
                 labels,
@@ -3633,10 +3858,22 @@ async def finalize_session(
                 retry=1,
             )
             s.summary = new_summary
-            save_session(s)
+            await asyncio.to_thread(save_session, s)
+            # 管理画面が一覧・詳細を再取得できるよう要約の完了を通知する
+            await emit_session_event(
+                "session.summary_ready",
+                {"id": sid, "summary_ready_at": datetime.now(UTC).isoformat()},
+                session_id=sid,
+            )
+        if PDF_PRERENDER_ENABLED:
+            # 確定時の描画はこのタスクに任せているため、要約の確定後にここで描画する
+            await asyncio.to_thread(prerender_session_pdf, sid)
 
     if summary_enabled and llm_gateway.has_remote_backend() and not (payload and payload.llm_error):
+        # 要約タスクが差し替え後の要約で描画するため、先行の描画は行わない
         background.add_task(_bg_summary_task, session.id)
+    elif PDF_PRERENDER_ENABLED:
+        background.add_task(prerender_session_pdf, session.id)
 
     return {
         "summary": session.summary,
@@ -3676,6 +3913,52 @@ def export_sessions_api(payload: SessionsExportRequest) -> StreamingResponse:
     )
 
 
+@app.get("/admin/sessions/export/analytics")
+def export_sessions_analytics(
+    format: str = Query(default="auto"),
+    start_date: str | None = Query(default=None),
+    end_date: str | None = Query(default=None),
+    visit_type: str | None = Query(default=None),
+) -> StreamingResponse:
+    """確定済みセッションを研究・集計向けの列指向形式でエクスポートする。
+
+    - 1セッション1行、テンプレート項目ごとに型付きの列（複数選択は選択肢ごとの真偽値列）。
+    - `format` は `parquet|csv|auto`。`auto` は pyarrow があれば Parquet、無ければ CSV。
+    - 氏名・生年月日・連絡先は含めない。
+    """
+    fmt = (format or "auto").lower()
+    if fmt == "auto":
+        fmt = "parquet" if parquet_available() else "csv"
+    if fmt not in {"parquet", "csv"}:
+        raise HTTPException(status_code=400, detail="unsupported format")
+    if fmt == "parquet" and not parquet_available():
+        raise HTTPException(status_code=400, detail="parquet_unavailable")
+
+    summaries = db_list_sessions(start_date=start_date, end_date=end_date, visit_type=visit_type)
+    # 一覧は新しい順のため、時系列順に並べ替えて出力する
+    ids = [str(row["id"]) for row in reversed(summaries) if not row.get("interrupted")]
+
+    memo: dict[tuple[Any, Any], SessionRowPlan] = {}
+    # 1巡目は回答を読まずに使用テンプレートを集め、列を確定させる
+    for s in _iter_sessions_batched(ids, include_answers=False):
+        _memoized_row_plan(memo, s.get("questionnaire_id"), s.get("visit_type"))
+    columns = plan_columns(plan.items for plan in memo.values())
+    records = (build_record(s, columns) for s in _iter_sessions_batched(ids))
+
+    ts = datetime.now().strftime("%Y%m%d-%H%M%S")
+    if fmt == "parquet":
+        return StreamingResponse(
+            iter_parquet(records, columns),
+            media_type="application/vnd.apache.parquet",
+            headers={"Content-Disposition": f"attachment; filename=sessions-analytics-{ts}.parquet"},
+        )
+    return StreamingResponse(
+        iter_analytics_csv(records, columns),
+        media_type="text/csv; charset=utf-8",
+        headers={"Content-Disposition": f"attachment; filename=sessions-analytics-{ts}.csv"},
+    )
+
+
 @app.post("/admin/sessions/import")
 async def import_sessions_api(
     file: UploadFile = File(...), password: str | None = Form(None), mode: str = Form("merge")
@@ -3706,6 +3989,46 @@ async def import_sessions_api(
     }
 
 
+def _session_event_backlog(after_id: int | None, since_dt: datetime | None, limit: int) -> list[bytes]:
+    """再接続時に送る未受信イベントを返す。
+
+    イベントログがあれば ID（または発生時刻）の範囲検索で取り出し、
+    ログを使えない場合は確定済みセッションの走査で補う。
+    """
+
+    try:
+        logged = list_session_events(after_id=after_id, since=since_dt, limit=limit)
+    except Exception as exc:  # noqa: BLE001 - ログを読めない場合は走査に切り替える
+        logger.warning("session_events_replay_failed: %s", exc)
+        logged = None
+    if logged is not None:
+        return [
+            session_events.serialize(
+                row["payload"], event_id=str(row["id"]), event_name=row.get("event_name") or ""
+            )
+            for row in logged
+        ]
+    if since_dt is None:
+        return []
+    messages: list[bytes] = []
+    events, _ = list_sessions_finalized_after(since_dt, limit=limit)
+    for event in events:
+        finalized = event.get("finalized_at")
+        session_id = event.get("id")
+        if not finalized or not session_id:
+            continue
+        payload = SessionFinalizeEvent(
+            id=str(session_id),
+            patient_name=event.get("patient_name"),
+            dob=event.get("dob"),
+            visit_type=event.get("visit_type"),
+            started_at=_ensure_isoformat(event.get("started_at")),
+            finalized_at=str(finalized),
+        )
+        messages.append(session_events.serialize(payload.dict(), event_id=payload.finalized_at))
+    return messages
+
+
 @app.get("/admin/sessions/stream")
 async def admin_session_stream(
     request: Request,
@@ -3715,42 +4038,57 @@ async def admin_session_stream(
     """問診完了イベントを Server-Sent Events で配信する。"""
 
     last_event_id = request.headers.get("last-event-id")
-    since_candidate = last_event_id or since or None
+    since_candidate = (last_event_id or since or "").strip() or None
+    after_id: int | None = None
     since_dt: datetime | None = None
     if since_candidate:
-        try:
-            since_dt = datetime.fromisoformat(since_candidate)
-        except Exception:
-            raise HTTPException(status_code=400, detail="invalid_since")
+        if since_candidate.isdigit():
+            after_id = int(since_candidate)
+        else:
+            # 旧形式（finalized_at の ISO 文字列）の ID も受け付ける
+            try:
+                since_dt = datetime.fromisoformat(since_candidate)
+            except Exception:
+                raise HTTPException(status_code=400, detail="invalid_since")
+
+    # 再送分を読む前に購読しておき、読み出し中に記録されたイベントも取りこぼさない
+    try:
+        subscriber = session_events.subscribe()
+    except TooManySubscribers:
+        logger.warning("session_stream_rejected reason=too_many_subscribers")
+        raise HTTPException(
+            status_code=503, detail="too_many_subscribers", headers={"Retry-After": "30"}
+        )
 
     backlog_messages: list[bytes] = []
-    if since_dt is not None:
-        events, _ = list_sessions_finalized_after(since_dt, limit=limit)
-        for event in events:
-            finalized = event.get("finalized_at")
-            session_id = event.get("id")
-            if not finalized or not session_id:
-                continue
-            payload = SessionFinalizeEvent(
-                id=str(session_id),
-                patient_name=event.get("patient_name"),
-                dob=event.get("dob"),
-                visit_type=event.get("visit_type"),
-                started_at=_ensure_isoformat(event.get("started_at")),
-                finalized_at=str(finalized),
-            )
-            backlog_messages.append(
-                session_events.serialize(payload.dict(), event_id=payload.finalized_at)
-            )
+    if after_id is not None or since_dt is not None:
+        try:
+            backlog_messages = await asyncio.to_thread(_session_event_backlog, after_id, since_dt, limit)
+        except BaseException:
+            session_events.unsubscribe(subscriber)
+            raise
+    # 再送済みのイベントは購読キューにも届いている場合があるため、ライブ配信側で読み飛ばす
+    replayed_ids = {event_id for event_id in map(message_event_id, backlog_messages) if event_id}
+    replayed_max_id = max((int(i) for i in replayed_ids if i.isdigit()), default=None)
+
+    def _already_replayed(message: bytes) -> bool:
+        event_id = message_event_id(message)
+        if event_id is None:
+            return False
+        if replayed_max_id is not None and event_id.isdigit():
+            return int(event_id) <= replayed_max_id
+        return event_id in replayed_ids
 
     async def event_generator() -> Iterable[bytes]:
-        for message in backlog_messages:
-            yield message
-        stream = session_events.stream()
+        stream = session_events.stream(subscriber)
         try:
+            for message in backlog_messages:
+                yield message
             async for message in stream:
                 if await request.is_disconnected():
                     break
+                if _already_replayed(message):
+                    continue
                 yield message
         finally:
             await stream.aclose()
@@ -3758,6 +4096,55 @@ async def admin_session_stream(
     return StreamingResponse(event_generator(), media_type="text/event-stream")
 
 
+@app.get("/admin/sessions/stream/stats")
+def admin_session_stream_stats() -> dict[str, Any]:
+    """SSE 購読者数と購読者ごとの未送信件数・遅延・破棄件数を返す。"""
+    return session_events.stats()
+
+
+@app.get("/admin/db/stats")
+def admin_db_call_stats(
+    limit: int = Query(10, ge=1, le=100),
+    order: Literal["max", "total", "mean", "calls"] = Query("max"),
+) -> dict[str, Any]:
+    """永続化関数ごとの呼び出し回数・所要時間・返却行数を上位 N 件返す。
+
+    - `order`: 並び順（最大所要時間 / 合計 / 平均 / 回数）。
+    - `slow_calls`: 閾値を超えた直近の呼び出しと、SQLite の場合は実行計画。
+    """
+    return {
+        "slow_threshold_ms": db_call_stats.slow_call_ms,
+        "order": order,
+        "functions": db_call_stats.top(limit, order),
+        "slow_calls": db_call_stats.recent_slow_calls(limit),
+    }
+
+
+@app.get("/admin/profiles")
+def admin_list_profiles() -> dict[str, Any]:
+    """保存済みのリクエストプロファイルを新しい順に返す。"""
+    return {
+        "enabled": PROFILER.enabled,
+        "format": PROFILER.format,
+        "max_files": PROFILER.max_files,
+        "profiles": PROFILER.list_profiles(),
+    }
+
+
+@app.get("/admin/profiles/{name}")
+def admin_download_profile(name: str) -> Response:
+    """プロファイルをダウンロードする（speedscope JSON または collapsed stacks）。"""
+    path = PROFILER.resolve(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="profile not found")
+    media_type = "application/json" if name.endswith(".json") else "text/plain; charset=utf-8"
+    return Response(
+        content=path.read_bytes(),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename={name}"},
+    )
+
+
 @app.get("/admin/sessions", response_model=list[SessionSummary])
 def admin_list_sessions(
     patient_name: str | None = None,
@@ -3801,137 +4188,368 @@ def admin_get_session(session_id: str) -> SessionDetail:
 
 
 @app.get("/admin/sessions/bulk/download/{fmt}")
-def admin_bulk_download(fmt: str, ids: list[str] = Query(default=[])) -> Response:
+def admin_bulk_download(
+    fmt: str,
+    ids: list[str] = Query(default=[]),
+    layout: str = Query(default="summary"),
+) -> Response:
     """複数セッションを指定形式で一括ダウンロードする。
 
-    - 返却形式は ZIP（`sessions-YYYYmmdd-HHMMSS.zip`）。
+    - 返却形式は ZIP（`sessions-YYYYmmdd-HHMMSS.zip`）。CSV のみ1枚の集計CSV。
     - `ids` クエリで対象セッションIDを複数指定する。
     - `fmt` は `pdf|md|csv` のいずれか。
+    - CSV の `layout` は `summary`（回答一覧を1列にまとめる）または `wide`（設問ごとに1列）。
     """
     if fmt not in {"pdf", "md", "csv"}:
         raise HTTPException(status_code=400, detail="unsupported format")
     if not ids:
         raise HTTPException(status_code=400, detail="ids is required")
 
-    def sanitize_filename(name: str) -> str:
-        name = re.sub(r"[\\/:*?\"<>|]", "_", name)
-        name = name.strip().replace(" ", "_")
-        return name or "session"
-
     # CSV は「全件を1枚の集計CSV」で返す
     if fmt == "csv":
-        sbuf = io.StringIO()
-        writer = csv.writer(sbuf)
-        # 共通セクション列 + 回答一覧（まとめ） + サマリー
-        writer.writerow(["セッションID", "患者名", "生年月日", "受診種別", "テンプレートID", "確定日時", "回答一覧", "自動生成サマリー"])
-        for sid in ids:
-            s = db_get_session(sid)
-            if not s:
-                continue
-            rows, vt_label, _items = build_session_rows_and_items(s)
-            answers_text_lines = [f"- {label}: {ans or '未回答'}" for label, ans in rows]
-            answers_text = "\n".join(answers_text_lines)
-            writer.writerow([
-                sid,
-                s.get("patient_name", ""),
-                s.get("dob", ""),
-                vt_label,
-                s.get("questionnaire_id", ""),
-                s.get("finalized_at", "") or "",
-                answers_text,
-                s.get("summary", "") or "",
-            ])
+        if layout not in {"summary", "wide"}:
+            raise HTTPException(status_code=400, detail="unsupported layout")
+        rows = _iter_wide_csv_rows(ids) if layout == "wide" else _iter_summary_csv_rows(ids)
         ts = datetime.now().strftime("%Y%m%d-%H%M%S")
-        content = sbuf.getvalue()
-        return Response(
-            content,
+        return StreamingResponse(
+            _iter_csv_chunks(rows),
             media_type="text/csv; charset=utf-8",
             headers={"Content-Disposition": f"attachment; filename=sessions-{ts}.csv"},
         )
 
-    # md / pdf は ZIP にまとめて返す
-    layout_mode, facility_name = _resolve_pdf_render_config()
-    zip_buf = io.BytesIO()
-    with zipfile.ZipFile(zip_buf, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
-        for sid in ids:
-            s = db_get_session(sid)
-            if not s:
-                continue
-            rows, vt_label, items = build_session_rows_and_items(s)
-            base = sanitize_filename(f"{s.get('patient_name','')}_{s.get('dob','')}_{sid}")
-            lines = build_markdown_lines(s, rows, vt_label)
-            if fmt == "md":
-                content = "\n".join(lines).encode("utf-8")
-                zf.writestr(f"{base}.md", content)
-            elif fmt == "pdf":
-                pdf_bytes = render_session_pdf(
-                    session=s,
-                    rows=rows,
-                    template_items=items,
-                    answers=s.get("answers", {}) or {},
-                    vt_label=vt_label,
-                    llm_question_texts=s.get("llm_question_texts") or {},
-                    summary=s.get("summary"),
-                    layout_mode=layout_mode,
-                    facility_name=facility_name,
-                )
-                zf.writestr(f"{base}.pdf", pdf_bytes)
-
-    zip_buf.seek(0)
+    # md / pdf は ZIP にまとめ、生成したメンバーから順に送出する
+    if fmt == "md":
+        members = _iter_markdown_members(ids)
+    else:
+        members = _iter_pdf_members(ids)
     ts = datetime.now().strftime("%Y%m%d-%H%M%S")
     return StreamingResponse(
-        zip_buf,
+        iter_zip_stream(members),
         media_type="application/zip",
         headers={"Content-Disposition": f"attachment; filename=sessions-{ts}.zip"},
     )
 
 
+# 一括出力でセッションをまとめて取得する件数
+BULK_FETCH_BATCH_SIZE = 200
+# CSV を送出する際のチャンクサイズ（文字数）
+CSV_STREAM_CHUNK_CHARS = 64 * 1024
+
+
+def _iter_sessions_batched(ids: list[str], *, include_answers: bool = True) -> Iterator[dict]:
+    """セッションを一定件数ずつまとめて取得し、`ids` の順に返す。"""
+
+    for offset in range(0, len(ids), BULK_FETCH_BATCH_SIZE):
+        yield from db_get_sessions(
+            ids[offset : offset + BULK_FETCH_BATCH_SIZE], include_answers=include_answers
+        )
+
+
+def _memoized_row_plan(
+    memo: dict[tuple[Any, Any], SessionRowPlan], questionnaire_id: Any, visit_type: Any
+) -> SessionRowPlan:
+    """(テンプレートID, 受診種別) ごとにテンプレートを1度だけ読み込み、行計画を返す。"""
+
+    key = (questionnaire_id, visit_type)
+    plan = memo.get(key)
+    if plan is None:
+        tpl = db_get_template(questionnaire_id, visit_type) or {}
+        plan = get_row_plan(tpl, visit_type)
+        memo[key] = plan
+    return plan
+
+
+def _iter_csv_chunks(rows: Iterable[list[Any]]) -> Iterator[str]:
+    """CSV 行を書き出し、一定サイズごとに文字列チャンクとして返す。"""
+
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for row in rows:
+        writer.writerow(row)
+        if buf.tell() >= CSV_STREAM_CHUNK_CHARS:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate(0)
+    if buf.tell():
+        yield buf.getvalue()
+
+
+_BULK_CSV_COMMON_HEADER = ["セッションID", "患者名", "生年月日", "受診種別", "テンプレートID", "確定日時"]
+
+
+def _bulk_csv_common_columns(s: dict) -> list[Any]:
+    return [
+        s.get("id", ""),
+        s.get("patient_name", ""),
+        s.get("dob", ""),
+        _visit_type_label(s.get("visit_type")),
+        s.get("questionnaire_id", ""),
+        s.get("finalized_at", "") or "",
+    ]
+
+
+def _iter_summary_csv_rows(ids: list[str]) -> Iterator[list[Any]]:
+    """共通列 + 回答一覧（まとめ） + サマリーの集計CSV行を返す。"""
+
+    yield [*_BULK_CSV_COMMON_HEADER, "回答一覧", "自動生成サマリー"]
+    memo: dict[tuple[Any, Any], SessionRowPlan] = {}
+    for s in _iter_sessions_batched(ids):
+        plan = _memoized_row_plan(memo, s.get("questionnaire_id"), s.get("visit_type"))
+        answers_text = "\n".join(f"- {label}: {ans or '未回答'}" for label, ans in plan.apply(s))
+        yield [*_bulk_csv_common_columns(s), answers_text, s.get("summary", "") or ""]
+
+
+def _iter_wide_csv_rows(ids: list[str]) -> Iterator[list[Any]]:
+    """設問ごとに1列とした分析用の集計CSV行を返す。
+
+    列は対象セッションが使うテンプレート項目の和集合（初出順）。
+    LLM 追加質問とテンプレート外の回答はそれぞれ1列にまとめる。
+    """
+
+    memo: dict[tuple[Any, Any], SessionRowPlan] = {}
+    # 1巡目は回答を読まずにテンプレートの組み合わせだけを集め、列を確定させる
+    columns: dict[str, QuestionnaireItem] = {}
+    for s in _iter_sessions_batched(ids, include_answers=False):
+        for item in _memoized_row_plan(memo, s.get("questionnaire_id"), s.get("visit_type")).items:
+            columns.setdefault(str(item.id), item)
+
+    header = list(_BULK_CSV_COMMON_HEADER)
+    used_labels: set[str] = set(header)
+    for item_id, item in columns.items():
+        label = item.label or item_id
+        if label in used_labels:
+            label = f"{label} ({item_id})"
+        used_labels.add(label)
+        header.append(label)
+    yield [*header, "追加質問", "その他の回答", "自動生成サマリー"]
+
+    for s in _iter_sessions_batched(ids):
+        answers = s.get("answers", {}) or {}
+        row = _bulk_csv_common_columns(s)
+        for item_id, item in columns.items():
+            row.append(_format_answer_value(answers.get(item_id), getattr(item, "type", None)))
+        llm_qtexts = s.get("llm_question_texts") or {}
+        if not isinstance(llm_qtexts, dict):
+            llm_qtexts = {}
+        followups = [
+            f"- {qtext}: {_format_answer_value(answers.get(str(iid))) or '未回答'}"
+            for iid, qtext in llm_qtexts.items()
+        ]
+        others = [
+            f"- {iid}: {_format_answer_value(answers.get(iid))}"
+            for iid in sorted(str(k) for k in answers.keys())
+            if iid not in columns and iid not in llm_qtexts
+        ]
+        row.extend(["\n".join(followups), "\n".join(others), s.get("summary", "") or ""])
+        yield row
+
+
+def _sanitize_download_filename(name: str) -> str:
+    name = re.sub(r"[\\/:*?\"<>|]", "_", name)
+    name = name.strip().replace(" ", "_")
+    return name or "session"
+
+
+def _iter_markdown_members(ids: list[str]) -> Iterator[tuple[str, bytes]]:
+    """一括ダウンロード用に Markdown の ZIP メンバーを1件ずつ生成する。"""
+
+    memo: dict[tuple[Any, Any], SessionRowPlan] = {}
+    for s in _iter_sessions_batched(ids):
+        sid = s.get("id")
+        plan = _memoized_row_plan(memo, s.get("questionnaire_id"), s.get("visit_type"))
+        rows, vt_label, _items = build_session_rows_and_items(s, plan=plan)
+        base = _sanitize_download_filename(f"{s.get('patient_name','')}_{s.get('dob','')}_{sid}")
+        lines = build_markdown_lines(s, rows, vt_label)
+        yield f"{base}.md", "\n".join(lines).encode("utf-8")
+
+
+def _iter_pdf_members(ids: list[str]) -> Iterator[tuple[str, bytes]]:
+    """一括ダウンロード用に PDF の ZIP メンバーを生成する。
+
+    描画はプロセスプールで並列に行い、入力順に返す。
+    """
+
+    layout_mode, facility_name = _resolve_pdf_render_config()
+    names: deque[str] = deque()
+
+    def _pdf_jobs() -> Iterator[dict[str, Any]]:
+        memo: dict[tuple[Any, Any], SessionRowPlan] = {}
+        for s in _iter_sessions_batched(ids):
+            sid = s.get("id")
+            plan = _memoized_row_plan(memo, s.get("questionnaire_id"), s.get("visit_type"))
+            rows, vt_label, _items = build_session_rows_and_items(s, plan=plan)
+            names.append(
+                _sanitize_download_filename(f"{s.get('patient_name','')}_{s.get('dob','')}_{sid}")
+            )
+            yield build_render_job(
+                session=s,
+                rows=rows,
+                template_items=plan.item_dicts,
+                vt_label=vt_label,
+                layout_mode=layout_mode,
+                facility_name=facility_name,
+            )
+
+    for pdf_bytes in pdf_render_pool.render_many(_pdf_jobs()):
+        yield f"{names.popleft()}.pdf", pdf_bytes
+
+
+def build_session_csv(rows: list[tuple[str, str]]) -> str:
+    """単一セッションの「項目, 回答」形式 CSV を生成する。"""
+
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(["項目", "回答"])
+    for label, ans in rows:
+        writer.writerow([label, ans])
+    return buf.getvalue()
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """If-None-Match ヘッダーが ETag と一致するか判定する（弱い比較）。"""
+
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def _session_document_key(
+    s: dict,
+    tpl: dict | None,
+    fmt: str,
+    layout_mode: PDFLayoutMode | None = None,
+    facility_name: str | None = None,
+) -> str:
+    """描画結果キャッシュのキーを求める。描画に影響する入力が変わればキーも変わる。"""
+
+    logo_url = None
+    if fmt == "pdf":
+        logo_url = (load_app_settings() or {}).get("logo_url")
+    return build_render_key(
+        kind=fmt,
+        session=s,
+        template=(tpl or {}).get("items"),
+        layout_mode=layout_mode.value if layout_mode else None,
+        facility_name=facility_name,
+        logo_url=logo_url,
+    )
+
+
+def _render_session_document(
+    s: dict,
+    tpl: dict | None,
+    fmt: str,
+    layout_mode: PDFLayoutMode | None = None,
+    facility_name: str | None = None,
+) -> bytes:
+    """単票の md / pdf を描画する。"""
+
+    if tpl is None:
+        tpl = db_get_template(s.get("questionnaire_id"), s.get("visit_type")) or {}
+    plan = get_row_plan(tpl, s.get("visit_type"))
+    rows, vt_label, _items = build_session_rows_and_items(s, plan=plan)
+    if fmt == "md":
+        return "\n".join(build_markdown_lines(s, rows, vt_label)).encode("utf-8")
+    return pdf_render_pool.render(
+        build_render_job(
+            session=s,
+            rows=rows,
+            template_items=plan.item_dicts,
+            vt_label=vt_label,
+            layout_mode=layout_mode or PDFLayoutMode.STRUCTURED,
+            facility_name=facility_name or "",
+        )
+    )
+
+
+_prerender_lock = threading.Lock()
+_prerender_inflight: set[str] = set()
+
+
+def prerender_session_pdf(session_id: str) -> bool:
+    """保存済みセッションの PDF を事前描画して描画結果キャッシュへ格納する。
+
+    同じ入力の描画が実行中または格納済みの場合は何もしない。描画した場合に True を返す。
+    """
+
+    s = db_get_session(session_id)
+    if not s:
+        return False
+    tpl = db_get_template(s.get("questionnaire_id"), s.get("visit_type")) or {}
+    layout_mode, facility_name = _resolve_pdf_render_config()
+    cache_key = _session_document_key(s, tpl, "pdf", layout_mode, facility_name)
+    with _prerender_lock:
+        if cache_key in _prerender_inflight or rendered_document_cache.contains(cache_key):
+            return False
+        _prerender_inflight.add(cache_key)
+    try:
+        started = time.perf_counter()
+        content = _render_session_document(s, tpl, "pdf", layout_mode, facility_name)
+        rendered_document_cache.put(cache_key, content, kind="pdf", session_id=session_id)
+        logger.info(
+            "pdf_prerendered id=%s elapsed_ms=%.1f",
+            session_id,
+            (time.perf_counter() - started) * 1000,
+        )
+        return True
+    except Exception as exc:  # noqa: BLE001 - 失敗時はダウンロード時に描画する
+        logger.warning("pdf_prerender_failed id=%s: %s", session_id, exc)
+        return False
+    finally:
+        with _prerender_lock:
+            _prerender_inflight.discard(cache_key)
+
+
 @app.get("/admin/sessions/{session_id}/download/{fmt}")
-def admin_download_session(session_id: str, fmt: str) -> Response:
-    """指定セッションを指定形式でダウンロードする。"""
+def admin_download_session(session_id: str, fmt: str, request: Request) -> Response:
+    """指定セッションを指定形式でダウンロードする。
+
+    md / pdf は描画結果をキャッシュし、ETag による再検証（304）に対応する。
+    """
     s = db_get_session(session_id)
     if not s:
         raise HTTPException(status_code=404, detail="session not found")
-    rows, vt_label, items = build_session_rows_and_items(s)
-    lines = build_markdown_lines(s, rows, vt_label)
-    if fmt == "md":
-        content = "\n".join(lines)
-        return Response(
-            content,
-            media_type="text/markdown; charset=utf-8",
-            headers={"Content-Disposition": f"attachment; filename=session-{session_id}.md"},
-        )
     if fmt == "csv":
-        buf = io.StringIO()
-        writer = csv.writer(buf)
-        writer.writerow(["項目", "回答"])
-        for label, ans in rows:
-            writer.writerow([label, ans])
-        content = buf.getvalue()
+        rows, _, _ = build_session_rows_and_items(s)
+        content = build_session_csv(rows)
         return Response(
             content,
             media_type="text/csv; charset=utf-8",
             headers={"Content-Disposition": f"attachment; filename=session-{session_id}.csv"},
         )
+    if fmt not in {"md", "pdf"}:
+        raise HTTPException(status_code=400, detail="unsupported format")
+
+    tpl = db_get_template(s.get("questionnaire_id"), s.get("visit_type")) or {}
+    layout_mode: PDFLayoutMode | None = None
+    facility_name: str | None = None
     if fmt == "pdf":
         layout_mode, facility_name = _resolve_pdf_render_config()
-        pdf_bytes = render_session_pdf(
-            session=s,
-            rows=rows,
-            template_items=items,
-            answers=s.get("answers", {}) or {},
-            vt_label=vt_label,
-            llm_question_texts=s.get("llm_question_texts") or {},
-            summary=s.get("summary"),
-            layout_mode=layout_mode,
-            facility_name=facility_name,
-        )
-        return StreamingResponse(
-            io.BytesIO(pdf_bytes),
-            media_type="application/pdf",
-            headers={"Content-Disposition": f"attachment; filename=session-{session_id}.pdf"},
-        )
-    raise HTTPException(status_code=400, detail="unsupported format")
+    cache_key = _session_document_key(s, tpl, fmt, layout_mode, facility_name)
+    etag = f'"{cache_key}"'
+    cache_headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=cache_headers)
+
+    media_type = "application/pdf" if fmt == "pdf" else "text/markdown; charset=utf-8"
+    headers = {
+        **cache_headers,
+        "Content-Disposition": f"attachment; filename=session-{session_id}.{fmt}",
+    }
+    # 事前描画が済んでいればそれを返し、未完了（描画中を含む）ならその場で描画する
+    content = rendered_document_cache.get(cache_key)
+    if content is None:
+        content = _render_session_document(s, tpl, fmt, layout_mode, facility_name)
+        rendered_document_cache.put(cache_key, content, kind=fmt, session_id=session_id)
+    return Response(content, media_type=media_type, headers=headers)
 
 
 @app.delete("/admin/sessions/{session_id}")
@@ -3940,6 +4558,8 @@ def admin_delete_session(session_id: str) -> dict[str, Any]:
     deleted = db_delete_session(session_id)
     if not deleted:
         raise HTTPException(status_code=404, detail="session not found")
+    llm_response_cache.purge_sessions([session_id])
+    rendered_document_cache.purge_sessions([session_id])
     return {"status": "ok", "deleted": 1}
 
 
@@ -3953,36 +4573,50 @@ def admin_bulk_delete(ids: list[str] = Query(default=[])) -> dict[str, Any]:
     if not ids:
         raise HTTPException(status_code=400, detail="ids is required")
     count = db_delete_sessions(ids)
+    llm_response_cache.purge_sessions(ids)
+    rendered_document_cache.purge_sessions(ids)
     return {"status": "ok", "deleted": int(count)}
 
 
-# --- 観測用メトリクス（最小実装） ---
-METRIC_SESSIONS_CREATED = 0
-METRIC_ANSWERS_RECEIVED = 0
-METRIC_LLM_CHATS = 0
-METRIC_SUMMARIES = 0
+# --- 観測用メトリクス ---
+METRIC_SESSIONS_CREATED = METRICS_REGISTRY.counter("monshin_sessions_created", "Number of sessions created")
+METRIC_ANSWERS_RECEIVED = METRICS_REGISTRY.counter("monshin_answers_received", "Number of answers received")
+METRIC_LLM_CHATS = METRICS_REGISTRY.counter("monshin_llm_chats", "Number of llm chat calls")
+METRIC_SUMMARIES = METRICS_REGISTRY.counter("monshin_summaries", "Number of summaries generated")
+
+# 既存のキャッシュ・イベント配信の統計値は収集時に読み出す
+for _name, _kind, _help, _read in (
+    ("monshin_llm_cache_hits", "counter", "Number of llm response cache hits", lambda: llm_response_cache.stats().get("hits", 0)),
+    ("monshin_llm_cache_misses", "counter", "Number of llm response cache misses", lambda: llm_response_cache.stats().get("misses", 0)),
+    ("monshin_llm_cache_evictions", "counter", "Number of llm response cache evictions", lambda: llm_response_cache.stats().get("evictions", 0)),
+    ("monshin_render_cache_hits", "counter", "Number of rendered document cache hits", lambda: rendered_document_cache.stats().get("hits", 0)),
+    ("monshin_render_cache_misses", "counter", "Number of rendered document cache misses", lambda: rendered_document_cache.stats().get("misses", 0)),
+    ("monshin_session_event_subscribers", "gauge", "Number of connected admin event subscribers", lambda: session_events.stats()["subscribers"]),
+    ("monshin_session_event_dropped", "counter", "Number of admin event messages dropped for slow subscribers", lambda: session_events.stats()["dropped"]),
+    ("monshin_session_event_disconnected", "counter", "Number of slow subscribers disconnected", lambda: session_events.stats()["disconnected"]),
+    ("monshin_session_event_rejected", "counter", "Number of subscriptions rejected by the subscriber limit", lambda: session_events.stats()["rejected"]),
+):
+    METRICS_REGISTRY.register_callback(_name, _help, _kind, _read)  # type: ignore[arg-type]
+METRICS_REGISTRY.register_callback(
+    "monshin_session_event_max_pending",
+    "Largest number of queued messages for a single subscriber",
+    "gauge",
+    lambda: session_events.stats()["max_pending"],
+    multiprocess_mode="max",
+)
+METRICS_REGISTRY.register_callback(
+    "monshin_session_event_max_lag_seconds",
+    "Age of the oldest undelivered message across subscribers",
+    "gauge",
+    lambda: session_events.stats()["max_lag_seconds"],
+    multiprocess_mode="max",
+)
 
 
 @app.get("/metrics")
 def metrics() -> Response:
-    """OpenMetrics 互換の最小テキストを返す。"""
-    lines = [
-        "# HELP monshin_sessions_created Number of sessions created",
-        "# TYPE monshin_sessions_created counter",
-        f"monshin_sessions_created {METRIC_SESSIONS_CREATED}",
-        "# HELP monshin_answers_received Number of answers received",
-        "# TYPE monshin_answers_received counter",
-        f"monshin_answers_received {METRIC_ANSWERS_RECEIVED}",
-        "# HELP monshin_llm_chats Number of llm chat calls",
-        "# TYPE monshin_llm_chats counter",
-        f"monshin_llm_chats {METRIC_LLM_CHATS}",
-        "# HELP monshin_summaries Number of summaries generated",
-        "# TYPE monshin_summaries counter",
-        f"monshin_summaries {METRIC_SUMMARIES}",
-        "",
-    ]
-    body = "\n".join(lines)
-    return Response(content=body, media_type="text/plain; version=0.0.4")
+    """OpenMetrics 形式のテキストを返す（複数ワーカー構成では全プロセス分を合算）。"""
+    return Response(content=METRICS_REGISTRY.render(), media_type=OPENMETRICS_CONTENT_TYPE)
 
 
 # --- UI メトリクス受け口（匿名・院内向け） ---
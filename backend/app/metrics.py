@@ -0,0 +1,445 @@
+"""アプリ内メトリクスのレジストリと OpenMetrics 形式の出力。
+
+カウンタ・ゲージ・ヒストグラムをスレッドセーフに記録し、`/metrics` で
+OpenMetrics テキストとして返す。
+`MONSHINMATE_METRICS_DIR` を指定すると、各ワーカープロセスが自分の値を一定間隔で
+`metrics-<pid>-<id>.json` として書き出し、収集時は全プロセス分を合算する
+（カウンタ・ヒストグラムは合計、ゲージは最近書き出したプロセスのみを合計または最大値で集約）。
+ディレクトリはデプロイ（全ワーカー起動）前に空にしておく。
+"""
+from __future__ import annotations
+
+from bisect import bisect_left
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Iterator, Literal
+from uuid import uuid4
+import json
+import logging
+import math
+import os
+import threading
+import time
+
+
+MetricKind = Literal["counter", "gauge", "histogram"]
+GaugeMode = Literal["sum", "max"]
+
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+# 秒単位の既定バケット（LLM 呼び出しのような長い処理まで含める）
+DEFAULT_BUCKETS: tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+METRICS_DIR = os.getenv("MONSHINMATE_METRICS_DIR", "").strip()
+METRICS_FLUSH_INTERVAL = float(os.getenv("MONSHINMATE_METRICS_FLUSH_INTERVAL", "5"))
+
+_LOGGER = logging.getLogger("metrics")
+
+LabelKey = tuple[str, ...]
+
+
+class _Metric:
+    kind: MetricKind
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: dict[LabelKey, Any] = {}
+
+    def _key(self, labels: dict[str, Any]) -> LabelKey:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name}: expected labels {self.labelnames}, got {tuple(labels)}")
+        try:
+            return tuple(str(labels[name]) for name in self.labelnames)
+        except KeyError as exc:
+            raise ValueError(f"{self.name}: missing label {exc}") from None
+
+    def samples(self) -> dict[LabelKey, Any]:
+        with self._lock:
+            values = {key: _copy_value(value) for key, value in self._values.items()}
+        if not values and not self.labelnames:
+            values[()] = self._zero()
+        return values
+
+    def _zero(self) -> Any:
+        return 0.0
+
+    def describe(self) -> dict[str, Any]:
+        return {"kind": self.kind, "help": self.documentation, "labelnames": list(self.labelnames)}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+def _copy_value(value: Any) -> Any:
+    if isinstance(value, list):
+        return [list(value[0]), value[1]]
+    return value
+
+
+class Counter(_Metric):
+    """単調増加するカウンタ。"""
+
+    kind: MetricKind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        if amount < 0:
+            raise ValueError("counters can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    """増減する現在値。"""
+
+    kind: MetricKind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        *,
+        multiprocess_mode: GaugeMode = "sum",
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.multiprocess_mode = multiprocess_mode
+
+    def set(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+    def describe(self) -> dict[str, Any]:
+        return {**super().describe(), "mode": self.multiprocess_mode}
+
+
+class Histogram(_Metric):
+    """観測値の分布。バケットごとの件数（非累積）と合計を保持する。"""
+
+    kind: MetricKind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        *,
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(float(b) for b in buckets if not math.isinf(b)))
+
+    def _zero(self) -> Any:
+        return [[0] * (len(self.buckets) + 1), 0.0]
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = self._zero()
+            state[0][index] += 1
+            state[1] += value
+
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[None]:
+        """ブロックの所要時間（秒）を記録する。例外時も記録する。"""
+
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def describe(self) -> dict[str, Any]:
+        return {**super().describe(), "buckets": list(self.buckets)}
+
+
+class _CallbackMetric(_Metric):
+    """収集時に関数を呼び出して値を得るメトリクス（既存の統計値の公開用）。"""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        kind: MetricKind,
+        callback: Callable[[], float],
+        *,
+        multiprocess_mode: GaugeMode = "sum",
+    ) -> None:
+        if kind == "histogram":
+            raise ValueError("callback metrics cannot be histograms")
+        super().__init__(name, documentation)
+        self.kind = kind
+        self.callback = callback
+        self.multiprocess_mode = multiprocess_mode
+
+    def samples(self) -> dict[LabelKey, Any]:
+        try:
+            return {(): float(self.callback())}
+        except Exception as exc:  # noqa: BLE001 - 収集失敗で /metrics 全体を落とさない
+            _LOGGER.warning("metric_callback_failed name=%s: %s", self.name, exc)
+            return {}
+
+    def describe(self) -> dict[str, Any]:
+        description = super().describe()
+        if self.kind == "gauge":
+            description["mode"] = self.multiprocess_mode
+        return description
+
+
+class MetricsRegistry:
+    """メトリクスの登録先。同名の再登録は既存のものを返す。"""
+
+    def __init__(self, shared_dir: str | Path | None = None, *, flush_interval: float = METRICS_FLUSH_INTERVAL) -> None:
+        self.shared_dir = Path(shared_dir) if shared_dir else None
+        self.flush_interval = max(0.5, float(flush_interval))
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+        self._process: tuple[int, Path] | None = None
+        self._flusher: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    def _register(self, metric: _Metric) -> Any:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if existing.kind != metric.kind or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"metric {metric.name} is already registered with a different shape")
+                if isinstance(existing, _CallbackMetric) and isinstance(metric, _CallbackMetric):
+                    existing.callback = metric.callback
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        *,
+        multiprocess_mode: GaugeMode = "sum",
+    ) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames, multiprocess_mode=multiprocess_mode))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        *,
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets=buckets))
+
+    def register_callback(
+        self,
+        name: str,
+        documentation: str,
+        kind: MetricKind,
+        callback: Callable[[], float],
+        *,
+        multiprocess_mode: GaugeMode = "sum",
+    ) -> None:
+        self._register(_CallbackMetric(name, documentation, kind, callback, multiprocess_mode=multiprocess_mode))
+
+    def get(self, name: str) -> _Metric | None:
+        return self._metrics.get(name)
+
+    # --- スナップショットと複数プロセスでの共有 ---
+    def snapshot(self) -> dict[str, Any]:
+        """このプロセスの全メトリクスを JSON 化できる形で返す。"""
+
+        with self._lock:
+            metrics = list(self._metrics.values())
+        families: dict[str, Any] = {}
+        for metric in metrics:
+            families[metric.name] = {
+                **metric.describe(),
+                "samples": [[list(key), value] for key, value in metric.samples().items()],
+            }
+        return {"pid": os.getpid(), "written_at": time.time(), "metrics": families}
+
+    def _process_file(self) -> Path | None:
+        if self.shared_dir is None:
+            return None
+        pid = os.getpid()
+        # fork 後の子プロセスは別ファイルに書く
+        if self._process is None or self._process[0] != pid:
+            self._process = (pid, self.shared_dir / f"metrics-{pid}-{uuid4().hex[:8]}.json")
+        return self._process[1]
+
+    def write_snapshot(self) -> Path | None:
+        """共有ディレクトリへこのプロセスの値を書き出す（一時ファイル経由で置き換える）。"""
+
+        path = self._process_file()
+        if path is None:
+            return None
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.snapshot(), ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, path)
+        return path
+
+    def _read_snapshots(self) -> list[dict[str, Any]]:
+        own = self.snapshot()
+        if self.shared_dir is None:
+            return [own]
+        try:
+            self.write_snapshot()
+        except OSError as exc:
+            _LOGGER.warning("metrics_snapshot_write_failed: %s", exc)
+        own_path = self._process_file()
+        snapshots = [own]
+        for path in sorted(self.shared_dir.glob("metrics-*.json")):
+            if path == own_path:
+                continue
+            try:
+                snapshots.append(json.loads(path.read_text(encoding="utf-8")))
+            except (OSError, ValueError) as exc:
+                _LOGGER.warning("metrics_snapshot_read_failed path=%s: %s", path.name, exc)
+        return snapshots
+
+    def collect(self) -> dict[str, Any]:
+        """全プロセス分を合算したメトリクスを返す。"""
+
+        snapshots = self._read_snapshots()
+        # 終了したプロセスのゲージは現在値として意味を持たないため除外する
+        fresh_after = time.time() - self.flush_interval * 3
+        merged: dict[str, Any] = {}
+        for index, snapshot in enumerate(snapshots):
+            fresh = index == 0 or float(snapshot.get("written_at") or 0) >= fresh_after
+            for name, family in (snapshot.get("metrics") or {}).items():
+                target = merged.get(name)
+                if target is None:
+                    target = merged[name] = {**family, "samples": {}}
+                elif target.get("kind") != family.get("kind"):
+                    continue
+                kind = target["kind"]
+                if kind == "gauge" and not fresh:
+                    continue
+                values = target["samples"]
+                for labels, value in family.get("samples") or []:
+                    key = tuple(labels)
+                    current = values.get(key)
+                    if current is None:
+                        values[key] = _copy_value(value)
+                    elif kind == "histogram":
+                        if len(current[0]) == len(value[0]):
+                            current[0] = [a + b for a, b in zip(current[0], value[0])]
+                            current[1] += value[1]
+                    elif kind == "gauge" and target.get("mode") == "max":
+                        values[key] = max(current, value)
+                    else:
+                        values[key] = current + value
+        return merged
+
+    def render(self) -> str:
+        """OpenMetrics テキスト形式で出力する。"""
+
+        lines: list[str] = []
+        for name, family in self.collect().items():
+            kind = family["kind"]
+            labelnames = family.get("labelnames") or []
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"# HELP {name} {_escape_help(family.get('help') or '')}")
+            for key, value in sorted(family["samples"].items()):
+                labels = list(zip(labelnames, key))
+                if kind == "counter":
+                    lines.append(f"{name}_total{_format_labels(labels)} {_format_value(value)}")
+                elif kind == "gauge":
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+                else:
+                    counts, total = value
+                    cumulative = 0
+                    for bound, count in zip([*family.get("buckets", []), math.inf], counts):
+                        cumulative += count
+                        bucket_labels = _format_labels([*labels, ("le", _format_value(bound))])
+                        lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(total)}")
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    # --- 定期書き出し ---
+    def start_flusher(self) -> None:
+        """共有ディレクトリが設定されている場合、定期書き出しスレッドを起動する。"""
+
+        if self.shared_dir is None or (self._flusher is not None and self._flusher.is_alive()):
+            return
+        self._stop.clear()
+        self._flusher = threading.Thread(target=self._flush_loop, name="metrics-flusher", daemon=True)
+        self._flusher.start()
+
+    def _flush_loop(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.write_snapshot()
+            except OSError as exc:
+                _LOGGER.warning("metrics_snapshot_write_failed: %s", exc)
+
+    def stop_flusher(self) -> None:
+        """定期書き出しを止め、最後の値を書き出す。"""
+
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join(timeout=self.flush_interval)
+            self._flusher = None
+        if self.shared_dir is not None:
+            try:
+                self.write_snapshot()
+            except OSError as exc:
+                _LOGGER.warning("metrics_snapshot_write_failed: %s", exc)
+
+
+def _escape_help(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: list[tuple[str, str]]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label_value(str(value))}"' for name, value in labels) + "}"
+
+
+def _format_value(value: float) -> str:
+    value = float(value)
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return repr(value)
+
+
+REGISTRY = MetricsRegistry(METRICS_DIR or None)
+
+
+__all__ = [
+    "Counter",
+    "DEFAULT_BUCKETS",
+    "Gauge",
+    "Histogram",
+    "MetricsRegistry",
+    "OPENMETRICS_CONTENT_TYPE",
+    "REGISTRY",
+]
@@ -3,53 +3,195 @@ from __future__ import annotations
 import asyncio
 import json
 import logging
-from collections.abc import AsyncIterator
-from typing import Any
+import time
+from collections.abc import AsyncIterator, Callable
+from typing import Any, Literal
+
+
+OverflowPolicy = Literal["drop_oldest", "disconnect"]
+
+
+class TooManySubscribers(RuntimeError):
+    """購読者数が上限に達している。"""
+
+
+class _Subscriber:
+    """購読者ごとの送信待ちキューと統計。"""
+
+    __slots__ = ("id", "queue", "connected_at", "delivered", "dropped", "closed")
+
+    def __init__(self, subscriber_id: int, max_queue: int) -> None:
+        self.id = subscriber_id
+        # (キュー投入時刻, メッセージ)。None は切断の合図
+        self.queue: asyncio.Queue[tuple[float, bytes] | None] = asyncio.Queue(maxsize=max_queue)
+        self.connected_at = time.monotonic()
+        self.delivered = 0
+        self.dropped = 0
+        self.closed = False
+
+    def lag_seconds(self, now: float) -> float:
+        """最も古い未送信メッセージの待ち時間（秒）。"""
+
+        try:
+            head = self.queue._queue[0]  # type: ignore[attr-defined]
+        except (AttributeError, IndexError):
+            return 0.0
+        return max(0.0, now - head[0]) if head else 0.0
 
 
 class SessionEventBroker:
-    """管理画面向けのセッション完了イベントを配信するシンプルなSSEブローカー。"""
+    """管理画面向けのセッション完了イベントを配信するシンプルなSSEブローカー。
+
+    購読者ごとのキューは上限付きで、詰まった購読者は `overflow_policy` に従って
+    古いメッセージを捨てる（drop_oldest）か切断する（disconnect）。配信は待たないため、
+    応答しないブラウザタブがあっても他の購読者や配信元は止まらない。
+    """
 
-    def __init__(self, heartbeat_interval: float = 25.0) -> None:
-        self._subscribers: set[asyncio.Queue[bytes]] = set()
-        self._lock = asyncio.Lock()
+    def __init__(
+        self,
+        heartbeat_interval: float = 25.0,
+        *,
+        max_queue: int = 100,
+        max_subscribers: int = 1000,
+        overflow_policy: OverflowPolicy = "drop_oldest",
+    ) -> None:
+        if overflow_policy not in ("drop_oldest", "disconnect"):
+            raise ValueError(f"unknown overflow policy: {overflow_policy}")
+        self._subscribers: dict[int, _Subscriber] = {}
         self._heartbeat_interval = heartbeat_interval
+        self._max_queue = max(1, int(max_queue))
+        self._max_subscribers = max(1, int(max_subscribers))
+        self._overflow_policy = overflow_policy
+        self._next_id = 0
+        self._stats = {"published": 0, "dropped": 0, "disconnected": 0, "rejected": 0}
         self._logger = logging.getLogger("session_events")
 
-    async def stream(self) -> AsyncIterator[bytes]:
-        """購読ストリームを生成する。クライアント切断時に自動で購読解除する。"""
+    def check_capacity(self) -> None:
+        """購読者数が上限に達している場合は `TooManySubscribers` を送出する。"""
+
+        if len(self._subscribers) >= self._max_subscribers:
+            self._stats["rejected"] += 1
+            raise TooManySubscribers(f"subscriber limit reached ({self._max_subscribers})")
+
+    def subscribe(self) -> _Subscriber:
+        """購読を登録する。上限に達している場合は `TooManySubscribers` を送出する。"""
+
+        self.check_capacity()
+        self._next_id += 1
+        subscriber = _Subscriber(self._next_id, self._max_queue)
+        self._subscribers[subscriber.id] = subscriber
+        self._logger.debug("session_events subscriber added; total=%d", len(self._subscribers))
+        return subscriber
+
+    def unsubscribe(self, subscriber: _Subscriber) -> None:
+        """購読を解除する（ストリームを開始せずに終える場合に使う）。"""
+
+        self._unsubscribe(subscriber)
 
-        queue: asyncio.Queue[bytes] = asyncio.Queue()
-        async with self._lock:
-            self._subscribers.add(queue)
-            self._logger.debug("session_events subscriber added; total=%d", len(self._subscribers))
+    def _unsubscribe(self, subscriber: _Subscriber) -> None:
+        subscriber.closed = True
+        if self._subscribers.pop(subscriber.id, None) is not None:
+            self._logger.debug("session_events subscriber removed; total=%d", len(self._subscribers))
 
+    async def stream(self, subscriber: _Subscriber | None = None) -> AsyncIterator[bytes]:
+        """購読ストリームを生成する。クライアント切断時に自動で購読解除する。
+
+        `subscriber` を省略した場合はここで購読を登録する。
+        """
+
+        if subscriber is None:
+            subscriber = self.subscribe()
         try:
-            while True:
+            while not subscriber.closed:
                 try:
-                    message = await asyncio.wait_for(queue.get(), timeout=self._heartbeat_interval)
+                    entry = await asyncio.wait_for(
+                        subscriber.queue.get(), timeout=self._heartbeat_interval
+                    )
                 except asyncio.TimeoutError:
                     yield b": keep-alive\n\n"
-                else:
-                    yield message
+                    continue
+                if entry is None:
+                    break
+                subscriber.delivered += 1
+                yield entry[1]
         finally:
-            async with self._lock:
-                self._subscribers.discard(queue)
-                self._logger.debug("session_events subscriber removed; total=%d", len(self._subscribers))
+            self._unsubscribe(subscriber)
 
     async def publish(
         self, event: dict[str, Any], *, event_id: str | None = None, event_name: str = "session.finalized"
     ) -> None:
         """全購読者へイベントを配信する。購読者がいない場合は即座に戻る。"""
 
-        message = self.serialize(event, event_id=event_id, event_name=event_name)
-        async with self._lock:
-            subscribers = list(self._subscribers)
-        if not subscribers:
+        if not self._subscribers:
             self._logger.debug("session_events publish skipped; no subscribers")
             return
-        for queue in subscribers:
-            await queue.put(message)
+        # シリアライズは1イベントにつき1回のみ行い、同じバイト列を全購読者で共有する
+        self.broadcast(self.serialize(event, event_id=event_id, event_name=event_name))
+
+    def broadcast(self, message: bytes) -> None:
+        """シリアライズ済みのメッセージを全購読者のキューへ積む（待機しない）。"""
+
+        self._stats["published"] += 1
+        entry = (time.monotonic(), message)
+        for subscriber in list(self._subscribers.values()):
+            queue = subscriber.queue
+            try:
+                queue.put_nowait(entry)
+                continue
+            except asyncio.QueueFull:
+                pass
+            if self._overflow_policy == "disconnect":
+                self._disconnect(subscriber)
+                continue
+            try:
+                queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+            subscriber.dropped += 1
+            self._stats["dropped"] += 1
+            queue.put_nowait(entry)
+
+    def _disconnect(self, subscriber: _Subscriber) -> None:
+        """滞留した購読者を切断する。未送信のメッセージは破棄し、切断の合図を積む。"""
+
+        queue = subscriber.queue
+        while True:
+            try:
+                queue.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            subscriber.dropped += 1
+            self._stats["dropped"] += 1
+        queue.put_nowait(None)
+        self._stats["disconnected"] += 1
+        self._unsubscribe(subscriber)
+        self._logger.warning("session_events slow subscriber disconnected id=%d", subscriber.id)
+
+    def stats(self) -> dict[str, Any]:
+        """購読者数・破棄件数・購読者ごとの遅延などの統計値を返す。"""
+
+        now = time.monotonic()
+        per_subscriber = [
+            {
+                "id": sub.id,
+                "pending": sub.queue.qsize(),
+                "lag_seconds": round(sub.lag_seconds(now), 3),
+                "delivered": sub.delivered,
+                "dropped": sub.dropped,
+                "connected_seconds": round(now - sub.connected_at, 1),
+            }
+            for sub in self._subscribers.values()
+        ]
+        return {
+            **self._stats,
+            "subscribers": len(per_subscriber),
+            "max_subscribers": self._max_subscribers,
+            "max_queue": self._max_queue,
+            "overflow_policy": self._overflow_policy,
+            "max_pending": max((s["pending"] for s in per_subscriber), default=0),
+            "max_lag_seconds": max((s["lag_seconds"] for s in per_subscriber), default=0.0),
+            "per_subscriber": per_subscriber,
+        }
 
     def serialize(
         self, event: dict[str, Any], *, event_id: str | None = None, event_name: str = "session.finalized"
@@ -66,6 +208,102 @@ class SessionEventBroker:
         if event_name:
             lines.append(f"event: {event_name}")
         lines.append(f"data: {payload}")
-        lines.append("")  # SSE メッセージの終端
+        # SSE メッセージは空行で終端する（連続して送っても1件ずつ区切られるように）
+        lines.extend(["", ""])
         message = "\n".join(lines).encode("utf-8")
         return message
+
+
+def message_event_id(message: bytes) -> str | None:
+    """シリアライズ済み SSE メッセージの `id:` 行の値を返す。"""
+
+    for line in message.split(b"\n"):
+        if line.startswith(b"id: "):
+            return line[4:].decode("utf-8", "replace").strip() or None
+        if not line:
+            break
+    return None
+
+
+class EventLogRelay:
+    """イベントログをカーソル付きでポーリングし、このプロセスの購読者へ中継する。
+
+    複数の uvicorn ワーカーや別プロセスで記録されたイベントも、各プロセスの中継が
+    同じログを読み進めることで全購読者に届く。カーソルは起動時点の最新 ID から始める
+    （それ以前のイベントは再接続時の再送で補う）。
+    """
+
+    def __init__(
+        self,
+        broker: SessionEventBroker,
+        fetch_after: Callable[[int, int], list[dict[str, Any]]],
+        latest_id: Callable[[], int],
+        *,
+        interval: float = 1.0,
+        batch_size: int = 500,
+    ) -> None:
+        self._broker = broker
+        self._fetch_after = fetch_after
+        self._latest_id = latest_id
+        self._interval = max(0.05, float(interval))
+        self._batch_size = max(1, int(batch_size))
+        self._cursor: int | None = None
+        self._task: asyncio.Task[None] | None = None
+        self._logger = logging.getLogger("session_events")
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def cursor(self) -> int | None:
+        return self._cursor
+
+    async def prime(self) -> None:
+        """カーソルを現在の最新 ID に合わせる。"""
+
+        self._cursor = int(await asyncio.to_thread(self._latest_id) or 0)
+
+    async def poll_once(self) -> int:
+        """カーソル以降のイベントを配信し、配信件数を返す。"""
+
+        if self._cursor is None:
+            await self.prime()
+        rows = await asyncio.to_thread(self._fetch_after, self._cursor or 0, self._batch_size)
+        for row in rows:
+            event_id = int(row["id"])
+            await self._broker.publish(
+                row.get("payload") or {},
+                event_id=str(event_id),
+                event_name=row.get("event_name") or "",
+            )
+            self._cursor = event_id
+        return len(rows)
+
+    async def run(self) -> None:
+        while True:
+            try:
+                delivered = await self.poll_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self._logger.exception("session_events relay poll failed")
+                delivered = 0
+            # 取りきれなかった場合は待たずに続きを読む
+            if delivered < self._batch_size:
+                await asyncio.sleep(self._interval)
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is None:
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
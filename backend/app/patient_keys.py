@@ -0,0 +1,161 @@
+"""患者照合用のキー（正規化した氏名・生年月日）。
+
+拡張機能向けの `/patient-summary` は氏名と生年月日の組で確定済みセッションを探す。
+生年月日は ISO・スラッシュ区切り・和暦などの表記で届くため、保存時に一度だけ
+`YYYY-MM-DD` に揃え、検索時も同じ関数でキーを作って索引と突き合わせる。
+"""
+from __future__ import annotations
+
+from datetime import datetime
+import re
+import unicodedata
+
+
+SPACE_CHARS = {" ", "\u3000"}
+
+DATE_FORMATS = [
+    "%Y-%m-%d",
+    "%Y/%m/%d",
+    "%Y.%m.%d",
+    "%Y年%m月%d日",
+    "%Y %m %d",
+]
+
+ERA_YEAR_PATTERN = re.compile(
+    r"(令和|reiwa|R|平成|heisei|H|昭和|showa|S|大正|taisho|T|明治|meiji|M)\s*(元|\d{1,2})",
+    re.IGNORECASE,
+)
+ERA_BASE_YEARS: dict[str, int] = {
+    "令和": 2018,
+    "reiwa": 2018,
+    "r": 2018,
+    "平成": 1988,
+    "heisei": 1988,
+    "h": 1988,
+    "昭和": 1925,
+    "showa": 1925,
+    "s": 1925,
+    "大正": 1911,
+    "taisho": 1911,
+    "t": 1911,
+    "明治": 1867,
+    "meiji": 1867,
+    "m": 1867,
+}
+
+
+def try_parse_iso_date(value: str) -> str | None:
+    trimmed = value.strip()
+    if not trimmed:
+        return None
+    normalized_values = [trimmed, trimmed.replace(" ", "")]
+    for candidate in normalized_values:
+        for fmt in DATE_FORMATS:
+            try:
+                dt = datetime.strptime(candidate, fmt)
+                return dt.strftime("%Y-%m-%d")
+            except ValueError:
+                continue
+    digits_only = re.sub(r"\D", "", trimmed)
+    if len(digits_only) == 8:
+        try:
+            year = int(digits_only[0:4])
+            month = int(digits_only[4:6])
+            day = int(digits_only[6:8])
+            dt = datetime(year, month, day)
+            return dt.strftime("%Y-%m-%d")
+        except ValueError:
+            return None
+    era_candidate = try_parse_japanese_era_date(trimmed)
+    if era_candidate:
+        year, month, day = era_candidate
+        try:
+            dt = datetime(year, month, day)
+            return dt.strftime("%Y-%m-%d")
+        except ValueError:
+            return None
+    return None
+
+
+def try_parse_japanese_era_date(value: str) -> tuple[int, int, int] | None:
+    match = ERA_YEAR_PATTERN.search(value)
+    if not match:
+        return None
+    era_key = match.group(1)
+    year_token = match.group(2)
+    base = ERA_BASE_YEARS.get(era_key.lower()) or ERA_BASE_YEARS.get(era_key)  # type: ignore[arg-type]
+    if base is None:
+        return None
+    if year_token == "元":
+        year_number = 1
+    else:
+        try:
+            year_number = int(year_token)
+        except ValueError:
+            return None
+    year = base + year_number
+    remainder = value[match.end():]
+    month_day = extract_month_day_from_text(remainder)
+    if not month_day:
+        return None
+    return year, month_day[0], month_day[1]
+
+
+def extract_month_day_from_text(text: str) -> tuple[int, int] | None:
+    if not text:
+        return None
+    month_match = re.search(r"(\d{1,2})月", text)
+    day_match = re.search(r"(\d{1,2})日", text)
+    if month_match and day_match:
+        try:
+            month = int(month_match.group(1))
+            day = int(day_match.group(1))
+        except ValueError:
+            return None
+        if 1 <= month <= 12 and 1 <= day <= 31:
+            return month, day
+    pair = re.search(r"(\d{1,2})\D+(\d{1,2})", text)
+    if pair:
+        try:
+            month = int(pair.group(1))
+            day = int(pair.group(2))
+        except ValueError:
+            return None
+        if 1 <= month <= 12 and 1 <= day <= 31:
+            return month, day
+    digits = re.findall(r"(\d{1,2})", text)
+    if len(digits) >= 2:
+        try:
+            month = int(digits[0])
+            day = int(digits[1])
+        except ValueError:
+            return None
+        if 1 <= month <= 12 and 1 <= day <= 31:
+            return month, day
+    return None
+
+
+def patient_name_key(value: str | None) -> str:
+    """全角・半角の違いと氏名中の空白を無視した照合用の氏名。"""
+
+    normalized = unicodedata.normalize("NFKC", value or "")
+    return "".join(ch for ch in normalized if ch not in SPACE_CHARS)
+
+
+def canonical_dob(value: str | None) -> str:
+    """生年月日を `YYYY-MM-DD` に揃える。解釈できない表記は前後の空白を除いてそのまま返す。"""
+
+    trimmed = unicodedata.normalize("NFKC", value or "").strip()
+    if not trimmed:
+        return ""
+    return try_parse_iso_date(trimmed) or trimmed
+
+
+__all__ = [
+    "SPACE_CHARS",
+    "canonical_dob",
+    "extract_month_day_from_text",
+    "patient_name_key",
+    "try_parse_iso_date",
+    "try_parse_japanese_era_date",
+]
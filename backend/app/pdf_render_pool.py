@@ -0,0 +1,204 @@
+"""PDF レンダリングをプロセスプールで並列実行するサービス。
+
+一括ダウンロード時に reportlab の描画を CPU コア数分に分散し、入力順に結果を返す。
+ワーカーは起動時に日本語フォントとスタイルを読み込んでおく。
+一括処理が同時に使えるワーカー数には上限を設け、単票ダウンロード用に空きを残す。
+"""
+from __future__ import annotations
+
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Iterable, Iterator
+import logging
+import multiprocessing
+import os
+import threading
+import time
+
+from .metrics import REGISTRY as METRICS_REGISTRY
+from .pdf_renderer import PDFLayoutMode, get_render_context, render_session_pdf
+
+
+logger = logging.getLogger("api")
+
+# 0 の場合はプロセスプールを使わず呼び出し元スレッドで描画する
+PDF_RENDER_WORKERS = int(os.getenv("MONSHINMATE_PDF_WORKERS", str(os.cpu_count() or 1)))
+# 単票ダウンロード用に確保しておくワーカー数
+PDF_RENDER_RESERVED_WORKERS = int(os.getenv("MONSHINMATE_PDF_RESERVED_WORKERS", "1"))
+
+
+# 描画時間はワーカーとの受け渡しを含めて API プロセス側で計測する
+PDF_RENDER_DURATION = METRICS_REGISTRY.histogram(
+    "monshin_pdf_render_duration_seconds",
+    "PDF render time including the worker round-trip",
+    ("mode", "layout"),
+)
+
+
+def _observe_render(job: dict[str, Any], mode: str, started: float) -> None:
+    PDF_RENDER_DURATION.observe(
+        time.perf_counter() - started, mode=mode, layout=str(job.get("layout_mode") or "")
+    )
+
+
+def _warm_worker() -> None:
+    """ワーカープロセス起動時にフォントとスタイル（描画コンテキスト）を読み込む。"""
+
+    get_render_context()
+
+
+def _render_job(job: dict[str, Any]) -> bytes:
+    layout_mode = job.get("layout_mode")
+    if not isinstance(layout_mode, PDFLayoutMode):
+        try:
+            layout_mode = PDFLayoutMode(layout_mode)
+        except ValueError:
+            layout_mode = PDFLayoutMode.STRUCTURED
+    return render_session_pdf(**{**job, "layout_mode": layout_mode})
+
+
+def build_render_job(
+    *,
+    session: dict[str, Any],
+    rows: list[tuple[str, str]],
+    template_items: list[Any],
+    vt_label: str,
+    layout_mode: PDFLayoutMode,
+    facility_name: str,
+) -> dict[str, Any]:
+    """`render_session_pdf` の引数をプロセス間で受け渡せる形に整える。"""
+
+    items: list[Any] = []
+    for item in template_items:
+        if hasattr(item, "model_dump"):
+            items.append(item.model_dump())
+        elif hasattr(item, "dict"):
+            items.append(item.dict())
+        else:
+            items.append(item)
+    return {
+        "session": dict(session),
+        "rows": [(str(label), str(answer)) for label, answer in rows],
+        "template_items": items,
+        "answers": dict(session.get("answers", {}) or {}),
+        "vt_label": vt_label,
+        "llm_question_texts": dict(session.get("llm_question_texts") or {}),
+        "summary": session.get("summary"),
+        "layout_mode": layout_mode.value,
+        "facility_name": facility_name,
+    }
+
+
+class PDFRenderPool:
+    """PDF 描画用のプロセスプール。初回利用時に起動する。"""
+
+    def __init__(
+        self,
+        max_workers: int = PDF_RENDER_WORKERS,
+        reserved_workers: int = PDF_RENDER_RESERVED_WORKERS,
+    ) -> None:
+        self.max_workers = max(0, int(max_workers))
+        # 一括処理が同時に投入できるタスク数（単票用の空きを残す）
+        self.bulk_slots = max(1, self.max_workers - max(0, int(reserved_workers)))
+        self._bulk_semaphore = threading.BoundedSemaphore(self.bulk_slots)
+        self._executor: ProcessPoolExecutor | None = None
+        self._guard = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_workers > 0
+
+    def _get_executor(self) -> ProcessPoolExecutor | None:
+        if not self.enabled:
+            return None
+        with self._guard:
+            if self._executor is None:
+                # fork はスレッドを抱えた API プロセスでは安全でないため spawn で起動する
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_warm_worker,
+                )
+            return self._executor
+
+    def _submit(self, job: dict[str, Any]) -> Future[bytes] | None:
+        executor = self._get_executor()
+        if executor is None:
+            return None
+        try:
+            return executor.submit(_render_job, job)
+        except Exception as exc:  # noqa: BLE001 - プール異常時はインライン描画へ
+            logger.warning("pdf_render_pool_submit_failed: %s", exc)
+            with self._guard:
+                self._executor = None
+            return None
+
+    def render(self, job: dict[str, Any]) -> bytes:
+        """単票を描画する。一括処理の上限とは独立して実行される。"""
+
+        started = time.perf_counter()
+        try:
+            future = self._submit(job)
+            if future is None:
+                return _render_job(job)
+            return future.result()
+        finally:
+            _observe_render(job, "single", started)
+
+    def render_many(self, jobs: Iterable[dict[str, Any]]) -> Iterator[bytes]:
+        """複数ジョブを並列に描画し、入力順に結果を返す。
+
+        実行中のタスク数は全リクエスト合計で `bulk_slots` までに制限し、
+        未返却の結果は `bulk_slots` の2倍までに抑える。
+        """
+
+        if not self.enabled:
+            for job in jobs:
+                started = time.perf_counter()
+                pdf = _render_job(job)
+                _observe_render(job, "bulk", started)
+                yield pdf
+            return
+
+        window = self.bulk_slots * 2
+        pending: deque[Future[bytes]] = deque()
+        try:
+            for job in jobs:
+                while len(pending) >= window:
+                    yield pending.popleft().result()
+                self._bulk_semaphore.acquire()
+                started = time.perf_counter()
+                future = self._submit(job)
+                if future is None:
+                    self._bulk_semaphore.release()
+                    while pending:
+                        yield pending.popleft().result()
+                    pdf = _render_job(job)
+                    _observe_render(job, "bulk", started)
+                    yield pdf
+                    continue
+                # 完了（キャンセル含む）した時点で枠を返す
+                future.add_done_callback(
+                    lambda f, job=job, started=started: self._on_bulk_done(f, job, started)
+                )
+                pending.append(future)
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def _on_bulk_done(self, future: Future[bytes], job: dict[str, Any], started: float) -> None:
+        self._bulk_semaphore.release()
+        if not future.cancelled():
+            _observe_render(job, "bulk", started)
+
+    def shutdown(self) -> None:
+        with self._guard:
+            executor = self._executor
+            self._executor = None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+__all__ = ["PDFRenderPool", "build_render_job"]
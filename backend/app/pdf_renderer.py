@@ -5,7 +5,8 @@
 from __future__ import annotations
 
 import io
-from dataclasses import dataclass
+import threading
+from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
 from typing import Any, Mapping, Sequence, TYPE_CHECKING
@@ -64,6 +65,7 @@ class ItemNode:
 
 
 _JP_FONTS_REGISTERED = False
+JAPANESE_FONT_NAMES = ("HeiseiMin-W3", "HeiseiKakuGo-W5")
 
 
 def ensure_japanese_fonts() -> None:
@@ -72,8 +74,8 @@ def ensure_japanese_fonts() -> None:
     global _JP_FONTS_REGISTERED
     if _JP_FONTS_REGISTERED:
         return
-    pdfmetrics.registerFont(UnicodeCIDFont("HeiseiMin-W3"))
-    pdfmetrics.registerFont(UnicodeCIDFont("HeiseiKakuGo-W5"))
+    for name in JAPANESE_FONT_NAMES:
+        pdfmetrics.registerFont(UnicodeCIDFont(name))
     _JP_FONTS_REGISTERED = True
 
 
@@ -244,26 +246,212 @@ def _create_styles() -> dict[str, ParagraphStyle]:
     return styles
 
 
-_LABEL_STYLE_CACHE: dict[int, ParagraphStyle] = {}
-
-
 def _label_style_for_depth(depth: int, base_style: ParagraphStyle) -> ParagraphStyle:
-    style = _LABEL_STYLE_CACHE.get(depth)
-    if style:
-        return style
-    style = ParagraphStyle(
+    return ParagraphStyle(
         name=f"LabelDepth{depth}",
         parent=base_style,
         leftIndent=depth * 6 * mm,
         leading=base_style.leading,
     )
-    _LABEL_STYLE_CACHE[depth] = style
-    return style
+
+
+def _create_table_styles() -> dict[str, TableStyle]:
+    """表の罫線・余白設定。描画ごとに作らず共有する。"""
+
+    return {
+        # 数値・日付の回答枠
+        "boxed_value": TableStyle(
+            [
+                ("BOX", (0, 0), (-1, -1), 0.6, colors.black),
+                ("LEFTPADDING", (0, 0), (-1, -1), 4),
+                ("RIGHTPADDING", (0, 0), (-1, -1), 4),
+                ("TOPPADDING", (0, 0), (-1, -1), 4),
+                ("BOTTOMPADDING", (0, 0), (-1, -1), 4),
+            ]
+        ),
+        "personal_info": TableStyle(
+            [
+                ("BOX", (0, 0), (-1, -1), 0.3, colors.grey),
+                ("INNERGRID", (0, 0), (-1, -1), 0.3, colors.grey),
+                ("BACKGROUND", (0, 0), (0, -1), colors.HexColor("#f0f0f0")),
+                ("VALIGN", (0, 0), (-1, -1), "TOP"),
+                ("LEFTPADDING", (0, 0), (-1, -1), 4),
+                ("RIGHTPADDING", (0, 0), (-1, -1), 4),
+                ("TOPPADDING", (0, 0), (-1, -1), 2),
+                ("BOTTOMPADDING", (0, 0), (-1, -1), 2),
+            ]
+        ),
+        "question": TableStyle(
+            [
+                ("BOX", (0, 0), (-1, -1), 0.6, colors.black),
+                ("INNERGRID", (0, 0), (-1, -1), 0.3, colors.grey),
+                ("BACKGROUND", (0, 0), (0, -1), colors.HexColor("#f7f7f7")),
+                ("VALIGN", (0, 0), (-1, -1), "TOP"),
+                ("LEFTPADDING", (0, 0), (-1, -1), 6),
+                ("RIGHTPADDING", (0, 0), (-1, -1), 6),
+                ("TOPPADDING", (0, 0), (-1, -1), 6),
+                ("BOTTOMPADDING", (0, 0), (-1, -1), 6),
+            ]
+        ),
+        "llm": TableStyle(
+            [
+                ("BOX", (0, 0), (-1, -1), 0.6, colors.black),
+                ("INNERGRID", (0, 0), (-1, -1), 0.3, colors.grey),
+                ("BACKGROUND", (0, 0), (0, -1), colors.HexColor("#f0f0f0")),
+                ("VALIGN", (0, 0), (-1, -1), "TOP"),
+                ("LEFTPADDING", (0, 0), (-1, -1), 6),
+                ("RIGHTPADDING", (0, 0), (-1, -1), 6),
+                ("TOPPADDING", (0, 0), (-1, -1), 6),
+                ("BOTTOMPADDING", (0, 0), (-1, -1), 6),
+            ]
+        ),
+        "summary": TableStyle(
+            [
+                ("BOX", (0, 0), (-1, -1), 0.6, colors.black),
+                ("LEFTPADDING", (0, 0), (-1, -1), 6),
+                ("RIGHTPADDING", (0, 0), (-1, -1), 6),
+                ("TOPPADDING", (0, 0), (-1, -1), 6),
+                ("BOTTOMPADDING", (0, 0), (-1, -1), 6),
+            ]
+        ),
+        "structured_header": TableStyle(
+            [
+                ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+                ("BOTTOMPADDING", (0, 0), (-1, -1), 6),
+                ("TOPPADDING", (0, 0), (-1, -1), 6),
+                ("LEFTPADDING", (0, 0), (-1, -1), 0),
+                ("RIGHTPADDING", (0, 0), (-1, -1), 0),
+            ]
+        ),
+        "legacy_header": TableStyle(
+            [
+                ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+                ("BOTTOMPADDING", (0, 0), (-1, -1), 4),
+                ("TOPPADDING", (0, 0), (-1, -1), 4),
+                ("LEFTPADDING", (0, 0), (-1, -1), 0),
+                ("RIGHTPADDING", (0, 0), (-1, -1), 0),
+            ]
+        ),
+        "patient": TableStyle(
+            [
+                ("BOX", (0, 0), (-1, -1), 0.6, colors.black),
+                ("INNERGRID", (0, 0), (-1, -1), 0.3, colors.HexColor("#d6dde3")),
+                ("BACKGROUND", (0, 0), (0, -1), colors.HexColor("#f5f7fa")),
+                ("BACKGROUND", (2, 0), (2, -1), colors.HexColor("#f5f7fa")),
+                ("VALIGN", (0, 0), (-1, -1), "TOP"),
+                ("TOPPADDING", (0, 0), (-1, -1), 6),
+                ("BOTTOMPADDING", (0, 0), (-1, -1), 6),
+                ("LEFTPADDING", (0, 0), (-1, -1), 6),
+                ("RIGHTPADDING", (0, 0), (-1, -1), 6),
+                ("BOTTOMPADDING", (1, 0), (1, 0), 10),
+            ]
+        ),
+    }
+
+
+@dataclass(frozen=True)
+class PageTemplateSpec:
+    """用紙サイズと余白。本文幅もここから求める。"""
+
+    pagesize: tuple[float, float]
+    left_margin: float
+    right_margin: float
+    top_margin: float
+    bottom_margin: float
+
+    @property
+    def width(self) -> float:
+        return self.pagesize[0] - self.left_margin - self.right_margin
+
+    def new_document(self, buf: io.BytesIO) -> SimpleDocTemplate:
+        return SimpleDocTemplate(
+            buf,
+            pagesize=self.pagesize,
+            leftMargin=self.left_margin,
+            rightMargin=self.right_margin,
+            topMargin=self.top_margin,
+            bottomMargin=self.bottom_margin,
+        )
+
+
+PAGE_TEMPLATES: dict[PDFLayoutMode, PageTemplateSpec] = {
+    PDFLayoutMode.STRUCTURED: PageTemplateSpec(A4, 18 * mm, 18 * mm, 20 * mm, 18 * mm),
+    PDFLayoutMode.LEGACY: PageTemplateSpec(A4, 40, 40, 40, 40),
+}
+
+# 施設名ヘッダーのエスケープ結果を保持する件数
+_FACILITY_MARKUP_CACHE_SIZE = 32
+
+
+@dataclass
+class PDFRenderContext:
+    """描画ごとに作り直す必要のないスタイル類をまとめたもの。
+
+    プロセスごとに1度だけ生成し（`get_render_context`）、以降の描画で共有する。
+    Flowable は描画中に状態を持つため共有せず、スタイル・罫線設定・寸法・フォントのみ保持する。
+    """
+
+    styles: dict[str, ParagraphStyle]
+    table_styles: dict[str, TableStyle]
+    page_templates: dict[PDFLayoutMode, PageTemplateSpec]
+    fonts: dict[str, Any]
+    label_styles: dict[int, ParagraphStyle] = field(default_factory=dict)
+    facility_markup_cache: dict[tuple[str, bool], str] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls) -> "PDFRenderContext":
+        ensure_japanese_fonts()
+        styles = _create_styles()
+        ctx = cls(
+            styles=styles,
+            table_styles=_create_table_styles(),
+            page_templates=dict(PAGE_TEMPLATES),
+            fonts={name: pdfmetrics.getFont(name) for name in JAPANESE_FONT_NAMES},
+        )
+        for depth in range(4):
+            ctx.label_style(depth)
+        return ctx
+
+    def label_style(self, depth: int) -> ParagraphStyle:
+        style = self.label_styles.get(depth)
+        if style is None:
+            style = _label_style_for_depth(depth, self.styles["bold"])
+            self.label_styles[depth] = style
+        return style
+
+    def facility_markup(self, facility_name: str, *, bold: bool = False) -> str:
+        key = (facility_name, bold)
+        markup = self.facility_markup_cache.get(key)
+        if markup is None:
+            markup = escape(facility_name)
+            if bold:
+                markup = f"<b>{markup}</b>"
+            if len(self.facility_markup_cache) >= _FACILITY_MARKUP_CACHE_SIZE:
+                self.facility_markup_cache.clear()
+            self.facility_markup_cache[key] = markup
+        return markup
+
+
+_RENDER_CONTEXT: PDFRenderContext | None = None
+_RENDER_CONTEXT_LOCK = threading.Lock()
+
+
+def get_render_context() -> PDFRenderContext:
+    """プロセス内で共有する描画コンテキストを返す（初回のみ生成）。"""
+
+    global _RENDER_CONTEXT
+    ctx = _RENDER_CONTEXT
+    if ctx is not None:
+        return ctx
+    with _RENDER_CONTEXT_LOCK:
+        if _RENDER_CONTEXT is None:
+            _RENDER_CONTEXT = PDFRenderContext.build()
+        return _RENDER_CONTEXT
 
 
 def _make_label_paragraph(
     node: ItemNode,
-    styles: dict[str, ParagraphStyle],
+    ctx: PDFRenderContext,
 ) -> Paragraph:
     label_text = escape(str(_item_attr(node.item, "label", node.item)))
     if node.condition:
@@ -273,28 +461,28 @@ def _make_label_paragraph(
         )
     else:
         note = ""
-    style = _label_style_for_depth(node.depth, styles["bold"])
+    style = ctx.label_style(node.depth)
     return Paragraph(label_text + note, style)
 
 
 def _make_value_flowable(
     node: ItemNode,
     answer: Any,
-    styles: dict[str, ParagraphStyle],
+    ctx: PDFRenderContext,
     value_width: float,
 ) -> Flowable:
     item_type = str(_item_attr(node.item, "type", "string") or "string")
     if item_type == "multi":
-        return _render_multi_answer(node, answer, styles, value_width)
+        return _render_multi_answer(node, answer, ctx, value_width)
     if item_type == "yesno":
-        return _render_yesno_answer(answer, styles)
+        return _render_yesno_answer(answer, ctx)
     if item_type in {"number", "slider"}:
-        return _render_number_answer(answer, styles, value_width)
+        return _render_number_answer(answer, ctx, value_width)
     if item_type == "date":
-        return _render_date_answer(answer, styles, value_width)
+        return _render_date_answer(answer, ctx, value_width)
     if item_type == "personal_info":
-        return _render_personal_info_answer(answer, styles, value_width)
-    return _render_text_answer(answer, styles, value_width)
+        return _render_personal_info_answer(answer, ctx, value_width)
+    return _render_text_answer(answer, ctx, value_width)
 
 
 def _normalize_multi_answer(value: Any) -> list[str]:
@@ -312,7 +500,7 @@ def _normalize_multi_answer(value: Any) -> list[str]:
 def _render_multi_answer(
     node: ItemNode,
     answer: Any,
-    styles: dict[str, ParagraphStyle],
+    ctx: PDFRenderContext,
     value_width: float,
 ) -> Flowable:
     options = _item_attr(node.item, "options") or []
@@ -322,7 +510,7 @@ def _render_multi_answer(
     selected_values = _normalize_multi_answer(answer)
     if not options:
         text = ", ".join(selected_values) if selected_values else "未回答"
-        return _render_text_answer(text, styles, value_width)
+        return _render_text_answer(text, ctx, value_width)
 
     option_set = set(options)
     selected_set = {val for val in selected_values if val in option_set}
@@ -337,16 +525,16 @@ def _render_multi_answer(
         lines.append(f"・自由記述: {formatted}")
 
     if not lines:
-        return Paragraph("未回答", styles["value"])
+        return Paragraph("未回答", ctx.styles["value"])
 
     text = "<br/>".join(lines)
-    return Paragraph(text, styles["value"])
+    return Paragraph(text, ctx.styles["value"])
 
 
-def _render_yesno_answer(answer: Any, styles: dict[str, ParagraphStyle]) -> Flowable:
+def _render_yesno_answer(answer: Any, ctx: PDFRenderContext) -> Flowable:
     value = str(answer or "").strip()
     if not value:
-        return Paragraph("未回答", styles["value"])
+        return Paragraph("未回答", ctx.styles["value"])
     normalized = value.lower()
     if normalized == "yes":
         display = "はい"
@@ -354,34 +542,24 @@ def _render_yesno_answer(answer: Any, styles: dict[str, ParagraphStyle]) -> Flow
         display = "いいえ"
     else:
         display = value
-    return Paragraph(escape(display), styles["value"])
+    return Paragraph(escape(display), ctx.styles["value"])
 
 
-def _render_number_answer(answer: Any, styles: dict[str, ParagraphStyle], value_width: float) -> Flowable:
+def _render_number_answer(answer: Any, ctx: PDFRenderContext, value_width: float) -> Flowable:
     text = "未回答" if answer is None or str(answer).strip() == "" else str(answer)
-    table = Table([[Paragraph(escape(text), styles["value"])]] , colWidths=[value_width])
-    table.setStyle(
-        TableStyle(
-            [
-                ("BOX", (0, 0), (-1, -1), 0.6, colors.black),
-                ("LEFTPADDING", (0, 0), (-1, -1), 4),
-                ("RIGHTPADDING", (0, 0), (-1, -1), 4),
-                ("TOPPADDING", (0, 0), (-1, -1), 4),
-                ("BOTTOMPADDING", (0, 0), (-1, -1), 4),
-            ]
-        )
-    )
+    table = Table([[Paragraph(escape(text), ctx.styles["value"])]] , colWidths=[value_width])
+    table.setStyle(ctx.table_styles["boxed_value"])
     return table
 
 
 def _render_personal_info_answer(
     answer: Any,
-    styles: dict[str, ParagraphStyle],
+    ctx: PDFRenderContext,
     value_width: float,
 ) -> Flowable:
     data = personal_info_coerce(answer)
     if data is None:
-        return _render_text_answer(answer, styles, value_width)
+        return _render_text_answer(answer, ctx, value_width)
     rows: list[list[Paragraph]] = []
     for key, label in PERSONAL_INFO_FIELDS:
         text = data[key].strip()
@@ -389,8 +567,8 @@ def _render_personal_info_answer(
         display = escape(display_text)
         rows.append(
             [
-                Paragraph(f"<b>{escape(label)}</b>", styles["base"]),
-                Paragraph(display.replace("\n", "<br/>"), styles["value"]),
+                Paragraph(f"<b>{escape(label)}</b>", ctx.styles["base"]),
+                Paragraph(display.replace("\n", "<br/>"), ctx.styles["value"]),
             ]
         )
     label_col = min(42 * mm, value_width * 0.4)
@@ -399,20 +577,7 @@ def _render_personal_info_answer(
         colWidths=[label_col, max(value_width - label_col, value_width * 0.5)],
         hAlign="LEFT",
     )
-    table.setStyle(
-        TableStyle(
-            [
-                ("BOX", (0, 0), (-1, -1), 0.3, colors.grey),
-                ("INNERGRID", (0, 0), (-1, -1), 0.3, colors.grey),
-                ("BACKGROUND", (0, 0), (0, -1), colors.HexColor("#f0f0f0")),
-                ("VALIGN", (0, 0), (-1, -1), "TOP"),
-                ("LEFTPADDING", (0, 0), (-1, -1), 4),
-                ("RIGHTPADDING", (0, 0), (-1, -1), 4),
-                ("TOPPADDING", (0, 0), (-1, -1), 2),
-                ("BOTTOMPADDING", (0, 0), (-1, -1), 2),
-            ]
-        )
-    )
+    table.setStyle(ctx.table_styles["personal_info"])
     return table
 
 
@@ -467,24 +632,14 @@ def _personal_info_header_value(values: Mapping[str, str], key: str) -> str:
     return text
 
 
-def _render_date_answer(answer: Any, styles: dict[str, ParagraphStyle], value_width: float) -> Flowable:
+def _render_date_answer(answer: Any, ctx: PDFRenderContext, value_width: float) -> Flowable:
     text = _format_date(str(answer) if answer else None) or "未回答"
-    table = Table([[Paragraph(escape(text), styles["value"])]] , colWidths=[value_width])
-    table.setStyle(
-        TableStyle(
-            [
-                ("BOX", (0, 0), (-1, -1), 0.6, colors.black),
-                ("LEFTPADDING", (0, 0), (-1, -1), 4),
-                ("RIGHTPADDING", (0, 0), (-1, -1), 4),
-                ("TOPPADDING", (0, 0), (-1, -1), 4),
-                ("BOTTOMPADDING", (0, 0), (-1, -1), 4),
-            ]
-        )
-    )
+    table = Table([[Paragraph(escape(text), ctx.styles["value"])]] , colWidths=[value_width])
+    table.setStyle(ctx.table_styles["boxed_value"])
     return table
 
 
-def _render_text_answer(answer: Any, styles: dict[str, ParagraphStyle], value_width: float) -> Flowable:
+def _render_text_answer(answer: Any, ctx: PDFRenderContext, value_width: float) -> Flowable:
     del value_width  # 内側テーブルを使用しないため未使用
 
     def _format_text(value: str) -> str:
@@ -504,13 +659,13 @@ def _render_text_answer(answer: Any, styles: dict[str, ParagraphStyle], value_wi
     elif answer not in (None, ""):
         rendered = _format_text(str(answer))
 
-    return Paragraph(rendered or "未回答", styles["value"])
+    return Paragraph(rendered or "未回答", ctx.styles["value"])
 
 
 def _make_question_table(
     nodes: list[ItemNode],
     answers: Mapping[str, Any],
-    styles: dict[str, ParagraphStyle],
+    ctx: PDFRenderContext,
     doc_width: float,
 ) -> Table | None:
     if not nodes:
@@ -525,33 +680,20 @@ def _make_question_table(
         value = answers.get(item_id)
         if node.condition and not _has_answer(value):
             continue
-        label_para = _make_label_paragraph(node, styles)
-        value_flow = _make_value_flowable(node, value, styles, value_width)
+        label_para = _make_label_paragraph(node, ctx)
+        value_flow = _make_value_flowable(node, value, ctx, value_width)
         data.append([label_para, value_flow])
     if not data:
         return None
     table = Table(data, colWidths=[label_width, value_width], repeatRows=0, hAlign="LEFT")
-    table.setStyle(
-        TableStyle(
-            [
-                ("BOX", (0, 0), (-1, -1), 0.6, colors.black),
-                ("INNERGRID", (0, 0), (-1, -1), 0.3, colors.grey),
-                ("BACKGROUND", (0, 0), (0, -1), colors.HexColor("#f7f7f7")),
-                ("VALIGN", (0, 0), (-1, -1), "TOP"),
-                ("LEFTPADDING", (0, 0), (-1, -1), 6),
-                ("RIGHTPADDING", (0, 0), (-1, -1), 6),
-                ("TOPPADDING", (0, 0), (-1, -1), 6),
-                ("BOTTOMPADDING", (0, 0), (-1, -1), 6),
-            ]
-        )
-    )
+    table.setStyle(ctx.table_styles["question"])
     return table
 
 
 def _make_llm_table(
     llm_question_texts: Mapping[str, str],
     answers: Mapping[str, Any],
-    styles: dict[str, ParagraphStyle],
+    ctx: PDFRenderContext,
     doc_width: float,
 ) -> Table | None:
     if not llm_question_texts:
@@ -560,44 +702,21 @@ def _make_llm_table(
     value_width = doc_width - label_width
     rows: list[list[Any]] = []
     for key, text in llm_question_texts.items():
-        label_para = Paragraph(escape(str(text)), styles["bold"])
-        value_flow = _render_text_answer(answers.get(key), styles, value_width)
+        label_para = Paragraph(escape(str(text)), ctx.styles["bold"])
+        value_flow = _render_text_answer(answers.get(key), ctx, value_width)
         rows.append([label_para, value_flow])
     if not rows:
         return None
     table = Table(rows, colWidths=[label_width, value_width], hAlign="LEFT")
-    table.setStyle(
-        TableStyle(
-            [
-                ("BOX", (0, 0), (-1, -1), 0.6, colors.black),
-                ("INNERGRID", (0, 0), (-1, -1), 0.3, colors.grey),
-                ("BACKGROUND", (0, 0), (0, -1), colors.HexColor("#f0f0f0")),
-                ("VALIGN", (0, 0), (-1, -1), "TOP"),
-                ("LEFTPADDING", (0, 0), (-1, -1), 6),
-                ("RIGHTPADDING", (0, 0), (-1, -1), 6),
-                ("TOPPADDING", (0, 0), (-1, -1), 6),
-                ("BOTTOMPADDING", (0, 0), (-1, -1), 6),
-            ]
-        )
-    )
+    table.setStyle(ctx.table_styles["llm"])
     return table
 
 
-def _make_summary_box(summary: str, styles: dict[str, ParagraphStyle], width: float) -> Table:
+def _make_summary_box(summary: str, ctx: PDFRenderContext, width: float) -> Table:
     text = escape(summary).replace("\n", "<br/>")
-    para = Paragraph(text, styles["value"])
+    para = Paragraph(text, ctx.styles["value"])
     table = Table([[para]], colWidths=[width], hAlign="LEFT")
-    table.setStyle(
-        TableStyle(
-            [
-                ("BOX", (0, 0), (-1, -1), 0.6, colors.black),
-                ("LEFTPADDING", (0, 0), (-1, -1), 6),
-                ("RIGHTPADDING", (0, 0), (-1, -1), 6),
-                ("TOPPADDING", (0, 0), (-1, -1), 6),
-                ("BOTTOMPADDING", (0, 0), (-1, -1), 6),
-            ]
-        )
-    )
+    table.setStyle(ctx.table_styles["summary"])
     return table
 
 
@@ -610,52 +729,34 @@ def _render_structured_pdf(
     llm_question_texts: Mapping[str, str],
     summary: str | None,
     facility_name: str,
+    ctx: PDFRenderContext,
 ) -> bytes:
-    ensure_japanese_fonts()
     buf = io.BytesIO()
-    doc = SimpleDocTemplate(
-        buf,
-        pagesize=A4,
-        leftMargin=18 * mm,
-        rightMargin=18 * mm,
-        topMargin=20 * mm,
-        bottomMargin=18 * mm,
-    )
-    styles = _create_styles()
+    doc = ctx.page_templates[PDFLayoutMode.STRUCTURED].new_document(buf)
     story: list[Flowable] = []
 
     completion_display = _resolve_completion_date(session) or "未登録"
     header = Table(
         [
             [
-                Paragraph(escape(facility_name), styles["header_left"]),
+                Paragraph(ctx.facility_markup(facility_name), ctx.styles["header_left"]),
                 Paragraph(
                     f"問診票記入日: {escape(completion_display)}",
-                    styles["header_right"],
+                    ctx.styles["header_right"],
                 ),
             ],
         ],
         colWidths=[doc.width * 0.55, doc.width * 0.45],
         hAlign="LEFT",
     )
-    header.setStyle(
-        TableStyle(
-            [
-                ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-                ("BOTTOMPADDING", (0, 0), (-1, -1), 6),
-                ("TOPPADDING", (0, 0), (-1, -1), 6),
-                ("LEFTPADDING", (0, 0), (-1, -1), 0),
-                ("RIGHTPADDING", (0, 0), (-1, -1), 0),
-            ]
-        )
-    )
+    header.setStyle(ctx.table_styles["structured_header"])
     story.append(header)
     story.append(Spacer(0, 4 * mm))
     # 表題に受診種別を併記（例: 問診票（再診））
     title_label = "問診票"
     if vt_label:
         title_label = f"{title_label}（{vt_label}）"
-    story.append(Paragraph(escape(title_label), styles["title"]))
+    story.append(Paragraph(escape(title_label), ctx.styles["title"]))
     story.append(Spacer(0, 5 * mm))
 
     nodes = _flatten_items(template_items)
@@ -671,11 +772,11 @@ def _render_structured_pdf(
     phone_text = _personal_info_header_value(personal_info_values, "phone")
 
     def _label_cell(text: str) -> Paragraph:
-        return Paragraph(f"<b>{escape(text)}</b>", styles["base"])
+        return Paragraph(f"<b>{escape(text)}</b>", ctx.styles["base"])
 
     def _value_cell(text: str) -> Paragraph:
         display = text if text else PERSONAL_INFO_EMPTY
-        return Paragraph(escape(display).replace("\n", "<br/>"), styles["value"])
+        return Paragraph(escape(display).replace("\n", "<br/>"), ctx.styles["value"])
 
     kana_line = kana_text if kana_text and kana_text != PERSONAL_INFO_EMPTY else "未回答"
     kana_color = "#888888" if kana_text == PERSONAL_INFO_EMPTY else "#555555"
@@ -692,7 +793,7 @@ def _render_structured_pdf(
     patient_table_data = [
         [
             _label_cell("患者氏名"),
-            Paragraph(name_markup, styles["value"]),
+            Paragraph(name_markup, ctx.styles["value"]),
             _label_cell("生年月日"),
             _value_cell(dob_text),
         ],
@@ -715,42 +816,27 @@ def _render_structured_pdf(
         colWidths=[label_width, left_value_width, label_width, right_value_width],
         hAlign="LEFT",
     )
-    patient_table.setStyle(
-        TableStyle(
-            [
-                ("BOX", (0, 0), (-1, -1), 0.6, colors.black),
-                ("INNERGRID", (0, 0), (-1, -1), 0.3, colors.HexColor("#d6dde3")),
-                ("BACKGROUND", (0, 0), (0, -1), colors.HexColor("#f5f7fa")),
-                ("BACKGROUND", (2, 0), (2, -1), colors.HexColor("#f5f7fa")),
-                ("VALIGN", (0, 0), (-1, -1), "TOP"),
-                ("TOPPADDING", (0, 0), (-1, -1), 6),
-                ("BOTTOMPADDING", (0, 0), (-1, -1), 6),
-                ("LEFTPADDING", (0, 0), (-1, -1), 6),
-                ("RIGHTPADDING", (0, 0), (-1, -1), 6),
-                ("BOTTOMPADDING", (1, 0), (1, 0), 10),
-            ]
-        )
-    )
+    patient_table.setStyle(ctx.table_styles["patient"])
     story.append(patient_table)
     story.append(Spacer(0, 6 * mm))
 
-    story.append(Paragraph("問診回答", styles["section"]))
-    question_table = _make_question_table(question_nodes, answers, styles, doc.width)
+    story.append(Paragraph("問診回答", ctx.styles["section"]))
+    question_table = _make_question_table(question_nodes, answers, ctx, doc.width)
     if question_table:
         story.append(question_table)
     else:
-        story.append(Paragraph("回答は記録されていません。", styles["value"]))
+        story.append(Paragraph("回答は記録されていません。", ctx.styles["value"]))
 
-    llm_table = _make_llm_table(llm_question_texts, answers, styles, doc.width)
+    llm_table = _make_llm_table(llm_question_texts, answers, ctx, doc.width)
     if llm_table:
         story.append(Spacer(0, 6 * mm))
-        story.append(Paragraph("追加質問", styles["section"]))
+        story.append(Paragraph("追加質問", ctx.styles["section"]))
         story.append(llm_table)
 
     if summary:
         story.append(Spacer(0, 6 * mm))
-        story.append(Paragraph("自動生成サマリー", styles["section"]))
-        story.append(_make_summary_box(summary, styles, doc.width))
+        story.append(Paragraph("自動生成サマリー", ctx.styles["section"]))
+        story.append(_make_summary_box(summary, ctx, doc.width))
 
     doc.build(story)
     buf.seek(0)
@@ -763,51 +849,33 @@ def _render_legacy_pdf(
     vt_label: str,
     summary: str | None,
     facility_name: str,
+    ctx: PDFRenderContext,
 ) -> bytes:
-    ensure_japanese_fonts()
     buf = io.BytesIO()
-    doc = SimpleDocTemplate(
-        buf,
-        pagesize=A4,
-        leftMargin=40,
-        rightMargin=40,
-        topMargin=40,
-        bottomMargin=40,
-    )
-    styles = _create_styles()
+    doc = ctx.page_templates[PDFLayoutMode.LEGACY].new_document(buf)
     story: list[Flowable] = []
 
     completion_display = _resolve_completion_date(session) or "未登録"
     header = Table(
         [
             [
-                Paragraph(f"<b>{escape(facility_name)}</b>", styles["header_left"]),
-                Paragraph(f"問診票記入日: {escape(completion_display)}", styles["header_right"]),
+                Paragraph(ctx.facility_markup(facility_name, bold=True), ctx.styles["header_left"]),
+                Paragraph(f"問診票記入日: {escape(completion_display)}", ctx.styles["header_right"]),
             ]
         ],
         colWidths=[doc.width * 0.55, doc.width * 0.45],
         hAlign="LEFT",
     )
-    header.setStyle(
-        TableStyle(
-            [
-                ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-                ("BOTTOMPADDING", (0, 0), (-1, -1), 4),
-                ("TOPPADDING", (0, 0), (-1, -1), 4),
-                ("LEFTPADDING", (0, 0), (-1, -1), 0),
-                ("RIGHTPADDING", (0, 0), (-1, -1), 0),
-            ]
-        )
-    )
+    header.setStyle(ctx.table_styles["legacy_header"])
     story.append(header)
     story.append(Spacer(0, 4 * mm))
     # 表題に受診種別を併記（例: 問診結果（再診））
     legacy_title = "問診結果"
     if vt_label:
         legacy_title = f"{legacy_title}（{vt_label}）"
-    story.append(Paragraph(escape(legacy_title), styles["title"]))
+    story.append(Paragraph(escape(legacy_title), ctx.styles["title"]))
     story.append(Spacer(0, 6 * mm))
-    story.append(Paragraph("患者情報", styles["section"]))
+    story.append(Paragraph("患者情報", ctx.styles["section"]))
     # 受診種別の行は削除し、タイトルへ併記
     info_lines = [
         f"患者名: {escape(session.get('patient_name') or '未登録')}",
@@ -815,21 +883,21 @@ def _render_legacy_pdf(
         f"性別: {escape(_format_gender(session.get('gender')))}",
     ]
     for line in info_lines:
-        story.append(Paragraph(line, styles["value"]))
+        story.append(Paragraph(line, ctx.styles["value"]))
 
     story.append(Spacer(0, 6 * mm))
-    story.append(Paragraph("回答", styles["section"]))
+    story.append(Paragraph("回答", ctx.styles["section"]))
     if rows:
         for label, value in rows:
             text = f"<b>{escape(label)}</b>: {escape(value or '未回答')}"
-            story.append(Paragraph(text, styles["value"]))
+            story.append(Paragraph(text, ctx.styles["value"]))
     else:
-        story.append(Paragraph("回答は記録されていません。", styles["value"]))
+        story.append(Paragraph("回答は記録されていません。", ctx.styles["value"]))
 
     if summary:
         story.append(Spacer(0, 6 * mm))
-        story.append(Paragraph("自動生成サマリー", styles["section"]))
-        story.append(Paragraph(escape(summary).replace("\n", "<br/>"), styles["value"]))
+        story.append(Paragraph("自動生成サマリー", ctx.styles["section"]))
+        story.append(Paragraph(escape(summary).replace("\n", "<br/>"), ctx.styles["value"]))
 
     doc.build(story)
     buf.seek(0)
@@ -846,12 +914,17 @@ def render_session_pdf(
     summary: str | None,
     layout_mode: PDFLayoutMode,
     facility_name: str,
+    context: PDFRenderContext | None = None,
 ) -> bytes:
-    """問診結果PDFを指定レイアウトで生成する。"""
+    """問診結果PDFを指定レイアウトで生成する。
+
+    `context` を省略した場合はプロセス共有の描画コンテキストを使う。
+    """
 
+    ctx = context or get_render_context()
     llm_texts = llm_question_texts or {}
     if layout_mode == PDFLayoutMode.LEGACY:
-        return _render_legacy_pdf(session, rows, vt_label, summary, facility_name)
+        return _render_legacy_pdf(session, rows, vt_label, summary, facility_name, ctx)
     return _render_structured_pdf(
         session,
         rows,
@@ -861,4 +934,5 @@ def render_session_pdf(
         llm_texts,
         summary,
         facility_name,
+        ctx,
     )
@@ -1,14 +1,20 @@
 """Postal-code dictionary import and lookup helpers."""
 from __future__ import annotations
 
+import codecs
 import csv
-import io
+import itertools
 import os
 import sqlite3
+import threading
+import time
 import unicodedata
+from array import array
+from bisect import bisect_left, bisect_right
 from datetime import UTC, datetime
 from pathlib import Path
-from typing import BinaryIO, Any
+from typing import BinaryIO, Any, Iterable, Iterator
+from uuid import uuid4
 
 
 POSTAL_DATA_DIR = Path(
@@ -23,14 +29,20 @@ POSTAL_DB_PATH = Path(
 BUNDLED_POSTAL_CSV_PATH = POSTAL_DATA_DIR / "utf_ken_all.csv"
 
 POSTAL_TABLE_SCHEMA = """
-CREATE TABLE IF NOT EXISTS postal_codes (
+CREATE TABLE IF NOT EXISTS {table} (
     postal_code TEXT NOT NULL,
     prefecture TEXT NOT NULL,
     city TEXT NOT NULL,
     town TEXT NOT NULL,
-    address TEXT NOT NULL
+    address TEXT NOT NULL,
+    prefecture_kana TEXT NOT NULL DEFAULT '',
+    city_kana TEXT NOT NULL DEFAULT '',
+    town_kana TEXT NOT NULL DEFAULT ''
 )
 """
+POSTAL_TABLE = "postal_codes"
+POSTAL_KANA_COLUMNS = ("prefecture_kana", "city_kana", "town_kana")
+POSTAL_STAGING_TABLE = "postal_codes_staging"
 
 POSTAL_META_SCHEMA = """
 CREATE TABLE IF NOT EXISTS postal_code_meta (
@@ -40,6 +52,21 @@ CREATE TABLE IF NOT EXISTS postal_code_meta (
 """
 
 
+# Rows per executemany() while streaming an import into the staging table.
+IMPORT_BATCH_SIZE = 5000
+# Bytes read from the uploaded file per decode step.
+IMPORT_READ_CHUNK = 256 * 1024
+# Bytes inspected to choose between UTF-8 and Shift_JIS.
+ENCODING_SNIFF_BYTES = 64 * 1024
+# How often (seconds) a loaded index checks whether another process replaced the DB file.
+INDEX_RELOAD_CHECK_INTERVAL = float(os.getenv("MONSHINMATE_POSTAL_INDEX_CHECK_INTERVAL", "1.0"))
+LOOKUP_CANDIDATE_LIMIT = 20
+SEARCH_CANDIDATE_LIMIT = 20
+SEARCH_MAX_LIMIT = 100
+# Shorter code prefixes match too large a share of the dictionary to be useful.
+SEARCH_MIN_CODE_DIGITS = 3
+
+
 class PostalCodeImportError(ValueError):
     """Raised when the postal-code dictionary cannot be imported."""
 
@@ -60,18 +87,57 @@ def _connect(db_path: Path = POSTAL_DB_PATH) -> sqlite3.Connection:
     return conn
 
 
+def _ensure_code_index(conn: sqlite3.Connection, table: str) -> None:
+    """Create the postal_code index on ``table`` unless one already exists.
+
+    Index names are global in SQLite, so each staging load gets a unique name; the
+    index then moves with the table when it is renamed into place.
+    """
+
+    for index in conn.execute(f"PRAGMA index_list({table})").fetchall():
+        columns = conn.execute(f"PRAGMA index_info({index['name']})").fetchall()
+        if [c["name"] for c in columns] == ["postal_code"]:
+            return
+    conn.execute(
+        f"CREATE INDEX idx_{table}_postal_code_{uuid4().hex[:8]} ON {table}(postal_code)"
+    )
+
+
 def init_postal_db(db_path: Path = POSTAL_DB_PATH) -> None:
     with _connect(db_path) as conn:
-        conn.execute(POSTAL_TABLE_SCHEMA)
+        conn.execute(POSTAL_TABLE_SCHEMA.format(table=POSTAL_TABLE))
+        # Dictionaries imported before kana support lack these columns.
+        for column in POSTAL_KANA_COLUMNS:
+            try:
+                conn.execute(
+                    f"ALTER TABLE {POSTAL_TABLE} ADD COLUMN {column} TEXT NOT NULL DEFAULT ''"
+                )
+            except sqlite3.OperationalError:
+                pass
         conn.execute(POSTAL_META_SCHEMA)
-        conn.execute(
-            "CREATE INDEX IF NOT EXISTS idx_postal_codes_postal_code ON postal_codes(postal_code)"
-        )
+        _ensure_code_index(conn, POSTAL_TABLE)
+
+
+# Town placeholder used by KEN_ALL for "no specific town"; not part of the address.
+NO_TOWN_PLACEHOLDER = "以下に掲載がない場合"
+NO_TOWN_PLACEHOLDER_KANA = "イカニケイサイガナイバアイ"
+
+
+_KATAKANA_TO_HIRAGANA = {code: code - 0x60 for code in range(0x30A1, 0x30F7)}
+
+
+def normalize_search_text(value: str | None) -> str:
+    """Fold text for address search: NFKC, katakana to hiragana, no whitespace."""
+
+    if not value:
+        return ""
+    normalized = unicodedata.normalize("NFKC", value).translate(_KATAKANA_TO_HIRAGANA)
+    return "".join(normalized.split()).lower()
 
 
 def _build_address(prefecture: str, city: str, town: str) -> str:
     normalized_town = (town or "").strip()
-    if normalized_town == "以下に掲載がない場合":
+    if normalized_town == NO_TOWN_PLACEHOLDER:
         normalized_town = ""
     return f"{prefecture.strip()}{city.strip()}{normalized_town}"
 
@@ -87,57 +153,108 @@ def _set_meta(conn: sqlite3.Connection, key: str, value: Any) -> None:
     )
 
 
+def _detect_encoding(head: bytes) -> str:
+    """Pick UTF-8 (with or without BOM) or Shift_JIS (the official KEN_ALL.CSV)."""
+
+    if head.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    try:
+        # The head may end in the middle of a multi-byte character.
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+    except UnicodeDecodeError:
+        return "cp932"
+    return "utf-8"
+
+
+def _iter_decoded_lines(file_obj: BinaryIO, chunk_size: int | None = None) -> Iterator[str]:
+    """Decode the upload incrementally and yield lines (keeping line endings)."""
+
+    chunk_size = chunk_size or IMPORT_READ_CHUNK
+    head = file_obj.read(max(chunk_size, ENCODING_SNIFF_BYTES))
+    decoder = codecs.getincrementaldecoder(_detect_encoding(head))()
+    chunks = itertools.chain(
+        (head[i : i + chunk_size] for i in range(0, len(head), chunk_size)),
+        iter(lambda: file_obj.read(chunk_size), b""),
+    )
+    pending = ""
+    for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line + "\n"
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+PostalRecord = tuple[str, str, str, str, str, str, str]
+
+
+def _iter_postal_records(lines: Iterable[str]) -> Iterator[PostalRecord]:
+    """Parse KEN_ALL rows into (postal_code, prefecture, city, town, *kana).
+
+    The official KEN_ALL.CSV splits long town names over consecutive records with the
+    same code while a full-width parenthesis is open; those records are joined back.
+    """
+
+    pending: list[str] | None = None
+    for row in csv.reader(lines):
+        if len(row) < 9:
+            continue
+        postal_code = normalize_postal_code(row[2])
+        if len(postal_code) != 7:
+            continue
+        prefecture = row[6].strip()
+        city = row[7].strip()
+        town = row[8].strip()
+        if not prefecture or not city:
+            continue
+        town_kana = row[5].strip()
+        if pending is not None:
+            if pending[0] == postal_code and pending[3].count("（") > pending[3].count("）"):
+                pending[3] += town
+                # Kana is usually repeated on continuation records.
+                if town_kana != pending[6]:
+                    pending[6] += town_kana
+                continue
+            yield tuple(pending)  # type: ignore[misc]
+        pending = [postal_code, prefecture, city, town, row[3].strip(), row[4].strip(), town_kana]
+    if pending is not None:
+        yield tuple(pending)  # type: ignore[misc]
+
+
+_import_lock = threading.Lock()
+
+
 def import_postal_csv(
     file_obj: BinaryIO,
     source_filename: str | None = None,
     db_path: Path = POSTAL_DB_PATH,
 ) -> dict[str, Any]:
-    """Import a Japan Post KEN_ALL CSV into the local lookup database."""
+    """Import a Japan Post KEN_ALL CSV (UTF-8 or Shift_JIS) into the local lookup database.
 
-    init_postal_db(db_path)
-    text_stream = io.TextIOWrapper(file_obj, encoding="utf-8-sig", newline="")
-    reader = csv.reader(text_stream)
-    rows: list[tuple[str, str, str, str, str]] = []
-    row_count = 0
+    Rows are streamed into a staging table in batches and indexed there; the live table
+    is replaced only at the end by a short rename transaction, so lookups keep working
+    during the upload.
+    """
 
-    try:
-        for row in reader:
-            if len(row) < 9:
-                continue
-            postal_code = normalize_postal_code(row[2])
-            if len(postal_code) != 7:
-                continue
-            prefecture = row[6].strip()
-            city = row[7].strip()
-            town = row[8].strip()
-            if not prefecture or not city:
-                continue
-            address = _build_address(prefecture, city, town)
-            rows.append((postal_code, prefecture, city, town, address))
-            row_count += 1
-    except UnicodeDecodeError as exc:
-        raise PostalCodeImportError("CSVはUTF-8で保存されたものを指定してください") from exc
-    except csv.Error as exc:
-        raise PostalCodeImportError("CSVの読み込みに失敗しました") from exc
-
-    if row_count == 0:
-        raise PostalCodeImportError("郵便番号データが見つかりません")
-
-    imported_at = datetime.now(UTC).isoformat()
-    with _connect(db_path) as conn:
-        conn.execute("BEGIN")
-        conn.execute("DELETE FROM postal_codes")
-        conn.executemany(
-            """
-            INSERT INTO postal_codes (postal_code, prefecture, city, town, address)
-            VALUES (?, ?, ?, ?, ?)
-            """,
-            rows,
-        )
-        _set_meta(conn, "row_count", row_count)
-        _set_meta(conn, "source_filename", source_filename or "")
-        _set_meta(conn, "last_updated_at", imported_at)
-        conn.commit()
+    init_postal_db(db_path)
+    with _import_lock:
+        conn = _connect(db_path)
+        try:
+            row_count = _load_staging_table(conn, file_obj)
+            imported_at = datetime.now(UTC).isoformat()
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(f"DROP TABLE {POSTAL_TABLE}")
+            conn.execute(f"ALTER TABLE {POSTAL_STAGING_TABLE} RENAME TO {POSTAL_TABLE}")
+            _set_meta(conn, "row_count", row_count)
+            _set_meta(conn, "source_filename", source_filename or "")
+            _set_meta(conn, "last_updated_at", imported_at)
+            conn.commit()
+        finally:
+            conn.close()
+    # Build the search n-grams now so that the first typeahead request does not pay for it.
+    reload_postal_index(db_path).build_search_index()
 
     return {
         "is_available": True,
@@ -147,6 +264,47 @@ def import_postal_csv(
     }
 
 
+def _load_staging_table(conn: sqlite3.Connection, file_obj: BinaryIO) -> int:
+    """Stream rows into a fresh staging table and index it. Returns the row count."""
+
+    conn.execute(f"DROP TABLE IF EXISTS {POSTAL_STAGING_TABLE}")
+    conn.execute(POSTAL_TABLE_SCHEMA.format(table=POSTAL_STAGING_TABLE))
+    conn.commit()
+    rows = (
+        (code, prefecture, city, town, _build_address(prefecture, city, town), *kana)
+        for code, prefecture, city, town, *kana in _iter_postal_records(_iter_decoded_lines(file_obj))
+    )
+    row_count = 0
+    try:
+        while True:
+            batch = list(itertools.islice(rows, IMPORT_BATCH_SIZE))
+            if not batch:
+                break
+            conn.executemany(
+                f"""
+                INSERT INTO {POSTAL_STAGING_TABLE}
+                    (postal_code, prefecture, city, town, address, prefecture_kana, city_kana, town_kana)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                batch,
+            )
+            row_count += len(batch)
+        if row_count == 0:
+            raise PostalCodeImportError("郵便番号データが見つかりません")
+        _ensure_code_index(conn, POSTAL_STAGING_TABLE)
+        conn.commit()
+    except BaseException as exc:
+        conn.rollback()
+        conn.execute(f"DROP TABLE IF EXISTS {POSTAL_STAGING_TABLE}")
+        conn.commit()
+        if isinstance(exc, UnicodeDecodeError):
+            raise PostalCodeImportError("CSVはUTF-8またはShift_JISで保存されたものを指定してください") from exc
+        if isinstance(exc, csv.Error):
+            raise PostalCodeImportError("CSVの読み込みに失敗しました") from exc
+        raise
+    return row_count
+
+
 def ensure_postal_dictionary(db_path: Path = POSTAL_DB_PATH) -> None:
     """Initialize lookup DB and import bundled CSV when no data exists yet."""
 
@@ -160,18 +318,296 @@ def ensure_postal_dictionary(db_path: Path = POSTAL_DB_PATH) -> None:
             import_postal_csv(file_obj, BUNDLED_POSTAL_CSV_PATH.name, db_path=db_path)
 
 
+class PostalCodeIndex:
+    """Immutable in-memory index of the postal-code dictionary.
+
+    Rows are kept sorted by code in parallel arrays: 7-digit codes as ``array('I')``,
+    prefecture/city as small interned-id arrays and town names packed into a single
+    string with offsets. A lookup is a binary search and takes a few microseconds.
+
+    For typeahead search every row also gets a normalized key (address + kana, see
+    ``normalize_search_text``) packed the same way, plus a character-bigram posting
+    index over those keys which is built once by ``build_search_index``.
+    """
+
+    __slots__ = (
+        "codes",
+        "prefecture_ids",
+        "city_ids",
+        "prefectures",
+        "cities",
+        "town_blob",
+        "town_offsets",
+        "search_blob",
+        "search_offsets",
+        "bigrams",
+        "_bigram_lock",
+        "row_count",
+        "meta",
+        "source_mtime_ns",
+    )
+
+    def __init__(
+        self,
+        rows: Iterable[tuple[str, ...]],
+        *,
+        row_count: int | None = None,
+        meta: dict[str, str] | None = None,
+        source_mtime_ns: int | None = None,
+    ) -> None:
+        self.codes = array("I")
+        self.prefecture_ids = array("H")
+        self.city_ids = array("H")
+        self.town_offsets = array("I", [0])
+        self.search_offsets = array("I", [0])
+        self.prefectures: list[str] = []
+        self.cities: list[str] = []
+        prefecture_lookup: dict[str, int] = {}
+        city_lookup: dict[str, int] = {}
+        towns: list[str] = []
+        keys: list[str] = []
+        length = 0
+        key_length = 0
+        # Rows are (postal_code, prefecture, city, town[, prefecture_kana, city_kana, town_kana]).
+        for postal_code, prefecture, city, town, *kana in rows:
+            pid = prefecture_lookup.get(prefecture)
+            if pid is None:
+                pid = prefecture_lookup[prefecture] = len(self.prefectures)
+                self.prefectures.append(prefecture)
+            cid = city_lookup.get(city)
+            if cid is None:
+                cid = city_lookup[city] = len(self.cities)
+                self.cities.append(city)
+            self.codes.append(int(postal_code))
+            self.prefecture_ids.append(pid)
+            self.city_ids.append(cid)
+            towns.append(town)
+            length += len(town)
+            self.town_offsets.append(length)
+            key = _search_key(prefecture, city, town, kana)
+            keys.append(key)
+            key_length += len(key)
+            self.search_offsets.append(key_length)
+        self.town_blob = "".join(towns)
+        self.search_blob = "".join(keys)
+        self.bigrams: dict[str, array] | None = None
+        self._bigram_lock = threading.Lock()
+        self.row_count = len(self.codes) if row_count is None else row_count
+        self.meta = dict(meta or {})
+        self.source_mtime_ns = source_mtime_ns
+
+    @classmethod
+    def load(cls, db_path: Path = POSTAL_DB_PATH) -> "PostalCodeIndex":
+        """Build the index from the lookup database (importing the bundled CSV if empty)."""
+
+        ensure_postal_dictionary(db_path)
+        mtime_ns = _db_mtime_ns(db_path)
+        conn = sqlite3.connect(db_path)
+        try:
+            count = conn.execute("SELECT COUNT(*) FROM postal_codes").fetchone()
+            meta_rows = conn.execute("SELECT key, value FROM postal_code_meta").fetchall()
+            # Rows are consumed straight from the cursor to avoid materializing the table.
+            rows = conn.execute(
+                """
+                SELECT DISTINCT postal_code, prefecture, city, town,
+                    prefecture_kana, city_kana, town_kana
+                FROM postal_codes
+                ORDER BY postal_code, prefecture, city, town
+                """
+            )
+            return cls(
+                rows,
+                row_count=int(count[0] or 0) if count else 0,
+                meta={key: value for key, value in meta_rows},
+                source_mtime_ns=mtime_ns,
+            )
+        finally:
+            conn.close()
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def _row(self, position: int) -> dict[str, str]:
+        prefecture = self.prefectures[self.prefecture_ids[position]]
+        city = self.cities[self.city_ids[position]]
+        town = self.town_blob[self.town_offsets[position] : self.town_offsets[position + 1]]
+        return {
+            "postal_code": f"{self.codes[position]:07d}",
+            "prefecture": prefecture,
+            "city": city,
+            "town": town,
+            "address": _build_address(prefecture, city, town),
+        }
+
+    def lookup(self, normalized: str, limit: int = LOOKUP_CANDIDATE_LIMIT) -> list[dict[str, str]]:
+        """Return rows for an exact 7-digit code (already normalized)."""
+
+        key = int(normalized)
+        start = bisect_left(self.codes, key)
+        end = min(bisect_right(self.codes, key, lo=start), start + limit)
+        return [self._row(i) for i in range(start, end)]
+
+    def build_search_index(self) -> None:
+        """Build the bigram postings over the search keys (idempotent, thread-safe)."""
+
+        if self.bigrams is not None:
+            return
+        with self._bigram_lock:
+            if self.bigrams is not None:
+                return
+            postings: dict[str, list[int]] = {}
+            blob = self.search_blob
+            offsets = self.search_offsets
+            for position in range(len(self.codes)):
+                key = blob[offsets[position] : offsets[position + 1]]
+                for gram in {key[i : i + 2] for i in range(len(key) - 1)}:
+                    if "\x00" in gram:
+                        continue
+                    bucket = postings.get(gram)
+                    if bucket is None:
+                        postings[gram] = [position]
+                    else:
+                        bucket.append(position)
+            self.bigrams = {gram: array("I", positions) for gram, positions in postings.items()}
+
+    def search(self, query: str, limit: int = SEARCH_CANDIDATE_LIMIT) -> tuple[str, list[dict[str, str]], bool]:
+        """Typeahead search. Returns ``(mode, candidates, truncated)``.
+
+        A query made of digits (``-`` and ``〒`` allowed) is a postal-code prefix; any
+        other query is a substring of the normalized address or its kana reading.
+        """
+
+        digits = unicodedata.normalize("NFKC", query or "").replace("-", "").replace("〒", "").strip()
+        if digits.isdigit():
+            return "code_prefix", *self._search_code_prefix(digits, limit)
+        return "address", *self._search_text(normalize_search_text(query).replace("\x00", ""), limit)
+
+    def _search_code_prefix(self, digits: str, limit: int) -> tuple[list[dict[str, str]], bool]:
+        if len(digits) < SEARCH_MIN_CODE_DIGITS or len(digits) > 7:
+            return [], False
+        scale = 10 ** (7 - len(digits))
+        start = bisect_left(self.codes, int(digits) * scale)
+        end = bisect_left(self.codes, (int(digits) + 1) * scale, lo=start)
+        return [self._row(i) for i in range(start, min(end, start + limit))], end - start > limit
+
+    def _search_text(self, needle: str, limit: int) -> tuple[list[dict[str, str]], bool]:
+        if not needle:
+            return [], False
+        blob = self.search_blob
+        offsets = self.search_offsets
+        if len(needle) == 1:
+            # No bigram to use; scan the packed keys and stop as soon as enough matched.
+            hits: list[int] = []
+            found = blob.find(needle)
+            while found != -1 and len(hits) <= limit:
+                position = bisect_right(offsets, found) - 1
+                hits.append(position)
+                found = blob.find(needle, offsets[position + 1])
+            return [self._row(i) for i in hits[:limit]], len(hits) > limit
+        self.build_search_index()
+        assert self.bigrams is not None
+        postings = []
+        for i in range(len(needle) - 1):
+            bucket = self.bigrams.get(needle[i : i + 2])
+            if bucket is None:
+                return [], False
+            postings.append(bucket)
+        # Verify the candidates of the rarest bigram against the full key.
+        candidates = min(postings, key=len)
+        hits = []
+        for position in candidates:
+            if blob.find(needle, offsets[position], offsets[position + 1]) != -1:
+                hits.append(position)
+                if len(hits) > limit:
+                    break
+        return [self._row(i) for i in hits[:limit]], len(hits) > limit
+
+
+def _search_key(prefecture: str, city: str, town: str, kana: list[str]) -> str:
+    if town == NO_TOWN_PLACEHOLDER:
+        town = ""
+    reading = list(kana[:3])
+    if len(reading) == 3 and unicodedata.normalize("NFKC", reading[2]) == NO_TOWN_PLACEHOLDER_KANA:
+        reading[2] = ""
+    # NUL separates the address from its reading so that matches never span both.
+    return normalize_search_text(prefecture + city + town) + "\x00" + normalize_search_text("".join(reading))
+
+
+def _db_mtime_ns(db_path: Path) -> int | None:
+    try:
+        return db_path.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+class _LoadedIndex:
+    __slots__ = ("index", "checked_at")
+
+    def __init__(self, index: PostalCodeIndex) -> None:
+        self.index = index
+        self.checked_at = time.monotonic()
+
+
+_indexes: dict[str, _LoadedIndex] = {}
+_index_lock = threading.Lock()
+
+
+def reload_postal_index(db_path: Path = POSTAL_DB_PATH) -> PostalCodeIndex:
+    """Rebuild the index from the database and swap it in atomically."""
+
+    index = PostalCodeIndex.load(db_path)
+    # Readers keep using the previous index until this single assignment.
+    _indexes[str(db_path)] = _LoadedIndex(index)
+    return index
+
+
+def get_postal_index(db_path: Path = POSTAL_DB_PATH) -> PostalCodeIndex:
+    """Return the loaded index, building it on first use.
+
+    The DB file timestamp is re-checked at most every ``INDEX_RELOAD_CHECK_INTERVAL``
+    seconds so that an upload handled by another worker process is picked up.
+    """
+
+    key = str(db_path)
+    loaded = _indexes.get(key)
+    if loaded is not None:
+        now = time.monotonic()
+        if now - loaded.checked_at < INDEX_RELOAD_CHECK_INTERVAL:
+            return loaded.index
+        loaded.checked_at = now
+        if _db_mtime_ns(db_path) == loaded.index.source_mtime_ns:
+            return loaded.index
+    with _index_lock:
+        current = _indexes.get(key)
+        if current is not None and current is not loaded:
+            return current.index
+        return reload_postal_index(db_path)
+
+
 def get_postal_dictionary_info(db_path: Path = POSTAL_DB_PATH) -> dict[str, Any]:
-    ensure_postal_dictionary(db_path)
-    with _connect(db_path) as conn:
-        row = conn.execute("SELECT COUNT(*) AS count FROM postal_codes").fetchone()
-        meta_rows = conn.execute("SELECT key, value FROM postal_code_meta").fetchall()
-    meta = {row["key"]: row["value"] for row in meta_rows}
-    row_count = int(row["count"] or 0) if row else 0
+    index = get_postal_index(db_path)
     return {
-        "is_available": row_count > 0,
-        "row_count": row_count,
-        "source_filename": meta.get("source_filename") or None,
-        "last_updated_at": meta.get("last_updated_at"),
+        "is_available": index.row_count > 0,
+        "row_count": index.row_count,
+        "source_filename": index.meta.get("source_filename") or None,
+        "last_updated_at": index.meta.get("last_updated_at"),
+    }
+
+
+def search_postal_codes(
+    query: str,
+    limit: int = SEARCH_CANDIDATE_LIMIT,
+    db_path: Path = POSTAL_DB_PATH,
+) -> dict[str, Any]:
+    """Prefix search on codes or substring search on address / kana for typeahead."""
+
+    limit = max(1, min(limit, SEARCH_MAX_LIMIT))
+    mode, candidates, truncated = get_postal_index(db_path).search(query, limit)
+    return {
+        "query": query,
+        "mode": mode,
+        "candidates": candidates,
+        "truncated": truncated,
     }
 
 
@@ -185,20 +621,7 @@ def lookup_postal_code(postal_code: str, db_path: Path = POSTAL_DB_PATH) -> dict
             "candidates": [],
         }
 
-    ensure_postal_dictionary(db_path)
-    with _connect(db_path) as conn:
-        rows = conn.execute(
-            """
-            SELECT DISTINCT postal_code, prefecture, city, town, address
-            FROM postal_codes
-            WHERE postal_code = ?
-            ORDER BY prefecture, city, town
-            LIMIT 20
-            """,
-            (normalized,),
-        ).fetchall()
-
-    candidates = [dict(row) for row in rows]
+    candidates = get_postal_index(db_path).lookup(normalized)
     address = candidates[0]["address"] if candidates else None
     return {
         "postal_code": normalized,
@@ -0,0 +1,344 @@
+"""リクエスト単位のサンプリングプロファイラ。
+
+対象リクエストの処理中だけバックグラウンドスレッドが一定間隔で全スレッドのスタックを
+採取し（`sys._current_frames`）、関数単位で集計して `app/logs/profiles` に保存する。
+保存形式は speedscope（https://www.speedscope.app/ でそのまま開ける）または
+collapsed stacks（flamegraph.pl などで SVG 化できる）。
+
+対象の選び方（いずれも既定は無効）:
+  - `MONSHINMATE_PROFILE_SAMPLE_RATE`: 全リクエストのうち計測する割合（0〜1）。
+  - `MONSHINMATE_PROFILE_PATHS`: パスの前方一致（カンマ区切り）。例 `/admin/sessions`。
+  - `MONSHINMATE_PROFILE_HEADER`: このヘッダーが付いたリクエストを計測する（例 `X-Monshin-Profile`）。
+いずれも未設定ならミドルウェアは判定せずにそのまま次へ渡す。
+
+待機中（select・ロック・キュー待ち）のスレッドは採取しない。同時に処理中の他のリクエストの
+スタックも含まれ得るため、スレッド名を最上位のフレームとして残す。
+"""
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterable, Literal, Mapping
+from uuid import uuid4
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+
+from .metrics import REGISTRY as METRICS_REGISTRY
+
+
+ProfileFormat = Literal["speedscope", "collapsed"]
+
+PROFILE_DIR = Path(
+    os.getenv("MONSHINMATE_PROFILE_DIR", str(Path(__file__).resolve().parent / "logs" / "profiles"))
+)
+PROFILE_SAMPLE_RATE = float(os.getenv("MONSHINMATE_PROFILE_SAMPLE_RATE", "0"))
+PROFILE_PATHS = tuple(p.strip() for p in os.getenv("MONSHINMATE_PROFILE_PATHS", "").split(",") if p.strip())
+PROFILE_HEADER = os.getenv("MONSHINMATE_PROFILE_HEADER", "").strip()
+PROFILE_INTERVAL_MS = float(os.getenv("MONSHINMATE_PROFILE_INTERVAL_MS", "5"))
+PROFILE_MAX_FILES = int(os.getenv("MONSHINMATE_PROFILE_MAX_FILES", "100"))
+PROFILE_FORMAT: ProfileFormat = (
+    "collapsed" if os.getenv("MONSHINMATE_PROFILE_FORMAT", "speedscope").strip().lower() == "collapsed" else "speedscope"
+)
+MAX_STACK_DEPTH = 128
+
+PROFILE_SUFFIXES: dict[str, str] = {"speedscope": ".speedscope.json", "collapsed": ".collapsed.txt"}
+# 保存名: <UTC 時刻>_<メソッド>_<パス>_<ID><拡張子>
+PROFILE_NAME_PATTERN = re.compile(
+    r"^(?P<ts>\d{8}T\d{6}\d{3}Z)_(?P<method>[A-Z]+)_(?P<path>[A-Za-z0-9._-]*)_(?P<id>[0-9a-f]{8})"
+    r"(?P<suffix>\.speedscope\.json|\.collapsed\.txt)$"
+)
+
+# 採取しない待機中の関数（ファイル名の末尾, 関数名）
+_IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("socket.py", "accept"),
+    ("socketserver.py", "serve_forever"),
+}
+
+_LOGGER = logging.getLogger("profiling")
+
+PROFILES_CAPTURED = METRICS_REGISTRY.counter(
+    "monshin_profiles_captured",
+    "Request profiles written to disk",
+    ("format",),
+)
+
+FrameKey = tuple[str, str, int]
+
+
+@dataclass
+class ProfileCapture:
+    """1リクエスト分の採取結果。"""
+
+    method: str
+    path: str
+    started_at: datetime
+    started: float
+    stacks: Counter[tuple[FrameKey, ...]] = field(default_factory=Counter)
+    samples: int = 0
+    duration_ms: float = 0.0
+    status: int = 0
+
+
+class SamplingProfiler:
+    """採取スレッドを共有し、処理中の各キャプチャへサンプルを配る。"""
+
+    def __init__(
+        self,
+        directory: Path = PROFILE_DIR,
+        *,
+        sample_rate: float = PROFILE_SAMPLE_RATE,
+        paths: Iterable[str] = PROFILE_PATHS,
+        header: str = PROFILE_HEADER,
+        interval_ms: float = PROFILE_INTERVAL_MS,
+        max_files: int = PROFILE_MAX_FILES,
+        fmt: ProfileFormat = PROFILE_FORMAT,
+    ) -> None:
+        self.directory = Path(directory)
+        self.sample_rate = min(max(sample_rate, 0.0), 1.0)
+        self.paths = tuple(paths)
+        self.header = header.lower()
+        self.interval = max(0.001, interval_ms / 1000)
+        self.max_files = max(1, max_files)
+        self.format: ProfileFormat = fmt
+        self._lock = threading.Lock()
+        self._active: list[ProfileCapture] = []
+        self._thread: threading.Thread | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0 or bool(self.paths) or bool(self.header)
+
+    def should_profile(self, path: str, headers: Mapping[str, str]) -> bool:
+        """このリクエストを計測するかどうか。"""
+
+        if self.header and headers.get(self.header):
+            return True
+        if self.paths and path.startswith(self.paths):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    # --- 採取 -----------------------------------------------------------------
+
+    def start(self, method: str, path: str) -> ProfileCapture:
+        capture = ProfileCapture(
+            method=method,
+            path=path,
+            started_at=datetime.now(timezone.utc),
+            started=time.perf_counter(),
+        )
+        with self._lock:
+            self._active.append(capture)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+        return capture
+
+    def stop(self, capture: ProfileCapture, status: int) -> ProfileCapture:
+        with self._lock:
+            if capture in self._active:
+                self._active.remove(capture)
+        capture.duration_ms = (time.perf_counter() - capture.started) * 1000
+        capture.status = status
+        return capture
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while True:
+            with self._lock:
+                if not self._active:
+                    self._thread = None
+                    return
+                active = list(self._active)
+            names = {t.ident: t.name for t in threading.enumerate()}
+            stacks = [
+                stack
+                for ident, frame in sys._current_frames().items()
+                if ident != own and (stack := _walk(frame, names.get(ident) or f"thread-{ident}"))
+            ]
+            with self._lock:
+                for capture in active:
+                    capture.samples += 1
+                    capture.stacks.update(stacks)
+            time.sleep(self.interval)
+
+    # --- 保存 -----------------------------------------------------------------
+
+    def save(self, capture: ProfileCapture) -> Path | None:
+        """採取結果を書き出し、古いファイルを上限件数まで削除する。サンプルが無ければ保存しない。"""
+
+        if not capture.stacks:
+            return None
+        self.directory.mkdir(parents=True, exist_ok=True)
+        slug = re.sub(r"[^A-Za-z0-9._-]+", "-", capture.path.strip("/"))[:80] or "root"
+        ts = capture.started_at.strftime("%Y%m%dT%H%M%S") + f"{capture.started_at.microsecond // 1000:03d}Z"
+        name = f"{ts}_{capture.method.upper()}_{slug}_{uuid4().hex[:8]}{PROFILE_SUFFIXES[self.format]}"
+        if self.format == "collapsed":
+            body = render_collapsed(capture)
+        else:
+            body = json.dumps(render_speedscope(capture, self.interval * 1000), ensure_ascii=False)
+        target = self.directory / name
+        tmp = target.with_name(target.name + ".tmp")
+        tmp.write_text(body, encoding="utf-8")
+        os.replace(tmp, target)
+        PROFILES_CAPTURED.inc(format=self.format)
+        self._rotate()
+        _LOGGER.info(
+            "profile_saved name=%s path=%s duration_ms=%.1f samples=%d",
+            name,
+            capture.path,
+            capture.duration_ms,
+            capture.samples,
+        )
+        return target
+
+    def _rotate(self) -> None:
+        files = sorted(self._profile_files(), key=lambda p: p.name)
+        for stale in files[: max(0, len(files) - self.max_files)]:
+            try:
+                stale.unlink()
+            except OSError:
+                pass
+
+    def _profile_files(self) -> list[Path]:
+        if not self.directory.is_dir():
+            return []
+        return [p for p in self.directory.iterdir() if PROFILE_NAME_PATTERN.match(p.name)]
+
+    def list_profiles(self) -> list[dict[str, Any]]:
+        """保存済みプロファイルを新しい順に返す。"""
+
+        entries: list[dict[str, Any]] = []
+        for path in self._profile_files():
+            match = PROFILE_NAME_PATTERN.match(path.name)
+            if not match:
+                continue
+            try:
+                size = path.stat().st_size
+            except OSError:
+                continue
+            captured_at = datetime.strptime(match["ts"][:-4], "%Y%m%dT%H%M%S").replace(
+                microsecond=int(match["ts"][-4:-1]) * 1000, tzinfo=timezone.utc
+            )
+            entries.append(
+                {
+                    "name": path.name,
+                    "method": match["method"],
+                    "path_slug": match["path"],
+                    "format": "collapsed" if match["suffix"] == PROFILE_SUFFIXES["collapsed"] else "speedscope",
+                    "size": size,
+                    "captured_at": captured_at.isoformat(),
+                }
+            )
+        entries.sort(key=lambda e: e["name"], reverse=True)
+        return entries
+
+    def resolve(self, name: str) -> Path | None:
+        """ダウンロード対象のパス。保存名の形式に合わないもの（パス区切りを含むなど）は拒否する。"""
+
+        if not PROFILE_NAME_PATTERN.match(name):
+            return None
+        path = self.directory / name
+        return path if path.is_file() else None
+
+
+def _walk(frame: Any, thread_name: str) -> tuple[FrameKey, ...] | None:
+    code = frame.f_code
+    if (os.path.basename(code.co_filename), code.co_name) in _IDLE_FRAMES:
+        return None
+    stack: list[FrameKey] = []
+    while frame is not None and len(stack) < MAX_STACK_DEPTH:
+        code = frame.f_code
+        stack.append((code.co_filename, code.co_name, code.co_firstlineno))
+        frame = frame.f_back
+    stack.append(("", thread_name, 0))
+    stack.reverse()
+    return tuple(stack)
+
+
+def _frame_label(key: FrameKey) -> str:
+    filename, name, line = key
+    if not filename:
+        return name
+    return f"{name} ({_short_filename(filename)}:{line})"
+
+
+def _short_filename(filename: str) -> str:
+    for marker in ("site-packages/", "backend/"):
+        index = filename.rfind(marker)
+        if index >= 0:
+            return filename[index + len(marker):]
+    return os.path.basename(filename)
+
+
+def render_collapsed(capture: ProfileCapture) -> str:
+    """flamegraph.pl 互換の `frame;frame;... count` 形式。"""
+
+    lines = [
+        ";".join(_frame_label(key).replace(";", ":") for key in stack) + f" {count}"
+        for stack, count in capture.stacks.most_common()
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def render_speedscope(capture: ProfileCapture, interval_ms: float) -> dict[str, Any]:
+    """speedscope の sampled プロファイル（同一スタックは重みにまとめる）。"""
+
+    frames: list[dict[str, Any]] = []
+    index: dict[FrameKey, int] = {}
+    samples: list[list[int]] = []
+    weights: list[float] = []
+    for stack, count in capture.stacks.most_common():
+        ids: list[int] = []
+        for key in stack:
+            if key not in index:
+                index[key] = len(frames)
+                frame: dict[str, Any] = {"name": key[1]}
+                if key[0]:
+                    frame.update(file=_short_filename(key[0]), line=key[2])
+                frames.append(frame)
+            ids.append(index[key])
+        samples.append(ids)
+        weights.append(round(count * interval_ms, 3))
+    name = f"{capture.method} {capture.path} -> {capture.status} ({capture.duration_ms:.1f} ms)"
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": name,
+        "exporter": "monshinmate",
+        "activeProfileIndex": 0,
+        "shared": {"frames": frames},
+        "profiles": [
+            {
+                "type": "sampled",
+                "name": name,
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": round(sum(weights), 3),
+                "samples": samples,
+                "weights": weights,
+            }
+        ],
+    }
+
+
+PROFILER = SamplingProfiler()
+
+
+__all__ = [
+    "PROFILER",
+    "ProfileCapture",
+    "SamplingProfiler",
+    "render_collapsed",
+    "render_speedscope",
+]
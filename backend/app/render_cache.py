@@ -0,0 +1,90 @@
+"""描画済み PDF / Markdown のキャッシュ。
+
+確定済みセッションは要約の更新以外で変化しないため、同じ記録を何度開いても
+reportlab の描画をやり直さないよう成果物を暗号化して SQLite に保存する。
+キーはセッション内容・テンプレート・レイアウト設定・施設名・ロゴのハッシュで、
+いずれかが変われば別キーとなるため明示的な無効化は不要（古い項目はサイズ上限で追い出す）。
+キーはそのまま HTTP の ETag にも利用する。
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any
+
+from cryptography.fernet import Fernet
+
+from .encrypted_cache import EncryptedSQLiteCache, resolve_fernet
+
+
+_LOGGER = logging.getLogger("api")
+
+RENDER_CACHE_DB_PATH = Path(
+    os.getenv(
+        "MONSHINMATE_RENDER_CACHE_DB",
+        str(Path(__file__).resolve().parent / "render_cache.sqlite3"),
+    )
+)
+DEFAULT_TTL_SECONDS = float(os.getenv("MONSHINMATE_RENDER_CACHE_TTL", str(7 * 24 * 3600)))
+DEFAULT_MAX_BYTES = int(os.getenv("MONSHINMATE_RENDER_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+# 描画処理の出力が変わる修正を入れた場合に上げる
+RENDERER_VERSION = "1"
+
+
+def build_render_key(
+    *,
+    kind: str,
+    session: dict[str, Any],
+    template: Any,
+    layout_mode: str | None = None,
+    facility_name: str | None = None,
+    logo_url: str | None = None,
+) -> str:
+    """描画結果を一意に決める入力からキャッシュキー（SHA-256 の16進表記）を生成する。"""
+
+    material = {
+        "renderer": RENDERER_VERSION,
+        "kind": kind,
+        "session": session,
+        "template": template,
+        "layout_mode": layout_mode or "",
+        "facility_name": facility_name or "",
+        "logo_url": logo_url or "",
+    }
+    encoded = json.dumps(material, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class RenderedDocumentCache(EncryptedSQLiteCache):
+    """暗号化した描画結果（PDF / Markdown のバイト列）を SQLite に保持するキャッシュ。"""
+
+    table = "rendered_document_cache"
+    log_prefix = "render_cache"
+    logger = _LOGGER
+
+    def __init__(
+        self,
+        db_path: Path | str = RENDER_CACHE_DB_PATH,
+        *,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        fernet: Fernet | None = None,
+    ) -> None:
+        super().__init__(
+            db_path,
+            ttl_seconds=ttl_seconds,
+            max_bytes=max_bytes,
+            fernet=fernet or resolve_fernet("RENDER_CACHE_ENC_KEY"),
+        )
+
+    def _serialize(self, value: Any) -> bytes:
+        return bytes(value)
+
+    def _deserialize(self, data: bytes) -> Any:
+        return data
+
+
+__all__ = ["RenderedDocumentCache", "build_render_key", "RENDER_CACHE_DB_PATH", "RENDERER_VERSION"]
@@ -32,72 +32,103 @@ class SessionFSM:
         )
 
     # ---- 追加質問 ----
-    def next_question(self) -> dict[str, Any] | None:
-        """次に提示すべき追加質問を返す。"""
+    def _remaining_slots(self) -> int:
+        """追加質問を生成すべき残り枠数を返す（生成不要なら0）。"""
+        if not getattr(self.llm_gateway.settings, "enabled", True):
+            return 0
+        if self.session.additional_questions_used >= self.session.max_additional_questions:
+            return 0
+        if self.session.pending_llm_questions:
+            return 0
+        return max(0, int(self.session.max_additional_questions) - int(self.session.additional_questions_used))
+
+    def _followup_kwargs(self, remaining_slots: int) -> dict[str, Any]:
+        return {
+            "context": self.session.answers,
+            "max_questions": remaining_slots,
+            "prompt": self.session.followup_prompt,
+            "lock_key": getattr(self.session, "id", None),
+        }
+
+    def _enqueue_generated(self, texts: list[str]) -> None:
+        """生成された質問文を保留キューと質問文マップへ登録する。"""
+        self.session.pending_llm_questions = []
+        # LLM 追加質問の提示文も保存（永続化用）。
+        # セッションに llm_question_texts 辞書がなければ初期化する。
+        if not hasattr(self.session, "llm_question_texts") or self.session.llm_question_texts is None:
+            self.session.llm_question_texts = {}
+        if not hasattr(self.session, "question_texts") or getattr(self.session, "question_texts") is None:
+            self.session.question_texts = {}
+        # すでに発行した llm_* の最大番号を求め、連番が重複しないようにする
+        def _extract_num(key: str) -> int:
+            try:
+                return int(key.split("_")[1]) if key.startswith("llm_") else 0
+            except Exception:
+                return 0
+        current_max = 0
+        try:
+            for k in list(self.session.llm_question_texts.keys()) + list(self.session.answers.keys()):
+                if isinstance(k, str) and k.startswith("llm_"):
+                    n = _extract_num(k)
+                    if n > current_max:
+                        current_max = n
+        except Exception:
+            current_max = 0
+        for i, t in enumerate(texts):
+            qid = f"llm_{current_max + i + 1}"
+            self.session.pending_llm_questions.append(
+                {
+                    "id": qid,
+                    "text": t,
+                    "expected_input_type": "string",
+                    "priority": 1,
+                }
+            )
+            # 表示した質問文をマッピングとして保持
+            self.session.llm_question_texts[qid] = t
+            try:
+                self.session.question_texts[qid] = t
+            except Exception:
+                pass
+
+    def _pop_pending(self) -> dict[str, Any] | None:
         if not getattr(self.llm_gateway.settings, "enabled", True):
             return None
         if self.session.additional_questions_used >= self.session.max_additional_questions:
             return None
-
         if not self.session.pending_llm_questions:
+            return None
+        question = self.session.pending_llm_questions.pop(0)
+        self.session.additional_questions_used += 1
+        return question
+
+    def next_question(self) -> dict[str, Any] | None:
+        """次に提示すべき追加質問を返す。"""
+        remaining_slots = self._remaining_slots()
+        if remaining_slots > 0:
             try:
-                remaining_slots = max(0, int(self.session.max_additional_questions) - int(self.session.additional_questions_used))
-                if remaining_slots <= 0:
-                    return None
                 texts = self.llm_gateway.generate_followups(
-                    context=self.session.answers,
-                    max_questions=remaining_slots,
-                    prompt=self.session.followup_prompt,
-                    lock_key=getattr(self.session, "id", None),
+                    **self._followup_kwargs(remaining_slots)
                 )
-                self.session.pending_llm_questions = []
-                # LLM 追加質問の提示文も保存（永続化用）。
-                # セッションに llm_question_texts 辞書がなければ初期化する。
-                if not hasattr(self.session, "llm_question_texts") or self.session.llm_question_texts is None:
-                    self.session.llm_question_texts = {}
-                if not hasattr(self.session, "question_texts") or getattr(self.session, "question_texts") is None:
-                    self.session.question_texts = {}
-                # すでに発行した llm_* の最大番号を求め、連番が重複しないようにする
-                def _extract_num(key: str) -> int:
-                    try:
-                        return int(key.split("_")[1]) if key.startswith("llm_") else 0
-                    except Exception:
-                        return 0
-                current_max = 0
-                try:
-                    for k in list(self.session.llm_question_texts.keys()) + list(self.session.answers.keys()):
-                        if isinstance(k, str) and k.startswith("llm_"):
-                            n = _extract_num(k)
-                            if n > current_max:
-                                current_max = n
-                except Exception:
-                    current_max = 0
-                for i, t in enumerate(texts):
-                    qid = f"llm_{current_max + i + 1}"
-                    self.session.pending_llm_questions.append(
-                        {
-                            "id": qid,
-                            "text": t,
-                            "expected_input_type": "string",
-                            "priority": 1,
-                        }
-                    )
-                    # 表示した質問文をマッピングとして保持
-                    self.session.llm_question_texts[qid] = t
-                    try:
-                        self.session.question_texts[qid] = t
-                    except Exception:
-                        pass
+                self._enqueue_generated(texts)
             except Exception:
                 logging.getLogger("llm").exception("generate_followups_failed")
                 self.session.pending_llm_questions = []
+        return self._pop_pending()
 
-        if not self.session.pending_llm_questions:
-            return None
-
-        question = self.session.pending_llm_questions.pop(0)
-        self.session.additional_questions_used += 1
-        return question
+    async def anext_question(self) -> dict[str, Any] | None:
+        """`next_question` の非同期版。"""
+        remaining_slots = self._remaining_slots()
+        if remaining_slots > 0:
+            try:
+                texts = await self.llm_gateway.agenerate_followups(
+                    **self._followup_kwargs(remaining_slots)
+                )
+                self._enqueue_generated(texts)
+            except Exception:
+                logging.getLogger("llm").exception("generate_followups_failed")
+                self.session.pending_llm_questions = []
+        return self._pop_pending()
 
     def next_questions(self) -> list[dict[str, Any]]:
         """追加質問をまとめて取得する。
@@ -116,6 +147,16 @@ class SessionFSM:
             questions.append(q)
         return questions
 
+    async def anext_questions(self) -> list[dict[str, Any]]:
+        """`next_questions` の非同期版。"""
+        questions: list[dict[str, Any]] = []
+        while True:
+            q = await self.anext_question()
+            if not q:
+                break
+            questions.append(q)
+        return questions
+
     def update_completion(self) -> None:
         """外部から明示的に完了状態を更新したい場合に使用。"""
         self._finalize_item()
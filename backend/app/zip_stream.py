@@ -0,0 +1,74 @@
+"""ZIP をシークせずに逐次生成するストリーミングライター。
+
+各メンバーはデータ記述子（data descriptor）付きで書き出すため、
+圧縮後サイズや CRC を事前に知る必要がなく、生成したそばからクライアントへ送れる。
+同時に保持するのは書き込み中のメンバー1件分のみ。
+"""
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Iterable, Iterator, Union
+import io
+import zipfile
+
+
+MemberData = Union[bytes, Iterable[bytes]]
+
+
+class _StreamSink(io.RawIOBase):
+    """書き込まれたバイト列を溜め、呼び出し側が取り出すまで保持する。
+
+    `tell` / `seek` を提供しないため、`zipfile` はデータ記述子方式で書き込む。
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._chunks: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: bytes) -> int:  # type: ignore[override]
+        if data:
+            self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        if not self._chunks:
+            return b""
+        out = b"".join(self._chunks)
+        self._chunks.clear()
+        return out
+
+
+def iter_zip_stream(
+    members: Iterable[tuple[str, MemberData]],
+    *,
+    compression: int = zipfile.ZIP_DEFLATED,
+) -> Iterator[bytes]:
+    """`(ファイル名, 内容)` の列から ZIP を逐次生成し、バイト列チャンクを返す。
+
+    内容は bytes またはチャンクの iterable を受け付ける。
+    """
+
+    sink = _StreamSink()
+    with zipfile.ZipFile(sink, mode="w", compression=compression) as zf:
+        for name, data in members:
+            info = zipfile.ZipInfo(name, date_time=datetime.now().timetuple()[:6])
+            info.compress_type = compression
+            chunks: Iterable[bytes] = (data,) if isinstance(data, (bytes, bytearray)) else data
+            with zf.open(info, mode="w") as dest:
+                for chunk in chunks:
+                    dest.write(chunk)
+                    out = sink.drain()
+                    if out:
+                        yield out
+            out = sink.drain()
+            if out:
+                yield out
+    out = sink.drain()
+    if out:
+        yield out
+
+
+__all__ = ["iter_zip_stream"]
@@ -0,0 +1,107 @@
+"""キュー経由の構造化アクセスログのテスト。"""
+from __future__ import annotations
+
+from pathlib import Path
+import json
+import logging
+import queue
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from fastapi.testclient import TestClient
+
+from app import access_log  # type: ignore[import]
+from app.main import app, on_startup  # type: ignore[import]
+
+
+def _read_access_log(path: Path) -> list[dict]:
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines() if line.strip()]
+
+
+def test_access_log_records_route_session_and_llm_timings(tmp_path: Path) -> None:
+    on_startup()
+    access_log.shutdown_logging()
+    access_log.configure_logging(tmp_path)
+    try:
+        client = TestClient(app)
+        res = client.post(
+            "/sessions",
+            json={
+                "patient_name": "記録 太郎",
+                "dob": "1980-01-01",
+                "gender": "male",
+                "visit_type": "initial",
+                "answers": {},
+            },
+        )
+        sid = res.json()["id"]
+        assert client.get(f"/admin/sessions/{sid}").status_code == 200
+        assert client.post("/llm/chat", json={"message": "こんにちは"}).status_code == 200
+        client.get("/healthz")
+    finally:
+        access_log.shutdown_logging()  # キューの残りを書き出してから読む
+
+    entries = {(e["method"], e["route"]): e for e in _read_access_log(tmp_path / "access.log")}
+    created = entries[("POST", "/sessions")]
+    assert created["session_id"] == sid
+    assert created["status"] == 200
+    assert created["message"].startswith("api_call path=/sessions method=POST status=200")
+    detail = entries[("GET", "/admin/sessions/{session_id}")]
+    assert detail["session_id"] == sid
+    assert detail["path"] == f"/admin/sessions/{sid}"
+    chat = entries[("POST", "/llm/chat")]
+    assert chat["llm_calls"] == 1
+    assert chat["llm"][0]["operation"] == "chat"
+    assert chat["llm_ms"] >= 0
+    assert (tmp_path / "security.log").exists()
+
+
+def test_polling_routes_are_sampled() -> None:
+    assert access_log.should_log("/admin/sessions", 200, sample_rate=0)
+    assert not access_log.should_log("/healthz", 200, sample_rate=0)
+    assert access_log.should_log("/healthz", 503, sample_rate=0)
+    assert access_log.should_log("/metrics", 200, sample_rate=1)
+
+
+def test_queue_handler_drops_instead_of_blocking() -> None:
+    log_queue: queue.Queue = queue.Queue(maxsize=1)
+    handler = access_log.NonBlockingQueueHandler(log_queue)
+    logger = logging.getLogger("test.access_log.full")
+    logger.propagate = False
+    logger.addHandler(handler)
+    before = access_log.LOG_RECORDS_DROPPED.samples().get(("test.access_log.full",), 0)
+    try:
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logger.exception("first %s", "record")
+        logger.error("second")
+        logger.error("third")
+    finally:
+        logger.removeHandler(handler)
+
+    assert log_queue.qsize() == 1
+    record = log_queue.get_nowait()
+    assert record.getMessage() == "first record"
+    assert record.exc_info is None and "ValueError: boom" in record.exc_text
+    assert access_log.LOG_RECORDS_DROPPED.samples()[("test.access_log.full",)] == before + 2
+
+
+def test_repeated_configure_does_not_open_log_files(tmp_path: Path, monkeypatch) -> None:
+    """登録済みのロガーに対しては書き込み先ファイルを開かない。"""
+    access_log.shutdown_logging()
+    access_log.configure_logging(tmp_path)
+    opened: list[str] = []
+
+    class _TrackingHandler(access_log.RotatingFileHandler):
+        def __init__(self, filename, *args, **kwargs) -> None:
+            opened.append(str(filename))
+            super().__init__(filename, *args, **kwargs)
+
+    monkeypatch.setattr(access_log, "RotatingFileHandler", _TrackingHandler)
+    try:
+        access_log.configure_logging(tmp_path / "second")
+    finally:
+        access_log.shutdown_logging()
+    assert opened == []
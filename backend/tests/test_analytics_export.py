@@ -0,0 +1,120 @@
+"""列指向の集計エクスポートのテスト。"""
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from pathlib import Path
+import csv
+import io
+import sys
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from fastapi.testclient import TestClient
+
+from app.analytics_export import (  # type: ignore[import]
+    build_record,
+    iter_csv,
+    iter_parquet,
+    parquet_available,
+    plan_columns,
+)
+from app.main import app, on_startup  # type: ignore[import]
+
+
+ITEMS = [
+    {"id": "personal_info", "label": "患者基本情報", "type": "personal_info"},
+    {
+        "id": "symptoms",
+        "label": "症状",
+        "type": "multi",
+        "options": ["頭痛", "発熱"],
+        "allow_freetext": True,
+        "followups": {"発熱": [{"id": "temp", "label": "体温", "type": "slider"}]},
+    },
+    {"id": "smoking", "label": "喫煙", "type": "yesno"},
+    {"id": "memo", "label": "メモ", "type": "string"},
+]
+
+SESSION = {
+    "id": "s1",
+    "questionnaire_id": "default",
+    "visit_type": "initial",
+    "gender": "female",
+    "dob": "1990-06-15",
+    "finalized_at": "2026-06-14T09:00:00+00:00",
+    "answers": {
+        "personal_info": {"name": "問診 花子", "phone": "090"},
+        "symptoms": ["発熱", "めまい"],
+        "temp": "38.2",
+        "smoking": "no",
+    },
+}
+
+
+def test_columns_are_typed_and_exclude_personal_info() -> None:
+    columns = plan_columns([ITEMS, [{"id": "symptoms", "type": "multi", "options": ["咳"]}]])
+    kinds = {c.name: c.kind for c in columns}
+    assert "personal_info" not in kinds
+    assert kinds["symptoms__頭痛"] == "bool"
+    assert kinds["symptoms__咳"] == "bool"
+    assert kinds["temp"] == "float"
+    assert kinds["smoking"] == "bool"
+
+    record = build_record(SESSION, columns)
+    assert record["symptoms__発熱"] is True
+    assert record["symptoms__頭痛"] is False
+    assert record["symptoms__other"] == "めまい"
+    assert record["temp"] == 38.2
+    assert record["smoking"] is False
+    assert record["memo"] is None
+    assert record["age_at_visit"] == 35
+    assert record["finalized_at"] == datetime(2026, 6, 14, 9, tzinfo=timezone.utc)
+    assert "問診 花子" not in "".join(iter_csv([record], columns))
+
+
+def test_age_at_visit_accepts_stored_dob_notations() -> None:
+    """スラッシュ区切り・8桁・和暦で保存された生年月日からも受診時年齢を出す。"""
+    columns = plan_columns([ITEMS])
+    for dob in ("1990/6/15", "19900615", "平成2年6月15日", "H2.6.15"):
+        record = build_record({**SESSION, "dob": dob}, columns)
+        assert record["age_at_visit"] == 35, dob
+    assert build_record({**SESSION, "dob": "不明"}, columns)["age_at_visit"] is None
+
+
+@pytest.mark.skipif(not parquet_available(), reason="pyarrow is not installed")
+def test_parquet_roundtrip() -> None:
+    import pyarrow.parquet as pq
+
+    columns = plan_columns([ITEMS])
+    records = [build_record({**SESSION, "id": f"s{i}"}, columns) for i in range(5)]
+    data = b"".join(iter_parquet(records, columns, row_group_size=2))
+    table = pq.read_table(io.BytesIO(data))
+    assert table.num_rows == 5
+    assert table.column("symptoms__発熱").to_pylist() == [True] * 5
+
+
+def test_export_endpoint_streams_csv() -> None:
+    on_startup()
+    client = TestClient(app)
+    res = client.post(
+        "/sessions",
+        json={
+            "patient_name": "集計 太郎",
+            "dob": "1970-01-01",
+            "gender": "male",
+            "visit_type": "initial",
+            "answers": {"chief_complaint": "腰痛"},
+        },
+    )
+    sid = res.json()["id"]
+    assert client.post(f"/sessions/{sid}/finalize").status_code == 200
+
+    res = client.get("/admin/sessions/export/analytics", params={"format": "csv"})
+    assert res.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(res.text)))
+    row = next(r for r in rows if r["session_id"] == sid)
+    assert row["chief_complaint"] == "腰痛"
+    assert "集計 太郎" not in res.text
+    assert client.get("/admin/sessions/export/analytics", params={"format": "xml"}).status_code == 400
@@ -676,6 +676,53 @@ def test_admin_bulk_download() -> None:
         assert len(r_zip.content) > 0
 
 
+def test_admin_bulk_download_csv_layouts() -> None:
+    """集計CSVは入力順に並び、wide レイアウトでは設問ごとに列が分かれる。"""
+    import csv
+    import io
+    from app.db import get_sessions as db_get_sessions
+
+    on_startup()
+    sids = []
+    for name, complaint in (("一括花子1", "咳"), ("一括花子2", "発熱")):
+        res = client.post(
+            "/sessions",
+            json={
+                "patient_name": name,
+                "dob": "1985-03-03",
+                "gender": "female",
+                "visit_type": "initial",
+                "answers": {"chief_complaint": complaint, "onset": "昨日"},
+            },
+        )
+        sid = res.json()["id"]
+        assert client.post(f"/sessions/{sid}/finalize").status_code == 200
+        sids.append(sid)
+
+    fetched = db_get_sessions([sids[1], "missing", sids[0]])
+    assert [s["id"] for s in fetched] == [sids[1], sids[0]]
+    assert fetched[0]["answers"]["chief_complaint"] == "発熱"
+
+    params = [("ids", sids[1]), ("ids", sids[0])]
+    summary = client.get("/admin/sessions/bulk/download/csv", params=params)
+    rows = list(csv.reader(io.StringIO(summary.text)))
+    assert [r[0] for r in rows[1:]] == [sids[1], sids[0]]
+    assert "発熱" in rows[1][6]
+
+    wide = client.get("/admin/sessions/bulk/download/csv", params=params + [("layout", "wide")])
+    assert wide.status_code == 200
+    rows = list(csv.reader(io.StringIO(wide.text)))
+    header = rows[0]
+    assert len(rows[1]) == len(header)
+    complaint_col = rows[1].index("発熱")
+    assert complaint_col >= 6
+    assert rows[2][complaint_col] == "咳"
+    assert header[-1] == "自動生成サマリー"
+
+    bad = client.get("/admin/sessions/bulk/download/csv", params=params + [("layout", "x")])
+    assert bad.status_code == 400
+
+
 def test_pdf_layout_setting_toggle() -> None:
     """PDFレイアウト設定の取得と更新が行える。"""
 
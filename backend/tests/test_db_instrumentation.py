@@ -0,0 +1,91 @@
+"""永続化アダプタ呼び出しの計測と遅い呼び出しの記録のテスト。"""
+from __future__ import annotations
+
+from pathlib import Path
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from fastapi.testclient import TestClient
+
+from app.db import list_sessions  # type: ignore[import]
+from app.db import instrumentation  # type: ignore[import]
+from app.db.instrumentation import count_rows, redact_sql, stats  # type: ignore[import]
+from app.main import app, on_startup  # type: ignore[import]
+
+
+def test_redact_sql_and_count_rows() -> None:
+    sql = "SELECT * FROM sessions WHERE patient_name = '山田 ''太郎''' AND id2 = 42 AND score > -1.5"
+    assert redact_sql(sql) == "SELECT * FROM sessions WHERE patient_name = ? AND id2 = ? AND score > ?"
+    assert count_rows([1, 2, 3]) == 3
+    assert count_rows({"id": "s1"}) == 1
+    assert count_rows(None) == 0
+    assert count_rows(5) == 5
+    assert count_rows(True) == 0
+
+
+def test_statement_capture_detaches_at_cap(tmp_path: Path) -> None:
+    """記録上限に達したら接続のトレースを外し、以降の SQL は見ない。"""
+    import sqlite3
+
+    captured: list[tuple[str, str]] = []
+    token = instrumentation._captured_statements.set(captured)
+    conn = sqlite3.connect(tmp_path / "trace.sqlite3")
+    try:
+        instrumentation.attach_statement_capture(conn, "trace.sqlite3")
+        conn.execute("CREATE TABLE t (v TEXT)")
+        conn.executemany("INSERT INTO t VALUES (?)", [("x" * 1000,)] * 50)
+        for i in range(instrumentation.MAX_CAPTURED_STATEMENTS + 5):
+            conn.execute("SELECT v FROM t WHERE rowid = ?", (i,)).fetchall()
+        # 上限に達した後の接続では何も記録しない
+        other = sqlite3.connect(tmp_path / "trace.sqlite3")
+        instrumentation.attach_statement_capture(other, "trace.sqlite3")
+        other.execute("SELECT count(*) FROM t").fetchall()
+        other.close()
+    finally:
+        conn.close()
+        instrumentation._captured_statements.reset(token)
+    assert len(captured) == instrumentation.MAX_CAPTURED_STATEMENTS
+    assert all(sql.startswith("SELECT v FROM t") for _, sql in captured)
+
+
+def test_slow_calls_are_logged_with_query_plan(monkeypatch, caplog) -> None:
+    """閾値を超えた呼び出しは実行計画付きで記録され、SQL のリテラルは伏せられる。"""
+    on_startup()
+    stats.reset()
+    monkeypatch.setattr(stats, "slow_call_ms", 0.000001)
+    caplog.set_level("WARNING", logger="db.instrumentation")
+
+    rows = list_sessions(patient_name="計測対象 花子")
+
+    top = {entry["function"]: entry for entry in stats.top(50)}
+    assert top["list_sessions"]["calls"] == 1
+    assert top["list_sessions"]["rows"] == len(rows)
+    slow = stats.recent_slow_calls()[0]
+    assert slow["function"] == "list_sessions"
+    assert slow["statements"], "SQLite の実行 SQL が取得されていること"
+    statement = slow["statements"][0]
+    assert statement["sql"].startswith("SELECT")
+    assert statement["plan"] and not statement["plan"][0].startswith("explain_failed")
+    assert "花子" not in statement["sql"]
+    assert any("db_slow_call_plan function=list_sessions" in r.getMessage() for r in caplog.records)
+
+
+def test_admin_db_stats_endpoint(monkeypatch) -> None:
+    on_startup()
+    stats.reset()
+    monkeypatch.setattr(stats, "slow_call_ms", 0)
+    client = TestClient(app)
+    for _ in range(3):
+        assert client.get("/admin/sessions").status_code == 200
+
+    res = client.get("/admin/db/stats", params={"limit": 5, "order": "calls"})
+    assert res.status_code == 200
+    body = res.json()
+    assert body["order"] == "calls"
+    assert len(body["functions"]) <= 5
+    calls = [entry["calls"] for entry in body["functions"]]
+    assert calls == sorted(calls, reverse=True)
+    assert any(entry["function"] == "list_sessions" and entry["calls"] >= 3 for entry in body["functions"])
+    assert body["slow_calls"] == []
+    assert client.get("/admin/db/stats", params={"order": "bogus"}).status_code == 422
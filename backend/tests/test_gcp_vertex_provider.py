@@ -160,3 +160,108 @@ def test_generate_followups_does_not_force_constant_max_tokens():
 
     assert result == []
     assert captured["max_tokens"] is None
+
+
+def _service_account_info() -> dict[str, Any]:
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+    return {
+        "type": "service_account",
+        "project_id": "demo",
+        "private_key_id": "kid",
+        "private_key": pem,
+        "client_email": "svc@demo.iam.gserviceaccount.com",
+        "client_id": "1",
+        "token_uri": "https://oauth2.example.test/token",
+    }
+
+
+class _FakeTokenEndpoint:
+    """トークンエンドポイントを模したトランスポート。"""
+
+    def __init__(self, expires_in: int = 3600) -> None:
+        self.calls = 0
+        self.expires_in = expires_in
+
+    def __call__(self, url, method="GET", body=None, headers=None, timeout=None, **kwargs):
+        self.calls += 1
+        data = json.dumps(
+            {"access_token": f"token-{self.calls}", "expires_in": self.expires_in}
+        ).encode()
+        return SimpleNamespace(status=200, headers={}, data=data)
+
+
+def test_auth_headers_reuse_cached_token(monkeypatch):
+    from app.llm_providers import gcp_vertex
+
+    endpoint = _FakeTokenEndpoint()
+    monkeypatch.setattr(gcp_vertex, "GoogleAuthRequest", lambda: endpoint)
+    provider = GcpVertexProvider()
+    profile = {"service_account_json": json.dumps(_service_account_info())}
+
+    first = provider._get_auth_headers(profile)
+    second = provider._get_auth_headers(dict(profile))
+
+    assert first == second == {"Authorization": "Bearer token-1"}
+    assert endpoint.calls == 1
+
+
+def test_auth_headers_refresh_near_expiry_single_flight(monkeypatch):
+    import threading
+
+    from app.llm_providers import gcp_vertex
+
+    # 有効期限がマージン内のトークンは毎回更新対象になる
+    endpoint = _FakeTokenEndpoint(expires_in=60)
+    monkeypatch.setattr(gcp_vertex, "GoogleAuthRequest", lambda: endpoint)
+    provider = GcpVertexProvider()
+    profile = {"service_account_json": json.dumps(_service_account_info())}
+
+    provider._get_auth_headers(profile)
+    assert endpoint.calls == 1
+    provider._get_auth_headers(profile)
+    assert endpoint.calls == 2
+
+    endpoint.expires_in = 3600
+    provider.clear_credentials_cache()
+    endpoint.calls = 0
+    barrier = threading.Barrier(8)
+    results: list[dict[str, str]] = []
+
+    def worker():
+        barrier.wait()
+        results.append(provider._get_auth_headers(profile))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert endpoint.calls == 1
+    assert len(results) == 8
+
+
+def test_credentials_fingerprint_does_not_parse_json(monkeypatch):
+    """リクエストごとに呼ばれる指紋計算ではサービスアカウントJSONを解釈しない。"""
+    provider = GcpVertexProvider()
+
+    def fail_parse(raw):
+        raise AssertionError("fingerprint must not parse the service account JSON")
+
+    monkeypatch.setattr(provider, "_parse_service_account_json", fail_parse)
+    raw = json.dumps({"client_email": "svc@demo.iam.gserviceaccount.com"})
+    assert provider._credentials_fingerprint({"service_account_json": raw}) == provider._credentials_fingerprint(
+        {"service_account_json": f" {raw}\n"}
+    )
+    assert provider._credentials_fingerprint({"service_account_json": raw}) != provider._credentials_fingerprint(
+        {"service_account_json": raw.replace("svc@", "other@")}
+    )
+    assert provider._credentials_fingerprint({}) == "adc"
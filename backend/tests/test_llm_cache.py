@@ -0,0 +1,118 @@
+"""LLM 応答キャッシュのテスト。"""
+from __future__ import annotations
+
+from pathlib import Path
+import sqlite3
+import sys
+import time
+
+import httpx
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app.llm_cache import LLMResponseCache, build_cache_key  # type: ignore[import]
+from app.llm_gateway import LLMGateway, LLMSettings  # type: ignore[import]
+
+
+def _key(**overrides) -> str:
+    params = {
+        "kind": "summarize",
+        "provider": "ollama",
+        "model": "m",
+        "temperature": 0.0,
+        "system_prompt": "sys",
+        "prompt": None,
+        "answers": {"q1": "頭痛"},
+    }
+    params.update(overrides)
+    return build_cache_key(**params)
+
+
+def test_cache_key_normalizes_answers() -> None:
+    """全角・空白・キー順の違いは同一キーとして扱う。"""
+    a = _key(answers={"q1": " ＡＢＣ ", "q2": ["１"]})
+    b = _key(answers={"q2": ["1"], "q1": "ABC"})
+    assert a == b
+    assert a != _key(answers={"q1": "ABD", "q2": ["1"]})
+    assert a != _key(answers={"q1": "ABC", "q2": ["1"]}, model="other")
+
+
+def test_cache_key_depends_on_endpoint() -> None:
+    """同じモデル名でも接続先・プロファイルの接続設定が違えば別のキーにする。"""
+    base = _key(base_url="http://host-a:11434")
+    assert base == _key(base_url="http://host-a:11434/")
+    assert base != _key(base_url="http://host-b:11434")
+    assert _key(profile={"location": "us-central1"}) != _key(profile={"location": "asia-northeast1"})
+
+
+def test_roundtrip_is_encrypted_at_rest(tmp_path: Path) -> None:
+    db_path = tmp_path / "cache.sqlite3"
+    cache = LLMResponseCache(db_path)
+    key = _key()
+    cache.put(key, "要約本文", kind="summarize", session_id="s1")
+    assert cache.get(key) == "要約本文"
+    with sqlite3.connect(db_path) as conn:
+        payload = conn.execute("SELECT payload FROM llm_response_cache").fetchone()[0]
+    assert "要約本文".encode("utf-8") not in bytes(payload)
+    assert cache.stats()["hits"] == 1
+
+
+def test_ttl_and_size_eviction(tmp_path: Path) -> None:
+    cache = LLMResponseCache(tmp_path / "cache.sqlite3", ttl_seconds=1)
+    key = _key()
+    cache.put(key, ["質問"], kind="generate_followups")
+    with sqlite3.connect(cache.db_path) as conn:
+        conn.execute("UPDATE llm_response_cache SET expires_at=?", (time.time() - 1,))
+    assert cache.get(key) is None
+
+    small = LLMResponseCache(tmp_path / "small.sqlite3", max_bytes=400)
+    small.put("k1", "a" * 100, kind="summarize")
+    time.sleep(0.01)
+    small.put("k2", "b" * 100, kind="summarize")
+    assert small.get("k1") is None
+    assert small.get("k2") == "b" * 100
+    assert small.stats()["evictions"] >= 1
+
+
+def test_purge_sessions(tmp_path: Path) -> None:
+    cache = LLMResponseCache(tmp_path / "cache.sqlite3")
+    cache.put("k1", "x", kind="summarize", session_id="s1")
+    cache.put("k2", "y", kind="summarize", session_id="s2")
+    assert cache.purge_sessions(["s1"]) == 1
+    assert cache.get("k1") is None
+    assert cache.get("k2") == "y"
+
+
+def test_gateway_uses_cache_only_when_deterministic(tmp_path: Path, monkeypatch) -> None:
+    calls: list[dict] = []
+
+    def fake_post(url, json=None, headers=None, timeout=None):  # noqa: A002
+        calls.append(json)
+        return httpx.Response(
+            200,
+            json={"message": {"content": "remote summary"}},
+            request=httpx.Request("POST", url),
+        )
+
+    monkeypatch.setattr(httpx, "post", fake_post)
+    settings = LLMSettings(
+        provider="ollama",
+        model="m",
+        temperature=0.0,
+        enabled=True,
+        base_url="http://localhost:11434",
+    )
+    gateway = LLMGateway(settings, response_cache=LLMResponseCache(tmp_path / "c.sqlite3"))
+    first = gateway.summarize_with_prompt("sys", {"q1": "頭痛"}, lock_key="s1")
+    second = gateway.summarize_with_prompt("sys", {"q1": "頭痛"}, lock_key="s1")
+    assert first == second == "remote summary"
+    assert len(calls) == 1
+
+    # 接続先を変えた場合は以前の応答を使わない
+    gateway.settings.base_url = "http://other-host:11434"
+    gateway.summarize_with_prompt("sys", {"q1": "頭痛"}, lock_key="s1")
+    assert len(calls) == 2
+
+    gateway.settings.temperature = 0.7
+    gateway.summarize_with_prompt("sys", {"q1": "頭痛"}, lock_key="s1")
+    assert len(calls) == 3
@@ -0,0 +1,113 @@
+"""サーキットブレーカーと適応タイムアウトのテスト。"""
+from __future__ import annotations
+
+from pathlib import Path
+import sys
+
+import httpx
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app.llm_circuit import CircuitBreaker, LatencyTracker  # type: ignore[import]
+from app.llm_gateway import LLMGateway, LLMSettings  # type: ignore[import]
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_breaker_opens_and_probes_half_open() -> None:
+    clock = _Clock()
+    breaker = CircuitBreaker(failure_threshold=2, cooldown_seconds=10, clock=clock)
+    breaker.record_failure()
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow_request()
+
+    clock.now = 11
+    assert breaker.allow_request()  # half-open の試行は1件のみ
+    assert breaker.state == "half_open"
+    assert not breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    clock.now = 22
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.snapshot()["consecutive_failures"] == 0
+
+
+def test_latency_tracker_timeout_from_percentile() -> None:
+    tracker = LatencyTracker(min_samples=3, multiplier=2.0, floor_seconds=5.0)
+    assert tracker.timeout_for("summarize", 20.0) == 20.0
+    for seconds in (3.0, 4.0, 4.5):
+        tracker.observe("summarize", seconds)
+    assert tracker.timeout_for("summarize", 20.0) == 9.0
+    assert tracker.timeout_for("summarize", 6.0) == 6.0
+    tracker.observe("chat", 0.1)
+    tracker.observe("chat", 0.1)
+    tracker.observe("chat", 0.1)
+    assert tracker.timeout_for("chat", 15.0) == 5.0
+
+
+def test_gateway_short_circuits_after_failures(monkeypatch) -> None:
+    calls: list[str] = []
+
+    def failing_post(url, **kwargs):
+        calls.append(url)
+        raise httpx.ConnectError("connection refused")
+
+    monkeypatch.setattr(httpx, "post", failing_post)
+    settings = LLMSettings(
+        provider="ollama",
+        model="m",
+        temperature=0.2,
+        enabled=True,
+        base_url="http://llm.test",
+    )
+    gateway = LLMGateway(settings)
+    for _ in range(gateway._breaker.failure_threshold):
+        assert gateway.generate_followups({"q": "a"}, 2) == []
+    attempts = len(calls)
+
+    assert gateway.generate_followups({"q": "a"}, 2) == []
+    summary = gateway.summarize_with_prompt("sys", {"q": "a"})
+    assert summary.startswith("要約:")
+    assert len(calls) == attempts
+    assert gateway.get_circuit_snapshot()["state"] == "open"
+
+    # 疎通確認など明示的な成功でブレーカーは閉じる
+    gateway._record_status("ok", "manual_test", "ok")
+    assert gateway.get_circuit_snapshot()["state"] == "closed"
+
+
+def test_failed_summary_counts_as_one_failure(monkeypatch) -> None:
+    """1回の要約失敗で連続失敗数は1つだけ進む（閾値より早くブレーカーを開かない）。"""
+    import asyncio
+
+    class FailingAdapter:
+        def summarize_with_prompt(self, *args, **kwargs):
+            raise RuntimeError("adapter down")
+
+    def failing_post(url, **kwargs):
+        raise httpx.ConnectError("connection refused")
+
+    monkeypatch.setattr(httpx, "post", failing_post)
+    adapter_gateway = LLMGateway(LLMSettings(provider="gcp_vertex", model="m", temperature=0.2, enabled=True))
+    adapter_gateway._get_adapter = lambda provider=None: FailingAdapter()  # type: ignore[method-assign]
+    assert adapter_gateway.summarize_with_prompt("sys", {"q": "a"}).startswith("要約:")
+    assert adapter_gateway.get_circuit_snapshot()["consecutive_failures"] == 1
+    assert asyncio.run(adapter_gateway.asummarize_with_prompt("sys", {"q": "a"})).startswith("要約:")
+    assert adapter_gateway.get_circuit_snapshot()["consecutive_failures"] == 2
+
+    remote_gateway = LLMGateway(
+        LLMSettings(provider="ollama", model="m", temperature=0.2, enabled=True, base_url="http://llm.test")
+    )
+    remote_gateway.summarize_with_prompt("sys", {"q": "a"})
+    assert remote_gateway.get_circuit_snapshot()["consecutive_failures"] == 1
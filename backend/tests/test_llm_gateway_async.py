@@ -0,0 +1,114 @@
+"""LLM ゲートウェイ非同期 API のテスト。"""
+from __future__ import annotations
+
+import asyncio
+import json
+from pathlib import Path
+import sys
+from types import MethodType
+
+import httpx
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app.llm_gateway import LLMGateway, LLMSettings  # type: ignore[import]
+from app.llm_providers.gcp_vertex import GcpVertexProvider  # type: ignore[import]
+
+
+def _gateway(handler, provider: str = "ollama") -> LLMGateway:
+    settings = LLMSettings(
+        provider=provider,
+        model="m",
+        temperature=0.2,
+        enabled=True,
+        base_url="http://llm.test",
+    )
+    gateway = LLMGateway(settings)
+    transport = httpx.MockTransport(handler)
+    gateway._get_async_client = lambda: httpx.AsyncClient(transport=transport)  # type: ignore[method-assign]
+    return gateway
+
+
+def test_agenerate_followups_and_asummarize() -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        if "format" in body:
+            return httpx.Response(200, json={"message": {"content": '["質問1", "質問2", "質問3"]'}})
+        return httpx.Response(200, json={"message": {"content": "要約結果"}})
+
+    gateway = _gateway(handler)
+
+    async def run() -> tuple[list[str], str]:
+        questions = await gateway.agenerate_followups({"q": "頭痛"}, 2, lock_key="s1")
+        summary = await gateway.asummarize_with_prompt("sys", {"q": "頭痛"}, lock_key="s1")
+        return questions, summary
+
+    questions, summary = asyncio.run(run())
+    assert questions == ["質問1", "質問2"]
+    assert summary == "要約結果"
+    assert gateway.get_status_snapshot()["status"] == "ok"
+
+
+def test_achat_falls_back_to_stub_on_error() -> None:
+    gateway = _gateway(lambda request: httpx.Response(500, json={}), provider="lm_studio")
+    reply = asyncio.run(gateway.achat("こんにちは"))
+    assert reply.startswith("LLM応答[lm_studio:m")
+    assert gateway.get_status_snapshot()["status"] == "ng"
+
+
+def test_agenerate_followups_cancellation_releases_lock() -> None:
+    async def slow_handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(10)
+        return httpx.Response(200, json={"message": {"content": "[]"}})
+
+    gateway = _gateway(slow_handler)
+
+    async def run() -> None:
+        task = asyncio.create_task(gateway.agenerate_followups({}, 1, lock_key="s1"))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert not gateway._get_async_lock("s1").locked()
+
+    asyncio.run(run())
+
+
+def test_vertex_async_methods_use_async_transport() -> None:
+    provider = GcpVertexProvider()
+    calls: list[dict] = []
+
+    async def fake_agenerate_text(self, settings, profile, **kwargs):
+        calls.append(kwargs)
+        return '["追加1", "追加2"]'
+
+    provider._agenerate_text = MethodType(fake_agenerate_text, provider)
+    settings = LLMSettings(provider="gcp_vertex", model="gemini", temperature=0.2)
+    result = asyncio.run(provider.agenerate_followups(settings, {}, {"q": "a"}, 3))
+    assert result == ["追加1", "追加2"]
+    assert calls[0]["response_mime_type"] == "application/json"
+
+
+def test_provider_clients_close_only_on_shutdown(monkeypatch) -> None:
+    """ゲートウェイの aclose は共有アダプタを閉じず、終了処理でだけ閉じる。"""
+    from app import llm_gateway as gateway_module  # type: ignore[import]
+    from app.llm_provider_registry import ProviderRegistration, get_provider_registry  # type: ignore[import]
+
+    provider = GcpVertexProvider()
+    sync_client = provider._get_http_client()
+    registration = ProviderRegistration(meta=get_provider_registry()["gcp_vertex"].meta, adapter=provider)
+    monkeypatch.setattr(gateway_module, "get_provider_registry", lambda: {"gcp_vertex": registration})
+
+    async def run() -> httpx.AsyncClient:
+        async_client = provider._get_async_http_client()
+        # /llm/list-models などの一時ゲートウェイを閉じても共有クライアントは使い続けられる
+        await LLMGateway(LLMSettings(provider="ollama", model="m", temperature=0.2)).aclose()
+        assert not sync_client.is_closed and not async_client.is_closed
+        await gateway_module.close_provider_adapters()
+        return async_client
+
+    async_client = asyncio.run(run())
+    assert sync_client.is_closed
+    assert async_client.is_closed
+    assert provider._http_client is None and provider._async_client is None
@@ -0,0 +1,108 @@
+"""メトリクスレジストリと /metrics 出力のテスト。"""
+from __future__ import annotations
+
+from pathlib import Path
+import json
+import sys
+import threading
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from fastapi.testclient import TestClient
+
+import app.main as main_module  # type: ignore[import]
+from app.main import app, on_startup  # type: ignore[import]
+from app.metrics import MetricsRegistry  # type: ignore[import]
+
+
+def test_render_openmetrics_text() -> None:
+    registry = MetricsRegistry()
+    requests = registry.counter("demo_requests", "Requests", ("path",))
+    registry.gauge("demo_inflight", "In flight").set(3)
+    latency = registry.histogram("demo_latency_seconds", "Latency", buckets=(0.1, 1.0))
+    requests.inc(path='/a"b\n')
+    requests.inc(2, path="/c")
+    latency.observe(0.05)
+    latency.observe(0.5)
+    latency.observe(5)
+
+    text = registry.render()
+    assert text.endswith("# EOF\n")
+    assert "# TYPE demo_requests counter" in text
+    assert 'demo_requests_total{path="/a\\"b\\n"} 1.0' in text
+    assert 'demo_requests_total{path="/c"} 2.0' in text
+    assert "demo_inflight 3.0" in text
+    assert 'demo_latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'demo_latency_seconds_bucket{le="1.0"} 2' in text
+    assert 'demo_latency_seconds_bucket{le="+Inf"} 3' in text
+    assert "demo_latency_seconds_count 3" in text
+    assert "demo_latency_seconds_sum 5.55" in text
+    # 同名の再登録は同じメトリクスを返す
+    assert registry.counter("demo_requests", "Requests", ("path",)) is requests
+
+
+def test_counter_is_thread_safe() -> None:
+    counter = MetricsRegistry().counter("demo_hits", "Hits")
+
+    def _work() -> None:
+        for _ in range(5000):
+            counter.inc()
+
+    threads = [threading.Thread(target=_work) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert counter.samples()[()] == 40000
+
+
+def test_shared_directory_merges_processes(tmp_path: Path) -> None:
+    """共有ディレクトリ経由で別プロセスの値を合算し、古いゲージは除外する。"""
+    worker_a = MetricsRegistry(tmp_path)
+    worker_b = MetricsRegistry(tmp_path)
+    for registry, hits, inflight in ((worker_a, 2, 1), (worker_b, 3, 4)):
+        registry.counter("demo_hits", "Hits").inc(hits)
+        registry.gauge("demo_inflight", "In flight").set(inflight)
+        registry.histogram("demo_latency_seconds", "Latency", buckets=(1.0,)).observe(0.5)
+    path_b = worker_b.write_snapshot()
+    assert path_b is not None
+
+    text = worker_a.render()
+    assert "demo_hits_total 5.0" in text
+    assert "demo_inflight 5.0" in text
+    assert 'demo_latency_seconds_bucket{le="1.0"} 2' in text
+
+    stale = json.loads(path_b.read_text(encoding="utf-8"))
+    stale["written_at"] = 0
+    path_b.write_text(json.dumps(stale), encoding="utf-8")
+    text = worker_a.render()
+    assert "demo_hits_total 5.0" in text  # 終了したプロセスの累計は残す
+    assert "demo_inflight 1.0" in text
+
+
+def test_metrics_endpoint_records_requests_and_db_calls() -> None:
+    on_startup()
+    client = TestClient(app)
+    res = client.post(
+        "/sessions",
+        json={
+            "patient_name": "計測 太郎",
+            "dob": "1980-01-01",
+            "gender": "male",
+            "visit_type": "initial",
+            "answers": {},
+        },
+    )
+    assert res.status_code == 200
+    sid = res.json()["id"]
+    assert client.get(f"/admin/sessions/{sid}").status_code == 200
+    main_module.llm_gateway.chat("こんにちは")
+
+    metrics = client.get("/metrics")
+    assert metrics.headers["content-type"].startswith("application/openmetrics-text")
+    text = metrics.text
+    assert text.endswith("# EOF\n")
+    assert 'monshin_http_request_duration_seconds_count{method="GET",route="/admin/sessions/{session_id}",status="200"}' in text
+    assert 'monshin_db_call_duration_seconds_count{function="save_session"}' in text
+    assert 'monshin_llm_call_duration_seconds_count{provider="ollama",operation="chat",outcome="fallback"}' in text
+    assert "monshin_sessions_created_total" in text
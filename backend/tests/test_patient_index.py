@@ -0,0 +1,111 @@
+"""確定済みセッションの患者索引（/patient-summary の照合）のテスト。"""
+from __future__ import annotations
+
+from pathlib import Path
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from fastapi.testclient import TestClient
+
+from app.db.sqlite_adapter import (  # type: ignore[import]
+    delete_session,
+    find_latest_finalized_session_id,
+    get_conn,
+    import_sessions_data,
+    init_db,
+)
+from app.main import PATIENT_SUMMARY_API_HEADER, app, on_startup  # type: ignore[import]
+from app.patient_keys import canonical_dob, patient_name_key  # type: ignore[import]
+
+
+def _session(sid: str, *, name: str = "索引　花子", dob: str = "1980-04-01", finalized_at: str | None = None) -> dict:
+    return {
+        "id": sid,
+        "patient_name": name,
+        "dob": dob,
+        "gender": "female",
+        "visit_type": "followup",
+        "questionnaire_id": "default",
+        "answers": {"chief_complaint": "頭痛"},
+        "completion_status": "finalized" if finalized_at else "in_progress",
+        "started_at": (finalized_at or "2026-01-01T00:00:00+00:00"),
+        "finalized_at": finalized_at,
+    }
+
+
+def test_keys_absorb_spacing_and_dob_notation() -> None:
+    assert patient_name_key("索引　花子") == patient_name_key("索引 花子") == patient_name_key("索引花子")
+    for variant in ("1980-04-01", "1980/4/1", "１９８０年４月１日", "19800401", "昭和55年4月1日", "S55.4.1"):
+        assert canonical_dob(variant) == "1980-04-01", variant
+    assert canonical_dob(" 不明 ") == "不明"
+    assert canonical_dob("") == ""
+
+
+def test_lookup_returns_latest_finalized_and_follows_deletes(tmp_path: Path) -> None:
+    db_path = str(tmp_path / "index.sqlite3")
+    init_db(db_path)
+    import_sessions_data(
+        [
+            _session("old", dob="昭和55年4月1日", finalized_at="2026-03-01T09:00:00+00:00"),
+            _session("new", name="索引 花子", finalized_at="2026-05-01T09:00:00+00:00"),
+            _session("draft"),  # 未確定は対象外
+            _session("other", dob="1981-04-01", finalized_at="2026-06-01T09:00:00+00:00"),
+            _session("prefix", name="索引　花子子", finalized_at="2026-07-01T09:00:00+00:00"),
+        ],
+        db_path=db_path,
+    )
+
+    assert find_latest_finalized_session_id("索引花子", "1980/04/01", db_path=db_path) == "new"
+    assert delete_session("new", db_path=db_path)
+    assert find_latest_finalized_session_id("索引 花子", "S55.4.1", db_path=db_path) == "old"
+    assert find_latest_finalized_session_id("索引 花子", "1990-01-01", db_path=db_path) is None
+
+    # 再取り込みで未確定に戻ったセッションは索引から外れる
+    import_sessions_data([_session("old", dob="1980-04-01")], db_path=db_path)
+    assert find_latest_finalized_session_id("索引 花子", "1980-04-01", db_path=db_path) is None
+
+    # 索引導入前の DB は起動時に確定済みセッションから索引を作り直す
+    conn = get_conn(db_path)
+    try:
+        conn.execute("DELETE FROM patient_index")
+        conn.commit()
+    finally:
+        conn.close()
+    init_db(db_path)
+    assert find_latest_finalized_session_id("索引 花子子", "1980-04-01", db_path=db_path) == "prefix"
+    import_sessions_data([], mode="replace", db_path=db_path)
+    assert find_latest_finalized_session_id("索引 花子子", "1980-04-01", db_path=db_path) is None
+
+
+def test_patient_summary_finds_session_finalized_through_api() -> None:
+    on_startup()
+    client = TestClient(app)
+    res = client.post(
+        "/sessions",
+        json={
+            "patient_name": "照合　次郎",
+            "dob": "1975-02-03",
+            "gender": "male",
+            "visit_type": "initial",
+            "answers": {"chief_complaint": "腰痛"},
+        },
+    )
+    sid = res.json()["id"]
+    assert client.post(f"/sessions/{sid}/finalize").status_code == 200
+
+    api_key = "index-test-api-key-0001"
+    assert client.put("/system/patient-summary-api-key", json={"api_key": api_key}).status_code == 200
+    try:
+        headers = {PATIENT_SUMMARY_API_HEADER: api_key}
+        found = client.post(
+            "/patient-summary", json={"patient_name": "照合次郎", "dob": "昭和50年2月3日"}, headers=headers
+        )
+        assert found.status_code == 200
+        assert found.json()["session_id"] == sid
+        missing = client.post(
+            "/patient-summary", json={"patient_name": "照合次郎", "dob": "1975-02-04"}, headers=headers
+        )
+        assert missing.status_code == 404
+    finally:
+        client.put("/system/patient-summary-api-key", json={"api_key": None})
@@ -0,0 +1,72 @@
+"""PDF 描画プロセスプールのテスト。"""
+from __future__ import annotations
+
+from pathlib import Path
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app.pdf_render_pool import PDFRenderPool, build_render_job  # type: ignore[import]
+from app.pdf_renderer import PDFLayoutMode  # type: ignore[import]
+
+
+def _job(index: int) -> dict:
+    session = {
+        "id": f"s{index}",
+        "patient_name": f"患者{index}",
+        "dob": "1990-01-01",
+        "answers": {"q1": f"回答{index}"},
+        "summary": None,
+    }
+    return build_render_job(
+        session=session,
+        rows=[("主訴", f"回答{index}")],
+        template_items=[{"id": "q1", "label": "主訴", "type": "string"}],
+        vt_label="初診",
+        layout_mode=PDFLayoutMode.LEGACY,
+        facility_name="テスト医院" + "X" * (index * 40),
+    )
+
+
+def test_render_many_keeps_input_order() -> None:
+    """並列描画でも入力順に結果が返る。"""
+    pool = PDFRenderPool(max_workers=2, reserved_workers=1)
+    inline = PDFRenderPool(max_workers=0)
+    try:
+        jobs = [_job(i) for i in range(4)]
+        results = list(pool.render_many(jobs))
+        expected = list(inline.render_many(jobs))
+        assert len(results) == 4
+        assert all(r.startswith(b"%PDF") for r in results)
+        # 施設名の長さを変えているため、サイズが入力順に増えていれば順序どおり
+        assert [len(r) for r in results] == [len(r) for r in expected]
+        assert [len(r) for r in results] == sorted(len(r) for r in results)
+        assert len({len(r) for r in results}) == 4
+        assert pool.render(_job(9)).startswith(b"%PDF")
+        assert pool.bulk_slots == 1
+    finally:
+        pool.shutdown()
+
+
+def test_render_context_is_shared_and_escapes_header() -> None:
+    """描画コンテキストはプロセス内で共有され、独自に渡しても同じ出力になる。"""
+    from reportlab import rl_config
+
+    from app.pdf_renderer import PDFRenderContext, get_render_context, render_session_pdf  # type: ignore[import]
+
+    ctx = get_render_context()
+    assert ctx is get_render_context()
+    assert ctx.facility_markup("A&B<医院>") == "A&amp;B&lt;医院&gt;"
+    assert ctx.facility_markup("A&B", bold=True) == "<b>A&amp;B</b>"
+    assert ctx.label_style(2) is ctx.label_style(2)
+
+    job = _job(1)
+    job["layout_mode"] = PDFLayoutMode.STRUCTURED
+    previous = rl_config.invariant
+    rl_config.invariant = 1
+    try:
+        shared = render_session_pdf(**job)
+        fresh = render_session_pdf(**job, context=PDFRenderContext.build())
+    finally:
+        rl_config.invariant = previous
+    assert shared == fresh
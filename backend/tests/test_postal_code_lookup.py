@@ -3,17 +3,22 @@ from __future__ import annotations
 
 from io import BytesIO
 from pathlib import Path
+import os
+import sqlite3
 import sys
+import time
 
 import pytest
 
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
+import app.postal_code_lookup as postal_module  # type: ignore[import]
 from app.postal_code_lookup import (  # type: ignore[import]
     PostalCodeImportError,
     get_postal_dictionary_info,
     import_postal_csv,
     lookup_postal_code,
+    search_postal_codes,
 )
 
 
@@ -63,3 +68,155 @@ def test_lookup_invalid_postal_code_does_not_fail(tmp_path: Path) -> None:
 def test_import_empty_csv_is_rejected(tmp_path: Path) -> None:
     with pytest.raises(PostalCodeImportError):
         import_postal_csv(BytesIO(b""), "empty.csv", db_path=tmp_path / "postal_codes.sqlite3")
+
+
+def test_index_is_hot_swapped_on_import(tmp_path: Path, monkeypatch) -> None:
+    """辞書を再インポートすると、読み込み済みの索引が新しいものに差し替わる。"""
+    db_path = tmp_path / "postal_codes.sqlite3"
+    import_postal_csv(BytesIO(SAMPLE_CSV.encode("utf-8")), "sample.csv", db_path=db_path)
+    before = postal_module.get_postal_index(db_path)
+    assert postal_module.get_postal_index(db_path) is before
+
+    updated = SAMPLE_CSV.replace("千代田\",0", "丸の内\",0")
+    import_postal_csv(BytesIO(updated.encode("utf-8")), "updated.csv", db_path=db_path)
+    after = postal_module.get_postal_index(db_path)
+    assert after is not before
+    assert lookup_postal_code("1000001", db_path=db_path)["address"] == "東京都千代田区丸の内"
+    assert get_postal_dictionary_info(db_path=db_path)["source_filename"] == "updated.csv"
+
+    # 別プロセスによる更新は DB ファイルの更新日時で検知する
+    monkeypatch.setattr(postal_module, "INDEX_RELOAD_CHECK_INTERVAL", 0.0)
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            "INSERT INTO postal_codes (postal_code, prefecture, city, town, address)"
+            " VALUES ('1000002', '東京都', '千代田区', '皇居外苑', '東京都千代田区皇居外苑')"
+        )
+    os.utime(db_path, ns=(time.time_ns(), time.time_ns() + 1_000_000))
+    assert lookup_postal_code("100-0002", db_path=db_path)["found"] is True
+
+
+def test_streaming_import_shift_jis_multiline(tmp_path: Path, monkeypatch) -> None:
+    """Shift_JIS の KEN_ALL（町域名が複数行に分割された行を含む）を分割読込で取り込める。"""
+    db_path = tmp_path / "postal_codes.sqlite3"
+    import_postal_csv(BytesIO(SAMPLE_CSV.encode("utf-8")), "sample.csv", db_path=db_path)
+
+    ken_all = "\r\n".join(
+        [
+            '01101,"060  ","0600042","ﾎｯｶｲﾄﾞｳ","ｻｯﾎﾟﾛｼﾁｭｳｵｳｸ","ｵｵﾄﾞｵﾘﾆｼ(1-19ﾁｮｳﾒ)","北海道","札幌市中央区","大通西（１〜１９丁目）",1,0,1,0,0,0',
+            '01224,"06613","0661371","ﾎｯｶｲﾄﾞｳ","ﾁﾄｾｼ","ﾗﾝｺｼ(ｿﾉﾀ)","北海道","千歳市","蘭越（その他、５７８番地、",1,1,0,0,0,0',
+            '01224,"06613","0661371","ﾎｯｶｲﾄﾞｳ","ﾁﾄｾｼ","ﾗﾝｺｼ(ｿﾉﾀ)","北海道","千歳市","６０４番地）",1,1,0,0,0,0',
+        ]
+    ) + "\r\n"
+    monkeypatch.setattr(postal_module, "IMPORT_BATCH_SIZE", 1)
+    monkeypatch.setattr(postal_module, "IMPORT_READ_CHUNK", 7)  # 多バイト文字の途中で区切られる
+
+    seen_during_import: list[int] = []
+
+    class _Upload(BytesIO):
+        def read(self, size: int = -1) -> bytes:
+            # 取り込み中も稼働中のテーブルは読める
+            with sqlite3.connect(db_path, timeout=0.1) as conn:
+                seen_during_import.append(conn.execute("SELECT COUNT(*) FROM postal_codes").fetchone()[0])
+            return super().read(size)
+
+    info = import_postal_csv(_Upload(ken_all.encode("cp932")), "KEN_ALL.CSV", db_path=db_path)
+    assert info["row_count"] == 2
+    assert set(seen_during_import) == {2}
+
+    merged = lookup_postal_code("066-1371", db_path=db_path)
+    assert merged["candidates"] == [
+        {
+            "postal_code": "0661371",
+            "prefecture": "北海道",
+            "city": "千歳市",
+            "town": "蘭越（その他、５７８番地、６０４番地）",
+            "address": "北海道千歳市蘭越（その他、５７８番地、６０４番地）",
+        }
+    ]
+    assert lookup_postal_code("0600042", db_path=db_path)["found"] is True
+    assert lookup_postal_code("1000001", db_path=db_path)["found"] is False
+    with sqlite3.connect(db_path) as conn:
+        tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+        indexes = conn.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type='index' AND tbl_name='postal_codes'"
+        ).fetchone()[0]
+    assert "postal_codes_staging" not in tables
+    assert indexes == 1
+
+
+def test_failed_import_keeps_live_dictionary(tmp_path: Path) -> None:
+    db_path = tmp_path / "postal_codes.sqlite3"
+    import_postal_csv(BytesIO(SAMPLE_CSV.encode("utf-8")), "sample.csv", db_path=db_path)
+    with pytest.raises(PostalCodeImportError):
+        import_postal_csv(BytesIO(b"not,a,postal,csv\n"), "broken.csv", db_path=db_path)
+    assert lookup_postal_code("1000001", db_path=db_path)["found"] is True
+    assert get_postal_dictionary_info(db_path=db_path)["source_filename"] == "sample.csv"
+
+
+def test_search_by_code_prefix_and_address(tmp_path: Path) -> None:
+    """郵便番号の前方一致と、住所・読み（かな・半角カナ）の部分一致で候補を返す。"""
+    db_path = tmp_path / "postal_codes.sqlite3"
+    import_postal_csv(BytesIO(SAMPLE_CSV.encode("utf-8")), "sample.csv", db_path=db_path)
+
+    result = search_postal_codes("１００-", db_path=db_path)
+    assert result["mode"] == "code_prefix"
+    assert [c["postal_code"] for c in result["candidates"]] == ["1000001"]
+    assert search_postal_codes("10", db_path=db_path)["candidates"] == []  # 桁数が少なすぎる
+
+    for query in ["千代田", "東京都千代田区", "ちよだ", "ﾁﾖﾀﾞ", "トウキョウ"]:
+        result = search_postal_codes(query, db_path=db_path)
+        assert result["mode"] == "address"
+        assert [c["postal_code"] for c in result["candidates"]] == ["1000001"], query
+    # 「以下に掲載がない場合」は検索対象にしない
+    assert search_postal_codes("掲載", db_path=db_path)["candidates"] == []
+    assert search_postal_codes("けいさい", db_path=db_path)["candidates"] == []
+    assert [c["postal_code"] for c in search_postal_codes("札", db_path=db_path)["candidates"]] == ["0600000"]
+
+    truncated = search_postal_codes("都", limit=1, db_path=db_path)
+    assert len(truncated["candidates"]) == 1 and truncated["truncated"] is False
+
+
+def test_search_latency_on_large_dictionary(tmp_path: Path) -> None:
+    """12 万行規模の辞書でも入力補完検索の p99 が 5ms を下回る。"""
+    words = [("本町", "ホンマチ"), ("桜", "サクラ"), ("緑ケ丘", "ミドリガオカ"), ("若葉", "ワカバ"), ("港", "ミナト")]
+    lines = []
+    for i in range(120_000):
+        word, kana = words[i % len(words)]
+        lines.append(
+            f'"00000","000  ","{(i * 83) % 10_000_000:07d}","トウキョウト","ミナトク","{kana}{i % 97}",'
+            f'"東京都","第{i % 300}区","{word}{i % 97}",0,0,0,0,0,0'
+        )
+    db_path = tmp_path / "postal_codes.sqlite3"
+    import_postal_csv(BytesIO("\n".join(lines).encode("utf-8")), "large.csv", db_path=db_path)
+
+    queries = ["100", "4567", "98765", "本町", "緑ケ丘4", "みなと", "さくら12", "第12区若葉", "存在しない", "港"] * 50
+    durations = []
+    for query in queries:
+        started = time.perf_counter()
+        result = search_postal_codes(query, db_path=db_path)
+        durations.append(time.perf_counter() - started)
+        assert len(result["candidates"]) <= 20
+    durations.sort()
+    assert durations[int(len(durations) * 0.99)] < 0.005
+
+
+def test_search_endpoint(tmp_path: Path, monkeypatch) -> None:
+    """/postal-code/search が郵便番号検索（/postal-code/{postal_code}）より優先される。"""
+    from fastapi.testclient import TestClient
+
+    import app.main as main_module  # type: ignore[import]
+
+    db_path = tmp_path / "postal_codes.sqlite3"
+    import_postal_csv(BytesIO(SAMPLE_CSV.encode("utf-8")), "sample.csv", db_path=db_path)
+    monkeypatch.setattr(
+        main_module,
+        "search_postal_codes",
+        lambda q, limit: search_postal_codes(q, limit, db_path=db_path),
+    )
+    client = TestClient(main_module.app)
+    res = client.get("/postal-code/search", params={"q": "ちよだ", "limit": 5})
+    assert res.status_code == 200
+    body = res.json()
+    assert body["mode"] == "address"
+    assert body["candidates"][0]["address"] == "東京都千代田区千代田"
+    assert client.get("/postal-code/search", params={"q": "x", "limit": 0}).status_code == 422
@@ -0,0 +1,120 @@
+"""リクエスト単位のサンプリングプロファイラのテスト。"""
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from pathlib import Path
+import json
+import sys
+import time
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from fastapi.testclient import TestClient
+from starlette.middleware.base import BaseHTTPMiddleware
+
+import app.main as main_module  # type: ignore[import]
+from app.main import app, on_startup  # type: ignore[import]
+from app.profiling import ProfileCapture, SamplingProfiler, render_collapsed  # type: ignore[import]
+
+
+def _busy_list_sessions(**_: object) -> list:
+    deadline = time.perf_counter() + 0.08
+    while time.perf_counter() < deadline:
+        pass
+    return []
+
+
+def test_disabled_profiler_skips_requests(monkeypatch, tmp_path: Path) -> None:
+    profiler = SamplingProfiler(tmp_path, sample_rate=0, paths=(), header="")
+    monkeypatch.setattr(main_module, "PROFILER", profiler)
+    assert not profiler.enabled
+    client = TestClient(app)
+    assert client.get("/admin/sessions", headers={"X-Monshin-Profile": "1"}).status_code == 200
+    assert list(tmp_path.iterdir()) == []
+    # 無効時は計測用ミドルウェア自体を登録しない
+    assert all(getattr(m.kwargs.get("dispatch"), "__name__", "") != "profile_middleware" for m in app.user_middleware)
+
+
+def test_header_triggered_profile_is_listed_and_downloadable(monkeypatch, tmp_path: Path) -> None:
+    on_startup()
+    profiler = SamplingProfiler(tmp_path, header="X-Monshin-Profile", interval_ms=2)
+    monkeypatch.setattr(main_module, "PROFILER", profiler)
+    monkeypatch.setattr(main_module, "db_list_sessions", _busy_list_sessions)
+    # 計測用ミドルウェアは起動時に有効な場合だけ登録されるため、ここでは明示的に被せる
+    client = TestClient(BaseHTTPMiddleware(app, dispatch=main_module.profile_middleware))
+
+    assert client.get("/admin/sessions").status_code == 200
+    assert profiler.list_profiles() == []  # ヘッダーなしは計測しない
+    assert client.get("/admin/sessions", headers={"X-Monshin-Profile": "1"}).status_code == 200
+
+    listing = client.get("/admin/profiles").json()
+    assert listing["enabled"] is True
+    entry = listing["profiles"][0]
+    assert entry["method"] == "GET"
+    assert entry["path_slug"] == "admin-sessions"
+    assert entry["format"] == "speedscope"
+
+    res = client.get(f"/admin/profiles/{entry['name']}")
+    assert res.status_code == 200
+    assert res.headers["content-disposition"] == f"attachment; filename={entry['name']}"
+    profile = res.json()
+    frames = [f["name"] for f in profile["shared"]["frames"]]
+    assert "_busy_list_sessions" in frames
+    assert profile["profiles"][0]["type"] == "sampled"
+    assert profile["profiles"][0]["name"].startswith("GET /admin/sessions -> 200")
+
+    assert client.get("/admin/profiles/..%2Fapp.sqlite3").status_code == 404
+    assert client.get("/admin/profiles/unknown.speedscope.json").status_code == 404
+
+
+def test_rotation_and_collapsed_output(tmp_path: Path) -> None:
+    profiler = SamplingProfiler(tmp_path, sample_rate=1.0, max_files=2, fmt="collapsed")
+    stack = (("", "MainThread", 0), ("/srv/backend/app/main.py", "handler", 10), ("/srv/backend/app/db.py", "query;all", 5))
+    for second in range(3):
+        capture = ProfileCapture(
+            method="GET",
+            path="/admin/sessions",
+            started_at=datetime(2026, 10, 19, 9, 0, second, tzinfo=timezone.utc),
+            started=0.0,
+        )
+        capture.stacks[stack] += 3
+        profiler.save(capture)
+
+    names = [p["name"] for p in profiler.list_profiles()]
+    assert len(names) == 2
+    assert names[0].startswith("20261019T090002000Z_GET_admin-sessions_")
+    assert names[1].startswith("20261019T090001000Z_")
+    assert render_collapsed(capture) == "MainThread;handler (app/main.py:10);query:all (app/db.py:5) 3\n"
+    # サンプルの無いリクエストは保存しない
+    empty = ProfileCapture(method="GET", path="/", started_at=datetime.now(timezone.utc), started=0.0)
+    assert profiler.save(empty) is None
+
+
+def test_streaming_body_is_profiled_until_sent(monkeypatch, tmp_path: Path) -> None:
+    """ストリーミング応答は本文の生成中も計測し、保存は送信後に行う。"""
+    from fastapi import FastAPI
+    from fastapi.responses import StreamingResponse
+
+    profiler = SamplingProfiler(tmp_path, paths=("/export",), interval_ms=2)
+    monkeypatch.setattr(main_module, "PROFILER", profiler)
+    stream_app = FastAPI()
+    stream_app.middleware("http")(main_module.profile_middleware)
+
+    def _busy_export_rows():
+        for _ in range(3):
+            deadline = time.perf_counter() + 0.03
+            while time.perf_counter() < deadline:
+                pass
+            yield b"row\n"
+
+    @stream_app.get("/export")
+    def export() -> StreamingResponse:
+        return StreamingResponse(_busy_export_rows(), media_type="text/csv")
+
+    res = TestClient(stream_app).get("/export")
+    assert res.status_code == 200 and res.text == "row\n" * 3
+    entry = profiler.list_profiles()[0]
+    profile = json.loads(profiler.resolve(entry["name"]).read_text(encoding="utf-8"))
+    frames = [f["name"] for f in profile["shared"]["frames"]]
+    assert "_busy_export_rows" in frames
+    assert profile["profiles"][0]["name"].startswith("GET /export -> 200")
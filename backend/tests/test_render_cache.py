@@ -0,0 +1,173 @@
+"""描画結果キャッシュのテスト。"""
+from __future__ import annotations
+
+from pathlib import Path
+import sqlite3
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from fastapi.testclient import TestClient
+
+import app.main as main_module  # type: ignore[import]
+from app.main import app, on_startup  # type: ignore[import]
+from app.render_cache import RenderedDocumentCache, build_render_key  # type: ignore[import]
+
+
+def _key(**overrides) -> str:
+    params = {
+        "kind": "pdf",
+        "session": {"id": "s1", "answers": {"q1": "頭痛"}, "summary": None},
+        "template": [{"id": "q1", "label": "主訴"}],
+        "layout_mode": "structured",
+        "facility_name": "テスト医院",
+        "logo_url": None,
+    }
+    params.update(overrides)
+    return build_render_key(**params)
+
+
+def test_key_changes_with_render_inputs() -> None:
+    """セッション内容・レイアウト・施設名のいずれかが変わればキーが変わる。"""
+    base = _key()
+    assert base == _key()
+    assert base != _key(session={"id": "s1", "answers": {"q1": "頭痛"}, "summary": "要約"})
+    assert base != _key(layout_mode="legacy")
+    assert base != _key(facility_name="別医院")
+    assert base != _key(logo_url="/system-logo/files/a.png")
+    assert base != _key(template=[{"id": "q1", "label": "主訴（変更）"}])
+
+
+def test_roundtrip_eviction_and_purge(tmp_path: Path) -> None:
+    cache = RenderedDocumentCache(tmp_path / "render.sqlite3", max_bytes=600)
+    cache.put("a", b"%PDF-secret" * 10, kind="pdf", session_id="s1")
+    assert cache.get("a") == b"%PDF-secret" * 10
+    with sqlite3.connect(cache.db_path) as conn:
+        payload = conn.execute("SELECT payload FROM rendered_document_cache").fetchone()[0]
+    assert b"secret" not in bytes(payload)
+
+    cache.put("b", b"x" * 200, kind="pdf", session_id="s2")
+    cache.put("c", b"y" * 200, kind="pdf", session_id="s3")
+    assert cache.get("a") is None  # 最終参照が古いものから追い出される
+    assert cache.stats()["evictions"] >= 1
+    assert cache.purge_sessions(["s3"]) == 1
+    assert cache.get("c") is None
+
+
+def test_download_uses_cache_and_etag(tmp_path: Path, monkeypatch) -> None:
+    """2回目は描画をスキップし、If-None-Match 一致時は 304 を返す。"""
+    on_startup()
+    cache = RenderedDocumentCache(tmp_path / "render.sqlite3")
+    monkeypatch.setattr(main_module, "rendered_document_cache", cache)
+    monkeypatch.setattr(main_module, "PDF_PRERENDER_ENABLED", False)
+    client = TestClient(app)
+    res = client.post(
+        "/sessions",
+        json={
+            "patient_name": "キャッシュ 太郎",
+            "dob": "1980-01-01",
+            "gender": "male",
+            "visit_type": "initial",
+            "answers": {"chief_complaint": "咳"},
+        },
+    )
+    sid = res.json()["id"]
+    assert client.post(f"/sessions/{sid}/finalize").status_code == 200
+
+    renders: list[int] = []
+    original_render = main_module.pdf_render_pool.render
+
+    def counting_render(job):
+        renders.append(1)
+        return original_render(job)
+
+    monkeypatch.setattr(main_module.pdf_render_pool, "render", counting_render)
+    first = client.get(f"/admin/sessions/{sid}/download/pdf")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    second = client.get(f"/admin/sessions/{sid}/download/pdf")
+    assert second.content == first.content
+    assert second.headers["etag"] == etag
+    assert len(renders) == 1
+
+    not_modified = client.get(
+        f"/admin/sessions/{sid}/download/pdf", headers={"If-None-Match": etag}
+    )
+    assert not_modified.status_code == 304
+
+    md = client.get(f"/admin/sessions/{sid}/download/md")
+    assert md.status_code == 200
+    assert md.headers["etag"] != etag
+    assert "咳" in md.text
+
+
+def test_finalize_prerenders_pdf(tmp_path: Path, monkeypatch) -> None:
+    """確定時に事前描画され、ダウンロード時は描画しない。"""
+    on_startup()
+    cache = RenderedDocumentCache(tmp_path / "render.sqlite3")
+    monkeypatch.setattr(main_module, "rendered_document_cache", cache)
+    monkeypatch.setattr(main_module, "PDF_PRERENDER_ENABLED", True)
+    client = TestClient(app)
+    res = client.post(
+        "/sessions",
+        json={
+            "patient_name": "事前 花子",
+            "dob": "1975-05-05",
+            "gender": "female",
+            "visit_type": "initial",
+            "answers": {"chief_complaint": "発熱"},
+        },
+    )
+    sid = res.json()["id"]
+    assert client.post(f"/sessions/{sid}/finalize").status_code == 200
+    assert cache.stats()["stores"] == 1
+    # 同じ入力では再描画しない
+    assert main_module.prerender_session_pdf(sid) is False
+
+    def fail_render(job):
+        raise AssertionError("should be served from the pre-rendered cache")
+
+    monkeypatch.setattr(main_module.pdf_render_pool, "render", fail_render)
+    pdf = client.get(f"/admin/sessions/{sid}/download/pdf")
+    assert pdf.status_code == 200
+    assert pdf.content.startswith(b"%PDF")
+
+
+def test_finalize_with_llm_summary_renders_once_after_summary(tmp_path: Path, monkeypatch) -> None:
+    """LLM 要約を生成する場合は先行描画せず、要約の差し替え後に1回だけ描画する。"""
+    on_startup()
+    cache = RenderedDocumentCache(tmp_path / "render.sqlite3")
+    monkeypatch.setattr(main_module, "rendered_document_cache", cache)
+    monkeypatch.setattr(main_module, "PDF_PRERENDER_ENABLED", True)
+    monkeypatch.setattr(main_module, "get_summary_config", lambda *args: {"enabled": True})
+    monkeypatch.setattr(main_module.llm_gateway, "has_remote_backend", lambda: True)
+    monkeypatch.setattr(main_module.llm_gateway.settings, "enabled", True)
+    steps: list[str] = []
+
+    async def fake_summary(*args, **kwargs) -> str:
+        steps.append("summary")
+        return "LLM要約"
+
+    original_render = main_module.pdf_render_pool.render
+
+    def counting_render(job):
+        steps.append("render")
+        return original_render(job)
+
+    monkeypatch.setattr(main_module.llm_gateway, "asummarize_with_prompt", fake_summary)
+    monkeypatch.setattr(main_module.pdf_render_pool, "render", counting_render)
+    client = TestClient(app)
+    res = client.post(
+        "/sessions",
+        json={
+            "patient_name": "順序 次郎",
+            "dob": "1970-07-07",
+            "gender": "male",
+            "visit_type": "initial",
+            "answers": {"chief_complaint": "めまい"},
+        },
+    )
+    sid = res.json()["id"]
+    assert client.post(f"/sessions/{sid}/finalize").status_code == 200
+    assert steps == ["summary", "render"]
+    assert main_module.sessions[sid].summary == "LLM要約"
@@ -0,0 +1,75 @@
+"""テンプレート行計画（SessionRowPlan）のテスト。"""
+from __future__ import annotations
+
+from pathlib import Path
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import app.main as main_module  # type: ignore[import]
+from app.main import build_session_rows_and_items, get_row_plan  # type: ignore[import]
+
+
+TEMPLATE = {
+    "items": [
+        {"id": "q1", "label": "主訴", "type": "string"},
+        {"id": "q2", "label": "喫煙", "type": "yesno"},
+        {"id": "q3", "label": "既往歴", "type": "multi", "options": ["高血圧", "糖尿病"]},
+    ]
+}
+
+
+def test_plan_is_shared_per_template_content() -> None:
+    """同じ内容のテンプレートでは計画を使い回し、項目が変われば作り直す。"""
+    plan = get_row_plan(TEMPLATE, "initial")
+    assert get_row_plan({"items": [dict(it) for it in TEMPLATE["items"]]}, "initial") is plan
+    assert [step[:2] for step in plan.steps] == [("q1", "主訴"), ("q2", "喫煙"), ("q3", "既往歴")]
+
+    changed = {"items": [*TEMPLATE["items"][:2], {"id": "q3", "label": "既往症", "type": "multi"}]}
+    assert get_row_plan(changed, "initial") is not plan
+    assert get_row_plan({}, "initial") is get_row_plan(None, "initial")
+
+
+def test_plan_apply_rows() -> None:
+    """テンプレート順の行に続き、追加質問・テンプレート外の回答を出力する。"""
+    session = {
+        "visit_type": "initial",
+        "answers": {
+            "q1": "頭痛",
+            "q2": "no",
+            "q3": ["高血圧", "その他"],
+            "llm_1": "yes",
+            "zz_extra": "メモ",
+            "personalInfo": {"name": "問診 太郎"},
+        },
+        "question_texts": {"q1": "本日の主訴"},
+        "llm_question_texts": {"llm_1": "発熱はありますか"},
+    }
+    rows, vt_label, items = build_session_rows_and_items(session, TEMPLATE)
+    assert vt_label == "初診"
+    assert [it.id for it in items] == ["q1", "q2", "q3"]
+    assert rows[:4] == [
+        ("本日の主訴", "頭痛"),
+        ("喫煙", "いいえ"),
+        ("既往歴", "高血圧, その他"),
+        ("発熱はありますか", "はい"),
+    ]
+    assert rows[4][0] == "患者基本情報"
+    assert "問診 太郎" in rows[4][1]
+    assert rows[5] == ("zz_extra", "メモ")
+
+
+def test_bulk_paths_reuse_plan(monkeypatch) -> None:
+    """一括出力ではテンプレートの読み込みと計画の作成を1度だけ行う。"""
+    fetched: list[tuple] = []
+
+    def fake_get_template(qid, vt):
+        fetched.append((qid, vt))
+        return TEMPLATE
+
+    monkeypatch.setattr(main_module, "db_get_template", fake_get_template)
+    memo: dict = {}
+    first = main_module._memoized_row_plan(memo, "tpl", "initial")
+    second = main_module._memoized_row_plan(memo, "tpl", "initial")
+    assert first is second
+    assert fetched == [("tpl", "initial")]
@@ -0,0 +1,92 @@
+"""SessionEventBroker の上限付きキューと滞留購読者の扱いのテスト。"""
+from __future__ import annotations
+
+from pathlib import Path
+import asyncio
+import sys
+import time
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import pytest
+
+from app.notifications import SessionEventBroker, TooManySubscribers  # type: ignore[import]
+
+
+async def _collect(broker: SessionEventBroker, count: int) -> list[bytes]:
+    messages: list[bytes] = []
+    stream = broker.stream()
+    async for message in stream:
+        messages.append(message)
+        if len(messages) >= count:
+            break
+    await stream.aclose()
+    return messages
+
+
+def test_load_500_subscribers_at_10_events_per_second(monkeypatch) -> None:
+    """500 購読者へ毎秒10件配信しても、停止した購読者が配信を妨げない。"""
+    subscribers, events, rate = 500, 20, 10.0
+    broker = SessionEventBroker(max_queue=5, max_subscribers=subscribers + 10)
+    serialized: list[int] = []
+    original_serialize = broker.serialize
+
+    def counting_serialize(*args, **kwargs):
+        serialized.append(1)
+        return original_serialize(*args, **kwargs)
+
+    monkeypatch.setattr(broker, "serialize", counting_serialize)
+
+    async def scenario() -> tuple[list[list[bytes]], list[float], dict]:
+        collectors = [asyncio.create_task(_collect(broker, events)) for _ in range(subscribers)]
+        # 受信しない（応答しないブラウザタブ相当の）購読者
+        stalled = [broker.subscribe() for _ in range(3)]
+        await asyncio.sleep(0.05)
+        assert broker.stats()["subscribers"] == subscribers + len(stalled)
+        publish_ms: list[float] = []
+        started = time.perf_counter()
+        for i in range(events):
+            t0 = time.perf_counter()
+            await broker.publish({"id": f"s{i}"}, event_id=str(i))
+            publish_ms.append((time.perf_counter() - t0) * 1000)
+            await asyncio.sleep(max(0.0, started + (i + 1) / rate - time.perf_counter()))
+        results = await asyncio.wait_for(asyncio.gather(*collectors), timeout=10)
+        return results, publish_ms, broker.stats()
+
+    results, publish_ms, stats = asyncio.run(scenario())
+    assert all(len(r) == events for r in results)
+    assert results[0][-1].startswith(f"id: {events - 1}\n".encode())
+    # 1イベントにつきシリアライズは1回
+    assert len(serialized) == events
+    # 配信は購読者の受信を待たない
+    assert max(publish_ms) < 250
+    assert stats["subscribers"] == 3
+    assert stats["max_pending"] == 5
+    assert stats["dropped"] == 3 * (events - 5)
+    assert stats["max_lag_seconds"] > 0
+
+
+def test_disconnect_policy_and_subscriber_limit() -> None:
+    """disconnect 方式では溢れた購読者を切断し、上限超過の購読は拒否する。"""
+    broker = SessionEventBroker(max_queue=2, max_subscribers=2, overflow_policy="disconnect")
+
+    async def scenario() -> list[bytes]:
+        slow = broker.subscribe()
+        broker.subscribe()
+        with pytest.raises(TooManySubscribers):
+            broker.subscribe()
+        for i in range(3):
+            await broker.publish({"id": i}, event_id=str(i))
+        received = [m async for m in broker.stream(slow)]
+        return received
+
+    assert asyncio.run(scenario()) == []  # 切断された購読者のストリームは即座に終了する
+    stats = broker.stats()
+    assert stats["disconnected"] == 2
+    assert stats["rejected"] == 1
+    assert stats["subscribers"] == 0
+
+
+def test_serialized_messages_are_delimited() -> None:
+    message = SessionEventBroker().serialize({"id": "s1"}, event_id="7")
+    assert message.decode("utf-8") == 'id: 7\nevent: session.finalized\ndata: {"id": "s1"}\n\n'
@@ -0,0 +1,189 @@
+"""管理画面イベントログ（SSE 再送）のテスト。"""
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+import asyncio
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from fastapi.testclient import TestClient
+
+import app.main as main_module  # type: ignore[import]
+from app.db.sqlite_adapter import (  # type: ignore[import]
+    append_session_event,
+    init_db,
+    list_session_events,
+    prune_session_events,
+)
+from app.main import app, on_startup  # type: ignore[import]
+from app.notifications import EventLogRelay, SessionEventBroker  # type: ignore[import]
+
+
+def test_event_log_replay_and_prune(tmp_path: Path) -> None:
+    """ID は単調増加し、ID・発生時刻での範囲取得と保持期間での削除ができる。"""
+    db_path = str(tmp_path / "events.sqlite3")
+    init_db(db_path)
+    base = datetime(2026, 1, 1, 9, 0, tzinfo=UTC)
+    ids = [
+        append_session_event(
+            "session.finalized",
+            {"id": f"s{i}", "finalized_at": (base + timedelta(minutes=i)).isoformat()},
+            session_id=f"s{i}",
+            occurred_at=base + timedelta(minutes=i),
+            db_path=db_path,
+        )
+        for i in range(5)
+    ]
+    assert ids == sorted(ids) and len(set(ids)) == 5
+
+    replay = list_session_events(after_id=ids[1], db_path=db_path)
+    assert [row["payload"]["id"] for row in replay] == ["s2", "s3", "s4"]
+    # 上限を超える場合は新しいものを残す
+    latest = list_session_events(after_id=0, limit=2, db_path=db_path)
+    assert [row["id"] for row in latest] == ids[-2:]
+    # 旧形式の ISO 文字列（naive は UTC とみなす）
+    by_time = list_session_events(since=datetime(2026, 1, 1, 9, 2), db_path=db_path)
+    assert [row["session_id"] for row in by_time] == ["s3", "s4"]
+
+    assert prune_session_events(datetime.now(UTC) + timedelta(seconds=1), db_path=db_path) == 5
+    assert list_session_events(after_id=0, db_path=db_path) == []
+    # 削除後も ID は再利用しない
+    next_id = append_session_event("session.finalized", {}, db_path=db_path)
+    assert next_id > ids[-1]
+
+
+def test_finalize_records_event_for_replay(monkeypatch) -> None:
+    """確定イベントがログに残り、Last-Event-ID 以降のみ再送される。"""
+    on_startup()
+    monkeypatch.setattr(main_module, "PDF_PRERENDER_ENABLED", False)
+    published: list[str | None] = []
+
+    async def fake_publish(event, *, event_id=None, event_name="session.finalized"):
+        published.append(event_id)
+
+    monkeypatch.setattr(main_module.session_events, "publish", fake_publish)
+    client = TestClient(app)
+    sids = []
+    for name in ("イベント 一郎", "イベント 二郎"):
+        res = client.post(
+            "/sessions",
+            json={
+                "patient_name": name,
+                "dob": "1990-01-01",
+                "gender": "male",
+                "visit_type": "initial",
+                "answers": {"chief_complaint": "咳"},
+            },
+        )
+        sid = res.json()["id"]
+        assert client.post(f"/sessions/{sid}/finalize").status_code == 200
+        sids.append(sid)
+
+    first_id, second_id = published[-2:]
+    assert first_id and first_id.isdigit() and int(second_id) > int(first_id)
+
+    backlog = main_module._session_event_backlog(int(first_id), None, 200)
+    assert len(backlog) == 1
+    message = backlog[0].decode("utf-8")
+    assert f"id: {second_id}" in message
+    assert "event: session.finalized" in message
+    assert sids[1] in message
+
+    legacy = main_module._session_event_backlog(None, datetime(2000, 1, 1, tzinfo=UTC), 500)
+    assert any(sids[0] in m.decode("utf-8") for m in legacy)
+
+    res = client.get("/admin/sessions/stream", headers={"Last-Event-ID": "not-a-date"})
+    assert res.status_code == 400
+
+
+def test_relay_fans_out_across_processes(tmp_path: Path) -> None:
+    """別プロセスで記録されたイベントも、各プロセスの中継が購読者へ届ける。"""
+    db_path = str(tmp_path / "events.sqlite3")
+    init_db(db_path)
+    append_session_event("session.finalized", {"id": "old"}, db_path=db_path)
+
+    def fetch_after(cursor: int, limit: int):
+        return list_session_events(after_id=cursor, limit=limit, oldest_first=True, db_path=db_path)
+
+    def latest_id() -> int:
+        rows = list_session_events(limit=1, db_path=db_path)
+        return rows[-1]["id"] if rows else 0
+
+    async def collect(broker: SessionEventBroker, count: int) -> list[bytes]:
+        messages: list[bytes] = []
+        stream = broker.stream()
+        async for message in stream:
+            messages.append(message)
+            if len(messages) == count:
+                break
+        await stream.aclose()
+        return messages
+
+    async def scenario() -> list[list[bytes]]:
+        # 2つのワーカープロセスに相当するブローカーと中継
+        workers = [SessionEventBroker() for _ in range(2)]
+        relays = [EventLogRelay(b, fetch_after, latest_id, batch_size=2) for b in workers]
+        for relay in relays:
+            await relay.prime()
+        collectors = [asyncio.create_task(collect(b, 3)) for b in workers]
+        await asyncio.sleep(0.01)  # 購読の開始を待つ
+        # 別プロセス（要約を生成するワーカーなど）が記録したイベント
+        append_session_event("session.finalized", {"id": "s1"}, db_path=db_path)
+        append_session_event("session.summary_ready", {"id": "s1"}, db_path=db_path)
+        append_session_event("session.finalized", {"id": "s2"}, db_path=db_path)
+        for relay in relays:
+            assert await relay.poll_once() == 2  # batch_size ずつ読み進める
+            assert await relay.poll_once() == 1
+            assert await relay.poll_once() == 0
+        return await asyncio.gather(*collectors)
+
+    for messages in asyncio.run(scenario()):
+        text = [m.decode("utf-8") for m in messages]
+        assert not any('"old"' in t for t in text)  # 起動前のイベントは中継しない
+        assert "event: session.finalized" in text[0] and '"s1"' in text[0]
+        assert "event: session.summary_ready" in text[1]
+        assert '"s2"' in text[2]
+
+
+def test_stream_subscribes_before_replay_without_duplicates(monkeypatch) -> None:
+    """再送の読み出し中に記録されたイベントも届き、再送済みのイベントは重複しない。"""
+    from starlette.requests import Request
+
+    broker = SessionEventBroker()
+    monkeypatch.setattr(main_module, "session_events", broker)
+
+    async def scenario() -> list[str | None]:
+        loop = asyncio.get_running_loop()
+
+        def backlog(after_id, since_dt, limit):
+            assert after_id == 5
+            # 読み出し中に記録されたイベント（7 は再送分と重複、8 は新規）
+            loop.call_soon_threadsafe(broker.broadcast, broker.serialize({"id": "s7"}, event_id="7"))
+            loop.call_soon_threadsafe(broker.broadcast, broker.serialize({"id": "s8"}, event_id="8"))
+            return [broker.serialize({"id": f"s{i}"}, event_id=str(i)) for i in (6, 7)]
+
+        monkeypatch.setattr(main_module, "_session_event_backlog", backlog)
+
+        async def receive() -> dict:
+            await asyncio.sleep(3600)
+            return {"type": "http.disconnect"}
+
+        request = Request(
+            {"type": "http", "method": "GET", "path": "/admin/sessions/stream", "headers": [(b"last-event-id", b"5")]},
+            receive,
+        )
+        response = await main_module.admin_session_stream(request, since=None, limit=200)
+        assert broker.stats()["subscribers"] == 1
+        ids: list[str | None] = []
+        body = response.body_iterator
+        async for message in body:
+            ids.append(main_module.message_event_id(message))
+            if len(ids) == 3:
+                break
+        await body.aclose()
+        return ids
+
+    assert asyncio.run(scenario()) == ["6", "7", "8"]
+    assert broker.stats()["subscribers"] == 0
@@ -0,0 +1,83 @@
+"""セッション一括取り込み（SQLite / CouchDB）のテスト。"""
+from __future__ import annotations
+
+from pathlib import Path
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app.db import sqlite_adapter  # type: ignore[import]
+from app.db.sqlite_adapter import get_session, import_sessions_data, init_db  # type: ignore[import]
+
+
+def _session(sid: str) -> dict:
+    return {
+        "id": sid,
+        "patient_name": "取込　花子",
+        "dob": "昭和55年4月1日",
+        "gender": "female",
+        "visit_type": "initial",
+        "questionnaire_id": "default",
+        "answers": {"chief_complaint": "頭痛", "onset": ["本日"], "llm_1": "昨日からです"},
+        "llm_question_texts": {"llm_1": "いつからですか？"},
+        "completion_status": "finalized",
+        "finalized_at": "2026-06-01T09:00:00+00:00",
+    }
+
+
+def test_import_sessions_sqlite_keeps_llm_question_texts(tmp_path: Path) -> None:
+    db_path = str(tmp_path / "import.sqlite3")
+    init_db(db_path)
+    assert import_sessions_data([_session("imp-1"), _session("imp-2")], db_path=db_path) == {"sessions": 2}
+    # 同じ ID の再取り込みは上書きになる
+    updated = _session("imp-1") | {"answers": {"chief_complaint": "腹痛"}}
+    import_sessions_data([updated], db_path=db_path)
+
+    first = get_session("imp-1", db_path=db_path)
+    second = get_session("imp-2", db_path=db_path)
+    assert first is not None and second is not None
+    assert first["answers"] == {"chief_complaint": "腹痛"}
+    assert second["answers"]["onset"] == ["本日"]
+    assert second["llm_question_texts"] == {"llm_1": "いつからですか？"}
+
+
+def test_import_sessions_couchdb_uses_bulk_docs(monkeypatch) -> None:
+    """CouchDB へは既存リビジョンをまとめて取得し、_bulk_docs で分割保存する。"""
+
+    class FakeCouch:
+        def __init__(self) -> None:
+            self.docs = {"imp-0": {"_rev": "1-a"}, "imp-3": {"_rev": "2-b", "deleted": True}}
+            self.view_calls = 0
+            self.updates: list[list[dict]] = []
+
+        def view(self, name: str, keys: list[str]):
+            assert name == "_all_docs"
+            self.view_calls += 1
+            rows = []
+            for key in keys:
+                doc = self.docs.get(key)
+                if doc is None:
+                    rows.append({"key": key, "error": "not_found"})
+                else:
+                    value = {"rev": doc["_rev"], "deleted": True} if doc.get("deleted") else {"rev": doc["_rev"]}
+                    rows.append({"id": key, "key": key, "value": value})
+            return rows
+
+        def update(self, docs: list[dict]):
+            self.updates.append([dict(d) for d in docs])
+            return [(True, d["_id"], "1-new") for d in docs]
+
+    fake = FakeCouch()
+    monkeypatch.setattr(sqlite_adapter, "get_couch_db", lambda: fake)
+    monkeypatch.setattr(sqlite_adapter, "COUCH_BULK_BATCH_SIZE", 2)
+
+    sessions = [_session(f"imp-{i}") for i in range(5)]
+    assert import_sessions_data(sessions) == {"sessions": 5}
+
+    assert fake.view_calls == 3
+    assert [len(batch) for batch in fake.updates] == [2, 2, 1]
+    saved = {doc["_id"]: doc for batch in fake.updates for doc in batch}
+    assert saved["imp-0"]["_rev"] == "1-a"
+    assert "_rev" not in saved["imp-1"]
+    assert "_rev" not in saved["imp-3"]  # 削除済み文書は新規として作り直す
+    assert saved["imp-2"]["llm_question_texts"] == {"llm_1": "いつからですか？"}
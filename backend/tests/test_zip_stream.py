@@ -0,0 +1,39 @@
+"""ストリーミング ZIP ライターのテスト。"""
+from __future__ import annotations
+
+from io import BytesIO
+from pathlib import Path
+import sys
+import zipfile
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app.zip_stream import iter_zip_stream  # type: ignore[import]
+
+
+def test_iter_zip_stream_writes_members_incrementally() -> None:
+    """メンバーごとにチャンクが送出され、データ記述子付きの正しい ZIP になる。"""
+    produced: list[str] = []
+
+    def members():
+        for name in ("a.md", "b.pdf"):
+            produced.append(name)
+            yield name, name.encode("utf-8") * 1000
+
+    stream = iter_zip_stream(members())
+    first = next(stream)
+    assert produced == ["a.md"]
+    assert first.startswith(b"PK\x03\x04")
+    data = first + b"".join(stream)
+
+    with zipfile.ZipFile(BytesIO(data)) as zf:
+        infos = zf.infolist()
+        assert [i.filename for i in infos] == ["a.md", "b.pdf"]
+        assert all(i.flag_bits & 0x08 for i in infos)
+        assert zf.read("b.pdf") == b"b.pdf" * 1000
+
+
+def test_iter_zip_stream_accepts_chunk_iterables() -> None:
+    data = b"".join(iter_zip_stream([("x.csv", iter([b"a,b\n", b"1,2\n"]))]))
+    with zipfile.ZipFile(BytesIO(data)) as zf:
+        assert zf.read("x.csv") == b"a,b\n1,2\n"
@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+問診フロー全体の負荷試験・ベンチマーク。
+
+一時ディレクトリの SQLite を使い、ASGI アプリ（app.main.app）を httpx.ASGITransport 経由で
+直接呼び出す。LLM は Ollama 互換のスタブサーバー（127.0.0.1 の空きポート）に接続する。
+データセットの件数（既定 1k / 10k / 100k）ごとに確定済みセッションを投入してから、
+
+  - 患者フロー: セッション作成 → 回答送信 → 追加質問取得 → 追加質問回答 → 確定
+  - 管理画面  : 一覧（全件・氏名検索）、PDF 単票ダウンロード、PDF 一括 ZIP
+
+を計測し、ステップごとの p50/p95/p99 とスループットを表示して JSON に保存する
+（コミット間の比較用に、コミットハッシュと実行条件も記録する）。
+
+注意:
+  - ASGITransport はバックグラウンドタスクの完了まで応答を返さないため、確定（finalize）の
+    計測値には PDF 事前描画などの後処理も含まれる。既定では事前描画を無効化して計測する。
+  - データセットは小さい件数から順に追加投入するため、同じ DB を使い回して計測する。
+    投入データと患者フローの回答は `generate_sessions.py` の合成データを使う。
+
+使い方:
+  python backend/tools/bench_api_flow.py --sizes 1000 --flows 50
+  python backend/tools/bench_api_flow.py --sizes 1000,10000,100000 --out bench-results.json
+  python backend/tools/bench_api_flow.py --llm-latency-ms 300 --concurrency 16 --prerender
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import httpx  # noqa: E402
+
+from generate_sessions import DOB_STYLES, SessionGenerator, format_dob  # noqa: E402
+
+
+FOLLOWUP_QUESTIONS = ["痛みはどのくらい続いていますか？", "市販薬は服用しましたか？", "発熱はありますか？"]
+SEED_BATCH_SIZE = 5000
+STEPS = (
+    "create",
+    "answers",
+    "llm_questions",
+    "llm_answers",
+    "finalize",
+    "list_all",
+    "list_by_name",
+    "pdf_single",
+    "pdf_bulk_zip",
+)
+
+
+# --- スタブ LLM サーバー ----------------------------------------------------
+
+
+class _StubLLMHandler(BaseHTTPRequestHandler):
+    """Ollama の /api/tags と /api/chat だけを返す最小限のサーバー。"""
+
+    latency_seconds = 0.0
+
+    def _send_json(self, body: dict[str, Any]) -> None:
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self) -> None:  # noqa: N802
+        if self.path.startswith("/api/tags"):
+            self._send_json({"models": [{"name": "bench-model"}]})
+            return
+        self.send_error(404)
+
+    def do_POST(self) -> None:  # noqa: N802
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        if self.latency_seconds > 0:
+            time.sleep(self.latency_seconds)
+        if not self.path.startswith("/api/chat"):
+            self.send_error(404)
+            return
+        if "format" in payload:
+            # 追加質問生成は JSON 配列の文字列を返す
+            limit = int((payload.get("format") or {}).get("maxItems") or len(FOLLOWUP_QUESTIONS))
+            content = json.dumps(FOLLOWUP_QUESTIONS[: max(0, limit)], ensure_ascii=False)
+        else:
+            content = "主訴は数日前からの症状。既往歴に特記事項なし。"
+        self._send_json({"message": {"role": "assistant", "content": content}, "done": True})
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        return
+
+
+def _start_stub_llm(latency_ms: float) -> ThreadingHTTPServer:
+    handler = type("BenchLLMHandler", (_StubLLMHandler,), {"latency_seconds": max(0.0, latency_ms) / 1000})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="bench-llm-stub", daemon=True).start()
+    return server
+
+
+# --- 合成データ --------------------------------------------------------------
+
+
+def _seed_sessions(
+    generator: SessionGenerator,
+    import_sessions_data: Callable[..., Any],
+    start: int,
+    stop: int,
+) -> list[tuple[str, str]]:
+    """確定済みセッションを `start` 番から `stop` 番の手前まで一括投入し、(ID, 氏名) を返す。"""
+
+    seeded: list[tuple[str, str]] = []
+    batch: list[dict[str, Any]] = []
+    for session in generator.iter_sessions(max(0, stop - start), start):
+        batch.append(session)
+        seeded.append((session["id"], session["patient_name"]))
+        if len(batch) >= SEED_BATCH_SIZE:
+            import_sessions_data(batch, mode="merge")
+            batch = []
+    if batch:
+        import_sessions_data(batch, mode="merge")
+    return seeded
+
+
+# --- 計測 -------------------------------------------------------------------
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+class _Recorder:
+    def __init__(self) -> None:
+        self.durations: dict[str, list[float]] = {step: [] for step in STEPS}
+        self.errors: dict[str, int] = {step: 0 for step in STEPS}
+
+    async def timed(self, step: str, call: Awaitable[httpx.Response]) -> httpx.Response | None:
+        started = time.perf_counter()
+        try:
+            res = await call
+        except Exception as exc:  # noqa: BLE001 - 失敗は件数として記録し計測を続ける
+            logging.getLogger("bench").warning("request_failed step=%s error=%s", step, exc)
+            self.errors[step] += 1
+            return None
+        elapsed = (time.perf_counter() - started) * 1000
+        if res.status_code != 200:
+            self.errors[step] += 1
+            return None
+        self.durations[step].append(elapsed)
+        return res
+
+    def summary(self) -> dict[str, dict[str, Any]]:
+        result: dict[str, dict[str, Any]] = {}
+        for step in STEPS:
+            values = sorted(self.durations[step])
+            if not values and not self.errors[step]:
+                continue
+            result[step] = {
+                "count": len(values),
+                "errors": self.errors[step],
+                "mean_ms": round(sum(values) / len(values), 3) if values else 0.0,
+                "p50_ms": round(_percentile(values, 50), 3),
+                "p95_ms": round(_percentile(values, 95), 3),
+                "p99_ms": round(_percentile(values, 99), 3),
+                "max_ms": round(values[-1], 3) if values else 0.0,
+            }
+        return result
+
+
+async def _patient_flow(
+    client: httpx.AsyncClient,
+    recorder: _Recorder,
+    rng: random.Random,
+    generator: SessionGenerator,
+) -> None:
+    patient = generator.patient(rng.randrange(10**9))
+    name = f"{patient['family']}　{patient['given']}"
+    res = await recorder.timed(
+        "create",
+        client.post(
+            "/sessions",
+            json={
+                "patient_name": name,
+                "dob": format_dob(patient["birth"], rng.choice(DOB_STYLES)),
+                "gender": patient["gender"],
+                "visit_type": "initial",
+                "answers": {},
+            },
+        ),
+    )
+    if res is None:
+        return
+    sid = res.json()["id"]
+    answers = generator.answers(generator.initial_items, patient, rng, name=name)
+    if await recorder.timed("answers", client.post(f"/sessions/{sid}/answers", json={"answers": answers})) is None:
+        return
+    res = await recorder.timed("llm_questions", client.post(f"/sessions/{sid}/llm-questions"))
+    for question in (res.json().get("questions") if res is not None else None) or []:
+        await recorder.timed(
+            "llm_answers",
+            client.post(f"/sessions/{sid}/llm-answers", json={"item_id": question["id"], "answer": "特にありません"}),
+        )
+    await recorder.timed("finalize", client.post(f"/sessions/{sid}/finalize"))
+
+
+async def _admin_reads(
+    client: httpx.AsyncClient,
+    recorder: _Recorder,
+    seeded: list[tuple[str, str]],
+    rng: random.Random,
+    bulk_size: int,
+) -> None:
+    sid, name = rng.choice(seeded)
+    await recorder.timed("list_all", client.get("/admin/sessions"))
+    await recorder.timed("list_by_name", client.get("/admin/sessions", params={"patient_name": name.split()[0]}))
+    await recorder.timed("pdf_single", client.get(f"/admin/sessions/{sid}/download/pdf"))
+    ids = [s for s, _ in rng.sample(seeded, k=min(bulk_size, len(seeded)))]
+    await recorder.timed("pdf_bulk_zip", client.get("/admin/sessions/bulk/download/pdf", params={"ids": ids}))
+
+
+async def _run_concurrently(count: int, concurrency: int, job: Callable[[int], Awaitable[None]]) -> float:
+    """`job(0..count-1)` を最大 `concurrency` 並列で実行し、経過秒数を返す。"""
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def _guarded(i: int) -> None:
+        async with semaphore:
+            await job(i)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(_guarded(i) for i in range(count)))
+    return time.perf_counter() - started
+
+
+async def _bench_dataset(
+    app: Any,
+    generator: SessionGenerator,
+    seeded: list[tuple[str, str]],
+    args: argparse.Namespace,
+    rng: random.Random,
+) -> dict[str, Any]:
+    recorder = _Recorder()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        # 初回のフォント読込・テンプレート取得などを計測から除く
+        warmup = _Recorder()
+        await _patient_flow(client, warmup, random.Random(0), generator)
+        await _admin_reads(client, warmup, seeded, random.Random(0), 1)
+
+        flow_seconds = await _run_concurrently(
+            args.flows, args.concurrency, lambda i: _patient_flow(client, recorder, rng, generator)
+        )
+        read_seconds = await _run_concurrently(
+            args.reads, args.concurrency, lambda i: _admin_reads(client, recorder, seeded, rng, args.bulk_size)
+        )
+    return {
+        "patient_flow": {
+            "flows": args.flows,
+            "seconds": round(flow_seconds, 3),
+            "flows_per_s": round(args.flows / flow_seconds, 2) if flow_seconds else 0.0,
+        },
+        "admin_reads": {
+            "iterations": args.reads,
+            "seconds": round(read_seconds, 3),
+            "iterations_per_s": round(args.reads / read_seconds, 2) if read_seconds else 0.0,
+        },
+        "steps": recorder.summary(),
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=Path(__file__).resolve().parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except Exception:  # noqa: BLE001 - git が無い環境でも計測は続ける
+        return None
+    return out.stdout.strip() or None
+
+
+def _print_result(entry: dict[str, Any]) -> None:
+    flow = entry["patient_flow"]
+    reads = entry["admin_reads"]
+    print(f"[sessions={entry['sessions']}] seed {entry['seed_seconds']:.1f} s")
+    print(f"  patient flow : {flow['flows']} flows in {flow['seconds']:.2f} s ({flow['flows_per_s']:.1f} flows/s)")
+    print(f"  admin reads  : {reads['iterations']} iterations in {reads['seconds']:.2f} s ({reads['iterations_per_s']:.1f} it/s)")
+    for step, s in entry["steps"].items():
+        print(
+            f"  {step:<14}: n={s['count']:<5} err={s['errors']:<3} p50 {s['p50_ms']:8.2f} ms / "
+            f"p95 {s['p95_ms']:8.2f} ms / p99 {s['p99_ms']:8.2f} ms / max {s['max_ms']:8.2f} ms"
+        )
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="問診フロー全体のベンチマーク")
+    ap.add_argument("--sizes", default="1000,10000,100000", help="投入するセッション件数（カンマ区切り、昇順に累積投入）")
+    ap.add_argument("--flows", type=int, default=200, help="件数ごとに実行する患者フロー数")
+    ap.add_argument("--reads", type=int, default=20, help="件数ごとに実行する管理画面操作の回数")
+    ap.add_argument("--bulk-size", type=int, default=20, help="一括 ZIP に含めるセッション数")
+    ap.add_argument("--concurrency", type=int, default=8, help="同時実行数")
+    ap.add_argument("--llm-latency-ms", type=float, default=0.0, help="スタブ LLM の応答遅延")
+    ap.add_argument("--prerender", action="store_true", help="確定時の PDF 事前描画を有効にする")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--out", default="bench-results.json", help="結果を書き出す JSON ファイル")
+    ap.add_argument("--workdir", help="DB を置くディレクトリ（既定は一時ディレクトリ）")
+    args = ap.parse_args()
+
+    sizes = sorted({int(s) for s in args.sizes.split(",") if s.strip()})
+    workdir = Path(args.workdir) if args.workdir else Path(tempfile.mkdtemp(prefix="monshin-bench-"))
+    workdir.mkdir(parents=True, exist_ok=True)
+    # app.* の読み込み前に設定しないと既定の DB に書き込んでしまう
+    os.environ["MONSHINMATE_DB"] = str(workdir / "app.sqlite3")
+    os.environ["MONSHINMATE_RENDER_CACHE_DB"] = str(workdir / "render_cache.sqlite3")
+    os.environ["MONSHINMATE_LLM_CACHE_DB"] = str(workdir / "llm_cache.sqlite3")
+    os.environ["MONSHINMATE_PDF_PRERENDER"] = "1" if args.prerender else "0"
+    os.environ["MONSHINMATE_LOG_DIR"] = str(workdir / "logs")
+    os.environ["MONSHINMATE_ACCESS_LOG_CONSOLE"] = "0"
+
+    from app import main as app_main  # noqa: E402
+    from app.db import import_sessions_data  # noqa: E402
+    from app.llm_gateway import LLMSettings  # noqa: E402
+
+    logging.basicConfig(level=logging.WARNING)
+    app_main.on_startup()
+    for name in (None, "app", "app.main", "security", "llm", "db.instrumentation"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    stub = _start_stub_llm(args.llm_latency_ms)
+    app_main.llm_gateway.update_settings(
+        LLMSettings(
+            provider="ollama",
+            model="bench-model",
+            temperature=0.2,
+            enabled=True,
+            base_url=f"http://127.0.0.1:{stub.server_address[1]}",
+        )
+    )
+
+    rng = random.Random(args.seed)
+    generator = SessionGenerator(args.seed)
+    seeded: list[tuple[str, str]] = []
+    results: list[dict[str, Any]] = []
+    try:
+        for size in sizes:
+            started = time.perf_counter()
+            seeded.extend(_seed_sessions(generator, import_sessions_data, len(seeded), size))
+            seed_seconds = time.perf_counter() - started
+            entry = {"sessions": size, "seed_seconds": round(seed_seconds, 3)}
+            entry.update(asyncio.run(_bench_dataset(app_main.app, generator, seeded, args, rng)))
+            _print_result(entry)
+            results.append(entry)
+    finally:
+        stub.shutdown()
+
+    report = {
+        "benchmark": "api_flow",
+        "commit": _git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": {k: v for k, v in vars(args).items() if k != "workdir"} | {"sizes": sizes},
+        "results": results,
+    }
+    Path(args.out).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"results written to {args.out} (db: {workdir})")
+
+
+if __name__ == "__main__":
+    main()
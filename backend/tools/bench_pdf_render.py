@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PDF 描画のベンチマーク。
+
+合成したセッションを指定件数描画し、1件あたりの描画時間と割り当てメモリを表示する。
+`shared` は共有の描画コンテキスト（PDFRenderContext）を再利用する現行方式、
+`fresh` は描画ごとにコンテキストを作り直す従来相当の方式。
+
+使い方:
+  python backend/tools/bench_pdf_render.py                  # 500 件を両方式で計測
+  python backend/tools/bench_pdf_render.py --count 100 --layout legacy
+  python backend/tools/bench_pdf_render.py --mode shared --alloc-samples 0
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app.pdf_renderer import (  # noqa: E402
+    PDFLayoutMode,
+    PDFRenderContext,
+    get_render_context,
+    render_session_pdf,
+)
+
+
+TEMPLATE_ITEMS: list[dict[str, Any]] = [
+    {"id": "personal_info", "label": "患者基本情報", "type": "personal_info"},
+    {"id": "chief_complaint", "label": "本日のご相談内容を教えてください", "type": "string"},
+    {
+        "id": "symptom_location",
+        "label": "症状が気になる部位を教えてください",
+        "type": "multi",
+        "options": ["頭・顔", "胸", "腹", "背中", "手足", "全身"],
+        "followups": {
+            "胸": [{"id": "chest_pain", "label": "胸の痛みの程度", "type": "slider"}],
+            "腹": [
+                {"id": "abd_onset", "label": "腹痛が始まった日", "type": "date"},
+                {"id": "abd_meal", "label": "食後に悪化しますか", "type": "yesno"},
+            ],
+        },
+    },
+    {"id": "onset", "label": "症状が気になり始めた時期", "type": "date"},
+    {
+        "id": "past_history",
+        "label": "これまでに指摘された病気を選んでください",
+        "type": "multi",
+        "options": ["高血圧", "糖尿病", "脂質異常症", "喘息", "心疾患"],
+    },
+    {"id": "smoking", "label": "喫煙していますか", "type": "yesno"},
+    {"id": "pain_scale", "label": "痛みの強さ", "type": "slider"},
+]
+
+
+def _sample_session(index: int, rng: random.Random) -> dict[str, Any]:
+    locations = rng.sample(["頭・顔", "胸", "腹", "背中", "手足", "全身"], k=rng.randint(1, 3))
+    answers: dict[str, Any] = {
+        "personal_info": {
+            "name": f"患者 {index}",
+            "kana": f"かんじゃ {index}",
+            "postal_code": "100-0001",
+            "address": "東京都千代田区1-1",
+            "phone": "03-0000-0000",
+        },
+        "chief_complaint": "数日前から症状が続いている。" * rng.randint(1, 4),
+        "symptom_location": locations,
+        "onset": f"2026-0{rng.randint(1, 9)}-1{rng.randint(0, 9)}",
+        "past_history": rng.sample(["高血圧", "糖尿病", "喘息", "その他の病気"], k=rng.randint(0, 2)),
+        "smoking": rng.choice(["yes", "no"]),
+        "pain_scale": rng.randint(0, 10),
+    }
+    if "胸" in locations:
+        answers["chest_pain"] = rng.randint(1, 10)
+    if "腹" in locations:
+        answers["abd_onset"] = "2026-05-01"
+        answers["abd_meal"] = rng.choice(["yes", "no"])
+    llm_texts = {f"llm_{i}": f"追加質問 {i} の内容を教えてください" for i in range(rng.randint(0, 3))}
+    for key in llm_texts:
+        answers[key] = "特にありません"
+    session = {
+        "id": f"bench-{index}",
+        "patient_name": f"患者 {index}",
+        "dob": "1980-04-01",
+        "gender": rng.choice(["male", "female"]),
+        "finalized_at": "2026-06-01T09:00:00+00:00",
+        "answers": answers,
+        "llm_question_texts": llm_texts,
+        "summary": "主訴は症状の持続。" * rng.randint(0, 5) or None,
+    }
+    return session
+
+
+def _render(session: dict[str, Any], layout: PDFLayoutMode, context: PDFRenderContext) -> bytes:
+    rows = [(str(k), str(v)) for k, v in session["answers"].items()]
+    return render_session_pdf(
+        session=session,
+        rows=rows,
+        template_items=TEMPLATE_ITEMS,
+        answers=session["answers"],
+        vt_label="初診",
+        llm_question_texts=session["llm_question_texts"],
+        summary=session["summary"],
+        layout_mode=layout,
+        facility_name="ベンチマーク<医院>",
+        context=context,
+    )
+
+
+def _run(
+    label: str,
+    sessions: list[dict[str, Any]],
+    layout: PDFLayoutMode,
+    context_factory: Callable[[], PDFRenderContext],
+    alloc_samples: int,
+) -> None:
+    # 初回のフォント読込などを計測から除く
+    _render(sessions[0], layout, context_factory())
+
+    durations: list[float] = []
+    started = time.perf_counter()
+    for session in sessions:
+        t0 = time.perf_counter()
+        _render(session, layout, context_factory())
+        durations.append((time.perf_counter() - t0) * 1000)
+    total = time.perf_counter() - started
+
+    peaks: list[int] = []
+    retained: list[int] = []
+    if alloc_samples > 0:
+        tracemalloc.start()
+        for session in sessions[:alloc_samples]:
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            _render(session, layout, context_factory())
+            current, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+            retained.append(current - before)
+        tracemalloc.stop()
+
+    durations.sort()
+    p95 = durations[min(len(durations) - 1, int(len(durations) * 0.95))]
+    print(f"[{label}] layout={layout.value} count={len(sessions)}")
+    print(f"  total      : {total:.2f} s ({len(sessions) / total:.1f} PDF/s)")
+    print(f"  per PDF    : mean {statistics.mean(durations):.2f} ms / p50 {durations[len(durations) // 2]:.2f} ms / p95 {p95:.2f} ms")
+    if peaks:
+        print(f"  peak alloc : mean {statistics.mean(peaks) / 1024:.1f} KiB (samples={len(peaks)})")
+        print(f"  retained   : mean {statistics.mean(retained) / 1024:.1f} KiB per PDF")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="PDF 描画ベンチマーク")
+    ap.add_argument("--count", type=int, default=500, help="描画するセッション数")
+    ap.add_argument("--layout", choices=[m.value for m in PDFLayoutMode], default=PDFLayoutMode.STRUCTURED.value)
+    ap.add_argument("--mode", choices=["both", "shared", "fresh"], default="both")
+    ap.add_argument("--alloc-samples", type=int, default=50, help="メモリ計測に使う件数（0 で無効）")
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    sessions = [_sample_session(i, rng) for i in range(max(1, args.count))]
+    layout = PDFLayoutMode(args.layout)
+    if args.mode in {"both", "fresh"}:
+        _run("fresh context (before)", sessions, layout, PDFRenderContext.build, args.alloc_samples)
+    if args.mode in {"both", "shared"}:
+        _run("shared context (after)", sessions, layout, get_render_context, args.alloc_samples)
+
+
+if __name__ == "__main__":
+    main()
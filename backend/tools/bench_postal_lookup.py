@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+郵便番号検索のベンチマーク。
+
+合成した辞書（既定 12 万行、KEN_ALL 相当）または指定の CSV を一時 DB に取り込み、
+1秒あたりの検索件数を表示する。`index` は読み込み済みの索引（PostalCodeIndex）、
+`sqlite` は検索ごとに辞書 DB を確認・接続していた従来相当の方式。
+`search` は入力補完向けの前方一致・住所/カナ部分一致検索で、p50/p95/p99 を表示する。
+
+使い方:
+  python backend/tools/bench_postal_lookup.py
+  python backend/tools/bench_postal_lookup.py --csv path/to/utf_ken_all.csv --lookups 200000
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app.postal_code_lookup import (  # noqa: E402
+    ensure_postal_dictionary,
+    import_postal_csv,
+    lookup_postal_code,
+    normalize_postal_code,
+    reload_postal_index,
+    search_postal_codes,
+)
+
+PREFECTURES = [
+    ("北海道", "ホッカイドウ"),
+    ("青森県", "アオモリケン"),
+    ("東京都", "トウキョウト"),
+    ("神奈川県", "カナガワケン"),
+    ("愛知県", "アイチケン"),
+    ("大阪府", "オオサカフ"),
+    ("福岡県", "フクオカケン"),
+    ("沖縄県", "オキナワケン"),
+]
+CITY_PARTS = [("中", "ナカ"), ("北", "キタ"), ("南", "ミナミ"), ("西", "ニシ"), ("東", "ヒガシ"), ("新", "シン")]
+CITY_SUFFIXES = [("川市", "カワシ"), ("山町", "ヤママチ"), ("田区", "タク"), ("野村", "ノムラ")]
+TOWN_WORDS = [
+    ("本町", "ホンマチ"),
+    ("桜", "サクラ"),
+    ("緑ケ丘", "ミドリガオカ"),
+    ("若葉", "ワカバ"),
+    ("旭", "アサヒ"),
+    ("港", "ミナト"),
+    ("栄", "サカエ"),
+    ("松原", "マツバラ"),
+    ("大手", "オオテ"),
+    ("宮前", "ミヤマエ"),
+]
+
+
+def _synthetic_csv(rows: int, rng: random.Random) -> tuple[bytes, list[str]]:
+    lines: list[str] = []
+    codes: list[str] = []
+    for i in range(rows):
+        code = f"{rng.randint(100, 9999999):07d}"
+        codes.append(code)
+        pref, pref_kana = PREFECTURES[i % len(PREFECTURES)]
+        part, part_kana = CITY_PARTS[(i // 8) % len(CITY_PARTS)]
+        suffix, suffix_kana = CITY_SUFFIXES[(i // 48) % len(CITY_SUFFIXES)]
+        word, word_kana = rng.choice(TOWN_WORDS)
+        city, city_kana = f"{part}{suffix}", f"{part_kana}{suffix_kana}"
+        town, town_kana = f"{word}{i % 97}", f"{word_kana}{i % 97}"
+        lines.append(
+            f'"00000","000  ","{code}","{pref_kana}","{city_kana}","{town_kana}","{pref}","{city}","{town}",0,0,0,0,0,0'
+        )
+    return "\n".join(lines).encode("utf-8"), codes
+
+
+def _legacy_lookup(db_path: Path) -> Callable[[str], object]:
+    """検索のたびに辞書の存在確認と接続を行う従来相当の検索。"""
+
+    def _lookup(code: str) -> object:
+        normalized = normalize_postal_code(code)
+        ensure_postal_dictionary(db_path)
+        conn = sqlite3.connect(db_path)
+        try:
+            return conn.execute(
+                """
+                SELECT DISTINCT postal_code, prefecture, city, town, address
+                FROM postal_codes WHERE postal_code = ?
+                ORDER BY prefecture, city, town LIMIT 20
+                """,
+                (normalized,),
+            ).fetchall()
+        finally:
+            conn.close()
+
+    return _lookup
+
+
+def _measure(label: str, fn: Callable[[str], object], queries: list[str]) -> None:
+    fn(queries[0])
+    started = time.perf_counter()
+    for code in queries:
+        fn(code)
+    elapsed = time.perf_counter() - started
+    per_lookup_us = elapsed / len(queries) * 1_000_000
+    print(f"[{label}] {len(queries)} lookups in {elapsed:.2f} s -> {len(queries) / elapsed:,.0f} lookups/s ({per_lookup_us:.1f} µs/lookup)")
+
+
+def _search_queries(count: int, known: list[str], rng: random.Random) -> list[str]:
+    """受付での入力途中を想定した検索語（郵便番号の先頭 3〜6 桁、住所・カナの一部、該当なし）。"""
+
+    words = [w for w, _ in TOWN_WORDS] + [p for p, _ in PREFECTURES] + [c for c, _ in CITY_PARTS]
+    kana = [k for _, k in TOWN_WORDS] + [k for _, k in PREFECTURES]
+    queries: list[str] = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.4:
+            code = rng.choice(known)
+            queries.append(code[: rng.randint(3, 6)])
+        elif roll < 0.7:
+            word = rng.choice(words)
+            queries.append(word[: rng.randint(1, len(word))] + (str(rng.randint(0, 96)) if rng.random() < 0.3 else ""))
+        elif roll < 0.9:
+            word = rng.choice(kana)
+            queries.append(word[: rng.randint(2, len(word))])
+        else:
+            queries.append(rng.choice(["存在しない町", "ぬぬぬ", "本町桜", "999"]))
+    return queries
+
+
+def _measure_search(queries: list[str], db_path: Path) -> None:
+    search_postal_codes(queries[0], db_path=db_path)
+    durations: list[float] = []
+    for query in queries:
+        t0 = time.perf_counter()
+        search_postal_codes(query, db_path=db_path)
+        durations.append((time.perf_counter() - t0) * 1000)
+    durations.sort()
+
+    def pct(p: float) -> float:
+        return durations[min(len(durations) - 1, int(len(durations) * p))]
+
+    print(f"[search] {len(queries)} queries: p50 {pct(0.5):.3f} ms / p95 {pct(0.95):.3f} ms / p99 {pct(0.99):.3f} ms / max {durations[-1]:.3f} ms")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="郵便番号検索ベンチマーク")
+    ap.add_argument("--csv", type=Path, help="取り込む KEN_ALL 形式の CSV（省略時は合成データ）")
+    ap.add_argument("--rows", type=int, default=120_000, help="合成データの行数")
+    ap.add_argument("--lookups", type=int, default=100_000, help="索引方式の検索回数")
+    ap.add_argument("--legacy-lookups", type=int, default=2_000, help="従来方式の検索回数（0 で省略）")
+    ap.add_argument("--searches", type=int, default=20_000, help="入力補完検索の回数（0 で省略）")
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "postal_codes.sqlite3"
+        if args.csv:
+            with args.csv.open("rb") as fh:
+                import_postal_csv(fh, args.csv.name, db_path=db_path)
+        else:
+            data, _ = _synthetic_csv(args.rows, rng)
+            import_postal_csv(io.BytesIO(data), "synthetic.csv", db_path=db_path)
+
+        started = time.perf_counter()
+        index = reload_postal_index(db_path)
+        print(f"index: {len(index)} rows, built in {(time.perf_counter() - started) * 1000:.0f} ms")
+        started = time.perf_counter()
+        index.build_search_index()
+        print(f"search bigrams: {len(index.bigrams or {})} keys, built in {(time.perf_counter() - started) * 1000:.0f} ms")
+        known = [f"{code:07d}" for code in rng.sample(list(index.codes), min(len(index), 5000))]
+        queries = [rng.choice(known) if rng.random() < 0.9 else f"{rng.randint(0, 9999999):07d}" for _ in range(args.lookups)]
+
+        _measure("index", lambda code: lookup_postal_code(code, db_path=db_path), queries)
+        if args.legacy_lookups > 0:
+            _measure("sqlite (before)", _legacy_lookup(db_path), queries[: args.legacy_lookups])
+        if args.searches > 0:
+            _measure_search(_search_queries(args.searches, known, rng), db_path)
+
+
+if __name__ == "__main__":
+    main()
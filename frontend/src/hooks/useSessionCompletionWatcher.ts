@@ -292,6 +292,22 @@ export function useSessionCompletionWatcher() {
       }
     };
 
+    const handleSummaryReady = (message: MessageEvent<string>) => {
+      if (disposed) return;
+      if (!message.data) return;
+      try {
+        const parsed = JSON.parse(message.data) as { id?: string };
+        if (!parsed?.id) return;
+        // 一覧・詳細画面がポーリングせずに最新の要約を再取得できるよう通知する
+        window.dispatchEvent(new CustomEvent('adminSessionSummaryReady', { detail: { id: parsed.id } }));
+        if (location.pathname === '/admin/sessions') {
+          window.dispatchEvent(new CustomEvent('adminSessionsRefreshRequested'));
+        }
+      } catch (error) {
+        console.warn('failed to parse summary ready payload', error);
+      }
+    };
+
     const connectStream = () => {
       if (disposed) return;
       if (eventSource) {
@@ -309,6 +325,7 @@ export function useSessionCompletionWatcher() {
       const handler = (evt: MessageEvent<string>) => handleStreamMessage(evt);
       source.onmessage = handler;
       source.addEventListener('session.finalized', handler as EventListener);
+      source.addEventListener('session.summary_ready', handleSummaryReady as EventListener);
       source.onerror = (error) => {
         if (disposed) return;
         console.warn('session notification stream error', error);
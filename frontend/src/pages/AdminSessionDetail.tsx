@@ -78,6 +78,26 @@ export default function AdminSessionDetail() {
     fetchData();
   }, [id, navigate]);
 
+  useEffect(() => {
+    // バックグラウンドの要約生成が完了したら、このセッションの詳細だけ再取得する
+    const handler = async (event: Event) => {
+      const readyId = (event as CustomEvent<{ id?: string }>).detail?.id;
+      if (!id || readyId !== id) return;
+      try {
+        const res = await fetch(`/admin/sessions/${id}`);
+        if (!res.ok) return;
+        const data: SessionDetail = await res.json();
+        setDetail(data);
+      } catch (error) {
+        console.error(error);
+      }
+    };
+    window.addEventListener('adminSessionSummaryReady', handler);
+    return () => {
+      window.removeEventListener('adminSessionSummaryReady', handler);
+    };
+  }, [id]);
+
   if (!detail) return null; // ローディング表示を追加しても良い
 
   const isPersonalInfoEntry = (